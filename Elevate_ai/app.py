@@ -2,10 +2,16 @@ from flask import Flask, render_template, request, redirect, session
 import os
 import re
 from blueprints.career import career_bp
+from blueprints.career.routes import schedule_interview_pool_warm
 from blueprints.study import study_bp
-import sqlite3
+from blueprints.study.routes import schedule_quiz_backfill
+from blueprints.jobs import jobs_bp
 from utils.error_handlers import register_error_handlers
+from services.cassette import get_default_cassette, register_request_recorder
+from services.job_queue import get_default_job_queue
 from utils.config import get_config, validate_config
+from utils.db_utils import connect, get_db_connection
+from utils.migrations import migrate
 from utils.logger import get_logger, log_info, log_error
 
 # Initialize logger
@@ -32,9 +38,16 @@ if not is_valid:
 # Register blueprints
 app.register_blueprint(career_bp, url_prefix='/career')
 app.register_blueprint(study_bp, url_prefix='/study')
+app.register_blueprint(jobs_bp, url_prefix='/jobs')
 
 log_info("Blueprints registered successfully")
 
+# Record incoming requests alongside Groq completions when GROQ_CASSETTE_MODE=record
+register_request_recorder(app, get_default_cassette(config))
+
+# Run background jobs in this process too when JOB_WORKERS > 0 (job_worker.py runs them by default)
+get_default_job_queue(config).start()
+
 # User authentication routes
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -46,7 +59,7 @@ def login():
             return render_template('login.html', error='Please provide both email and password')
         
         # Simple authentication for demo purposes
-        conn = sqlite3.connect('database/database.db')
+        conn = connect()
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
         user = cursor.fetchone()
@@ -78,7 +91,7 @@ def register():
             return render_template('register.html', error='Passwords do not match')
         
         # Check if user already exists
-        conn = sqlite3.connect('database/database.db')
+        conn = connect()
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
         existing_user = cursor.fetchone()
@@ -113,108 +126,29 @@ os.makedirs('database', exist_ok=True)
 def index():
     return render_template('index.html')
 
-# Initialize database
+# Initialize database: create or upgrade the versioned schema
 def init_db():
-    conn = sqlite3.connect('database/database.db')
-    cursor = conn.cursor()
-    
-    # Create users table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        email TEXT UNIQUE,
-        password TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    
-    # Create tables for career module
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS resumes (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        resume_text TEXT,
-        job_description TEXT,
-        analysis_result TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS interviews (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        job_title TEXT,
-        questions TEXT,
-        answers TEXT,
-        feedback TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    
-    # Create tables for study module
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS syllabi (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        subject TEXT,
-        content TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS quizzes (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        syllabus_id INTEGER,
-        questions TEXT,
-        answers TEXT,
-        score REAL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id),
-        FOREIGN KEY (syllabus_id) REFERENCES syllabi (id)
-    )
-    ''')
-    
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS study_plans (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        syllabus_id INTEGER,
-        plan_content TEXT,
-        start_date DATE,
-        end_date DATE,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id),
-        FOREIGN KEY (syllabus_id) REFERENCES syllabi (id)
-    )
-    ''')
-    
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS progress (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        syllabus_id INTEGER,
-        topic TEXT,
-        status TEXT,
-        notes TEXT,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users (id),
-        FOREIGN KEY (syllabus_id) REFERENCES syllabi (id)
-    )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        migrate(conn)
 
 # Initialize database on startup
 init_db()
 log_info("Database initialized successfully")
 
+# Normalize quizzes stored before quiz_questions existed, in small batches in the background
+try:
+    if schedule_quiz_backfill():
+        log_info("Quiz backfill queued")
+except Exception as e:
+    log_error(f"Quiz backfill scheduling failed: {e}")
+
+# Refill the most requested interview pools once across workers (opt-in)
+try:
+    if schedule_interview_pool_warm():
+        log_info("Interview pool warm-up queued")
+except Exception as e:
+    log_error(f"Interview pool warm-up scheduling failed: {e}")
+
 # Register error handlers
 register_error_handlers(app)
 log_info("Error handlers registered successfully")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Concurrent-request capacity per gunicorn worker
+
+Starts the mock Groq server (mock_groq_server.py) with a fixed latency, then serves a
+minimal LLM-bound route from ONE gunicorn worker in each deployment mode and
+fires a burst of concurrent requests at it:
+
+    sync       default sync worker, GroqClient      (before)
+    gthread    gthread worker, GroqClient           (after, see DEPLOYMENT.md)
+    async      gthread worker, AsyncGroqClient view (for comparison)
+
+Capacity is the average number of LLM calls the worker had in flight, i.e.
+completed requests x upstream latency / wall time.
+
+Usage:
+    python benchmarks/bench_concurrency.py [--requests 50] [--latency 0.5] [--threads 200]
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..'))
+
+# Add parent directory to path to import services
+sys.path.insert(0, APP_DIR)
+
+
+def create_app():
+    """The app gunicorn serves: one sync and one async LLM-bound route."""
+    from flask import Flask, request
+
+    from services.async_groq_client import AsyncGroqClient
+    from services.groq_client import GroqClient
+
+    app = Flask(__name__)
+    groq_client = GroqClient()
+    async_groq_client = AsyncGroqClient()
+
+    @app.route('/sync', methods=['POST'])
+    def sync_route():
+        return {"result": groq_client.generate_response(request.form['prompt'])}
+
+    @app.route('/async', methods=['POST'])
+    async def async_route():
+        return {"result": await async_groq_client.generate_response(request.form['prompt'])}
+
+    return app
+
+
+if os.getenv('BENCH_SERVE_APP'):
+    app = create_app()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"gunicorn did not start on port {port}")
+
+
+def run_mode(name, worker_args, path, args, upstream_url):
+    import requests
+
+    port = free_port()
+    env = dict(os.environ, BENCH_SERVE_APP="1", GROQ_API_KEY="bench", GROQ_API_BASE_URL=upstream_url,
+               GROQ_RATE_LIMIT_ENABLED="False", GROQ_SINGLE_FLIGHT_ENABLED="False",
+               GROQ_CACHE_ENABLED="False", GROQ_HTTP_POOL_MAXSIZE=str(args.threads))
+    server = subprocess.Popen(
+        ["gunicorn", "-w", "1", *worker_args, "--timeout", "300", "--bind", f"127.0.0.1:{port}",
+         "--chdir", BENCH_DIR, "--log-level", "warning", "bench_concurrency:app"],
+        env=env, cwd=APP_DIR,
+    )
+    try:
+        wait_for_port(port)
+        url = f"http://127.0.0.1:{port}{path}"
+
+        def call(i):
+            response = requests.post(url, data={"prompt": f"{name} request {i}"}, timeout=600)
+            return response.status_code == 200
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=args.requests) as executor:
+            ok = sum(executor.map(call, range(args.requests)))
+        elapsed = time.monotonic() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+    capacity = ok * args.latency / elapsed
+    print(f"{name:<10}{ok:>6}/{args.requests:<6}{elapsed:>10.2f}s{capacity:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=50, help="concurrent requests per mode")
+    parser.add_argument("--latency", type=float, default=0.5, help="upstream latency in seconds")
+    parser.add_argument("--threads", type=int, default=200, help="gthread threads per worker")
+    args = parser.parse_args()
+
+    from mock_groq_server import MockGroqServer
+
+    upstream = MockGroqServer(latency=args.latency).start()
+    upstream_url = upstream.url
+
+    print(f"{'mode':<10}{'ok':>13}{'wall':>11}{'in flight':>12}")
+    run_mode("sync", ["-k", "sync"], "/sync", args, upstream_url)
+    run_mode("gthread", ["-k", "gthread", "--threads", str(args.threads)], "/sync", args, upstream_url)
+    run_mode("async", ["-k", "gthread", "--threads", str(args.threads)], "/async", args, upstream_url)
+    upstream.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Database-bound request throughput with and without the connection pool
+
+Serves the login and /study/quiz/get paths through the Flask test client
+from several reader threads while writer threads keep saving interview
+answers, then reports requests per second for each path. Each mode runs in
+its own process against a fresh database:
+
+    direct   DB_POOL_ENABLED=False: a plain sqlite3.connect per use    (before)
+    pooled   pooled WAL connections from utils.db_utils              (after)
+
+Usage:
+    python benchmarks/bench_db.py [--seconds 5] [--readers 8] [--writers 2]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..'))
+
+# Add parent directory to path to import app
+sys.path.insert(0, APP_DIR)
+
+MODES = {"direct": "False", "pooled": "True"}
+
+
+def seed(path):
+    """Create the schema with one user, syllabus, quiz and interview."""
+    from services.quiz_history import backfill_batch
+    from utils.migrations import migrate
+
+    with sqlite3.connect(path) as conn:
+        migrate(conn)
+        conn.execute("INSERT INTO users (email, password) VALUES ('bench@example.com', 'secret')")
+        conn.execute("INSERT INTO syllabi (user_id, subject, content, parsed_topics) "
+                     "VALUES ('bench', 'Biology', 'Cells', '[\"Cells\"]')")
+        questions = json.dumps({"questions": [{"id": i, "question": f"Question {i}", "options": ["A", "B"],
+                                               "correct_answer": "A", "topic": "Cells"} for i in range(10)]})
+        conn.execute("INSERT INTO quizzes (user_id, syllabus_id, topics, questions) VALUES ('bench', 1, 'Cells', ?)",
+                     (questions,))
+        conn.execute("INSERT INTO interviews (user_id, job_role, questions, answers) VALUES ('bench', 'Engineer', ?, '{}')",
+                     (json.dumps({"questions": [{"id": i, "question": f"Q{i}", "type": "technical"}
+                                                for i in range(1, 1001)]}),))
+        backfill_batch(conn)
+
+
+def run_mode(args):
+    """Measure one mode in this process; the database must already be seeded."""
+    from app import app
+
+    stop = threading.Event()
+    counts = {"login": 0, "quiz": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def count(name):
+        with lock:
+            counts[name] += 1
+
+    def reader(path):
+        client = app.test_client()
+        while not stop.is_set():
+            if path == "login":
+                response = client.post('/login', data={"email": "bench@example.com", "password": "secret"})
+                ok = response.status_code == 302
+            else:
+                ok = client.get('/study/quiz/get?quiz_id=1').status_code == 200
+            count(path if ok else "errors")
+
+    def writer(worker):
+        client = app.test_client()
+        i = 0
+        while not stop.is_set():
+            response = client.post('/career/interview/answer', json={
+                "interview_id": 1, "question_id": (worker * 100 + i) % 1000 + 1, "answer": f"Answer {i}"})
+            count("writes" if response.status_code == 200 else "errors")
+            i += 1
+
+    threads = [threading.Thread(target=reader, args=("login" if n % 2 else "quiz",)) for n in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {name: value / args.seconds for name, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seconds", type=float, default=5.0, help="measuring time per mode")
+    parser.add_argument("--readers", type=int, default=8, help="threads alternating login and quiz reads")
+    parser.add_argument("--writers", type=int, default=2, help="threads saving interview answers")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args)))
+        return
+
+    print(f"{'mode':<10}{'login/s':>10}{'quiz/s':>10}{'writes/s':>10}{'errors/s':>10}")
+    for mode, pooled in MODES.items():
+        with tempfile.TemporaryDirectory() as workdir:
+            os.makedirs(os.path.join(workdir, "database"))
+            seed(os.path.join(workdir, "database", "database.db"))
+            env = dict(os.environ, DB_POOL_ENABLED=pooled, GROQ_API_KEY="bench", LOG_LEVEL="WARNING",
+                       JOB_WORKERS="0", JOB_QUEUE_PATH=os.path.join(workdir, "jobs.db"),
+                       GROQ_SINGLE_FLIGHT_PATH="", GROQ_RATE_LIMIT_PATH="", INTERVIEW_POOL_WARM_TOP="0",
+                       INTERVIEW_EVAL_ENABLED="False")
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode, "--seconds", str(args.seconds),
+                 "--readers", str(args.readers), "--writers", str(args.writers)],
+                env=env, cwd=workdir, capture_output=True, text=True, check=True,
+            ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<10}{result['login']:>10.0f}{result['quiz']:>10.0f}"
+              f"{result['writes']:>10.0f}{result['errors']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark for JSON extraction
+
+Compares the greedy regular expression the routes used to run
+(``re.search(r"\\{.*\\}", ..., re.DOTALL)`` followed by ``json.loads``)
+against the shared scanner in services/json_extract.py on multi-KB
+responses shaped like real quiz, plan and feedback completions.
+
+Usage:
+    python benchmarks/bench_json_extract.py [--iterations N]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+# Add parent directory to path to import services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.json_extract import extract_json, get_extraction_stats
+
+
+def legacy_extract(raw_response):
+    """The extraction previously duplicated in both blueprints."""
+    match = re.search(r"```json\s*(\{.*?\})\s*```", raw_response, re.DOTALL)
+    if match:
+        candidate = match.group(1)
+    else:
+        match = re.search(r"\{.*\}", raw_response, re.DOTALL)
+        if not match:
+            return None
+        candidate = match.group(0)
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        return None
+
+
+def build_quiz(num_questions):
+    questions = [{
+        "id": i,
+        "question": f"Question {i}: which of these {{braces}} closes the block?",
+        "options": [f"A. option {i}", "B. }", "C. ]", "D. none"],
+        "correct_answer": "A",
+        "explanation": "Because the scanner ignores brackets inside strings. " * 3,
+        "topic": f"Topic {i % 7}",
+    } for i in range(num_questions)]
+    return json.dumps({"title": "Generated quiz", "questions": questions}, indent=2)
+
+
+def build_cases():
+    quiz = build_quiz(40)
+    return {
+        "clean": quiz,
+        "fenced + prose": f"Sure! Here is your quiz:\n```json\n{quiz}\n```\nLet me know if you need {{more}}.",
+        "trailing commas": quiz.replace("\n  ]", ",\n  ]"),
+        "truncated": quiz[:int(len(quiz) * 0.8)],
+    }
+
+
+def bench(func, text, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = func(text)
+    elapsed = time.perf_counter() - start
+    return elapsed / iterations * 1e6, result is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'case':<18}{'size':>8}{'legacy us':>12}{'ok':>5}{'scanner us':>13}{'ok':>5}")
+    for name, text in build_cases().items():
+        legacy_us, legacy_ok = bench(legacy_extract, text, args.iterations)
+        scanner_us, scanner_ok = bench(extract_json, text, args.iterations)
+        print(f"{name:<18}{len(text):>8}{legacy_us:>12.1f}{str(legacy_ok):>5}"
+              f"{scanner_us:>13.1f}{str(scanner_ok):>5}")
+
+    print(json.dumps(get_extraction_stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Replay recorded traffic through the app and report latency and CPU per endpoint
+
+Record a cassette in production (or staging) with GROQ_CASSETTE_MODE=record,
+then replay it here. Requests are sent in recorded order through the Flask
+test client while the Groq clients answer from the cassette, so the numbers
+cover the whole request path (routing, prompt building, JSON extraction,
+database) without the network. Replay against a snapshot of the database
+taken when recording started so that inserted IDs line up.
+
+Usage:
+    python benchmarks/bench_replay.py database/groq_cassette.jsonl.gz \\
+        [--database snapshot.db] [--latency-scale 0] [--output run.json] [--baseline previous.json]
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..'))
+
+# Add parent directory to path to import app
+sys.path.insert(0, APP_DIR)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(int(round(pct / 100 * len(ordered))) - 1, 0)]
+
+
+def prepare_database(workdir, snapshot):
+    """Put a database at workdir/database/database.db, copied from snapshot or freshly created."""
+    os.makedirs(os.path.join(workdir, "database"))
+    target = os.path.join(workdir, "database", "database.db")
+    if snapshot:
+        shutil.copyfile(snapshot, target)
+        return
+    from utils.migrations import migrate
+
+    with sqlite3.connect(target) as conn:
+        migrate(conn)
+
+
+def replay(requests, client):
+    """
+    Send each recorded request and measure it.
+
+    Returns:
+        dict: endpoint -> {"wall_ms": [...], "cpu_ms": [...], "errors": n}
+    """
+    results = defaultdict(lambda: {"wall_ms": [], "cpu_ms": [], "errors": 0})
+    for entry in requests:
+        data = dict(entry["form"])
+        for name, (filename, encoded) in entry["files"].items():
+            data[name] = (io.BytesIO(base64.b64decode(encoded)), filename)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        response = client.open(entry["path"], method=entry["method"],
+                               query_string=entry["query"], data=data)
+        response.get_data()  # drain streamed bodies
+        cpu_ms = (time.process_time() - cpu_start) * 1000
+        wall_ms = (time.perf_counter() - wall_start) * 1000
+
+        endpoint = results[f"{entry['method']} {entry['path']}"]
+        endpoint["wall_ms"].append(wall_ms)
+        endpoint["cpu_ms"].append(cpu_ms)
+        endpoint["errors"] += response.status_code >= 400
+    return results
+
+
+def summarize(results):
+    return {
+        endpoint: {
+            "count": len(r["wall_ms"]),
+            "errors": r["errors"],
+            "p50_ms": round(percentile(r["wall_ms"], 50), 2),
+            "p99_ms": round(percentile(r["wall_ms"], 99), 2),
+            "cpu_ms": round(sum(r["cpu_ms"]) / len(r["cpu_ms"]), 2),
+        }
+        for endpoint, r in sorted(results.items())
+    }
+
+
+def change(current, previous):
+    if not previous:
+        return ""
+    return f"{(current - previous) * 100 / previous:+.0f}%"
+
+
+def print_report(summary, baseline):
+    print(f"{'endpoint':<40}{'n':>6}{'err':>5}{'p50 ms':>10}{'p99 ms':>10}{'cpu ms':>10}"
+          + (f"{'Δp50':>8}{'Δp99':>8}{'Δcpu':>8}" if baseline else ""))
+    for endpoint, row in summary.items():
+        line = (f"{endpoint:<40}{row['count']:>6}{row['errors']:>5}"
+                f"{row['p50_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['cpu_ms']:>10.1f}")
+        if baseline and endpoint in baseline:
+            before = baseline[endpoint]
+            line += "".join(f"{change(row[key], before[key]):>8}" for key in ("p50_ms", "p99_ms", "cpu_ms"))
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("cassette", help="cassette recorded with GROQ_CASSETTE_MODE=record")
+    parser.add_argument("--database", help="database snapshot from when recording started")
+    parser.add_argument("--latency-scale", type=float, default=0.0,
+                        help="multiply recorded Groq latency (0 = answer instantly)")
+    parser.add_argument("--limit", type=int, help="replay only the first N requests")
+    parser.add_argument("--output", help="write the per-endpoint summary as JSON")
+    parser.add_argument("--baseline", help="summary JSON from a previous run to compare against")
+    args = parser.parse_args()
+
+    cassette_path = os.path.abspath(args.cassette)
+    snapshot = os.path.abspath(args.database) if args.database else None
+    os.environ.update(GROQ_CASSETTE_MODE="replay", GROQ_CASSETTE_PATH=cassette_path,
+                      GROQ_CASSETTE_LATENCY_SCALE=str(args.latency_scale),
+                      GROQ_SINGLE_FLIGHT_PATH="", GROQ_RATE_LIMIT_PATH="")
+    os.environ.setdefault("GROQ_API_KEY", "replay")
+
+    from services.cassette import read_entries
+
+    requests = [entry for entry in read_entries(cassette_path) if entry["type"] == "request"]
+    if args.limit:
+        requests = requests[:args.limit]
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        prepare_database(workdir, snapshot)
+        # The routes open database/database.db relative to the working directory
+        os.chdir(workdir)
+        from app import app
+        from services.cassette import get_default_cassette
+        from utils.config import get_config
+
+        start = time.perf_counter()
+        results = replay(requests, app.test_client())
+        elapsed = time.perf_counter() - start
+        cassette_stats = get_default_cassette(get_config()).get_stats()
+        os.chdir(cwd)
+
+    summary = summarize(results)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(summary, baseline)
+    print(f"\n{len(requests)} requests in {elapsed:.2f}s - cassette hits {cassette_stats['hits']}, "
+          f"date-insensitive hits {cassette_stats['loose_hits']}, misses {cassette_stats['misses']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,22 @@
 from flask import render_template, request, jsonify, session, abort
 from . import career_bp
 import json
-import re
 import os  # <-- IMPORT THIS MODULE
+import time
 from services.groq_client import GroqClient
+from services.json_extract import extract_json_from_response, has_json_object
 from utils.db_utils import get_db_connection, query_db, insert_db, update_db
 from utils.validators import sanitize_text, validate_email
 from utils.logger import log_info, log_error, log_api_request
 from utils.file_handlers import save_uploaded_file, extract_text_from_file
 from utils.config import get_config
+from utils.error_handlers import AIResponseError
+from utils.sse import sse_response
+from services.job_queue import get_default_job_queue
+from services.interview_pool import get_default_interview_pool, normalize_role, normalize_level
+from services.answer_evaluation import (evaluation_key, evaluation_prompt, parse_evaluation, save_evaluation,
+                                        load_evaluations, summary_prompt, aggregate_feedback)
+from blueprints.jobs.routes import wants_background, accepted_response
 
 # Get configuration
 config = get_config()
@@ -16,38 +24,28 @@ config = get_config()
 # Initialize Groq client
 groq_client = GroqClient()
 
-# Helper function to robustly extract JSON from AI response
-def extract_json_from_response(raw_response, logger_func):
-    """
-    Finds the first '{' and the last '}' in the raw string
-    to extract the JSON object, ignoring markdown fences.
-    """
-    match = re.search(r"\{.*\}", raw_response, re.DOTALL)
-    if not match:
-        logger_func(f"No JSON object found in Groq response: {raw_response[:200]}")
-        return None
-        
-    json_string = match.group(0)
-    return json_string
+job_queue = get_default_job_queue(config)
+interview_pool = get_default_interview_pool(config)
 
 # Resume Analysis and Job Fit Routes
 @career_bp.route('/resume', methods=['GET'])
 def resume_page():
     return render_template('resume.html')
 
-@career_bp.route('/resume/analyze', methods=['POST'])
-def analyze_resume():
-    log_api_request(request, 'resume_analyze', 200)
-    
-    data = request.form
+def _prepare_resume_analysis(data, files, user_id):
+    """
+    Collect the resume text (from upload or text area) and build the analysis prompt.
+
+    Returns:
+        tuple: (resume_request, error_response)
+    """
     job_description = sanitize_text(data.get('job_description', ''))
-    user_id = session.get('user_id', 'anonymous')
     
     resume_text = ""
     saved_filename = "N/A" # Initialize filename
     
     # 1. Prioritize file upload
-    resume_file = request.files.get('resume_file')
+    resume_file = files.get('resume_file')
     if resume_file and resume_file.filename:
         success, result = save_uploaded_file(resume_file, 'resume')
 
@@ -60,18 +58,18 @@ def analyze_resume():
                 extracted_text = extract_text_from_file(file_path)
                 if "Error" in extracted_text:
                     log_error(f"Text extraction failed for {file_path}: {extracted_text}")
-                    return jsonify({"error": extracted_text}), 400
+                    return None, (jsonify({"error": extracted_text}), 400)
                 
                 if extracted_text:
                     resume_text = sanitize_text(extracted_text)
 
             except Exception as e:
                 log_error(f"Critical error processing uploaded resume file: {str(e)}")
-                return jsonify({"error": f"Error processing file: {str(e)}"}), 500
+                return None, (jsonify({"error": f"Error processing file: {str(e)}"}), 500)
         else:
             error_message = result
             log_error(f"File upload failed: {error_message}")
-            return jsonify({"error": error_message}), 400
+            return None, (jsonify({"error": error_message}), 400)
     
     # 2. If no text came from file, fall back to the text area
     if not resume_text:
@@ -81,7 +79,7 @@ def analyze_resume():
     # 3. NOW, perform validation on the final values
     if not resume_text or not job_description:
         log_error("Missing required fields: No resume text (from file or text area) or no job description.")
-        return jsonify({"error": "A resume (either as text or a file) and a job description are required"}), 400
+        return None, (jsonify({"error": "A resume (either as text or a file) and a job description are required"}), 400)
     
     # Call Groq API for resume analysis
     prompt = f"""You are a Resume Analyzer Agent. Analyze the following resume for quality, structure, and content.
@@ -103,54 +101,233 @@ def analyze_resume():
     {{"quality_score": 0-10, "content_score": 0-10, "job_fit_score": 0-10, "match_percentage": 0-100, "strengths": [list], "gaps": [list], "suggestions": [list]}}
     """
     
+    return {
+        "prompt": prompt,
+        "user_id": user_id,
+        "filename": saved_filename,
+        "resume_text": resume_text,
+        "job_description": job_description
+    }, None
+
+def _save_resume_analysis(resume_request, analysis_result_raw):
+    """
+    Parse a generated resume analysis and store it.
+
+    Returns:
+        dict: The analysis JSON returned to the frontend
+    """
+    extraction = extract_json_from_response(analysis_result_raw, log_error)
+    if not extraction:
+        raise AIResponseError("Failed to extract JSON from AI response", analysis_result_raw)
+
+    # --- START FINAL FIX: Map the parsed JSON to ALL schema columns ---
+    analysis_result_json_string = extraction.json_string
+    result_json = extraction.data
+
+    # Build the data dictionary to match the database schema exactly
+    resume_data = {
+        "user_id": resume_request['user_id'],
+        "filename": resume_request['filename'],
+        "content": resume_request['resume_text'],
+        "job_description": resume_request['job_description'],
+        "analysis": analysis_result_json_string,  # Store the full JSON blob in the 'analysis' column
+        "match_score": result_json.get('match_percentage'), # Map AI key to DB column
+        "strengths": json.dumps(result_json.get('strengths', [])), # Store lists as JSON strings
+        "gaps": json.dumps(result_json.get('gaps', [])),
+        "suggestions": json.dumps(result_json.get('suggestions', []))
+    }
+    
+    insert_db("resumes", resume_data)
+    
+    # Return the original JSON object to the frontend
+    return result_json
+    # --- END FINAL FIX ---
+
+def _run_resume_job(resume_request):
+    """Analyze and store a resume in a background job."""
+    analysis_result_raw = groq_client.generate_response(resume_request['prompt'], task="resume",
+                                                        validate=has_json_object)
+    return _save_resume_analysis(resume_request, analysis_result_raw)
+
+job_queue.register("resume", _run_resume_job)
+
+@career_bp.route('/resume/analyze', methods=['POST'])
+def analyze_resume():
+    log_api_request(request, 'resume_analyze', 200)
+    
+    user_id = session.get('user_id', 'anonymous')
+    resume_request, error_response = _prepare_resume_analysis(request.form, request.files, user_id)
+    if error_response:
+        return error_response
+    
+    if wants_background(request):
+        return accepted_response(job_queue.enqueue("resume", resume_request, user_id=user_id))
+    
     try:
         log_info(f"Analyzing resume for user {user_id}")
-        analysis_result_raw = groq_client.generate_response(prompt)
-        
-        analysis_result_json_string = extract_json_from_response(analysis_result_raw, log_error)
-        if not analysis_result_json_string:
-            return jsonify({"error": "Failed to extract JSON from AI response", "raw_response": analysis_result_raw}), 500
-
-        # --- START FINAL FIX: Parse the JSON and map to ALL schema columns ---
-        try:
-            # Parse the JSON string into a Python dict FIRST
-            result_json = json.loads(analysis_result_json_string)
-        except json.JSONDecodeError:
-            log_error(f"Failed to parse extracted JSON from AI: {analysis_result_json_string[:200]}")
-            return jsonify({
-                "error": "Invalid JSON response from AI after extraction",
-                "raw_response": analysis_result_raw
-            })
-
-        # Build the data dictionary to match the database schema exactly
-        resume_data = {
-            "user_id": user_id,
-            "filename": saved_filename,
-            "content": resume_text,
-            "job_description": job_description,
-            "analysis": analysis_result_json_string,  # Store the full JSON blob in the 'analysis' column
-            "match_score": result_json.get('match_percentage'), # Map AI key to DB column
-            "strengths": json.dumps(result_json.get('strengths', [])), # Store lists as JSON strings
-            "gaps": json.dumps(result_json.get('gaps', [])),
-            "suggestions": json.dumps(result_json.get('suggestions', []))
-        }
-        
-        # This insert will now work
-        resume_id = insert_db("resumes", resume_data)
-        
-        # Return the original JSON object to the frontend
-        return jsonify(result_json)
-        # --- END FINAL FIX ---
+        analysis_result_raw = groq_client.generate_response(resume_request['prompt'],
+                                                            task="resume", validate=has_json_object)
+        return jsonify(_save_resume_analysis(resume_request, analysis_result_raw))
     
+    except AIResponseError as e:
+        return jsonify(e.to_dict()), e.status_code
     except Exception as e:
         log_error(f"Resume analysis failed: {e}")
         return jsonify({"error": str(e)}), 500
 
+@career_bp.route('/resume/analyze/stream', methods=['POST'])
+def analyze_resume_stream():
+    log_api_request(request, 'resume_analyze_stream', 200)
+    
+    user_id = session.get('user_id', 'anonymous')
+    resume_request, error_response = _prepare_resume_analysis(request.form, request.files, user_id)
+    if error_response:
+        return error_response
+    
+    log_info(f"Streaming resume analysis for user {user_id}")
+    return sse_response(
+        groq_client.stream_response(resume_request['prompt'], task="resume", validate=has_json_object),
+        lambda analysis_result_raw: _save_resume_analysis(resume_request, analysis_result_raw)
+    )
+
 # Mock Interview Routes
 @career_bp.route('/interview', methods=['GET'])
 def interview_page():
     return render_template('interview.html')
 
+def _interview_prompt(job_title, experience_level, existing=(), set_number=None):
+    """Build the question prompt for a mock interview."""
+    prompt = f"""You are a Mock Interviewer Agent for a {job_title} position at {experience_level} level.
+    Generate 5 relevant technical and behavioral questions that would be asked in a real interview.
+    """
+    if set_number is not None:
+        existing_str = "\n".join(f"- {question}" for question in existing) or "none"
+        prompt += f"""
+    This is question set {set_number}; do not repeat or rephrase these existing questions:
+    {existing_str}
+    """
+    return prompt + """
+    Format your response as JSON with the following structure:
+    {"questions": [{"id": 1, "question": "question text", "type": "technical|behavioral"}]}
+    """
+
+def _refill_interview_pool(payload):
+    """Generate question sets until a (role, level) pool is back to full size."""
+    role_key = payload['role_key']
+    level = payload['level']
+
+    with get_db_connection() as conn:
+        missing = interview_pool.sets_per_pair - interview_pool.live_sets(conn, role_key, level)
+        existing = interview_pool.question_texts(conn, role_key, level)
+    if missing <= 0:
+        return {"added": 0}
+
+    prompts = [_interview_prompt(role_key, level, existing, set_number=number)
+               for number in range(1, missing + 1)]
+    batch = groq_client.generate_many(prompts, use_cache=False, task="interview")
+    if batch.items and not batch.succeeded:
+        raise batch.items[0].error
+
+    question_sets = []
+    for item in batch.items:
+        extraction = extract_json_from_response(item.response, log_error) if item.ok else None
+        if extraction and isinstance(extraction.data, dict) and extraction.data.get('questions'):
+            question_sets.append(extraction.json_string)
+
+    with get_db_connection() as conn:
+        ids = interview_pool.add_sets(conn, role_key, level, question_sets)
+        conn.commit()
+    log_info(f"Added {len(ids)} interview question sets for {role_key} ({level})")
+    return {"added": len(ids)}
+
+job_queue.register("interview_pool", _refill_interview_pool)
+
+def _schedule_interview_refill(role_key, level, live):
+    # The live count is part of the payload, so a finished refill only
+    # absorbs new requests while the pool is unchanged
+    job = job_queue.enqueue("interview_pool", {"role_key": role_key, "level": level, "live": live})
+    if not job["deduplicated"]:
+        interview_pool.count("refills")
+
+def warm_interview_pool(top):
+    """
+    Queue refills for the most requested (role, level) pairs that are not full.
+
+    Args:
+        top: Number of pairs to consider
+
+    Returns:
+        int: Number of pools queued for refill
+    """
+    with get_db_connection() as conn:
+        pairs = [(role_key, level, interview_pool.live_sets(conn, role_key, level))
+                 for role_key, level in interview_pool.popular(conn, top)]
+    low = [(role_key, level, live) for role_key, level, live in pairs if live < interview_pool.sets_per_pair]
+    for role_key, level, live in low:
+        _schedule_interview_refill(role_key, level, live)
+    log_info(f"Interview pool warm-up: {len(low)} of {len(pairs)} popular pairs queued for refill")
+    return len(low)
+
+def _run_interview_pool_warm(payload):
+    """Queue refills for the most requested interview pools in a background job."""
+    return {"queued": warm_interview_pool(payload['top'])}
+
+job_queue.register("interview_pool_warm", _run_interview_pool_warm)
+
+def schedule_interview_pool_warm():
+    """
+    Queue the interview pool warm-up if INTERVIEW_POOL_WARM_TOP asks for one.
+
+    The payload is fixed, so a queued, running or finished warm-up absorbs
+    the submissions of every worker that starts within JOB_RESULT_TTL.
+
+    Returns:
+        bool: Whether a new warm-up was queued
+    """
+    if not config.INTERVIEW_POOL_ENABLED or config.INTERVIEW_POOL_WARM_TOP <= 0:
+        return False
+    job = job_queue.enqueue("interview_pool_warm", {"top": config.INTERVIEW_POOL_WARM_TOP})
+    return not job["deduplicated"]
+
+def _interview_from_pool(user_id, job_title, role_key, level):
+    """
+    Start an interview from a pooled question set.
+
+    Returns:
+        dict: Response payload, or None when the pool has no set for the user
+    """
+    with get_db_connection() as conn:
+        interview_pool.record_request(conn, role_key, level)
+        picked = interview_pool.take(conn, user_id, role_key, level)
+        live = interview_pool.live_sets(conn, role_key, level)
+        conn.commit()
+
+    if picked is None:
+        return None
+    if live < interview_pool.min_sets:
+        _schedule_interview_refill(role_key, level, live)
+
+    set_id, questions = picked
+    interview_id = insert_db("interviews", {
+        "user_id": user_id,
+        "job_role": job_title,
+        "questions": questions,
+        "answers": '{}'
+    })
+    log_info(f"Created interview ID {interview_id} from pooled set {set_id} ({role_key}, {level})")
+    return {"interview_id": interview_id, "questions": json.loads(questions)["questions"]}
+
+def _pool_generated_set(user_id, role_key, level, questions):
+    """Add a freshly generated question set to its pool, as seen by this user."""
+    with get_db_connection() as conn:
+        set_id = interview_pool.add_sets(conn, role_key, level, [questions])[0]
+        interview_pool.mark_served(conn, user_id, set_id)
+        live = interview_pool.live_sets(conn, role_key, level)
+        conn.commit()
+    # Refilled only once this set is in, so the refill does not overshoot
+    if live < interview_pool.min_sets:
+        _schedule_interview_refill(role_key, level, live)
+
 @career_bp.route('/interview/start', methods=['POST'])
 def start_interview():
     log_api_request(request, 'interview_start', 200)
@@ -164,43 +341,153 @@ def start_interview():
         log_error("Missing job title for interview")
         return jsonify({"error": "Job title is required"}), 400
     
-    prompt = f"""You are a Mock Interviewer Agent for a {job_title} position at {experience_level} level.
-    Generate 5 relevant technical and behavioral questions that would be asked in a real interview.
-    
-    Format your response as JSON with the following structure:
-    {{"questions": [{{"id": 1, "question": "question text", "type": "technical|behavioral"}}]}}
-    """
+    role_key, title_level = normalize_role(job_title)
+    level = normalize_level(experience_level, title_level)
+    prompt = _interview_prompt(job_title, experience_level)
     
     try:
         log_info(f"Starting mock interview for {job_title} position at {experience_level} level for user {user_id}")
-        questions_result_raw = groq_client.generate_response(prompt)
+        if config.INTERVIEW_POOL_ENABLED and role_key:
+            pooled_interview = _interview_from_pool(user_id, job_title, role_key, level)
+            if pooled_interview:
+                return jsonify(pooled_interview)
+        
+        questions_result_raw = groq_client.generate_response(prompt, task="interview",
+                                                             validate=has_json_object)
         
-        questions_result = extract_json_from_response(questions_result_raw, log_error)
-        if not questions_result:
+        extraction = extract_json_from_response(questions_result_raw, log_error)
+        if not extraction:
             return jsonify({"error": "Failed to extract JSON from AI response", "raw_response": questions_result_raw}), 500
 
-        try:
-            questions_json = json.loads(questions_result)
-            
-            interview_data = {
-                "user_id": user_id,
-                "job_role": job_title,
-                "questions": questions_result,
-                "answers": '{}'
-            }
-            interview_id = insert_db("interviews", interview_data)
-            
-            log_info(f"Created interview ID {interview_id} with {len(questions_json.get('questions', []))} questions")
-            return jsonify({"interview_id": interview_id, "questions": questions_json["questions"]})
+        questions_json = extraction.data
+        
+        interview_data = {
+            "user_id": user_id,
+            "job_role": job_title,
+            "questions": extraction.json_string,
+            "answers": '{}'
+        }
+        interview_id = insert_db("interviews", interview_data)
+        
+        if config.INTERVIEW_POOL_ENABLED and role_key and questions_json.get('questions'):
+            try:
+                _pool_generated_set(user_id, role_key, level, extraction.json_string)
+            except Exception as e:
+                log_error(f"Pooling generated interview questions failed: {e}")
         
-        except json.JSONDecodeError as e:
-            log_error(f"Invalid JSON response from AI for interview questions (post-extraction): {str(e)}")
-            return jsonify({"error": "Invalid JSON response from AI", "raw_response": questions_result_raw}), 500
+        log_info(f"Created interview ID {interview_id} with {len(questions_json.get('questions', []))} questions")
+        return jsonify({"interview_id": interview_id, "questions": questions_json["questions"]})
     
     except Exception as e:
         log_error(f"Error generating interview questions: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def _evaluate_answer(payload):
+    """Score one interview answer and store the evaluation, in a background job."""
+    interview_id = payload['interview_id']
+    question_id = payload['question_id']
+
+    result = query_db("SELECT job_role, questions, answers FROM interviews WHERE id = ?",
+                      (interview_id,), one=True)
+    if not result:
+        return {"skipped": "interview not found"}
+    question = next((q for q in json.loads(result['questions'])['questions']
+                     if str(q['id']) == question_id), None)
+    answer = _load_answers(interview_id, result['answers']).get(question_id)
+    # A newer answer to the same question has its own job
+    if question is None or evaluation_key(interview_id, question_id, answer) != payload['key']:
+        return {"skipped": "answer changed"}
+
+    response = groq_client.generate_response(evaluation_prompt(result['job_role'], question, answer),
+                                             max_tokens=config.INTERVIEW_EVAL_MAX_TOKENS, task="evaluation",
+                                             validate=has_json_object)
+    extraction = extract_json_from_response(response, log_error)
+    if not extraction:
+        raise AIResponseError("Failed to extract JSON from AI response", response)
+    score, feedback = parse_evaluation(extraction.data)
+
+    with get_db_connection() as conn:
+        save_evaluation(conn, interview_id, question_id, answer, score, feedback)
+        conn.commit()
+    log_info(f"Evaluated answer {question_id} of interview {interview_id}: {score}/10")
+    return {"score": score}
+
+job_queue.register("answer_evaluation", _evaluate_answer)
+
+def _schedule_answer_evaluation(interview_id, question_id, answer):
+    key = evaluation_key(interview_id, question_id, answer)
+    try:
+        job_queue.enqueue("answer_evaluation", {"interview_id": interview_id, "question_id": question_id,
+                                                "key": key}, dedupe_key=key)
+    except Exception as e:
+        # Final feedback falls back to evaluating everything in one call
+        log_error(f"Could not queue evaluation of answer {question_id} in interview {interview_id}: {e}")
+
+def _wait_for_evaluations(interview_id, answers):
+    """
+    Stored evaluations of the current answers, waiting for pending ones.
+
+    Returns:
+        dict: Question ID to evaluation, for the answers evaluated in time
+    """
+    deadline = time.monotonic() + config.INTERVIEW_EVAL_WAIT_SECONDS
+    while True:
+        with get_db_connection() as conn:
+            evaluations = load_evaluations(conn, interview_id, answers)
+        pending = [job for job in (job_queue.find(evaluation_key(interview_id, question_id, answer))
+                                   for question_id, answer in answers.items() if question_id not in evaluations)
+                   if job is not None and job['status'] in ("queued", "running")]
+        if not pending or time.monotonic() >= deadline:
+            return evaluations
+        job_queue.wait(min(0.25, max(deadline - time.monotonic(), 0)))
+
+def _load_answers(interview_id, legacy_answers=None):
+    """
+    Current answers of an interview, read with one primary-key range scan.
+
+    Args:
+        interview_id: Interview ID
+        legacy_answers: The interview's old `answers` JSON column, for
+            interviews answered before answers had their own table
+
+    Returns:
+        dict: Question ID to answer text
+    """
+    try:
+        answers = json.loads(legacy_answers) if legacy_answers else {}
+    except json.JSONDecodeError:
+        answers = {}
+    for row in query_db("SELECT question_id, answer FROM interview_answers WHERE interview_id = ?",
+                        (interview_id,)):
+        answers[row['question_id']] = row['answer']
+    return answers
+
+def _save_answers(interview_id, answers):
+    """
+    Upsert answers of an interview in one transaction.
+
+    Args:
+        interview_id: Interview ID
+        answers: List of (question_id, answer) tuples
+
+    Returns:
+        bool: False if the interview does not exist
+    """
+    with get_db_connection() as conn:
+        if conn.execute("SELECT 1 FROM interviews WHERE id = ?", (interview_id,)).fetchone() is None:
+            return False
+        conn.executemany(
+            "INSERT INTO interview_answers (interview_id, question_id, answer) VALUES (?, ?, ?) "
+            "ON CONFLICT (interview_id, question_id) DO UPDATE SET answer = excluded.answer, "
+            "updated_at = CURRENT_TIMESTAMP",
+            [(interview_id, question_id, answer) for question_id, answer in answers]
+        )
+        conn.commit()
+    if config.INTERVIEW_EVAL_ENABLED:
+        for question_id, answer in answers:
+            _schedule_answer_evaluation(interview_id, question_id, answer)
+    return True
+
 @career_bp.route('/interview/answer', methods=['POST'])
 def submit_answer():
     log_api_request(request, 'interview_answer', 200)
@@ -215,28 +502,10 @@ def submit_answer():
         return jsonify({"error": "Interview ID, question ID, and answer are required"}), 400
     
     try:
-        result = query_db(
-            "SELECT answers FROM interviews WHERE id = ?", 
-            (interview_id,), 
-            one=True
-        )
-        
-        if not result:
+        if not _save_answers(int(interview_id), [(str(question_id), answer_text)]):
             log_error(f"Interview not found with ID {interview_id}")
             return jsonify({"error": "Interview not found"}), 404
         
-        try:
-            answers = json.loads(result['answers']) if result['answers'] and result['answers'] != '{}' else {}
-        except json.JSONDecodeError:
-            answers = {}
-        
-        answers[str(question_id)] = answer_text
-        
-        # Proactive Fix: Using update_db correctly based on the utils file provided
-        update_data = {"answers": json.dumps(answers)}
-        condition_str = f"id = {int(interview_id)}" # Simple sanitation, assumes ID is int
-        update_db("interviews", update_data, condition_str)
-        
         log_info(f"Saved answer for question {question_id} in interview {interview_id}")
         return jsonify({"success": True})
     
@@ -244,50 +513,98 @@ def submit_answer():
         log_error(f"Error saving interview answer: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-
-@career_bp.route('/interview/feedback', methods=['POST'])
-def get_feedback():
-    log_api_request(request, 'interview_feedback', 200)
+@career_bp.route('/interview/answers', methods=['POST'])
+def submit_answers():
+    """Save several answers of one interview in a single request."""
+    log_api_request(request, 'interview_answers', 200)
     
-    data = request.form
+    data = request.json or {}
     interview_id = data.get('interview_id')
+    submitted = data.get('answers')
     
-    if not interview_id:
-        log_error("Missing interview ID for feedback")
-        return jsonify({"error": "Interview ID is required"}), 400
+    if not interview_id or not isinstance(submitted, list) or not submitted:
+        log_error(f"Missing required fields for interview answers. Interview: {interview_id}")
+        return jsonify({"error": "Interview ID and a list of answers are required"}), 400
+    
+    answers = {}
+    for item in submitted:
+        question_id = item.get('question_id') if isinstance(item, dict) else None
+        answer_text = sanitize_text(item.get('answer', '')) if isinstance(item, dict) else ''
+        if not question_id or not answer_text:
+            log_error(f"Incomplete answer in batch for interview {interview_id}: {item}")
+            return jsonify({"error": "Each answer needs a question ID and an answer"}), 400
+        answers[str(question_id)] = answer_text  # the last answer to a question wins
     
     try:
-        result = query_db(
-            f"SELECT job_role, questions, answers FROM interviews WHERE id = ?", 
-            (interview_id,),
-            one=True
-        )
-        
-        if not result:
+        if not _save_answers(int(interview_id), list(answers.items())):
             log_error(f"Interview not found with ID {interview_id}")
             return jsonify({"error": "Interview not found"}), 404
         
-        job_role = result['job_role']
-        questions = json.loads(result['questions'])
-        answers = json.loads(result['answers'])
-        
-        qa_pairs = []
-        for q in questions['questions']:
-            q_id = str(q['id'])
-            if q_id in answers:
-                qa_pairs.append({
-                    "question": q['question'],
-                    "answer": answers[q_id],
-                    "type": q['type']
-                })
-        
-        if not qa_pairs:
-            log_error(f"No answers found for interview {interview_id}")
-            return jsonify({"error": "No answers found for this interview"}), 400
-        
-        log_info(f"Generating feedback for interview {interview_id} with {len(qa_pairs)} answered questions")
-        
-        prompt = f"""You are a Feedback Agent for a {job_role} interview.
+        log_info(f"Saved {len(answers)} answers in interview {interview_id}")
+        return jsonify({"success": True, "saved": len(answers)})
+    
+    except Exception as e:
+        log_error(f"Error saving interview answers: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def _prepare_feedback(interview_id):
+    """
+    Collect the answered questions of an interview and build the feedback prompt.
+
+    Returns:
+        tuple: (feedback_request, error_response)
+    """
+    if not interview_id:
+        log_error("Missing interview ID for feedback")
+        return None, (jsonify({"error": "Interview ID is required"}), 400)
+    
+    result = query_db(
+        f"SELECT job_role, questions, answers FROM interviews WHERE id = ?", 
+        (interview_id,),
+        one=True
+    )
+    
+    if not result:
+        log_error(f"Interview not found with ID {interview_id}")
+        return None, (jsonify({"error": "Interview not found"}), 404)
+    
+    job_role = result['job_role']
+    questions = json.loads(result['questions'])
+    answers = _load_answers(int(interview_id), result['answers'])
+    
+    qa_pairs = []
+    answered = {}
+    for q in questions['questions']:
+        q_id = str(q['id'])
+        if q_id in answers:
+            qa_pairs.append({
+                "question": q['question'],
+                "answer": answers[q_id],
+                "type": q['type']
+            })
+            answered[q_id] = q
+    
+    if not qa_pairs:
+        log_error(f"No answers found for interview {interview_id}")
+        return None, (jsonify({"error": "No answers found for this interview"}), 400)
+    
+    log_info(f"Generating feedback for interview {interview_id} with {len(qa_pairs)} answered questions")
+    
+    if config.INTERVIEW_EVAL_ENABLED:
+        evaluations = _wait_for_evaluations(int(interview_id), {q_id: answers[q_id] for q_id in answered})
+        if len(evaluations) == len(answered):
+            # Every answer is already scored: only the written summary is left to generate
+            evaluated = [{"question_id": q_id, "question": q['question'], "type": q['type']}
+                         for q_id, q in answered.items()]
+            log_info(f"Summarising {len(evaluated)} stored answer evaluations for interview {interview_id}")
+            return {"prompt": summary_prompt(job_role, evaluated, evaluations), "interview_id": interview_id,
+                    "evaluated": evaluated, "evaluations": evaluations,
+                    "task": "summary", "max_tokens": config.INTERVIEW_SUMMARY_MAX_TOKENS}, None
+        log_info(f"Interview {interview_id} has {len(evaluations)} of {len(answered)} answers evaluated; "
+                 f"generating feedback in one call")
+    
+    prompt = f"""You are a Feedback Agent for a {job_role} interview.
         Analyze the following question-answer pairs from a mock interview and provide detailed feedback.
         
         Interview for: {job_role}
@@ -304,26 +621,89 @@ def get_feedback():
         Format your response as JSON with the following structure:
         {{"overall_impression": "text", "overall_score": 0-100, "strengths": [list], "improvements": [list], "detailed_feedback": [{{"question_id": 1, "feedback": "text", "score": 0-10}}]}}
         """
+    
+    return {"prompt": prompt, "interview_id": interview_id}, None
+
+def _save_feedback(feedback_request, feedback_result_raw):
+    """
+    Parse generated interview feedback and store it.
+
+    Returns:
+        dict: Response payload with the interview ID and feedback
+    """
+    interview_id = feedback_request['interview_id']
+    
+    extraction = extract_json_from_response(feedback_result_raw, log_error)
+    if not extraction:
+        raise AIResponseError("Failed to extract JSON from AI response", feedback_result_raw)
+
+    feedback_result = extraction.json_string
+    feedback_json = extraction.data
+    if 'evaluations' in feedback_request:
+        feedback_json = aggregate_feedback(feedback_request['evaluated'], feedback_request['evaluations'],
+                                           feedback_json)
+        feedback_result = json.dumps(feedback_json)
+
+    # Proactive Fix: Using update_db correctly
+    feedback_data = {"feedback": feedback_result}
+    condition_str = f"id = {int(interview_id)}"
+    update_db("interviews", feedback_data, condition_str)
+    
+    log_info(f"Interview feedback completed with overall score {feedback_json.get('overall_score', 'N/A')}")
+    return {"interview_id": interview_id, "feedback": feedback_json}
+
+def _feedback_options(feedback_request):
+    """Routing task and token cap of a feedback request: small for a summary of stored evaluations."""
+    return {"task": feedback_request.get('task', "feedback"), "max_tokens": feedback_request.get('max_tokens', 2048)}
+
+def _run_feedback_job(feedback_request):
+    """Generate and store interview feedback in a background job."""
+    feedback_result_raw = groq_client.generate_response(feedback_request['prompt'], validate=has_json_object,
+                                                        **_feedback_options(feedback_request))
+    return _save_feedback(feedback_request, feedback_result_raw)
+
+job_queue.register("feedback", _run_feedback_job)
+
+@career_bp.route('/interview/feedback', methods=['POST'])
+def get_feedback():
+    log_api_request(request, 'interview_feedback', 200)
+    
+    try:
+        feedback_request, error_response = _prepare_feedback(request.form.get('interview_id'))
+        if error_response:
+            return error_response
         
-        feedback_result_raw = groq_client.generate_response(prompt)
-        
-        feedback_result = extract_json_from_response(feedback_result_raw, log_error)
-        if not feedback_result:
-            return jsonify({"error": "Failed to extract JSON from AI response", "raw_response": feedback_result_raw}), 500
-
-        # Proactive Fix: Using update_db correctly
-        feedback_data = {"feedback": feedback_result}
-        condition_str = f"id = {int(interview_id)}"
-        update_db("interviews", feedback_data, condition_str)
+        if wants_background(request):
+            return accepted_response(job_queue.enqueue("feedback", feedback_request,
+                                                       user_id=session.get('user_id', 'anonymous')))
         
-        try:
-            feedback_json = json.loads(feedback_result)
-            log_info(f"Interview feedback completed with overall score {feedback_json.get('overall_score', 'N/A')}")
-            return jsonify({"interview_id": interview_id, "feedback": feedback_json})
-        except json.JSONDecodeError as e:
-            log_error(f"Invalid JSON response from AI for interview feedback (post-extraction): {str(e)}")
-            return jsonify({"error": "Invalid JSON response from AI", "raw_response": feedback_result_raw}), 500
+        feedback_result_raw = groq_client.generate_response(feedback_request['prompt'],
+                                                            validate=has_json_object,
+                                                            **_feedback_options(feedback_request))
+        return jsonify(_save_feedback(feedback_request, feedback_result_raw))
     
+    except AIResponseError as e:
+        return jsonify(e.to_dict()), e.status_code
     except Exception as e:
         log_error(f"Error generating interview feedback: {str(e)}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+@career_bp.route('/interview/feedback/stream', methods=['POST'])
+def get_feedback_stream():
+    log_api_request(request, 'interview_feedback_stream', 200)
+    
+    try:
+        feedback_request, error_response = _prepare_feedback(request.form.get('interview_id'))
+        if error_response:
+            return error_response
+    except Exception as e:
+        log_error(f"Error preparing interview feedback: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+    
+    return sse_response(
+        groq_client.stream_response(feedback_request['prompt'], validate=has_json_object,
+                                    **_feedback_options(feedback_request)),
+        lambda feedback_result_raw: _save_feedback(feedback_request, feedback_result_raw),
+        array_key='detailed_feedback',
+        required_fields=['question_id', 'feedback', 'score']
+    )
@@ -0,0 +1,94 @@
+from flask import Response, jsonify, session, stream_with_context, url_for
+from . import jobs_bp
+import time
+from services.job_queue import TERMINAL_STATUSES, get_default_job_queue
+from utils.config import get_config
+from utils.sse import format_sse
+
+# Get configuration
+config = get_config()
+
+job_queue = get_default_job_queue(config)
+
+# Seconds between SSE keep-alive comments while a job is pending
+KEEPALIVE_INTERVAL = 15
+
+
+def wants_background(req):
+    """Check whether the client asked for a job ID instead of waiting (RFC 7240 Prefer header)."""
+    return "respond-async" in req.headers.get("Prefer", "")
+
+
+def accepted_response(job):
+    """
+    Build the 202 response for an enqueued job.
+
+    Returns:
+        tuple: (response, status, headers)
+    """
+    status_url = url_for('jobs.get_job', job_id=job['job_id'])
+    return jsonify({
+        "job_id": job['job_id'],
+        "status": job['status'],
+        "deduplicated": job['deduplicated'],
+        "status_url": status_url,
+        "events_url": url_for('jobs.job_events', job_id=job['job_id'])
+    }), 202, {"Location": status_url}
+
+
+def _own_job(job_id):
+    """
+    Get a job if it belongs to the session's user.
+
+    Other users' jobs and internal jobs are reported as missing, so job IDs
+    reveal nothing about them.
+
+    Returns:
+        dict or None: The job, or None
+    """
+    job = job_queue.get(job_id)
+    if job is None or job['user_id'] is None or job['user_id'] != str(session.get('user_id', 'anonymous')):
+        return None
+    return job
+
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = _own_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+@jobs_bp.route('/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    if _own_job(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    def generate():
+        last = None
+        last_sent = time.monotonic()
+        while True:
+            job = job_queue.get(job_id)
+            if job is None:
+                yield format_sse({"error": "Job expired"}, "error")
+                return
+            if job['status'] in TERMINAL_STATUSES:
+                yield format_sse(job, "done" if job['status'] == "succeeded" else "error")
+                return
+            state = (job['status'], job['attempts'])
+            if state != last:
+                last = state
+                last_sent = time.monotonic()
+                yield format_sse(job, "status")
+            elif time.monotonic() - last_sent > KEEPALIVE_INTERVAL:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            # Woken at once by workers in this process; polls for the others
+            job_queue.wait(job_queue.poll_interval)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
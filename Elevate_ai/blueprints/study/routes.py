@@ -1,34 +1,33 @@
 from flask import render_template, request, jsonify, session
 from . import study_bp
-import sqlite3
 import json
-import re  # <-- IMPORTED FOR ROBUST JSON PARSING
 from services.groq_client import GroqClient
+from services.json_extract import extract_json_from_response, has_json_object
 from datetime import datetime, timedelta
 from utils.logger import log_info, log_error, log_api_request
+from utils.error_handlers import AIResponseError
+from utils.sse import sse_response, sse_replay
+from utils.config import get_config
+from utils.db_utils import connect, bulk_upsert
+from services.job_queue import get_default_job_queue
+from services.question_bank import get_default_question_bank
+from services.quiz_history import (parse_questions, save_questions, load_questions, mark_answers, save_responses,
+                                   weak_topics as recent_weak_topics, quiz_history, pending_backfill, backfill)
+from services.prefetch import Prefetcher
+from services.topic_mastery import record_quiz, load_mastery, progress_series
+from blueprints.jobs.routes import wants_background, accepted_response
 
 # Initialize Groq client
 groq_client = GroqClient()
 
-# Helper function to get database connection
-def get_db_connection():
-    conn = sqlite3.connect('database/database.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+config = get_config()
+job_queue = get_default_job_queue(config)
+question_bank = get_default_question_bank(config)
+prefetcher = Prefetcher(job_queue, groq_client, min_headroom=config.PREFETCH_MIN_HEADROOM,
+                        wait_seconds=config.PREFETCH_WAIT_SECONDS)
 
-# Helper function to robustly extract JSON from AI response
-def extract_json_from_response(raw_response, logger_func):
-    """
-    Finds the first '{' and the last '}' in the raw string
-    to extract the JSON object, ignoring markdown fences.
-    """
-    match = re.search(r"\{.*\}", raw_response, re.DOTALL)
-    if not match:
-        logger_func(f"No JSON object found in Groq response: {raw_response[:200]}")
-        return None
-        
-    json_string = match.group(0)
-    return json_string
+# Pooled connection to the application database; close() returns it to the pool
+get_db_connection = connect
 
 # Syllabus Routes
 @study_bp.route('/syllabus', methods=['GET'])
@@ -68,20 +67,15 @@ def upload_syllabus():
     """
 
     try:
-        parsed_result_raw = groq_client.generate_response(prompt)
+        parsed_result_raw = groq_client.generate_response(prompt, task="syllabus",
+                                                          validate=has_json_object)
 
-        # --- Robust JSON extraction ---
-        clean_result = extract_json_from_response(parsed_result_raw, log_error)
-        if not clean_result:
+        # --- Robust JSON extraction (with repair of common LLM mistakes) ---
+        extraction = extract_json_from_response(parsed_result_raw, log_error)
+        if not extraction:
              return jsonify({"error": "Failed to extract JSON from AI response", "raw_response": parsed_result_raw}), 500
 
-        # Try to parse the CLEANED string
-        try:
-            syllabus_json = json.loads(clean_result) # This is the parsed JSON
-        except json.JSONDecodeError:
-            log_error(f"Invalid JSON from Groq (raw): {parsed_result_raw[:200]}")
-            log_error(f"Failed to parse extracted JSON: {clean_result[:200]}")
-            return jsonify({"error": "Invalid JSON response from AI", "raw_response": parsed_result_raw}), 500
+        syllabus_json = extraction.data # This is the parsed JSON
 
         # Store only if JSON is valid
         conn = get_db_connection()
@@ -98,12 +92,52 @@ def upload_syllabus():
         conn.commit()
         conn.close()
 
+        # Fill the question bank so quizzes on this syllabus are served from it
+        if config.QUESTION_BANK_ENABLED:
+            for difficulty in config.QUESTION_BANK_DIFFICULTIES:
+                _queue_question_bank_fill({"syllabus_id": syllabus_id, "difficulty": difficulty})
+
+        if config.PREFETCH_ENABLED:
+            _prefetch_defaults(syllabus_id, user_id)
+
         return jsonify({"syllabus_id": syllabus_id, "parsed_syllabus": syllabus_json}), 200
 
     except Exception as e:
         log_error(f"Syllabus upload failed: {e}")
         return jsonify({"error": str(e)}), 500
 
+def _prefetch_defaults(syllabus_id, user_id):
+    """Prefetch the default quiz and study plan for a new syllabus."""
+    defaults = {'syllabus_id': syllabus_id}
+    # The question bank already covers quizzes when it is on
+    preparers = [("plan", _prepare_study_plan)]
+    if not config.QUESTION_BANK_ENABLED:
+        preparers.insert(0, ("quiz", _prepare_quiz))
+
+    for task, prepare in preparers:
+        try:
+            generation_request, error_response = prepare(defaults, user_id)
+            if not error_response:
+                prefetcher.schedule(task, generation_request['prompt'])
+        except Exception as e:
+            log_error(f"Scheduling {task} prefetch failed: {e}")
+
+def _prefetched(task, prompt, wait_seconds=None):
+    """Completion prefetched for this exact prompt, or None."""
+    if not config.PREFETCH_ENABLED:
+        return None
+    return prefetcher.take(task, prompt, wait_seconds)
+
+def _completion_chunks(task, prompt):
+    """Stream a completion, or replay a prefetched one as a single chunk."""
+    # Nothing is sent while waiting, so a stream only briefly waits for a
+    # running prefetch before streaming from Groq itself
+    prefetched = _prefetched(task, prompt, config.PREFETCH_STREAM_WAIT_SECONDS)
+    if prefetched is not None:
+        yield prefetched
+        return
+    yield from groq_client.stream_response(prompt, task=task, validate=has_json_object)
+
 # Quiz Routes
 @study_bp.route('/quiz', methods=['GET'])
 def quiz_page():
@@ -116,7 +150,7 @@ def get_quiz():
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT questions, syllabus_id FROM quizzes WHERE id = ?", (quiz_id,))
+        cursor.execute("SELECT syllabus_id FROM quizzes WHERE id = ?", (quiz_id,))
         result = cursor.fetchone()
         
         if not result:
@@ -124,89 +158,97 @@ def get_quiz():
             return jsonify({"error": "Quiz not found"}), 404
         
         syllabus_id = result['syllabus_id']
-        questions_json = result['questions']
         
         # Get syllabus subject
         cursor.execute("SELECT subject FROM syllabi WHERE id = ?", (syllabus_id,))
         syllabus = cursor.fetchone()
         subject = syllabus['subject'] if syllabus else "Unknown Subject"
         
-        conn.close()
-        
-        # Parse the JSON response
         try:
-            quiz_data = json.loads(questions_json)
-            return jsonify({"quiz_id": quiz_id, "syllabus_id": syllabus_id, "subject": subject, "quiz": quiz_data})
-        except json.JSONDecodeError:
+            questions = _quiz_questions(conn, quiz_id)
+        except ValueError:
             return jsonify({"error": "Invalid quiz data format"}), 500
+        finally:
+            conn.close()
+        
+        return jsonify({"quiz_id": quiz_id, "syllabus_id": syllabus_id, "subject": subject,
+                        "quiz": {"questions": questions}})
     
     except Exception as e:
         log_error(f"Error fetching quiz: {e}")
         return jsonify({"error": str(e)}), 500
 
-@study_bp.route('/study/quiz/generate', methods=['POST'])
-@study_bp.route('/quiz/generate', methods=['POST'])
-def generate_quiz():
-    log_api_request(request, 'quiz_generate', 200)
-    
-    data = request.form
+def _quiz_questions(conn, quiz_id, normalize=False):
+    """
+    Questions of a quiz, from quiz_questions or, for a quiz the backfill
+    has not reached yet, from its archived JSON.
+
+    Args:
+        conn: Database connection
+        quiz_id: Quiz ID
+        normalize: Store questions read from the JSON in quiz_questions;
+            the caller commits
+
+    Raises:
+        ValueError: If the archived JSON is invalid
+    """
+    questions = load_questions(conn, quiz_id)
+    if not questions:
+        row = conn.execute("SELECT questions FROM quizzes WHERE id = ?", (quiz_id,)).fetchone()
+        questions = parse_questions(row['questions']) if row else []
+        if normalize:
+            save_questions(conn, quiz_id, questions)
+    return questions
+
+def _syllabus_topics(parsed_topics):
+    """Topic names from a syllabus's parsed_topics JSON."""
+    try:
+        topics = json.loads(parsed_topics or '{}').get('topics', [])
+        return [t['name'] for t in topics if isinstance(t, dict) and t.get('name')]
+    except (json.JSONDecodeError, AttributeError):
+        return []
+
+def _prepare_quiz(data, user_id):
+    """
+    Look up the syllabus and weak topics and build the quiz prompt.
+
+    Returns:
+        tuple: (quiz_request, error_response)
+    """
     syllabus_id = data.get('syllabus_id')
     difficulty = data.get('difficulty', 'medium')
     num_questions = int(data.get('num_questions', 5))
     topics = data.get('topics', '')  # Comma-separated list of topics
-    user_id = session.get('user_id', 'anonymous')
-    
-    try:
-        # Get syllabus content
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # This is correct: we need the PARSED JSON to generate the quiz
-        cursor.execute("SELECT subject, parsed_topics, content FROM syllabi WHERE id = ?", (syllabus_id,))
-        result = cursor.fetchone()
-        
-        if not result:
-            conn.close()
-            return jsonify({"error": "Syllabus not found"}), 404
-        
-        subject = result['subject']
-        syllabus_content = result['parsed_topics'] # Use the JSON data
-        raw_syllabus = result['content']  # Get the raw syllabus content
-        
-        # Get user's previous quiz results to identify weak areas
-        cursor.execute(
-            "SELECT questions, answers, score FROM quizzes WHERE user_id = ? AND syllabus_id = ? ORDER BY created_at DESC LIMIT 5",
-            (user_id, syllabus_id)
-        )
-        previous_quizzes = cursor.fetchall()
-        
-        # Extract weak topics from previous quizzes
-        weak_topics = []
-        if previous_quizzes:
-            for quiz in previous_quizzes:
-                try:
-                    questions = json.loads(quiz['questions'])
-                    answers = json.loads(quiz['answers'])
-                    score = quiz['score']
-                    
-                    if score < 0.7:  # Less than 70%
-                        for q in questions['questions']:
-                            if q['topic'] not in weak_topics:
-                                weak_topics.append(q['topic'])
-                except (json.JSONDecodeError, KeyError):
-                    continue
-        
-        # Prepare topics for the quiz
-        selected_topics = []
-        if topics:
-            selected_topics = topics.split(',')
-        elif weak_topics:
-            selected_topics = weak_topics[:3]
-        
-        topics_str = ", ".join(selected_topics) if selected_topics else "all topics"
-        
-        # Call Groq API to generate quiz
-        prompt = f"""You are a Quiz Generator Agent. Generate a quiz for {subject} with the following parameters:
+
+    # Get syllabus content
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    # This is correct: we need the PARSED JSON to generate the quiz
+    cursor.execute("SELECT subject, parsed_topics, content FROM syllabi WHERE id = ?", (syllabus_id,))
+    result = cursor.fetchone()
+
+    if not result:
+        conn.close()
+        return None, (jsonify({"error": "Syllabus not found"}), 404)
+
+    subject = result['subject']
+    raw_syllabus = result['content']  # Get the raw syllabus content
+
+    # Weak areas: topics answered less than 70% correctly in the last five submitted quizzes
+    weak_topics = recent_weak_topics(conn, user_id, syllabus_id)
+    conn.close()
+
+    # Prepare topics for the quiz
+    selected_topics = []
+    if topics:
+        selected_topics = topics.split(',')
+    elif weak_topics:
+        selected_topics = weak_topics[:3]
+
+    topics_str = ", ".join(selected_topics) if selected_topics else "all topics"
+
+    prompt = f"""You are a Quiz Generator Agent. Generate a quiz for {subject} with the following parameters:
         
         Syllabus Content: {raw_syllabus}
         Difficulty: {difficulty}
@@ -219,34 +261,288 @@ def generate_quiz():
         Format your response as JSON with the following structure:
         {{"questions": [{{"id": 1, "question": "question text", "options": ["A. option1", "B. option2", "C. option3", "D. option4"], "correct_answer": "A", "topic": "topic name", "explanation": "explanation text"}}]}}
         """
-        
-        quiz_result_raw = groq_client.generate_response(prompt)
 
-        # --- Robust JSON extraction ---
-        quiz_result = extract_json_from_response(quiz_result_raw, log_error)
-        if not quiz_result:
-            return jsonify({"error": "Failed to extract JSON from AI response", "raw_response": quiz_result_raw}), 500
+    return {
+        "prompt": prompt,
+        "user_id": user_id,
+        "syllabus_id": syllabus_id,
+        "difficulty": difficulty,
+        "num_questions": num_questions,
+        "topics": [t.strip() for t in selected_topics if t.strip()] or _syllabus_topics(result['parsed_topics'])
+    }, None
+
+def _save_quiz(quiz_request, quiz_result_raw):
+    """
+    Parse a generated quiz and store it.
+
+    Returns:
+        dict: Response payload with the new quiz ID and questions
+    """
+    # --- Robust JSON extraction (with repair of common LLM mistakes) ---
+    extraction = extract_json_from_response(quiz_result_raw, log_error)
+    if not extraction:
+        raise AIResponseError("Failed to extract JSON from AI response", quiz_result_raw)
+
+    quiz_result = extraction.json_string
+    quiz_json = extraction.data
+
+    # Store in database
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO quizzes (user_id, syllabus_id, questions, answers, score) VALUES (?, ?, ?, ?, ?)",
+        (quiz_request['user_id'], quiz_request['syllabus_id'], quiz_result, '{}', 0.0)
+    )
+    quiz_id = cursor.lastrowid
+    questions = quiz_json.get('questions', []) if isinstance(quiz_json, dict) else []
+    save_questions(conn, quiz_id, [q for q in questions if isinstance(q, dict)])
+    conn.commit()
+    conn.close()
+
+    return {"quiz_id": quiz_id, "quiz": quiz_json}
+
+def _bank_prompt(subject, raw_syllabus, difficulty, topics, existing):
+    """Build a quiz prompt that generates bank questions for a few topics."""
+    per_topic = config.QUESTION_BANK_PER_TOPIC
+    existing_str = "\n".join(f"- {question}" for question in existing) or "none"
+
+    return f"""You are a Quiz Generator Agent. Generate a quiz for {subject} with the following parameters:
         
-        # Store in database
-        cursor.execute(
-            "INSERT INTO quizzes (user_id, syllabus_id, questions, answers, score) VALUES (?, ?, ?, ?, ?)",
-            (user_id, syllabus_id, quiz_result, '{}', 0.0)
+        Syllabus Content: {raw_syllabus}
+        Difficulty: {difficulty}
+        Number of Questions: {per_topic * len(topics)}
+        Topics to Focus on: {", ".join(topics)}
+        
+        Write {per_topic} questions for each topic and set each question's "topic" to exactly one of the topic names above.
+        Generate questions that test understanding and application of concepts, not just memorization.
+        For each question, provide 4 options with one correct answer.
+        Do not repeat or rephrase these existing questions:
+        {existing_str}
+        
+        Format your response as JSON with the following structure:
+        {{"questions": [{{"id": 1, "question": "question text", "options": ["A. option1", "B. option2", "C. option3", "D. option4"], "correct_answer": "A", "topic": "topic name", "explanation": "explanation text"}}]}}
+        """
+
+def _bank_has_budget():
+    # Fills are background generations, so like prefetches they give way to
+    # interactive requests when the rate limiter runs low
+    return groq_client.headroom() >= config.PREFETCH_MIN_HEADROOM
+
+def _queue_question_bank_fill(payload):
+    """
+    Queue a question bank fill, unless the rate limiter is short of budget.
+
+    A skipped bucket still fills up from quizzes generated on a bank miss.
+
+    Returns:
+        bool: Whether the fill was queued
+    """
+    if not _bank_has_budget():
+        question_bank.count("skipped_fills")
+        log_info(f"Skipped question bank fill for syllabus {payload['syllabus_id']} ({payload['difficulty']}): "
+                 f"rate limit headroom below {config.PREFETCH_MIN_HEADROOM}")
+        return False
+    job_queue.enqueue("question_bank", payload)
+    return True
+
+def _fill_question_bank(payload):
+    """
+    Generate questions for a syllabus at one difficulty and bank them.
+
+    Payload keys: syllabus_id, difficulty and optionally topics (defaults to
+    every topic of the syllabus).
+    """
+    # Budget is checked again here: the job may run long after it was queued
+    if not _bank_has_budget():
+        question_bank.count("skipped_fills")
+        return {"skipped": True}
+
+    syllabus_id = payload['syllabus_id']
+    difficulty = payload['difficulty']
+
+    conn = get_db_connection()
+    try:
+        syllabus = conn.execute(
+            "SELECT subject, content, parsed_topics FROM syllabi WHERE id = ?", (syllabus_id,)
+        ).fetchone()
+        if not syllabus:
+            return {"added": 0}
+        topics = payload.get('topics') or _syllabus_topics(syllabus['parsed_topics'])
+        size = max(config.QUESTION_BANK_TOPICS_PER_CALL, 1)
+        groups = [topics[i:i + size] for i in range(0, len(topics), size)]
+        prompts = [_bank_prompt(syllabus['subject'], syllabus['content'], difficulty, group,
+                                question_bank.question_texts(conn, syllabus_id, group, difficulty))
+                   for group in groups]
+    finally:
+        conn.close()
+
+    batch = groq_client.generate_many(prompts, use_cache=False, task="quiz")
+    if batch.items and not batch.succeeded:
+        raise batch.items[0].error
+
+    questions = []
+    for item in batch.items:
+        extraction = extract_json_from_response(item.response, log_error) if item.ok else None
+        if extraction and isinstance(extraction.data, dict):
+            questions.extend(q for q in extraction.data.get('questions', []) if isinstance(q, dict))
+
+    conn = get_db_connection()
+    try:
+        ids = question_bank.add_questions(conn, syllabus_id, difficulty, questions)
+        conn.commit()
+    finally:
+        conn.close()
+
+    log_info(f"Question bank for syllabus {syllabus_id} ({difficulty}): "
+             f"{len(set(ids))} of {len(questions)} generated questions banked or matched")
+    return {"topics": topics, "generated": len(questions)}
+
+job_queue.register("question_bank", _fill_question_bank)
+
+def _backfill_quizzes(payload):
+    """Normalize quizzes stored before quiz_questions existed."""
+    return {"examined": backfill(get_db_connection, payload['batch_size'], config.QUIZ_BACKFILL_PAUSE,
+                                 config.TOPIC_MASTERY_ALPHA)}
+
+job_queue.register("quiz_backfill", _backfill_quizzes)
+
+def schedule_quiz_backfill():
+    """
+    Queue the quiz backfill if any quiz is stored only as JSON.
+
+    Returns:
+        bool: Whether a backfill was queued
+    """
+    conn = get_db_connection()
+    try:
+        pending = pending_backfill(conn)
+    finally:
+        conn.close()
+    if pending:
+        job_queue.enqueue("quiz_backfill", {"batch_size": config.QUIZ_BACKFILL_BATCH_SIZE})
+    return pending
+
+def _top_up_question_bank(quiz_request, thin):
+    """Queue generation for buckets running low on unseen questions."""
+    if not thin:
+        return
+    # The bank size is part of the payload, so a finished top-up only absorbs
+    # new requests until it has added questions
+    if _queue_question_bank_fill({
+        "syllabus_id": quiz_request['syllabus_id'],
+        "difficulty": quiz_request['difficulty'].lower(),
+        "topics": sorted(thin),
+        "banked": sum(thin.values())
+    }):
+        question_bank.count("top_ups")
+
+def _quiz_from_bank(quiz_request):
+    """
+    Assemble a quiz from banked questions the user has not seen, and store it.
+
+    Returns:
+        dict: Response payload as from _save_quiz, or None when the bank
+            cannot fill the quiz
+    """
+    count = quiz_request['num_questions']
+    conn = get_db_connection()
+    try:
+        picked, thin = question_bank.assemble(
+            conn, quiz_request['syllabus_id'], quiz_request['user_id'],
+            quiz_request['topics'], quiz_request['difficulty'], count
         )
-        quiz_id = cursor.lastrowid
+        if picked and len(picked) == count:
+            question_bank.mark_seen(conn, quiz_request['user_id'], [bank_id for bank_id, _ in picked])
+            conn.commit()
+    finally:
+        conn.close()
+
+    # On a miss the caller generates the quiz and banks it, so only a served
+    # quiz triggers a top-up
+    if not picked or len(picked) < count:
+        return None
+    _top_up_question_bank(quiz_request, thin)
+
+    questions = [dict(question, id=index) for index, (_, question) in enumerate(picked, 1)]
+    question_bank.count("quizzes_served")
+    question_bank.count("questions_served", count)
+    return _save_quiz(quiz_request, json.dumps({"questions": questions}))
+
+def _bank_generated_quiz(quiz_request, quiz):
+    """Bank the questions of a freshly generated quiz and mark them seen."""
+    questions = [q for q in quiz.get('questions', []) if isinstance(q, dict)]
+    conn = get_db_connection()
+    try:
+        ids = question_bank.add_questions(conn, quiz_request['syllabus_id'], quiz_request['difficulty'], questions)
+        question_bank.mark_seen(conn, quiz_request['user_id'], ids)
         conn.commit()
+    finally:
         conn.close()
-        
-        # Parse the JSON response
+
+def _save_generated_quiz(quiz_request, quiz_result_raw):
+    """Store a generated quiz and, with the question bank on, bank its questions."""
+    quiz_payload = _save_quiz(quiz_request, quiz_result_raw)
+    if config.QUESTION_BANK_ENABLED:
         try:
-            quiz_json = json.loads(quiz_result)
-            return jsonify({"quiz_id": quiz_id, "quiz": quiz_json})
-        except json.JSONDecodeError:
-            log_error(f"Invalid JSON from Groq (raw): {quiz_result_raw[:200]}")
-            return jsonify({"error": "Invalid JSON response from AI", "raw_response": quiz_result_raw})
+            _bank_generated_quiz(quiz_request, quiz_payload['quiz'])
+        except Exception as e:
+            log_error(f"Banking generated quiz failed: {e}")
+    return quiz_payload
+
+@study_bp.route('/study/quiz/generate', methods=['POST'])
+@study_bp.route('/quiz/generate', methods=['POST'])
+def generate_quiz():
+    log_api_request(request, 'quiz_generate', 200)
+    
+    user_id = session.get('user_id', 'anonymous')
     
+    try:
+        quiz_request, error_response = _prepare_quiz(request.form, user_id)
+        if error_response:
+            return error_response
+        
+        if config.QUESTION_BANK_ENABLED:
+            banked_quiz = _quiz_from_bank(quiz_request)
+            if banked_quiz:
+                return jsonify(banked_quiz)
+        
+        # Call Groq API to generate quiz, unless it was prefetched
+        quiz_result_raw = _prefetched("quiz", quiz_request['prompt'])
+        if quiz_result_raw is None:
+            quiz_result_raw = groq_client.generate_response(quiz_request['prompt'], task="quiz",
+                                                            validate=has_json_object)
+        return jsonify(_save_generated_quiz(quiz_request, quiz_result_raw))
+    
+    except AIResponseError as e:
+        return jsonify(e.to_dict()), e.status_code
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@study_bp.route('/quiz/generate/stream', methods=['POST'])
+def generate_quiz_stream():
+    log_api_request(request, 'quiz_generate_stream', 200)
+    
+    user_id = session.get('user_id', 'anonymous')
+    
+    try:
+        quiz_request, error_response = _prepare_quiz(request.form, user_id)
+        if error_response:
+            return error_response
+        banked_quiz = _quiz_from_bank(quiz_request) if config.QUESTION_BANK_ENABLED else None
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+    required_fields = ['id', 'question', 'options', 'correct_answer']
+    if banked_quiz:
+        return sse_replay(banked_quiz, banked_quiz['quiz']['questions'], required_fields)
+    
+    return sse_response(
+        _completion_chunks("quiz", quiz_request['prompt']),
+        lambda quiz_result_raw: _save_generated_quiz(quiz_request, quiz_result_raw),
+        array_key='questions',
+        required_fields=required_fields
+    )
+
 @study_bp.route('/quiz/submit', methods=['POST'])
 def submit_quiz():
     log_api_request(request, 'quiz_submit', 200)
@@ -256,87 +552,75 @@ def submit_quiz():
     user_answers = data.get('answers')
     
     try:
-        # Get quiz questions
+        # Get quiz questions and syllabus
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT questions FROM quizzes WHERE id = ?", (quiz_id,))
+        cursor.execute("SELECT syllabus_id FROM quizzes WHERE id = ?", (quiz_id,))
         result = cursor.fetchone()
         
         if not result:
             conn.close()
             return jsonify({"error": "Quiz not found"}), 404
         
-        # Calculate score
-        questions = json.loads(result['questions'])
-        correct_count = 0
-        total_questions = len(questions['questions'])
+        syllabus_id = result['syllabus_id']
+        user_id = session.get('user_id', 'anonymous')
+        questions = _quiz_questions(conn, quiz_id, normalize=True)
         
-        for q in questions['questions']:
-            q_id = str(q['id'])
-            if q_id in user_answers and user_answers[q_id] == q['correct_answer']:
-                correct_count += 1
+        # Score the quiz and collect per-topic results in one pass
+        marked = mark_answers(questions, user_answers)
+        total_questions = len(marked)
+        correct_count = 0
+        topic_mastered = {}
+        questions_with_explanations = []
+        
+        for _, q, answer, is_correct in marked:
+            correct_count += is_correct
+            # A topic is mastered only if every question on it was answered correctly
+            topic_mastered[q['topic']] = topic_mastered.get(q['topic'], True) and is_correct
+            questions_with_explanations.append({
+                "id": q['id'],
+                "question": q['question'],
+                "user_answer": answer,
+                "correct_answer": q['correct_answer'],
+                "is_correct": is_correct,
+                "explanation": q.get('explanation'),
+                "topic": q['topic']
+            })
         
         score = correct_count / total_questions if total_questions > 0 else 0
         
-        # Update quiz with answers and score
+        # Store the responses, fold them into topic mastery, and keep the answers and score on the quiz
+        save_responses(conn, quiz_id, user_id, syllabus_id, marked)
+        record_quiz(conn, user_id, syllabus_id, quiz_id, marked, config.TOPIC_MASTERY_ALPHA)
         cursor.execute(
-            "UPDATE quizzes SET answers = ?, score = ? WHERE id = ?",
-            (json.dumps(user_answers), score, quiz_id)
+            "UPDATE quizzes SET answers = ?, score = ?, total_questions = ? WHERE id = ?",
+            (json.dumps(user_answers), score, total_questions, quiz_id)
         )
         
-        # Update progress for topics in the quiz
-        user_id = session.get('user_id', 'anonymous')
-        cursor.execute("SELECT syllabus_id FROM quizzes WHERE id = ?", (quiz_id,))
-        syllabus_id = cursor.fetchone()['syllabus_id']
-        
-        for q in questions['questions']:
-            topic = q['topic']
-            q_id = str(q['id'])
-            status = "mastered" if q_id in user_answers and user_answers[q_id] == q['correct_answer'] else "needs_review"
-            
-            # Check if progress entry exists
-            cursor.execute(
-                "SELECT id FROM progress WHERE user_id = ? AND syllabus_id = ? AND topic = ?",
-                (user_id, syllabus_id, topic)
-            )
-            existing = cursor.fetchone()
-            
-            if existing:
-                cursor.execute(
-                    "UPDATE progress SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-                    (status, existing['id'])
-                )
-            else:
-                cursor.execute(
-                    "INSERT INTO progress (user_id, syllabus_id, topic, status) VALUES (?, ?, ?, ?)",
-                    (user_id, syllabus_id, topic, status)
-                )
+        # Update progress with one upsert per topic
+        bulk_upsert(
+            conn, "progress",
+            ("user_id", "syllabus_id", "topic", "status", "quiz_count", "last_quiz_id"),
+            [(user_id, syllabus_id, topic, "mastered" if mastered else "needs_review", 1, quiz_id)
+             for topic, mastered in topic_mastered.items()],
+            key=("user_id", "syllabus_id", "topic"),
+            update={
+                "status": "excluded.status",
+                "quiz_count": "quiz_count + 1",
+                "last_quiz_id": "excluded.last_quiz_id",
+                "updated_at": "CURRENT_TIMESTAMP",
+            },
+        )
         
         conn.commit()
+        conn.close()
         
-        # Prepare result with explanations
-        result = {
+        return jsonify({
             "score": score,
             "correct_count": correct_count,
             "total_questions": total_questions,
-            "questions_with_explanations": []
-        }
-        
-        for q in questions['questions']:
-            q_id = str(q['id'])
-            is_correct = q_id in user_answers and user_answers[q_id] == q['correct_answer']
-            result["questions_with_explanations"].append({
-                "id": q['id'],
-                "question": q['question'],
-                "user_answer": user_answers.get(q_id, ""),
-                "correct_answer": q['correct_answer'],
-                "is_correct": is_correct,
-                "explanation": q['explanation'],
-                "topic": q['topic']
-            })
-        
-        conn.close()
-        return jsonify(result)
+            "questions_with_explanations": questions_with_explanations
+        })
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -390,49 +674,47 @@ def get_plan():
         log_error(f"Error fetching study plan: {e}")
         return jsonify({"error": str(e)}), 500
 
-@study_bp.route('/study/plan/generate', methods=['POST'])
-@study_bp.route('/plan/generate', methods=['POST'])
-def generate_study_plan():
-    log_api_request(request, 'plan_generate', 200)
-    
-    data = request.form
+def _prepare_study_plan(data, user_id):
+    """
+    Look up the syllabus and weak topics and build the study plan prompt.
+
+    Returns:
+        tuple: (plan_request, error_response)
+    """
     syllabus_id = data.get('syllabus_id')
     duration_days = int(data.get('duration_days', 30))
     hours_per_day = float(data.get('hours_per_day', 2.0))
-    user_id = session.get('user_id', 'anonymous')
-    
-    try:
-        # Get syllabus content
-        conn = get_db_connection()
-        conn.row_factory = sqlite3.Row   # ✅ important so we can use dict-style access
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT subject, parsed_topics FROM syllabi WHERE id = ?", (syllabus_id,))
-        result = cursor.fetchone()
-        
-        if not result:
-            conn.close()
-            return jsonify({"error": "Syllabus not found"}), 404
-        
-        subject = result["subject"]
-        syllabus_content = result["parsed_topics"]  # already JSON text from DB
-        
-        # Get user's progress to identify weak areas
-        cursor.execute(
-            "SELECT topic, status FROM progress WHERE user_id = ? AND syllabus_id = ?",
-            (user_id, syllabus_id)
-        )
-        progress_results = cursor.fetchall()
-        
-        weak_topics = [row["topic"] for row in progress_results if row["status"] == "needs_review"]
-        weak_topics_str = ", ".join(weak_topics) if weak_topics else "none identified yet"
-        
-        # Calculate dates
-        start_date = datetime.now().strftime("%Y-%m-%d")
-        end_date = (datetime.now() + timedelta(days=duration_days)).strftime("%Y-%m-%d")
-        
-        # Call Groq API to generate study plan
-        prompt = f"""You are a Planner Agent. Generate a personalized study plan for {subject} with the following parameters:
+
+    # Get syllabus content
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT subject, parsed_topics FROM syllabi WHERE id = ?", (syllabus_id,))
+    result = cursor.fetchone()
+
+    if not result:
+        conn.close()
+        return None, (jsonify({"error": "Syllabus not found"}), 404)
+
+    subject = result["subject"]
+    syllabus_content = result["parsed_topics"]  # already JSON text from DB
+
+    # Get user's progress to identify weak areas
+    cursor.execute(
+        "SELECT topic, status FROM progress WHERE user_id = ? AND syllabus_id = ?",
+        (user_id, syllabus_id)
+    )
+    progress_results = cursor.fetchall()
+    conn.close()
+
+    weak_topics = [row["topic"] for row in progress_results if row["status"] == "needs_review"]
+    weak_topics_str = ", ".join(weak_topics) if weak_topics else "none identified yet"
+
+    # Calculate dates
+    start_date = datetime.now().strftime("%Y-%m-%d")
+    end_date = (datetime.now() + timedelta(days=duration_days)).strftime("%Y-%m-%d")
+
+    prompt = f"""You are a Planner Agent. Generate a personalized study plan for {subject} with the following parameters:
         
         Syllabus: {syllabus_content}
         Duration: {duration_days} days
@@ -451,43 +733,103 @@ def generate_study_plan():
         Format your response as JSON with the following structure:
         {{"plan": [{{"day": 1, "date": "YYYY-MM-DD", "topics": ["topic1", "topic2"], "activities": ["activity1", "activity2"], "duration_hours": 2.0, "resources": ["resource1", "resource2"]}}]}}
         """
+
+    return {
+        "prompt": prompt,
+        "user_id": user_id,
+        "syllabus_id": syllabus_id,
+        "start_date": start_date,
+        "end_date": end_date
+    }, None
+
+def _save_study_plan(plan_request, plan_result_raw):
+    """
+    Parse a generated study plan and store it.
+
+    Returns:
+        dict: Response payload with the new plan ID and plan
+    """
+    # --- Robust JSON extraction (with repair of common LLM mistakes) ---
+    extraction = extract_json_from_response(plan_result_raw, log_error)
+    if not extraction:
+        raise AIResponseError("Failed to extract JSON from AI response", plan_result_raw)
+
+    plan_str = extraction.json_string
+    plan_json = extraction.data
+
+    # Store in database
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO study_plans (user_id, syllabus_id, plan_content, start_date, end_date) VALUES (?, ?, ?, ?, ?)",
+        (plan_request['user_id'], plan_request['syllabus_id'], plan_str,
+         plan_request['start_date'], plan_request['end_date'])
+    )
+    plan_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+
+    return {"plan_id": plan_id, "plan": plan_json}
+
+def _run_plan_job(plan_request):
+    """Generate and store a study plan in a background job, unless it was prefetched."""
+    plan_result_raw = _prefetched("plan", plan_request['prompt'])
+    if plan_result_raw is None:
+        plan_result_raw = groq_client.generate_response(plan_request['prompt'], task="plan",
+                                                        validate=has_json_object)
+    return _save_study_plan(plan_request, plan_result_raw)
+
+job_queue.register("plan", _run_plan_job)
+
+@study_bp.route('/study/plan/generate', methods=['POST'])
+@study_bp.route('/plan/generate', methods=['POST'])
+def generate_study_plan():
+    log_api_request(request, 'plan_generate', 200)
+    
+    user_id = session.get('user_id', 'anonymous')
+    
+    try:
+        plan_request, error_response = _prepare_study_plan(request.form, user_id)
+        if error_response:
+            return error_response
         
-        plan_result_raw = groq_client.generate_response(prompt)
-
-        # --- Robust JSON extraction ---
-        plan_result = extract_json_from_response(plan_result_raw, log_error)
-        if not plan_result:
-            return jsonify({"error": "Failed to extract JSON from AI response", "raw_response": plan_result_raw}), 500
-        
-        # Ensure we always have a string to insert in DB
-        if isinstance(plan_result, dict):
-            plan_str = json.dumps(plan_result)
-            plan_json = plan_result
-        elif isinstance(plan_result, str):
-            try:
-                plan_json = json.loads(plan_result)
-                plan_str = plan_result
-            except json.JSONDecodeError:
-                log_error(f"Invalid JSON from Groq (raw): {plan_result_raw[:200]}")
-                return jsonify({"error": "Invalid JSON response from AI", "raw_response": plan_result_raw}), 500
-        else:
-            return jsonify({"error": "Unexpected type from extract_json_from_response"}), 500
-
-        # Store in database
-        cursor.execute(
-            "INSERT INTO study_plans (user_id, syllabus_id, plan_content, start_date, end_date) VALUES (?, ?, ?, ?, ?)",
-            (user_id, syllabus_id, plan_str, start_date, end_date)
-        )
-        plan_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        if wants_background(request):
+            return accepted_response(job_queue.enqueue("plan", plan_request, user_id=user_id))
+        
+        # Call Groq API to generate study plan, unless it was prefetched
+        plan_result_raw = _prefetched("plan", plan_request['prompt'])
+        if plan_result_raw is None:
+            plan_result_raw = groq_client.generate_response(plan_request['prompt'], task="plan",
+                                                            validate=has_json_object)
         
         # ✅ Return clean JSON
-        return jsonify({"plan_id": plan_id, "plan": plan_json})
+        return jsonify(_save_study_plan(plan_request, plan_result_raw))
     
+    except AIResponseError as e:
+        return jsonify(e.to_dict()), e.status_code
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@study_bp.route('/plan/generate/stream', methods=['POST'])
+def generate_study_plan_stream():
+    log_api_request(request, 'plan_generate_stream', 200)
+    
+    user_id = session.get('user_id', 'anonymous')
+    
+    try:
+        plan_request, error_response = _prepare_study_plan(request.form, user_id)
+        if error_response:
+            return error_response
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+    return sse_response(
+        _completion_chunks("plan", plan_request['prompt']),
+        lambda plan_result_raw: _save_study_plan(plan_request, plan_result_raw),
+        array_key='plan',
+        required_fields=['day', 'topics', 'activities']
+    )
+
 # Progress Routes
 @study_bp.route('/progress', methods=['GET'])
 def progress_page():
@@ -496,7 +838,8 @@ def progress_page():
 @study_bp.route('/progress/get', methods=['GET'])
 def get_progress():
     syllabus_id = request.args.get('syllabus_id')
-    days = request.args.get('days', 30, type=int)
+    # A number of days, or "all" for the whole history
+    days = None if request.args.get('days') == 'all' else request.args.get('days', 30, type=int)
     
     if not syllabus_id:
         return jsonify({"error": "Syllabus ID is required"}), 400
@@ -521,140 +864,67 @@ def get_progress():
             conn.close()
             return jsonify({"error": "User not logged in"}), 401
         
-        # Get progress data
-        cursor.execute("""
-            SELECT p.topic, p.mastery_level, p.created_at 
-            FROM progress p
-            WHERE p.user_id = ? AND p.syllabus_id = ?
-            ORDER BY p.created_at DESC
-        """, (user_id, syllabus_id))
-        
-        progress_data = cursor.fetchall()
-        
-        # Get quiz history
-        cursor.execute("""
-            SELECT q.id, q.score, q.total_questions, q.created_at, q.topics
-            FROM quizzes q
-            WHERE q.user_id = ? AND q.syllabus_id = ?
-            ORDER BY q.created_at DESC
-        """, (user_id, syllabus_id))
-        
-        quiz_history = cursor.fetchall()
-        
-        # Calculate overall mastery
-        total_topics = 0
-        mastered_topics = 0
-        topic_mastery = {}
-        
-        for item in progress_data:
-            topic = item['topic']
-            mastery = item['mastery_level']
-            
-            topic_mastery[topic] = mastery
-            total_topics += 1
-            if mastery >= 80:  # Consider 80% or higher as mastered
-                mastered_topics += 1
+        # Mastery is maintained on each quiz submission, so this reads one row
+        # per topic however many quizzes the user has taken
+        totals, topics = load_mastery(conn, user_id, syllabus_id)
+        recent_quizzes = quiz_history(conn, user_id, syllabus_id, config.PROGRESS_HISTORY_LIMIT)
+        # The chart is downsampled from the daily or weekly rollups in SQL, so
+        # it has at most PROGRESS_CHART_POINTS points per topic for any window
+        resolution, series = progress_series(conn, user_id, syllabus_id, days,
+                                             config.PROGRESS_CHART_POINTS, config.PROGRESS_DAILY_MAX_DAYS)
+        conn.close()
         
+        topic_mastery = {item['topic']: round(item['mastery'] * 100, 1) for item in topics}
+        total_topics = len(topic_mastery)
+        mastered_topics = sum(1 for mastery in topic_mastery.values() if mastery >= 80)  # 80% or higher is mastered
         overall_mastery = (mastered_topics / total_topics * 100) if total_topics > 0 else 0
         
         # Calculate study hours (estimate from quiz attempts)
-        study_hours = len(quiz_history) * 0.5  # Assuming each quiz takes about 30 minutes
+        quizzes_completed = totals['quizzes'] if totals else 0
+        study_hours = quizzes_completed * 0.5  # Assuming each quiz takes about 30 minutes
         
         # Identify weak topics (less than 60% mastery)
         weak_topics = [topic for topic, mastery in topic_mastery.items() if mastery < 60]
         
         # Format quiz history
         formatted_quizzes = []
-        for quiz in quiz_history:
+        for quiz in recent_quizzes:
             formatted_quizzes.append({
-                "id": quiz['id'],
-                "score": quiz['score'],
-                "total_questions": quiz['total_questions'],
-                "percentage": round(quiz['score'] / quiz['total_questions'] * 100, 1),
-                "date": quiz['created_at'],
-                "topics": quiz['topics'].split(',') if quiz['topics'] else []
+                "id": quiz['quiz_id'],
+                "score": quiz['correct'],
+                "total_questions": quiz['answered'],
+                "percentage": round(quiz['correct'] / quiz['answered'] * 100, 1),
+                "date": quiz['answered_at'],
+                "topics": quiz['topics']
             })
         
         # Format progress data for chart
         chart_data = []
-        for item in progress_data:
+        for point in series:
             chart_data.append({
-                "topic": item['topic'],
-                "mastery": item['mastery_level'],
-                "date": item['last_updated']
+                "topic": point['topic'],
+                "date": point['date'],
+                "mastery": round(point['mastery'] * 100, 1),
+                "score": round(point['score'] * 100, 1),
+                "answered": point['answered']
             })
         
-        conn.close()
-        
         return jsonify({
             "subject": subject,
             "overall_mastery": round(overall_mastery, 1),
-            "quizzes_completed": len(quiz_history),
+            "quizzes_completed": quizzes_completed,
             "study_hours": round(study_hours, 1),
             "topics_mastered": f"{mastered_topics}/{total_topics}",
             "topic_mastery": topic_mastery,
             "weak_topics": weak_topics,
             "quiz_history": formatted_quizzes,
-            "chart_data": chart_data
+            "chart_data": chart_data,
+            "chart_resolution": resolution
         })
         
     except Exception as e:
         log_error(f"Error fetching progress data: {e}")
         return jsonify({"error": str(e)}), 500
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get syllabus info
-        cursor.execute("SELECT subject FROM syllabi WHERE id = ?", (syllabus_id,))
-        syllabus = cursor.fetchone()
-        
-        if not syllabus:
-            conn.close()
-            return jsonify({"error": "Syllabus not found"}), 404
-        
-        # Get progress data
-        cursor.execute(
-            "SELECT topic, status, notes, updated_at FROM progress WHERE user_id = ? AND syllabus_id = ? ORDER BY updated_at DESC",
-            (user_id, syllabus_id)
-        )
-        progress_results = cursor.fetchall()
-        
-        # Get quiz history
-        cursor.execute(
-            "SELECT id, score, created_at FROM quizzes WHERE user_id = ? AND syllabus_id = ? ORDER BY created_at ASC",
-            (user_id, syllabus_id)
-        )
-        quiz_results = cursor.fetchall()
-        
-        # Format results
-        progress_data = {
-            "subject": syllabus['subject'],
-            "topics": [],
-            "quiz_history": []
-        }
-        
-        for progress in progress_results:
-            progress_data["topics"].append({
-                "topic": progress['topic'],
-                "status": progress['status'],
-                "notes": progress['notes'],
-                "updated_at": progress['updated_at']
-            })
-        
-        for quiz in quiz_results:
-            progress_data["quiz_history"].append({
-                "quiz_id": quiz['id'],
-                "score": quiz['score'],
-                "date": quiz['created_at']
-            })
-        
-        conn.close()
-        return jsonify(progress_data)
-    
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
 
 @study_bp.route('/progress/update', methods=['POST'])
 def update_progress():
@@ -669,25 +939,19 @@ def update_progress():
     
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
         
-        # Check if progress entry exists
-        cursor.execute(
-            "SELECT id FROM progress WHERE user_id = ? AND syllabus_id = ? AND topic = ?",
-            (user_id, syllabus_id, topic)
+        # Insert the progress entry or update the existing one in one statement
+        bulk_upsert(
+            conn, "progress",
+            ("user_id", "syllabus_id", "topic", "status", "notes"),
+            [(user_id, syllabus_id, topic, status, notes)],
+            key=("user_id", "syllabus_id", "topic"),
+            update={
+                "status": "excluded.status",
+                "notes": "excluded.notes",
+                "updated_at": "CURRENT_TIMESTAMP",
+            },
         )
-        existing = cursor.fetchone()
-        
-        if existing:
-            cursor.execute(
-                "UPDATE progress SET status = ?, notes = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-                (status, notes, existing['id'])
-            )
-        else:
-            cursor.execute(
-                "INSERT INTO progress (user_id, syllabus_id, topic, status, notes) VALUES (?, ?, ?, ?, ?)",
-                (user_id, syllabus_id, topic, status, notes)
-            )
         
         conn.commit()
         conn.close()
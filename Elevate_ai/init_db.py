@@ -5,8 +5,9 @@
 Database initialization script for Elevate.AI
 
 This script initializes the SQLite database with the necessary tables
-for the Elevate.AI application. It creates tables for resumes, interviews,
-syllabi, quizzes, study plans, and progress tracking.
+for the Elevate.AI application. It applies the versioned schema from
+utils/migrations.py (resumes, interviews, syllabi, quizzes, study plans,
+progress tracking and their indexes), upgrading an existing database.
 
 Usage:
     python init_db.py
@@ -15,9 +16,12 @@ Usage:
 import os
 import sqlite3
 from datetime import datetime
-from utils.db_utils import get_db_connection
+import json
+from utils.db_utils import connect, get_db_connection
 from utils.config import get_config
 from utils.logger import get_logger, log_info, log_error
+from utils.migrations import migrate
+from services.quiz_history import backfill
 
 # Initialize logger
 logger = get_logger()
@@ -28,93 +32,6 @@ config = get_config()
 # Database file path
 DB_PATH = os.path.join(os.getcwd(), config.DATABASE_PATH)
 
-# SQL statements to create tables
-CREATE_TABLES = [
-    """
-    CREATE TABLE IF NOT EXISTS resumes (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id TEXT NOT NULL,
-        filename TEXT NOT NULL,
-        content TEXT NOT NULL,
-        job_description TEXT NOT NULL,
-        analysis TEXT,
-        match_score REAL,
-        strengths TEXT,
-        gaps TEXT,
-        suggestions TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """,
-    
-    """
-    CREATE TABLE IF NOT EXISTS interviews (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id TEXT NOT NULL,
-        job_role TEXT NOT NULL,
-        questions TEXT NOT NULL,
-        answers TEXT,
-        feedback TEXT,
-        overall_score REAL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """,
-    
-    """
-    CREATE TABLE IF NOT EXISTS syllabi (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id TEXT NOT NULL,
-        subject TEXT NOT NULL,
-        content TEXT NOT NULL,
-        parsed_topics TEXT NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """,
-    
-    """
-    CREATE TABLE IF NOT EXISTS quizzes (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id TEXT NOT NULL,
-        syllabus_id INTEGER NOT NULL,
-        topics TEXT NOT NULL,
-        questions TEXT NOT NULL,
-        answers TEXT,
-        score REAL,
-        feedback TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (syllabus_id) REFERENCES syllabi (id)
-    )
-    """,
-    
-    """
-    CREATE TABLE IF NOT EXISTS study_plans (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id TEXT NOT NULL,
-        syllabus_id INTEGER NOT NULL,
-        duration_days INTEGER NOT NULL,
-        hours_per_day REAL NOT NULL,
-        plan_data TEXT NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (syllabus_id) REFERENCES syllabi (id)
-    )
-    """,
-    
-    """
-    CREATE TABLE IF NOT EXISTS progress (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id TEXT NOT NULL,
-        syllabus_id INTEGER NOT NULL,
-        topic TEXT NOT NULL,
-        mastery_level REAL NOT NULL,
-        quiz_count INTEGER DEFAULT 0,
-        study_hours REAL DEFAULT 0,
-        last_quiz_id INTEGER,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (syllabus_id) REFERENCES syllabi (id),
-        FOREIGN KEY (last_quiz_id) REFERENCES quizzes (id)
-    )
-    """
-]
-
 def init_db():
     """Initialize the database with required tables"""
     log_info(f"Initializing database at {DB_PATH}...")
@@ -125,16 +42,12 @@ def init_db():
     try:
         # Connect to database using context manager
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Create tables
-            for create_table_sql in CREATE_TABLES:
-                cursor.execute(create_table_sql)
-            
-            # Commit changes
-            conn.commit()
+            version = migrate(conn)
+        
+        # Normalize quizzes stored before quiz_questions existed
+        backfill(connect, config.QUIZ_BACKFILL_BATCH_SIZE, pause=0, alpha=config.TOPIC_MASTERY_ALPHA)
         
-        log_info("Database initialization complete!")
+        log_info(f"Database initialization complete (schema version {version})!")
     except Exception as e:
         log_error(f"Error initializing database: {str(e)}")
         raise
@@ -209,13 +122,13 @@ def add_sample_data():
     }
     
             cursor.execute(
-                "INSERT INTO study_plans (user_id, syllabus_id, duration_days, hours_per_day, plan_data) VALUES (?, ?, ?, ?, ?)",
+                "INSERT INTO study_plans (user_id, syllabus_id, duration_days, hours_per_day, plan_content) VALUES (?, ?, ?, ?, ?)",
                 (
                     user_id,
                     syllabus_id,
                     30,
                     2.0,
-                    str(plan_data)
+                    json.dumps(plan_data)
                 )
             )
             
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Background job worker for Elevate.AI application
+
+This script runs queued generations (study plans, resume analyses,
+interview feedback) and the other background Groq calls outside the web
+server, so request workers only enqueue jobs. Run it next to gunicorn on
+the same machine (the queue is a SQLite file). Several copies can share
+one JOB_QUEUE_PATH; jobs left running by a stopped worker are picked up
+again once their lease expires.
+"""
+
+import argparse
+import os
+import signal
+import threading
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Elevate.AI background jobs")
+    parser.add_argument("--workers", type=int, default=4, help="worker threads in this process")
+    args = parser.parse_args()
+
+    # Importing the app registers the job handlers and starts the workers
+    os.environ["JOB_WORKERS"] = str(args.workers)
+    from app import app  # noqa: F401
+    from services.job_queue import get_default_job_queue
+    from utils.config import get_config
+    from utils.logger import log_info
+
+    job_queue = get_default_job_queue(get_config())
+    stopping = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stopping.set())
+
+    log_info(f"Job worker running {args.workers} threads on {job_queue.db_path}")
+    stopping.wait()
+    log_info("Job worker stopping after current jobs")
+    job_queue.stop(timeout=get_config().JOB_LEASE_SECONDS)
+
+
+if __name__ == '__main__':
+    main()
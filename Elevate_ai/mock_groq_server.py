@@ -0,0 +1,483 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Mock Groq API server for Elevate.AI application
+
+This script runs a deterministic, OpenAI-compatible stand-in for the Groq
+chat/completions API so the application can be load-tested and benchmarked
+offline. Each agent prompt (syllabus, quiz, plan, resume, interview, answer
+evaluation, feedback) gets schema-valid canned JSON; latency, token rate,
+streaming, 429s and server errors are all configurable.
+
+Usage:
+    python mock_groq_server.py --port 8001 --latency lognormal:0.4,0.6 --tokens-per-second 300
+    GROQ_API_BASE_URL=http://127.0.0.1:8001/openai/v1 python run.py
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Roughly how many characters make up one token
+CHARS_PER_TOKEN = 4
+
+# Prompt markers identifying each agent, checked in order
+AGENT_MARKERS = [
+    ("syllabus", "Syllabus Agent"),
+    ("quiz", "Quiz Generator Agent"),
+    ("plan", "Planner Agent"),
+    ("resume", "Resume Analyzer Agent"),
+    ("interview", "Mock Interviewer Agent"),
+    ("evaluation", "Answer Evaluator Agent"),
+    ("feedback", "Feedback Agent"),
+]
+
+
+def parse_latency(spec):
+    """
+    Parse a latency distribution.
+
+    Accepted forms (seconds): "0.3", "fixed:0.3", "uniform:0.1,0.5",
+    "normal:0.4,0.1", "lognormal:0.4,0.6" (median, sigma) and
+    "exponential:0.4" (mean).
+
+    Args:
+        spec: Distribution spec string
+
+    Returns:
+        callable: Function taking a random.Random and returning seconds
+    """
+    spec = str(spec).strip()
+    kind, _, params = spec.partition(":")
+    if not params:
+        kind, params = "fixed", kind
+    values = [float(v) for v in params.split(",")]
+
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(rng.gauss(values[0], values[1]), 0.0)
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == "exponential":
+        return lambda rng: rng.expovariate(1 / values[0])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def detect_agent(prompt):
+    """
+    Work out which agent a prompt belongs to.
+
+    Args:
+        prompt: Prompt text
+
+    Returns:
+        str: Agent name, or "generic"
+    """
+    for agent, marker in AGENT_MARKERS:
+        if marker in prompt:
+            return agent
+    return "generic"
+
+
+# Question angles, so a topic's quiz questions are not near-duplicates
+QUESTION_ASPECTS = [
+    "best defines", "is a common misconception about", "describes a real-world use of",
+    "explains the history of", "compares two approaches to", "identifies a limitation of",
+    "gives an example of", "predicts the outcome of an experiment on", "summarises the key formula of",
+    "links cause and effect in", "ranks the main components of", "evaluates an argument about",
+]
+
+
+def _find(pattern, prompt, default):
+    match = re.search(pattern, prompt)
+    return match.group(1).strip() if match else default
+
+
+def _topics(prompt, rng, count=4):
+    subject = _find(r"(?:content for|quiz for|plan for) ([^.\n]+?)(?: with|\.|\n)", prompt, "the subject")
+    focus = _find(r"Topics to Focus on: ([^\n]+)", prompt, "")
+    if focus and focus != "all topics":
+        names = [t.strip() for t in focus.split(",") if t.strip()]
+    else:
+        names = [f"{subject} fundamentals", f"{subject} core concepts",
+                 f"Applied {subject}", f"Advanced {subject}"]
+    rng.shuffle(names)
+    return names[:count] or ["General"]
+
+
+def build_content(agent, prompt, rng):
+    """
+    Build the canned completion for an agent prompt.
+
+    Args:
+        agent: Agent name from detect_agent
+        prompt: Prompt text, used for counts, dates and topic names
+        rng: Random source seeded from the prompt
+
+    Returns:
+        dict: Response object matching the agent's requested schema
+    """
+    if agent == "syllabus":
+        return {"topics": [{
+            "name": topic,
+            "subtopics": [f"{topic}: part {i}" for i in range(1, 3)],
+            "learning_objectives": [f"Explain {topic.lower()}", f"Apply {topic.lower()} to problems"],
+        } for topic in _topics(prompt, rng)]}
+
+    if agent == "quiz":
+        count = int(_find(r"Number of Questions: (\d+)", prompt, "5"))
+        topics = _topics(prompt, rng)
+        offset = rng.randrange(len(QUESTION_ASPECTS))
+        questions = []
+        for i in range(1, count + 1):
+            topic = topics[(i - 1) % len(topics)]
+            aspect = QUESTION_ASPECTS[(offset + (i - 1) // len(topics)) % len(QUESTION_ASPECTS)]
+            questions.append({
+                "id": i,
+                "question": f"Question {i}: which statement {aspect} {topic}?",
+                "options": [f"{letter}. Statement {letter} about {topic}" for letter in "ABCD"],
+                "correct_answer": rng.choice("ABCD"),
+                "topic": topic,
+                "explanation": f"Statement is correct because of how {topic} works.",
+            })
+        return {"questions": questions}
+
+    if agent == "plan":
+        days = int(_find(r"Duration: (\d+) days", prompt, "7"))
+        hours = float(_find(r"Hours per day: ([\d.]+)", prompt, "2"))
+        start = datetime.strptime(_find(r"Start date: (\d{4}-\d{2}-\d{2})", prompt,
+                                        datetime.now().strftime("%Y-%m-%d")), "%Y-%m-%d")
+        topics = _topics(prompt, rng)
+        return {"plan": [{
+            "day": day,
+            "date": (start + timedelta(days=day - 1)).strftime("%Y-%m-%d"),
+            "topics": [topics[(day - 1) % len(topics)]],
+            "activities": ["Read notes", "Practice problems"] + (["Review session"] if day % 3 == 0 else []),
+            "duration_hours": hours,
+            "resources": ["Course textbook", "Practice set"],
+        } for day in range(1, days + 1)]}
+
+    if agent == "resume":
+        match = rng.randint(40, 95)
+        return {
+            "quality_score": rng.randint(5, 10),
+            "content_score": rng.randint(5, 10),
+            "job_fit_score": match // 10,
+            "match_percentage": match,
+            "strengths": ["Clear structure", "Relevant project experience"],
+            "gaps": ["No measurable outcomes listed"],
+            "suggestions": ["Quantify achievements", "Tailor the summary to the role"],
+        }
+
+    if agent == "interview":
+        role = _find(r"Agent for an? ([^\n]+?) position", prompt, "the role")
+        return {"questions": [{
+            "id": i,
+            "question": f"Question {i} for {role}: describe a time you {action}.",
+            "type": "behavioral" if i % 2 else "technical",
+        } for i, action in enumerate(["solved a hard bug", "designed a system", "led a project",
+                                      "optimized performance", "handled conflict"], start=1)]}
+
+    if agent == "evaluation":
+        score = rng.randint(4, 10)
+        return {"score": score, "feedback": f"A {'strong' if score >= 7 else 'partial'} answer; "
+                                            "add a concrete example and its outcome."}
+
+    if agent == "feedback":
+        answered = max(prompt.count('"answer":'), 1)
+        scores = [rng.randint(4, 10) for _ in range(answered)]
+        return {
+            "overall_impression": "Solid answers with room for more concrete examples.",
+            "overall_score": int(sum(scores) * 10 / answered),
+            "strengths": ["Structured answers", "Good technical vocabulary"],
+            "improvements": ["Give measurable results", "Be more concise"],
+            "detailed_feedback": [{"question_id": i, "feedback": f"Answer {i} was clear.", "score": score}
+                                  for i, score in enumerate(scores, start=1)],
+        }
+
+    return {"response": "This is a mock Groq completion."}
+
+
+class MockGroqServer(ThreadingHTTPServer):
+    """
+    OpenAI-compatible mock server.
+
+    Completions are deterministic for a given prompt and seed; latency and
+    fault injection draw from one seeded sequence in arrival order.
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, host="127.0.0.1", port=0, seed=0, latency="0", tokens_per_second=0,
+                 rate_limit_rate=0.0, retry_after=1.0, requests_per_minute=0,
+                 error_rate=0.0, error_codes=(500, 503), prose=False):
+        super().__init__((host, port), MockGroqHandler)
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._failures = deque()
+        self._window = deque()
+        self._thread = None
+        self.configure(latency=latency, tokens_per_second=tokens_per_second,
+                       rate_limit_rate=rate_limit_rate, retry_after=retry_after,
+                       requests_per_minute=requests_per_minute, error_rate=error_rate,
+                       error_codes=error_codes, prose=prose)
+        self.reset_stats()
+
+    @property
+    def url(self):
+        """Base URL to use as GROQ_API_BASE_URL."""
+        return f"http://{self.server_address[0]}:{self.server_port}/openai/v1"
+
+    def configure(self, **options):
+        """
+        Change behaviour while the server is running.
+
+        Args:
+            latency: Distribution spec for time to first token
+            tokens_per_second: Completion token rate (0 for instant)
+            rate_limit_rate: Probability of answering 429
+            retry_after: Retry-After seconds sent with injected 429s
+            requests_per_minute: Enforced RPM limit (0 for none)
+            error_rate: Probability of answering with a server error
+            error_codes: Status codes to choose server errors from
+            prose: Wrap JSON in chatty prose and markdown fences
+        """
+        with self._lock:
+            for name, value in options.items():
+                if name == "latency":
+                    self.latency_spec = value
+                    self.latency = parse_latency(value)
+                elif name == "error_codes":
+                    self.error_codes = tuple(int(code) for code in value)
+                else:
+                    setattr(self, name, value)
+
+    def fail_next(self, status, count=1, headers=None):
+        """Answer the next count requests with status, regardless of rates."""
+        with self._lock:
+            self._failures.extend([(status, headers or {})] * count)
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {
+                "requests": 0,
+                "completions": 0,
+                "streamed": 0,
+                "rate_limited": 0,
+                "errors": 0,
+                "in_flight": 0,
+                "max_in_flight": 0,
+                "completion_tokens": 0,
+                "by_agent": {},
+            }
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["by_agent"] = dict(self._stats["by_agent"])
+        return stats
+
+    def plan_request(self):
+        """
+        Decide how to answer the next request.
+
+        Returns:
+            tuple: (status, headers, latency_seconds)
+        """
+        with self._lock:
+            self._stats["requests"] += 1
+            latency = self.latency(self._rng)
+            if self._failures:
+                status, headers = self._failures.popleft()
+                self._stats["rate_limited" if status == 429 else "errors"] += 1
+                return status, headers, 0.0
+
+            now = time.monotonic()
+            if self.requests_per_minute:
+                while self._window and now - self._window[0] >= 60:
+                    self._window.popleft()
+                if len(self._window) >= self.requests_per_minute:
+                    self._stats["rate_limited"] += 1
+                    wait = 60 - (now - self._window[0])
+                    return 429, {"Retry-After": f"{wait:.2f}"}, 0.0
+                self._window.append(now)
+
+            roll = self._rng.random()
+            if roll < self.rate_limit_rate:
+                self._stats["rate_limited"] += 1
+                return 429, {"Retry-After": str(self.retry_after)}, 0.0
+            if roll < self.rate_limit_rate + self.error_rate:
+                self._stats["errors"] += 1
+                return self._rng.choice(self.error_codes), {}, latency
+            return 200, {}, latency
+
+    def record_completion(self, agent, tokens, streamed, started):
+        with self._lock:
+            if started:
+                self._stats["in_flight"] += 1
+                self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._stats["in_flight"])
+                return
+            self._stats["in_flight"] -= 1
+            self._stats["completions"] += 1
+            self._stats["streamed"] += int(streamed)
+            self._stats["completion_tokens"] += tokens
+            self._stats["by_agent"][agent] = self._stats["by_agent"].get(agent, 0) + 1
+
+    def start(self):
+        """Serve from a daemon thread; returns self for chaining."""
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-groq", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class MockGroqHandler(BaseHTTPRequestHandler):
+    """Request handler for MockGroqServer"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path.endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock-model", "object": "model"}]})
+        elif self.path == "/stats":
+            self._send_json(200, self.server.get_stats())
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        server = self.server
+        status, headers, latency = server.plan_request()
+        if status != 200:
+            time.sleep(latency)
+            message = "Rate limit reached" if status == 429 else "Injected server error"
+            self._send_json(status, {"error": {"message": message}}, headers)
+            return
+
+        prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+        agent = detect_agent(prompt)
+        digest = hashlib.sha256(f"{server.seed}:{prompt}".encode("utf-8")).hexdigest()
+        content = json.dumps(build_content(agent, prompt, random.Random(digest)), indent=2)
+        if server.prose:
+            content = f"Sure! Here is the result:\n```json\n{content}\n```\nLet me know if you need changes."
+
+        prompt_tokens = len(prompt) // CHARS_PER_TOKEN
+        completion_tokens = max(len(content) // CHARS_PER_TOKEN, 1)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        model = request.get("model", "mock-model")
+
+        server.record_completion(agent, completion_tokens, False, started=True)
+        try:
+            time.sleep(latency)
+            if request.get("stream"):
+                self._stream(content, usage, model, server.tokens_per_second)
+            else:
+                if server.tokens_per_second:
+                    time.sleep(completion_tokens / server.tokens_per_second)
+                self._send_json(200, {
+                    "id": f"chatcmpl-{digest[:12]}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                 "finish_reason": "stop"}],
+                    "usage": usage,
+                })
+        finally:
+            server.record_completion(agent, completion_tokens, bool(request.get("stream")), started=False)
+
+    def _stream(self, content, usage, model, tokens_per_second):
+        """Send the completion as SSE chunks of about one token each."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        delay = 1 / tokens_per_second if tokens_per_second else 0
+        for i in range(0, len(content), CHARS_PER_TOKEN):
+            chunk = {"object": "chat.completion.chunk", "model": model,
+                     "choices": [{"index": 0, "delta": {"content": content[i:i + CHARS_PER_TOKEN]}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            if delay:
+                time.sleep(delay)
+
+        final = {"object": "chat.completion.chunk", "model": model,
+                 "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                 "x_groq": {"usage": usage}}
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic mock Groq API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", default="0.3", help="e.g. 0.3, uniform:0.1,0.5, lognormal:0.4,0.6")
+    parser.add_argument("--tokens-per-second", type=float, default=0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="probability of a 429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--requests-per-minute", type=int, default=0, help="enforced RPM limit")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a 5xx")
+    parser.add_argument("--error-codes", default="500,503")
+    parser.add_argument("--prose", action="store_true", help="wrap JSON in prose and fences")
+    args = parser.parse_args()
+
+    server = MockGroqServer(
+        host=args.host, port=args.port, seed=args.seed, latency=args.latency,
+        tokens_per_second=args.tokens_per_second, rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after, requests_per_minute=args.requests_per_minute,
+        error_rate=args.error_rate, error_codes=args.error_codes.split(","), prose=args.prose,
+    )
+    print(f"Mock Groq API listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Incremental evaluation of interview answers
+
+Each submitted answer is scored on its own by a background job and the
+result is stored per (interview, question), keyed by a hash of the answer
+so that an edited answer is evaluated again. Final feedback then only
+aggregates the stored evaluations and asks for a short written summary,
+instead of sending every question and answer in one long prompt.
+"""
+
+import hashlib
+import json
+
+# Stored next to the interviews they belong to
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS interview_evaluations (
+        interview_id INTEGER NOT NULL,
+        question_id TEXT NOT NULL,
+        answer_hash TEXT NOT NULL,
+        score REAL NOT NULL,
+        feedback TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (interview_id, question_id),
+        FOREIGN KEY (interview_id) REFERENCES interviews (id)
+    )
+    """,
+]
+
+
+def answer_hash(answer):
+    """Short hash identifying the text of an answer."""
+    return hashlib.sha256(str(answer).encode("utf-8")).hexdigest()[:16]
+
+
+def evaluation_key(interview_id, question_id, answer):
+    """Dedupe key of the evaluation job for one answer."""
+    return f"answer_evaluation:{interview_id}:{question_id}:{answer_hash(answer)}"
+
+
+def evaluation_prompt(job_role, question, answer):
+    """
+    Build the prompt scoring a single answer.
+
+    Args:
+        job_role: Role the interview is for
+        question: Question dict with question and type
+        answer: Candidate's answer
+
+    Returns:
+        str: Prompt text
+    """
+    return f"""You are an Answer Evaluator Agent for a {job_role} interview.
+        Evaluate the candidate's answer to one {question.get('type', 'interview')} question.
+
+        Question: {question.get('question', '')}
+
+        Answer: {answer}
+
+        Score the answer from 0 to 10 and give two or three sentences of specific feedback.
+
+        Format your response as JSON with the following structure:
+        {{"score": 0-10, "feedback": "text"}}
+        """
+
+
+def parse_evaluation(data):
+    """
+    Validate an evaluation returned by the model.
+
+    Args:
+        data: Parsed JSON from the evaluation response
+
+    Returns:
+        tuple: (score clamped to 0-10, feedback text)
+
+    Raises:
+        ValueError: If the score or feedback is missing
+    """
+    if not isinstance(data, dict) or not data.get("feedback"):
+        raise ValueError("Evaluation has no feedback")
+    try:
+        score = float(data["score"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Evaluation has no numeric score")
+    return min(max(score, 0.0), 10.0), str(data["feedback"])
+
+
+def save_evaluation(conn, interview_id, question_id, answer, score, feedback):
+    """Store the evaluation of an answer, replacing one of an older answer."""
+    conn.execute(
+        "INSERT INTO interview_evaluations (interview_id, question_id, answer_hash, score, feedback) "
+        "VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (interview_id, question_id) DO UPDATE SET answer_hash = excluded.answer_hash, "
+        "score = excluded.score, feedback = excluded.feedback, created_at = CURRENT_TIMESTAMP",
+        (interview_id, str(question_id), answer_hash(answer), score, feedback)
+    )
+
+
+def load_evaluations(conn, interview_id, answers):
+    """
+    Stored evaluations that match the current answers of an interview.
+
+    Args:
+        conn: Database connection
+        interview_id: Interview ID
+        answers: Dict of question ID to current answer text
+
+    Returns:
+        dict: Question ID to {"score", "feedback"}; stale evaluations are left out
+    """
+    evaluations = {}
+    for row in conn.execute(
+        "SELECT question_id, answer_hash, score, feedback FROM interview_evaluations WHERE interview_id = ?",
+        (interview_id,)
+    ):
+        question_id = row[0]
+        if question_id in answers and row[1] == answer_hash(answers[question_id]):
+            evaluations[question_id] = {"score": row[2], "feedback": row[3]}
+    return evaluations
+
+
+def _question_id(question_id):
+    return int(question_id) if str(question_id).isdigit() else question_id
+
+
+def summary_prompt(job_role, qa_pairs, evaluations):
+    """
+    Build the short prompt summarising already evaluated answers.
+
+    Only the questions, scores and per-answer feedback are sent, not the
+    answers themselves.
+
+    Args:
+        job_role: Role the interview is for
+        qa_pairs: Answered questions, each with question_id, question and type
+        evaluations: Question ID to {"score", "feedback"}
+
+    Returns:
+        str: Prompt text
+    """
+    evaluated = [{
+        "question": pair["question"],
+        "type": pair["type"],
+        "score": evaluations[pair["question_id"]]["score"],
+        "feedback": evaluations[pair["question_id"]]["feedback"],
+    } for pair in qa_pairs]
+    return f"""You are a Feedback Agent for a {job_role} interview.
+        Each answer of this mock interview has already been scored (0-10) and reviewed:
+
+        {json.dumps(evaluated, indent=2)}
+
+        Summarise the candidate's performance in a short overall impression, with the
+        main strengths and areas for improvement across all answers.
+
+        Format your response as JSON with the following structure:
+        {{"overall_impression": "text", "strengths": [list], "improvements": [list]}}
+        """
+
+
+def aggregate_feedback(qa_pairs, evaluations, summary):
+    """
+    Combine stored evaluations and the summary into the feedback document.
+
+    The result has the same shape as feedback generated in one call: the
+    overall score is the mean answer score scaled to 0-100 and
+    detailed_feedback lists the stored evaluations.
+
+    Args:
+        qa_pairs: Answered questions, each with question_id
+        evaluations: Question ID to {"score", "feedback"}
+        summary: Parsed summary with overall_impression, strengths and improvements
+
+    Returns:
+        dict: Interview feedback
+    """
+    detailed = [{
+        "question_id": _question_id(pair["question_id"]),
+        "feedback": evaluations[pair["question_id"]]["feedback"],
+        "score": evaluations[pair["question_id"]]["score"],
+    } for pair in qa_pairs]
+    scores = [item["score"] for item in detailed]
+    summary = summary if isinstance(summary, dict) else {}
+    return {
+        "overall_impression": summary.get("overall_impression", ""),
+        "overall_score": round(sum(scores) * 10 / len(scores)) if scores else 0,
+        "strengths": summary.get("strengths", []),
+        "improvements": summary.get("improvements", []),
+        "detailed_feedback": detailed,
+    }
@@ -0,0 +1,558 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Asyncio Groq API client
+
+This module provides AsyncGroqClient, the coroutine counterpart of
+GroqClient. Every upstream call made in a worker process runs on one
+background event loop that owns a pooled ``httpx.AsyncClient``, so a single
+process can keep hundreds of Groq calls in flight while request threads
+(or per-request event loops created by Flask's async views) simply await
+the result. Requires the optional ``httpx`` package.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+from services.groq_client import BatchItem, BatchResult, GroqClient
+from services.http_transport import HTTPStatusError, TransportError, TransportTimeout
+from services.rate_limiter import RateLimitExceeded, backoff_delay, estimate_tokens
+from services.response_cache import make_cache_key
+from utils.logger import log_error, log_groq_api_request, log_info
+
+try:
+    import httpx
+except ImportError:  # The async client is optional
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (needed by httpx for HTTP/2)
+except ImportError:
+    h2 = None
+
+# Marks the end of a stream relayed between event loops
+_END_OF_STREAM = object()
+
+
+class _LoopThread:
+    """A daemon thread running the event loop that owns upstream connections."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="groq-async-loop", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+
+_loop_thread = None
+_loop_thread_lock = threading.Lock()
+
+
+def _get_loop_thread():
+    """Get this process's background loop, starting a new one after a fork."""
+    global _loop_thread
+    if _loop_thread is None or _loop_thread.pid != os.getpid():
+        with _loop_thread_lock:
+            if _loop_thread is None or _loop_thread.pid != os.getpid():
+                _loop_thread = _LoopThread()
+                log_info(f"Started Groq async event loop (pid {_loop_thread.pid})")
+    return _loop_thread
+
+
+class _AsyncFlight:
+    """One in-progress call shared by coroutines on the background loop."""
+
+    def __init__(self):
+        self.event = asyncio.Event()
+        self.result = None
+        self.failed = False
+
+
+class AsyncGroqClient(GroqClient):
+    """
+    Groq client whose generation methods are coroutines.
+
+    Takes the same constructor arguments and exposes the same method names as
+    GroqClient, and shares its response cache, rate limiter and retry policy.
+    Identical concurrent prompts are coalesced within the process, and across
+    workers through the same single-flight lease file as GroqClient.
+    """
+
+    def __init__(self, *args, max_connections=None, **kwargs):
+        if httpx is None:
+            raise ImportError("AsyncGroqClient requires httpx; install it with 'pip install httpx'")
+        super().__init__(*args, **kwargs)
+
+        self.max_connections = max_connections or self.config.GROQ_ASYNC_MAX_CONNECTIONS
+        self._http = None
+        self._http_pid = None
+
+        # Only touched from the background loop
+        self._flights = {}
+        self._async_stats = {
+            "requests": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "coalesced": 0,
+        }
+
+    def get_stats(self) -> dict:
+        """Get pool, cache, coalescing and rate limiter statistics for this client."""
+        stats = super().get_stats()
+        stats["async_transport"] = dict(self._async_stats, max_connections=self.max_connections,
+                                        http2=self._use_http2())
+        return stats
+
+    def _use_http2(self):
+        return self.config.GROQ_HTTP2 and h2 is not None
+
+    def _get_http(self):
+        """Get the pooled AsyncClient; must be called on the background loop."""
+        if self._http is None or self._http_pid != os.getpid():
+            self._http = httpx.AsyncClient(
+                http2=self._use_http2(),
+                timeout=httpx.Timeout(self.config.GROQ_READ_TIMEOUT,
+                                      connect=self.config.GROQ_CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+            self._http_pid = os.getpid()
+        return self._http
+
+    async def _on_loop(self, coro):
+        """Run coro on the background loop and await it from the caller's loop."""
+        loop_thread = _get_loop_thread()
+        if asyncio.get_running_loop() is loop_thread.loop:
+            return await coro
+        future = asyncio.run_coroutine_threadsafe(coro, loop_thread.loop)
+        return await asyncio.wrap_future(future)
+
+    async def _off_loop(self, rate_limiter, fn, *args):
+        """Await fn(*args), in a worker thread when it may write a file-backed rate limiter."""
+        if rate_limiter is not None and rate_limiter.db_path:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def _send_once(self, send, endpoint):
+        """Await send(endpoint), translating httpx errors into transport errors."""
+        self._async_stats["requests"] += 1
+        self._async_stats["in_flight"] += 1
+        self._async_stats["max_in_flight"] = max(self._async_stats["max_in_flight"],
+                                                 self._async_stats["in_flight"])
+        try:
+            return await send(endpoint)
+        except HTTPStatusError:
+            self._async_stats["errors"] += 1
+            raise
+        except httpx.TimeoutException as e:
+            self._async_stats["errors"] += 1
+            raise TransportTimeout(str(e)) from e
+        except httpx.HTTPError as e:
+            self._async_stats["errors"] += 1
+            raise TransportError(str(e)) from e
+        finally:
+            self._async_stats["in_flight"] -= 1
+
+    async def _send(self, send, estimated_tokens):
+        """Await send(endpoint) within the rate limit, retrying 429 and 5xx responses.
+
+        Returns:
+            tuple: (result, rate limiter the successful attempt was charged to)
+        """
+        deadline = time.monotonic() + self.call_deadline
+        attempt = 0
+        endpoint = None
+        while True:
+            endpoint, rate_limiter = self._acquire_endpoint(failed=endpoint)
+            try:
+                if rate_limiter is not None:
+                    await rate_limiter.acquire_async(estimated_tokens, deadline)
+                start = time.monotonic()
+                result = await self._send_once(send, endpoint)
+            except RateLimitExceeded:
+                self._release_endpoint(endpoint)
+                raise
+            except TransportError as e:
+                # May reconcile or block the limiter, which takes its file's write lock
+                delay = await self._off_loop(rate_limiter, self._failover_delay, e, endpoint, attempt,
+                                             estimated_tokens, deadline, rate_limiter)
+            except BaseException:
+                # Includes cancellation of a losing hedge
+                self._release_endpoint(endpoint)
+                raise
+            else:
+                self._release_endpoint(endpoint, ok=True, latency_ms=(time.monotonic() - start) * 1000)
+                return result, rate_limiter
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _request_completion_async(self, prompt, temperature, max_tokens, model=None, task=None):
+        """Send a chat completion request, hedged if the task allows; returns (content, tokens_used)."""
+        model = model or self.model
+        return await self._hedged_async(
+            task, lambda: self._call_upstream_async(prompt, temperature, max_tokens, model, task))
+
+    async def _hedged_async(self, task, make_call):
+        """Await make_call(); past the task's hedge delay, race a second call and cancel the loser."""
+        delay = self.router.hedge_delay(task)
+        if delay is None:
+            return await make_call()
+
+        primary = asyncio.ensure_future(make_call())
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        log_info(f"Hedging slow {task} call after {delay:.2f}s")
+        hedge = asyncio.ensure_future(make_call())
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        self.router.record_hedge(task, won=future is hedge)
+                        return future.result()
+                    error = future.exception()
+        finally:
+            for future in pending:
+                future.cancel()
+        self.router.record_hedge(task, won=False)
+        raise error
+
+    async def _call_upstream_async(self, prompt, temperature, max_tokens, model, task):
+        """Make one upstream completion call; returns (content, tokens_used)."""
+        if self.cassette is not None and self.cassette.replaying:
+            entry, delay = self._replay_completion(prompt, temperature, max_tokens, model)
+            await asyncio.sleep(delay)
+            self.router.observe(task, model, entry["latency_ms"], entry["tokens"])
+            return entry["response"], entry["tokens"]
+
+        headers, data = self._build_request(prompt, temperature, max_tokens, model=model)
+        estimated_tokens = estimate_tokens(prompt, max_tokens)
+
+        prompt_type = prompt.split('\n')[0][:50]
+        log_groq_api_request(prompt_type)
+
+        async def send(endpoint):
+            url, request_headers = self._target(endpoint, headers)
+            response = await self._get_http().post(url, headers=request_headers, json=data)
+            if response.status_code >= 400:
+                raise HTTPStatusError(response.status_code, dict(response.headers), response.text)
+            return response
+
+        start_time = time.time()
+        try:
+            response, rate_limiter = await self._send(send, estimated_tokens)
+            result = response.json()
+
+            choices = result.get("choices", [])
+            if not choices:
+                raise Exception(f"No choices in response: {result}")
+            content = choices[0]["message"]["content"]
+
+        except Exception as e:
+            log_error(f"Groq API request failed: {str(e)}")
+            raise
+
+        response_time = int((time.time() - start_time) * 1000)
+        tokens_used = result.get("usage", {}).get("total_tokens", 0)
+        log_groq_api_request(prompt_type, tokens_used, response_time)
+        if tokens_used and rate_limiter is not None:
+            await rate_limiter.reconcile_async(estimated_tokens, tokens_used)
+        self.router.observe(task, model, response_time, tokens_used)
+        if self.cassette is not None:
+            self.cassette.record(model, prompt, temperature, max_tokens, content,
+                                 tokens_used, response_time)
+        return content, tokens_used
+
+    async def _fetch(self, prompt, temperature, max_tokens, flight_key, model=None, task=None):
+        """
+        Make the upstream call on the background loop, coalescing by flight_key
+        within the process and, through the single-flight lease, across workers.
+
+        Returns:
+            tuple: (content, tokens_used, led) where led is False for callers
+            that received another caller's result
+        """
+        while flight_key is not None:
+            flight = self._flights.get(flight_key)
+            if flight is None:
+                break
+            try:
+                await asyncio.wait_for(flight.event.wait(), self.single_flight.wait_timeout)
+            except asyncio.TimeoutError:
+                break
+            if not flight.failed:
+                self._async_stats["coalesced"] += 1
+                return flight.result, 0, False
+            # The leader failed; loop so that one waiter retries as the new leader
+
+        if flight_key is None or flight_key in self._flights:
+            content, tokens = await self._request_completion_async(prompt, temperature, max_tokens,
+                                                                   model, task)
+            return content, tokens, True
+
+        flight = self._flights[flight_key] = _AsyncFlight()
+        tokens_used = []
+
+        async def call():
+            content, tokens = await self._request_completion_async(prompt, temperature, max_tokens,
+                                                                   model, task)
+            tokens_used.append(tokens)
+            return content
+
+        try:
+            # The process's leader also takes the cross-worker lease, so only
+            # one worker on the host calls upstream
+            flight.result = await self.single_flight.lead_async(flight_key, call)
+            return flight.result, sum(tokens_used), bool(tokens_used)
+        except BaseException:
+            flight.failed = True
+            raise
+        finally:
+            del self._flights[flight_key]
+            flight.event.set()
+
+    async def _chat_completion_async(self, prompt, temperature, max_tokens,
+                                     use_cache=True, refresh_cache=False, task=None, validate=None):
+        """Return (content, tokens_used) for a prompt, consulting the cache first."""
+        model = self.model_for(task)
+        cache_key = make_cache_key(model, prompt, temperature, max_tokens)
+        cached_lookup = use_cache and self.cache is not None
+        if cached_lookup and not refresh_cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached, 0
+
+        coalesce = self.single_flight is not None and use_cache and not refresh_cache
+        content, tokens, led = await self._on_loop(
+            self._fetch(prompt, temperature, max_tokens, cache_key if coalesce else None, model, task))
+        if cached_lookup and led:
+            self._cache_response(cache_key, content, validate)
+        return content, tokens
+
+    async def generate_response(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2048,
+                                use_cache: bool = True, refresh_cache: bool = False, task: str = None,
+                                validate=None) -> str:
+        """Generate a plain text response from Groq API, routed and recorded by task.
+
+        A response that validate rejects is returned but not cached.
+        """
+        content, _ = await self._chat_completion_async(prompt, temperature, max_tokens,
+                                                       use_cache, refresh_cache, task, validate)
+        return content
+
+    async def stream_response(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2048,
+                              use_cache: bool = True, refresh_cache: bool = False, task: str = None,
+                              validate=None):
+        """Generate a plain text response from Groq API, yielding text as it arrives.
+
+        The stream is read on the background loop and relayed to the caller's
+        loop chunk by chunk; closing the generator early cancels the request.
+        """
+        model = self.model_for(task)
+        cache_key = None
+        if self.cache is not None and use_cache:
+            cache_key = make_cache_key(model, prompt, temperature, max_tokens)
+            if not refresh_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    yield cached
+                    return
+
+        caller_loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def relay(item):
+            caller_loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        loop_thread = _get_loop_thread()
+        future = asyncio.run_coroutine_threadsafe(
+            self._produce_stream(prompt, temperature, max_tokens, relay, model, task), loop_thread.loop)
+
+        parts = []
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END_OF_STREAM:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                parts.append(item)
+                yield item
+        finally:
+            future.cancel()
+
+        if cache_key is not None and parts:
+            self._cache_response(cache_key, "".join(parts), validate)
+
+    async def _produce_stream(self, prompt, temperature, max_tokens, relay, model=None, task=None):
+        """Read a streamed completion on the background loop and relay each chunk."""
+        model = model or self.model
+        if self.cassette is not None and self.cassette.replaying:
+            try:
+                entry, _ = self._replay_completion(prompt, temperature, max_tokens, model)
+            except Exception as e:
+                relay(e)
+                return
+            for delay, text in self.cassette.replay_chunks(entry):
+                await asyncio.sleep(delay)
+                relay(text)
+            self.router.observe(task, model, entry["latency_ms"], entry["tokens"])
+            relay(_END_OF_STREAM)
+            return
+
+        headers, data = self._build_request(prompt, temperature, max_tokens, stream=True, model=model)
+        estimated_tokens = estimate_tokens(prompt, max_tokens)
+
+        prompt_type = prompt.split('\n')[0][:50]
+        log_groq_api_request(prompt_type)
+
+        async def open_stream(endpoint):
+            url, request_headers = self._target(endpoint, headers)
+            request = self._get_http().build_request("POST", url, headers=request_headers, json=data)
+            response = await self._get_http().send(request, stream=True)
+            if response.status_code >= 400:
+                await response.aread()
+                await response.aclose()
+                raise HTTPStatusError(response.status_code, dict(response.headers), response.text)
+            return response
+
+        start_time = time.time()
+        first_token_ms = None
+        parts = []
+        tokens_used = 0
+        try:
+            response, rate_limiter = await self._send(open_stream, estimated_tokens)
+            try:
+                async for line in response.aiter_lines():
+                    if not line or not line.startswith("data:"):
+                        continue
+                    event_data = line[len("data:"):].strip()
+                    if event_data == "[DONE]":
+                        break
+
+                    chunk = json.loads(event_data)
+                    usage = chunk.get("usage") or chunk.get("x_groq", {}).get("usage") or {}
+                    tokens_used = usage.get("total_tokens", tokens_used)
+
+                    for choice in chunk.get("choices", []):
+                        text = (choice.get("delta") or {}).get("content")
+                        if text:
+                            if first_token_ms is None:
+                                first_token_ms = int((time.time() - start_time) * 1000)
+                            parts.append(text)
+                            relay(text)
+            finally:
+                await response.aclose()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log_error(f"Groq API streaming request failed: {str(e)}")
+            relay(e)
+            return
+
+        response_time = int((time.time() - start_time) * 1000)
+        log_groq_api_request(prompt_type, tokens_used, response_time)
+        if tokens_used and rate_limiter is not None:
+            await rate_limiter.reconcile_async(estimated_tokens, tokens_used)
+        self.router.observe(task, model, response_time, tokens_used)
+        if self.cassette is not None:
+            self.cassette.record(model, prompt, temperature, max_tokens, "".join(parts),
+                                 tokens_used, response_time, first_token_ms)
+        relay(_END_OF_STREAM)
+
+    async def generate_structured_response(self, prompt: str, expect_json: bool = True,
+                                           temperature: float = 0.7, max_tokens: int = 2048,
+                                           use_cache: bool = True, refresh_cache: bool = False,
+                                           task: str = None):
+        """Generate a structured (JSON) response from Groq API."""
+        if expect_json:
+            prompt = f"{prompt}\n\nReturn ONLY valid JSON as response."
+
+        content = await self.generate_response(prompt, temperature, max_tokens, use_cache, refresh_cache,
+                                               task)
+
+        if expect_json:
+            try:
+                return json.loads(content)
+            except json.JSONDecodeError as e:
+                log_error(f"Failed to parse JSON response: {str(e)}")
+                log_error(f"Raw content: {content[:500]}...")
+                raise
+
+        return content
+
+    async def _run_batch_item_async(self, item, semaphore, temperature, max_tokens, use_cache, retries,
+                                    task=None):
+        """Generate one batch item, retrying failures without raising."""
+        async with semaphore:
+            start_time = time.time()
+            while True:
+                item.attempts += 1
+                try:
+                    item.response, tokens = await self._chat_completion_async(
+                        item.prompt, temperature, max_tokens, use_cache, task=task)
+                    item.tokens += tokens
+                    item.error = None
+                    break
+                except Exception as e:
+                    item.error = e
+                    if item.attempts > retries:
+                        log_error(f"Batch item {item.index} failed after {item.attempts} attempts: {str(e)}")
+                        break
+                    await asyncio.sleep(backoff_delay(item.attempts - 1, self.backoff_base, self.backoff_max))
+            item.elapsed_ms = int((time.time() - start_time) * 1000)
+        return item
+
+    async def generate_many_as_completed(self, prompts, max_concurrency: int = 4, temperature: float = 0.7,
+                                         max_tokens: int = 2048, use_cache: bool = True, retries: int = 1,
+                                         task: str = None):
+        """Generate responses for many prompts, yielding each BatchItem as it finishes."""
+        items = [BatchItem(index, prompt) for index, prompt in enumerate(prompts)]
+        if not items:
+            return
+
+        start_time = time.time()
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        futures = [asyncio.ensure_future(self._run_batch_item_async(item, semaphore, temperature,
+                                                                    max_tokens, use_cache, retries, task))
+                   for item in items]
+        try:
+            for next_done in asyncio.as_completed(futures):
+                yield await next_done
+        finally:
+            for future in futures:
+                future.cancel()
+
+        wall_time_ms = int((time.time() - start_time) * 1000)
+        failed = sum(1 for item in items if not item.ok)
+        log_info(f"Groq batch of {len(items)} prompts finished in {wall_time_ms}ms - "
+                 f"Tokens: {sum(item.tokens for item in items)} - Failed: {failed}")
+
+    async def generate_many(self, prompts, max_concurrency: int = 4, temperature: float = 0.7,
+                            max_tokens: int = 2048, use_cache: bool = True, retries: int = 1,
+                            task: str = None) -> BatchResult:
+        """Generate responses for many prompts concurrently, returned in prompt order."""
+        start_time = time.time()
+        items = [item async for item in self.generate_many_as_completed(
+            prompts, max_concurrency, temperature, max_tokens, use_cache, retries, task)]
+        items.sort(key=lambda item: item.index)
+        return BatchResult(items, int((time.time() - start_time) * 1000))
+
+    async def aclose(self):
+        """Close pooled connections."""
+        if self._http is not None and self._http_pid == os.getpid():
+            http, self._http = self._http, None
+            await self._on_loop(http.aclose())
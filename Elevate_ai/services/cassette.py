@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Record/replay cassettes for Groq completions
+
+In record mode every upstream completion (prompt, response, tokens and
+measured latency) and every incoming app request is appended to a gzipped
+JSON-lines cassette. In replay mode the Groq clients answer from the
+cassette instead of the network, optionally sleeping for the recorded
+latency, so recorded production traffic can be pushed through the app and
+benchmarked offline (see benchmarks/bench_replay.py).
+"""
+
+import base64
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from services.http_transport import TransportError
+from services.response_cache import make_cache_key
+
+# Dates in prompts (e.g. a plan's start date) change from day to day
+_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# Paths never worth recording
+_SKIP_PREFIXES = ("/static/",)
+
+
+class CassetteMiss(TransportError):
+    """Raised in replay mode when a prompt was never recorded."""
+
+
+def loose_key(model, prompt, temperature, max_tokens):
+    """
+    Build a fallback key that also ignores calendar dates in the prompt.
+
+    Args:
+        model: Model name
+        prompt: Prompt text
+        temperature: Sampling temperature
+        max_tokens: Completion token limit
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    return make_cache_key(model, _DATE_RE.sub("<date>", prompt), temperature, max_tokens)
+
+
+def read_entries(path):
+    """
+    Read every entry of a cassette file in recorded order.
+
+    Args:
+        path: Cassette file path
+
+    Returns:
+        list: Entry dicts
+    """
+    entries = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entries.append(json.loads(line))
+    return entries
+
+
+class Cassette:
+    """
+    Completion recorder and player.
+
+    Keys are the response-cache keys, so prompts that differ only in
+    whitespace match; if no exact match exists, a key that also ignores
+    dates is tried. A prompt recorded several times is replayed in
+    recorded order, cycling when exhausted.
+    """
+
+    def __init__(self, path, mode="replay", latency_scale=1.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._loose = {}
+        self._stats = {"recorded": 0, "requests_recorded": 0, "hits": 0, "loose_hits": 0, "misses": 0}
+
+        if mode == "record":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        else:
+            for entry in read_entries(path):
+                if entry["type"] == "call":
+                    self._calls.setdefault(entry["key"], deque()).append(entry)
+                    self._loose.setdefault(entry["loose_key"], deque()).append(entry)
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    def _append(self, entry):
+        """Append one entry as its own gzip member, so concurrent workers never interleave."""
+        data = gzip.compress((json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8"))
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    def record(self, model, prompt, temperature, max_tokens, response, tokens,
+               latency_ms, first_token_ms=None):
+        """
+        Record one completion.
+
+        Args:
+            model: Model name
+            prompt: Prompt text
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+            response: Completion text
+            tokens: usage.total_tokens
+            latency_ms: Time until the full response had arrived
+            first_token_ms: Time to the first streamed chunk, for streams
+        """
+        self._append({
+            "type": "call",
+            "key": make_cache_key(model, prompt, temperature, max_tokens),
+            "loose_key": loose_key(model, prompt, temperature, max_tokens),
+            "ts": round(time.time(), 3),
+            "model": model,
+            "prompt": prompt,
+            "response": response,
+            "tokens": tokens,
+            "latency_ms": latency_ms,
+            "first_token_ms": first_token_ms,
+        })
+        with self._lock:
+            self._stats["recorded"] += 1
+
+    def record_request(self, method, path, query, form, files):
+        """
+        Record one incoming app request for later replay.
+
+        Args:
+            method: HTTP method
+            path: Request path
+            query: Query string
+            form: Dict of form fields
+            files: Dict of field -> (filename, bytes)
+        """
+        self._append({
+            "type": "request",
+            "ts": round(time.time(), 3),
+            "method": method,
+            "path": path,
+            "query": query,
+            "form": form,
+            "files": {name: [filename, base64.b64encode(data).decode("ascii")]
+                      for name, (filename, data) in files.items()},
+        })
+        with self._lock:
+            self._stats["requests_recorded"] += 1
+
+    def lookup(self, model, prompt, temperature, max_tokens):
+        """
+        Get the recorded entry for a prompt.
+
+        Returns:
+            dict: Entry with response, tokens and latency
+
+        Raises:
+            CassetteMiss: If neither key was recorded
+        """
+        key = make_cache_key(model, prompt, temperature, max_tokens)
+        with self._lock:
+            entries, stat = self._calls.get(key), "hits"
+            if not entries:
+                entries = self._loose.get(loose_key(model, prompt, temperature, max_tokens))
+                stat = "loose_hits"
+            if not entries:
+                self._stats["misses"] += 1
+                raise CassetteMiss(f"No cassette entry for prompt {prompt.split(chr(10))[0][:50]!r}")
+            self._stats[stat] += 1
+            entry = entries[0]
+            entries.rotate(-1)
+        return entry
+
+    def replay_delay(self, entry, first_token=False):
+        """Seconds to wait before answering with entry, after scaling."""
+        ms = entry.get("first_token_ms") if first_token else None
+        if ms is None:
+            ms = entry.get("latency_ms") or 0
+        return ms * self.latency_scale / 1000
+
+    def replay_chunks(self, entry, size=16):
+        """
+        Split a recorded response into stream chunks.
+
+        The first chunk waits for the recorded time to first token and the
+        rest share the remaining recorded latency evenly.
+
+        Returns:
+            list: (delay_seconds, text) pairs
+        """
+        text = entry["response"]
+        chunks = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        first = self.replay_delay(entry, first_token=True)
+        rest = max(self.replay_delay(entry) - first, 0) / max(len(chunks) - 1, 1)
+        return [(first if i == 0 else rest, chunk) for i, chunk in enumerate(chunks)]
+
+    def get_stats(self):
+        """
+        Get record/replay counters for this process.
+
+        Returns:
+            dict: Cassette statistics
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["mode"] = self.mode
+        return stats
+
+
+def register_request_recorder(app, cassette):
+    """
+    Record every incoming request to the cassette while it is recording.
+
+    Args:
+        app: Flask application
+        cassette: Cassette, or None to do nothing
+    """
+    if cassette is None or cassette.replaying:
+        return
+
+    from flask import request
+
+    @app.before_request
+    def record_request():
+        if request.path.startswith(_SKIP_PREFIXES):
+            return
+        files = {}
+        for name, storage in request.files.items():
+            files[name] = (storage.filename, storage.stream.read())
+            storage.stream.seek(0)
+        cassette.record_request(request.method, request.path, request.query_string.decode("utf-8"),
+                                request.form.to_dict(), files)
+
+
+_default_cassette = None
+_default_cassette_lock = threading.Lock()
+
+
+def get_default_cassette(config):
+    """
+    Get the process-wide cassette, or None when record/replay is off.
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        Cassette or None: Shared cassette instance
+    """
+    global _default_cassette
+    if not config.GROQ_CASSETTE_MODE:
+        return None
+    if _default_cassette is None:
+        with _default_cassette_lock:
+            if _default_cassette is None:
+                _default_cassette = Cassette(
+                    config.GROQ_CASSETTE_PATH,
+                    mode=config.GROQ_CASSETTE_MODE,
+                    latency_scale=config.GROQ_CASSETTE_LATENCY_SCALE,
+                )
+    return _default_cassette
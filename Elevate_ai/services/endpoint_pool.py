@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Load balancing across OpenAI-compatible endpoints and API keys
+
+This module lets the Groq clients spread calls over a pool of endpoints,
+each with its own base URL, key, weight and rate limits. A call goes to
+the endpoint with the fewest outstanding requests (or the lowest
+EWMA-latency cost) relative to its weight. Endpoints that keep failing are
+ejected by a circuit breaker and re-admitted after a successful half-open
+probe.
+"""
+
+import json
+import random
+import threading
+import time
+
+from services.http_transport import TransportError
+from services.rate_limiter import RateLimiter
+
+STRATEGIES = ("least_outstanding", "ewma")
+
+
+class EndpointUnavailable(TransportError):
+    """Raised when every endpoint in the pool is ejected."""
+
+    def __init__(self, message, retry_after=None):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class Endpoint:
+    """
+    One base URL and API key with its own budget and circuit breaker.
+
+    The breaker opens after failure_threshold consecutive failures (0
+    disables it). After reset_timeout seconds one probe request is let
+    through; its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, name, base_url, api_key, weight=1.0, rate_limiter=None,
+                 failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        if self.base_url.endswith("/chat/completions"):
+            self.base_url = self.base_url[:-len("/chat/completions")]
+        self.api_key = api_key
+        self.weight = float(weight)
+        self.rate_limiter = rate_limiter
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        # Guarded by the pool's lock
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.outstanding = 0
+        self.ewma_ms = None
+        self.stats = {"requests": 0, "errors": 0, "ejections": 0, "probes": 0}
+
+    def _available(self, now):
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            return now - self.opened_at >= self.reset_timeout
+        return not self.probing  # half-open: one probe at a time
+
+    def _open(self, now):
+        if self.state == "closed":
+            self.stats["ejections"] += 1
+        self.state = "open"
+        self.opened_at = now
+        self.probing = False
+
+
+class EndpointPool:
+    """
+    Pick endpoints for upstream calls and track their health.
+
+    Every acquire must be paired with a release. Ties between equally
+    good endpoints are broken at random in proportion to their weights.
+    """
+
+    def __init__(self, endpoints, strategy="least_outstanding", ewma_alpha=0.3):
+        if not endpoints:
+            raise ValueError("An endpoint pool needs at least one endpoint")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown endpoint strategy: {strategy}")
+        self.endpoints = list(endpoints)
+        self.strategy = strategy
+        self.ewma_alpha = ewma_alpha
+        self._lock = threading.Lock()
+
+    def _cost(self, endpoint):
+        if self.strategy == "ewma":
+            # Endpoints without samples cost nothing, so they get tried
+            return (endpoint.ewma_ms or 0.0) * (endpoint.outstanding + 1) / endpoint.weight
+        # Idle endpoints tie, so light traffic is shared by weight too
+        return endpoint.outstanding / endpoint.weight
+
+    def acquire(self, exclude=()):
+        """
+        Choose an endpoint for one call and count it as outstanding.
+
+        Args:
+            exclude: Endpoints to avoid if any other is available, e.g.
+                the one that just failed
+
+        Returns:
+            Endpoint: Chosen endpoint
+
+        Raises:
+            EndpointUnavailable: If every endpoint is ejected
+        """
+        with self._lock:
+            now = time.monotonic()
+            available = [e for e in self.endpoints if e._available(now)]
+            candidates = [e for e in available if e not in exclude] or available
+            if not candidates:
+                retry_after = min(e.opened_at + e.reset_timeout - now for e in self.endpoints)
+                raise EndpointUnavailable("All Groq endpoints are ejected", max(retry_after, 0.0))
+
+            best = min(self._cost(e) for e in candidates)
+            tied = [e for e in candidates if self._cost(e) == best]
+            endpoint = random.choices(tied, weights=[e.weight for e in tied])[0]
+
+            if endpoint.state == "open":
+                endpoint.state = "half_open"
+            if endpoint.state == "half_open":
+                endpoint.probing = True
+                endpoint.stats["probes"] += 1
+            endpoint.outstanding += 1
+            endpoint.stats["requests"] += 1
+            return endpoint
+
+    def release(self, endpoint, ok=None, latency_ms=None):
+        """
+        Finish a call made through acquire.
+
+        Args:
+            endpoint: Endpoint returned by acquire
+            ok: True if the endpoint answered, False if it failed (5xx,
+                timeout, connection error), None if the call ended without
+                saying anything about its health (e.g. cancelled)
+            latency_ms: Call latency to fold into the EWMA, for successes
+        """
+        with self._lock:
+            now = time.monotonic()
+            endpoint.outstanding -= 1
+            if ok is None:
+                endpoint.probing = False
+                return
+            if ok:
+                endpoint.consecutive_failures = 0
+                endpoint.state = "closed"
+                endpoint.probing = False
+                if latency_ms is not None:
+                    endpoint.ewma_ms = latency_ms if endpoint.ewma_ms is None else (
+                        self.ewma_alpha * latency_ms + (1 - self.ewma_alpha) * endpoint.ewma_ms)
+                return
+            endpoint.stats["errors"] += 1
+            endpoint.consecutive_failures += 1
+            if endpoint.state == "half_open" or (
+                    endpoint.failure_threshold and endpoint.consecutive_failures >= endpoint.failure_threshold):
+                endpoint._open(now)
+
+    def has_alternative(self, endpoint):
+        """Check whether another endpoint could take a call right now."""
+        with self._lock:
+            now = time.monotonic()
+            return any(e is not endpoint and e._available(now) for e in self.endpoints)
+
+    def get_stats(self):
+        """
+        Get load, latency and health figures for every endpoint.
+
+        Returns:
+            dict: Pool statistics
+        """
+        with self._lock:
+            return {
+                "strategy": self.strategy,
+                "endpoints": {
+                    e.name: dict(e.stats, state=e.state, outstanding=e.outstanding, weight=e.weight,
+                                 ewma_ms=round(e.ewma_ms, 1) if e.ewma_ms is not None else None,
+                                 rate_limiter=e.rate_limiter.get_stats() if e.rate_limiter else None)
+                    for e in self.endpoints
+                },
+            }
+
+
+def endpoints_from_config(config):
+    """
+    Build endpoints from GROQ_ENDPOINTS (JSON list) or GROQ_API_KEYS.
+
+    Each GROQ_ENDPOINTS entry needs base_url and api_key and may set name,
+    weight, requests_per_minute and tokens_per_minute. GROQ_API_KEYS is a
+    comma-separated list of keys for GROQ_API_BASE_URL.
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        list: Endpoint instances, empty when neither setting is used
+    """
+    specs = json.loads(config.GROQ_ENDPOINTS) if config.GROQ_ENDPOINTS else [
+        {"base_url": config.GROQ_API_BASE_URL, "api_key": key.strip()}
+        for key in config.GROQ_API_KEYS.split(",") if key.strip()
+    ]
+
+    endpoints = []
+    for i, spec in enumerate(specs, start=1):
+        name = spec.get("name") or f"endpoint-{i}"
+        rate_limiter = None
+        if config.GROQ_RATE_LIMIT_ENABLED:
+            rate_limiter = RateLimiter(
+                requests_per_minute=spec.get("requests_per_minute", config.GROQ_REQUESTS_PER_MINUTE),
+                tokens_per_minute=spec.get("tokens_per_minute", config.GROQ_TOKENS_PER_MINUTE),
+                db_path=config.GROQ_RATE_LIMIT_PATH or None,
+                name=f"groq:{name}",
+            )
+        endpoints.append(Endpoint(
+            name, spec["base_url"], spec["api_key"], weight=spec.get("weight", 1.0),
+            rate_limiter=rate_limiter, failure_threshold=config.GROQ_BREAKER_FAILURES,
+            reset_timeout=config.GROQ_BREAKER_RESET,
+        ))
+    return endpoints
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool(config):
+    """
+    Get the process-wide endpoint pool, or None when no pool is configured.
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        EndpointPool or None: Shared pool instance
+    """
+    global _default_pool
+    if not (config.GROQ_ENDPOINTS or config.GROQ_API_KEYS):
+        return None
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = EndpointPool(endpoints_from_config(config),
+                                             strategy=config.GROQ_ENDPOINT_STRATEGY)
+    return _default_pool
@@ -1,17 +1,90 @@
-import os
-import requests
+import itertools
 import json
+import os
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from utils.config import get_config
-from utils.logger import log_info, log_error, log_groq_api_request
+from utils.logger import log_info, log_error, log_warning, log_groq_api_request
+from services.cassette import get_default_cassette
+from services.endpoint_pool import get_default_pool
+from services.http_transport import HTTPStatusError, TransportError, get_default_transport
+from services.model_router import get_default_router
+from services.rate_limiter import (RateLimitExceeded, backoff_delay, estimate_tokens,
+                                   get_default_rate_limiter, parse_retry_after)
+from services.response_cache import get_default_cache, make_cache_key
+from services.single_flight import get_default_single_flight
+
+
+class BatchItem:
+    """Outcome of one prompt in a generate_many batch."""
+
+    def __init__(self, index, prompt):
+        self.index = index
+        self.prompt = prompt
+        self.response = None
+        self.error = None
+        self.attempts = 0
+        self.tokens = 0
+        self.elapsed_ms = 0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class BatchResult:
+    """Ordered batch items plus aggregate token and wall-time figures."""
+
+    def __init__(self, items, wall_time_ms):
+        self.items = items
+        self.wall_time_ms = wall_time_ms
+        self.total_tokens = sum(item.tokens for item in items)
+        self.succeeded = sum(1 for item in items if item.ok)
+        self.failed = len(items) - self.succeeded
+
+    @property
+    def responses(self):
+        """Responses in prompt order, None for failed items."""
+        return [item.response for item in self.items]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+
+_hedge_executor = None
+_hedge_executor_pid = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor():
+    """Get this process's pool for hedged calls, recreating it after a fork."""
+    global _hedge_executor, _hedge_executor_pid
+    if _hedge_executor is None or _hedge_executor_pid != os.getpid():
+        with _hedge_executor_lock:
+            if _hedge_executor is None or _hedge_executor_pid != os.getpid():
+                _hedge_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="groq-hedge")
+                _hedge_executor_pid = os.getpid()
+    return _hedge_executor
 
 
 class GroqClient:
-    def __init__(self, api_key=None, base_url=None, model=None):
+    def __init__(self, api_key=None, base_url=None, model=None, transport=None, cache=None,
+                 single_flight=None, rate_limiter=None, cassette=None, router=None, pool=None):
         """Initialize the Groq client."""
         self.config = get_config()
+
+        # Endpoints/keys to balance calls over; None sends everything to base_url
+        self.pool = pool if pool is not None else get_default_pool(self.config)
+
         self.api_key = api_key or self.config.GROQ_API_KEY
-        if not self.api_key:
+        if not self.api_key and self.pool is None:
             log_error("GROQ_API_KEY not found. Set it in .env file or pass it to the constructor.")
             raise ValueError("Missing GROQ_API_KEY")
 
@@ -22,38 +95,297 @@ class GroqClient:
 
         self.model = model or self.config.GROQ_API_MODEL
 
+        # Pooled keep-alive transport shared by all clients in this process
+        self.transport = transport or get_default_transport(self.config)
+
+        # Optional response cache (disabled unless GROQ_CACHE_ENABLED is set)
+        self.cache = cache if cache is not None else get_default_cache(self.config)
+
+        # Identical concurrent prompts share one upstream call
+        self.single_flight = (single_flight if single_flight is not None
+                              else get_default_single_flight(self.config))
+
+        # RPM/TPM budget shared by every client (and worker, if file-backed)
+        self.rate_limiter = (rate_limiter if rate_limiter is not None
+                             else get_default_rate_limiter(self.config))
+        self.max_retries = self.config.GROQ_MAX_RETRIES
+        self.call_deadline = self.config.GROQ_CALL_DEADLINE
+        self.backoff_base = self.config.GROQ_BACKOFF_BASE
+        self.backoff_max = self.config.GROQ_BACKOFF_MAX
+
+        # Record/replay cassette for offline benchmarking (off unless configured)
+        self.cassette = cassette if cassette is not None else get_default_cassette(self.config)
+
+        # Task -> model tier routing, per-task histograms and hedging
+        self.router = router if router is not None else get_default_router(self.config)
+
+        # Tokens used by upstream calls made on the current thread
+        self._usage = threading.local()
+
     def set_model(self, model_name: str):
         """Change the model used for generation."""
         self.model = model_name
 
-    def generate_response(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2048) -> str:
-        """Generate a plain text response from Groq API."""
+    def get_stats(self) -> dict:
+        """Get connection pool, cache and coalescing statistics for this client."""
+        stats = {"transport": self.transport.get_stats()}
+        if self.cache is not None:
+            stats["cache"] = self.cache.get_stats()
+        if self.single_flight is not None:
+            stats["single_flight"] = self.single_flight.get_stats()
+        if self.rate_limiter is not None:
+            stats["rate_limiter"] = self.rate_limiter.get_stats()
+        if self.cassette is not None:
+            stats["cassette"] = self.cassette.get_stats()
+        if self.pool is not None:
+            stats["endpoints"] = self.pool.get_stats()
+        stats["routing"] = self.router.get_stats()
+        return stats
+
+    def headroom(self) -> float:
+        """Fraction of rate-limit budget available now, on the best live endpoint."""
+        if self.pool is None:
+            limiters = [self.rate_limiter]
+        else:
+            limiters = [endpoint.rate_limiter for endpoint in self.pool.endpoints if endpoint.state != "open"]
+        return max((1.0 if limiter is None else limiter.headroom() for limiter in limiters), default=0.0)
+
+    def model_for(self, task=None) -> str:
+        """Get the model a task is routed to."""
+        return self.router.model_for(task, self.model)
+
+    def _cache_response(self, cache_key, content, validate=None):
+        """Cache a completion, unless validate rejects it."""
+        if validate is not None and not validate(content):
+            log_warning("Not caching a Groq response that failed validation")
+            return
+        self.cache.set(cache_key, content)
+
+    def _chat_completion(self, prompt: str, temperature: float, max_tokens: int,
+                         use_cache: bool = True, refresh_cache: bool = False, task: str = None,
+                         validate=None) -> str:
+        """Return the message content for a prompt, consulting the cache first.
+
+        use_cache=False bypasses the cache and coalescing entirely;
+        refresh_cache=True skips the lookup and is not coalesced with other
+        callers, but stores the fresh response. A response that validate
+        rejects is returned but not cached.
+        """
+        model = self.model_for(task)
+        cache_key = make_cache_key(model, prompt, temperature, max_tokens)
+        cached_lookup = use_cache and self.cache is not None
+        if cached_lookup and not refresh_cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        def fetch():
+            if cached_lookup and not refresh_cache:
+                # A flight that finished since our lookup may have filled the cache
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
+            content = self._request_completion(prompt, temperature, max_tokens, model, task)
+            if cached_lookup:
+                self._cache_response(cache_key, content, validate)
+            return content
+
+        if self.single_flight is not None and use_cache and not refresh_cache:
+            return self.single_flight.do(cache_key, fetch)
+        return fetch()
+
+    def _build_request(self, prompt: str, temperature: float, max_tokens: int, stream: bool = False,
+                       model: str = None):
+        """Build headers and body for a chat/completions request."""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
 
         data = {
-            "model": self.model,
+            "model": model or self.model,
             "messages": [{"role": "user", "content": prompt}],
             "temperature": temperature,
             "max_tokens": max_tokens
         }
+        if stream:
+            data["stream"] = True
+
+        return headers, data
+
+    def _target(self, endpoint, headers):
+        """Get the completions URL and headers for endpoint (None = this client's base_url and key)."""
+        if endpoint is None:
+            return f"{self.base_url}/chat/completions", headers
+        return (f"{endpoint.base_url}/chat/completions",
+                dict(headers, Authorization=f"Bearer {endpoint.api_key}"))
+
+    def _retry_delay(self, error, attempt, estimated_tokens, deadline, rate_limiter):
+        """Decide whether an HTTP error is retried and how long to sleep first.
+
+        Honours Retry-After (pausing every caller on a 429) and otherwise backs
+        off with full jitter. Re-raises the error when it is not retryable, the
+        retry budget is spent or the next attempt would pass the call deadline.
+        """
+        retryable = error.status_code == 429 or error.status_code >= 500
+        if not retryable or attempt >= self.max_retries:
+            raise error
+
+        delay = parse_retry_after(error.headers)
+        if delay is None:
+            delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+        if rate_limiter is not None:
+            # A rejected request consumed no tokens
+            rate_limiter.reconcile(estimated_tokens, 0)
+            if error.status_code == 429:
+                rate_limiter.block_for(delay)
+        if time.monotonic() + delay > deadline:
+            raise error
+
+        log_warning(f"Groq API returned {error.status_code}; retrying in {delay:.2f}s "
+                    f"(attempt {attempt + 1}/{self.max_retries})")
+        if rate_limiter is not None and error.status_code == 429:
+            # The limiter already holds every caller until the block ends
+            return 0.0
+        return delay
+
+    def _acquire_endpoint(self, failed):
+        """Pick an endpoint (avoiding the one that just failed) and its rate limiter."""
+        if self.pool is None:
+            return None, self.rate_limiter
+        endpoint = self.pool.acquire(exclude=(failed,))
+        return endpoint, endpoint.rate_limiter
+
+    def _release_endpoint(self, endpoint, ok=None, latency_ms=None):
+        if endpoint is not None:
+            self.pool.release(endpoint, ok, latency_ms)
+
+    def _failover_delay(self, error, endpoint, attempt, estimated_tokens, deadline, rate_limiter):
+        """Release endpoint after a failed attempt and decide how long to wait before the next.
+
+        Status errors follow _retry_delay. With a pool, a retryable failure is
+        retried at once on another endpoint if one is available, and transport
+        errors (timeouts, refused connections) fail over too instead of being
+        raised. Re-raises the error when the call should give up.
+        """
+        if isinstance(error, HTTPStatusError):
+            # A 429 or 4xx still shows the endpoint is up
+            self._release_endpoint(endpoint, ok=error.status_code < 500)
+            delay = self._retry_delay(error, attempt, estimated_tokens, deadline, rate_limiter)
+        else:
+            self._release_endpoint(endpoint, ok=False)
+            if endpoint is None or attempt >= self.max_retries or not self.pool.has_alternative(endpoint):
+                raise error
+            delay = 0.0
+
+        if endpoint is not None and self.pool.has_alternative(endpoint):
+            log_warning(f"Groq endpoint {endpoint.name} failed ({error}); failing over")
+            return 0.0
+        return delay
+
+    def _send_with_retries(self, send, estimated_tokens):
+        """Run send(endpoint) within the rate limit, retrying 429 and 5xx responses.
+
+        Returns:
+            tuple: (result, rate limiter the successful attempt was charged to)
+        """
+        deadline = time.monotonic() + self.call_deadline
+        attempt = 0
+        endpoint = None
+        while True:
+            endpoint, rate_limiter = self._acquire_endpoint(failed=endpoint)
+            try:
+                if rate_limiter is not None:
+                    rate_limiter.acquire(estimated_tokens, deadline)
+                start = time.monotonic()
+                result = send(endpoint)
+            except RateLimitExceeded:
+                self._release_endpoint(endpoint)
+                raise
+            except TransportError as e:
+                delay = self._failover_delay(e, endpoint, attempt, estimated_tokens, deadline, rate_limiter)
+            except BaseException:
+                self._release_endpoint(endpoint)
+                raise
+            else:
+                self._release_endpoint(endpoint, ok=True, latency_ms=(time.monotonic() - start) * 1000)
+                return result, rate_limiter
+            time.sleep(delay)
+            attempt += 1
+
+    def _replay_completion(self, prompt: str, temperature: float, max_tokens: int, model: str):
+        """Look up a completion in the replaying cassette; returns (entry, delay_seconds)."""
+        entry = self.cassette.lookup(model, prompt, temperature, max_tokens)
+        log_groq_api_request(prompt.split('\n')[0][:50], entry["tokens"], entry["latency_ms"])
+        return entry, self.cassette.replay_delay(entry)
+
+    def _request_completion(self, prompt: str, temperature: float, max_tokens: int,
+                            model: str = None, task: str = None) -> str:
+        """Send a chat completion request (hedged if the task allows) and return the content."""
+        model = model or self.model
+        content, tokens_used = self._hedged(
+            task, lambda: self._call_upstream(prompt, temperature, max_tokens, model, task))
+        self._usage.tokens = getattr(self._usage, "tokens", 0) + tokens_used
+        return content
+
+    def _hedged(self, task, call):
+        """Run call(); if it outlasts the task's hedge delay, race a second call against it.
+
+        The first successful result wins. A hedge that loses keeps running to
+        completion in the background, since a blocking request cannot be
+        cancelled.
+        """
+        delay = self.router.hedge_delay(task)
+        if delay is None:
+            return call()
+
+        executor = _get_hedge_executor()
+        primary = executor.submit(call)
+        if wait([primary], timeout=delay).done:
+            return primary.result()
+
+        log_info(f"Hedging slow {task} call after {delay:.2f}s")
+        hedge = executor.submit(call)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self.router.record_hedge(task, won=future is hedge)
+                    return future.result()
+                error = future.exception()
+        self.router.record_hedge(task, won=False)
+        raise error
+
+    def _call_upstream(self, prompt: str, temperature: float, max_tokens: int, model: str, task: str):
+        """Make one upstream completion call; returns (content, tokens_used)."""
+        if self.cassette is not None and self.cassette.replaying:
+            entry, delay = self._replay_completion(prompt, temperature, max_tokens, model)
+            time.sleep(delay)
+            self.router.observe(task, model, entry["latency_ms"], entry["tokens"])
+            return entry["response"], entry["tokens"]
+
+        headers, data = self._build_request(prompt, temperature, max_tokens, model=model)
+        estimated_tokens = estimate_tokens(prompt, max_tokens)
 
         # Log request
         prompt_type = prompt.split('\n')[0][:50]
         log_groq_api_request(prompt_type)
 
-        start_time = time.time()
-        try:
-            # Ensure we're using the correct endpoint
-            endpoint = f"{self.base_url}/chat/completions"
-            response = requests.post(
-                endpoint,
-                headers=headers,
-                json=data
+        def send(endpoint):
+            url, request_headers = self._target(endpoint, headers)
+            response = self.transport.post(
+                url,
+                headers=request_headers,
+                payload=data
             )
             response.raise_for_status()
+            return response
+
+        start_time = time.time()
+        try:
+            response, rate_limiter = self._send_with_retries(send, estimated_tokens)
             result = response.json()
 
             choices = result.get("choices", [])
@@ -66,68 +398,200 @@ class GroqClient:
             response_time = int((time.time() - start_time) * 1000)
             tokens_used = result.get("usage", {}).get("total_tokens", 0)
             log_groq_api_request(prompt_type, tokens_used, response_time)
+            if tokens_used and rate_limiter is not None:
+                rate_limiter.reconcile(estimated_tokens, tokens_used)
+            self.router.observe(task, model, response_time, tokens_used)
+            if self.cassette is not None:
+                self.cassette.record(model, prompt, temperature, max_tokens, content,
+                                     tokens_used, response_time)
 
-            return content
+            return content, tokens_used
 
         except Exception as e:
             log_error(f"Groq API request failed: {str(e)}")
             raise
 
-    def generate_structured_response(self, prompt: str, expect_json: bool = True,
-                                     temperature: float = 0.7, max_tokens: int = 2048):
-        """Generate a structured (JSON) response from Groq API.
-        Since Groq does not support `response_format`, we enforce JSON via prompt.
+    def generate_response(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2048,
+                          use_cache: bool = True, refresh_cache: bool = False, task: str = None,
+                          validate=None) -> str:
+        """Generate a plain text response from Groq API.
+
+        task (e.g. "quiz" or "feedback") selects the model tier and the
+        latency histogram the call is recorded in. validate, if given, is
+        called with the response before it is cached; a response it rejects
+        is not cached, so asking again generates a new one.
         """
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        return self._chat_completion(prompt, temperature, max_tokens, use_cache, refresh_cache, task, validate)
 
-        # Prompt trick: force JSON output if requested
-        if expect_json:
-            prompt = f"{prompt}\n\nReturn ONLY valid JSON as response."
+    def _run_batch_item(self, item, temperature, max_tokens, use_cache, retries, task=None):
+        """Generate one batch item, retrying failures without raising."""
+        start_time = time.time()
+        self._usage.tokens = 0
+        while True:
+            item.attempts += 1
+            try:
+                item.response = self._chat_completion(item.prompt, temperature, max_tokens, use_cache,
+                                                      task=task)
+                item.error = None
+                break
+            except Exception as e:
+                item.error = e
+                if item.attempts > retries:
+                    log_error(f"Batch item {item.index} failed after {item.attempts} attempts: {str(e)}")
+                    break
+                time.sleep(backoff_delay(item.attempts - 1, self.backoff_base, self.backoff_max))
+        item.tokens = self._usage.tokens
+        item.elapsed_ms = int((time.time() - start_time) * 1000)
+        return item
 
-        data = {
-            "model": self.model,
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": temperature,
-            "max_tokens": max_tokens
-        }
+    def generate_many_as_completed(self, prompts, max_concurrency: int = 4, temperature: float = 0.7,
+                                   max_tokens: int = 2048, use_cache: bool = True, retries: int = 1,
+                                   task: str = None):
+        """Generate responses for many prompts, yielding each BatchItem as it finishes.
+
+        Prompts run on a pool of at most max_concurrency threads and share the
+        client's rate limiter, cache and coalescing. A failing prompt is retried
+        up to `retries` more times and then reported through item.error; it
+        never stops the rest of the batch.
+        """
+        items = [BatchItem(index, prompt) for index, prompt in enumerate(prompts)]
+        if not items:
+            return
+
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(items))),
+                                thread_name_prefix="groq-batch") as executor:
+            futures = [executor.submit(self._run_batch_item, item, temperature, max_tokens,
+                                       use_cache, retries, task)
+                       for item in items]
+            for future in as_completed(futures):
+                yield future.result()
+
+        wall_time_ms = int((time.time() - start_time) * 1000)
+        failed = sum(1 for item in items if not item.ok)
+        log_info(f"Groq batch of {len(items)} prompts finished in {wall_time_ms}ms - "
+                 f"Tokens: {sum(item.tokens for item in items)} - Failed: {failed}")
+
+    def generate_many(self, prompts, max_concurrency: int = 4, temperature: float = 0.7,
+                      max_tokens: int = 2048, use_cache: bool = True, retries: int = 1,
+                      task: str = None) -> BatchResult:
+        """Generate responses for many prompts concurrently, returned in prompt order."""
+        start_time = time.time()
+        items = sorted(self.generate_many_as_completed(prompts, max_concurrency, temperature,
+                                                       max_tokens, use_cache, retries, task),
+                       key=lambda item: item.index)
+        return BatchResult(items, int((time.time() - start_time) * 1000))
+
+    def stream_response(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2048,
+                        use_cache: bool = True, refresh_cache: bool = False, task: str = None,
+                        validate=None):
+        """Generate a plain text response from Groq API, yielding text as it arrives.
+
+        Uses `stream=True` on chat/completions. The full text is cached once the
+        stream completes, unless validate rejects it; a cache hit is yielded as
+        a single chunk. Streams are routed by task but never hedged.
+        """
+        model = self.model_for(task)
+        cache_key = None
+        if self.cache is not None and use_cache:
+            cache_key = make_cache_key(model, prompt, temperature, max_tokens)
+            if not refresh_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    yield cached
+                    return
+
+        if self.cassette is not None and self.cassette.replaying:
+            entry, _ = self._replay_completion(prompt, temperature, max_tokens, model)
+            for delay, text in self.cassette.replay_chunks(entry):
+                time.sleep(delay)
+                yield text
+            self.router.observe(task, model, entry["latency_ms"], entry["tokens"])
+            self._usage.tokens = getattr(self._usage, "tokens", 0) + entry["tokens"]
+            if cache_key is not None:
+                self._cache_response(cache_key, entry["response"], validate)
+            return
+
+        headers, data = self._build_request(prompt, temperature, max_tokens, stream=True, model=model)
+        estimated_tokens = estimate_tokens(prompt, max_tokens)
 
         prompt_type = prompt.split('\n')[0][:50]
         log_groq_api_request(prompt_type)
 
+        def open_stream(endpoint):
+            url, request_headers = self._target(endpoint, headers)
+            lines = self.transport.stream_lines(
+                url,
+                headers=request_headers,
+                payload=data
+            )
+            # Pull the first line so status errors surface while retrying is still safe
+            first = next(lines, None)
+            return lines if first is None else itertools.chain([first], lines)
+
         start_time = time.time()
+        first_token_ms = None
+        parts = []
+        tokens_used = 0
+        rate_limiter = None
         try:
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=data
-            )
-            response.raise_for_status()
-            result = response.json()
+            # The endpoint is released once the stream opens
+            lines, rate_limiter = self._send_with_retries(open_stream, estimated_tokens)
+            for line in lines:
+                if not line or not line.startswith("data:"):
+                    continue
+                event_data = line[len("data:"):].strip()
+                if event_data == "[DONE]":
+                    break
 
-            choices = result.get("choices", [])
-            if not choices:
-                raise Exception(f"No choices in response: {result}")
+                chunk = json.loads(event_data)
+                # Groq reports usage on the final chunk under x_groq
+                usage = chunk.get("usage") or chunk.get("x_groq", {}).get("usage") or {}
+                tokens_used = usage.get("total_tokens", tokens_used)
 
-            content = choices[0]["message"]["content"]
+                for choice in chunk.get("choices", []):
+                    text = (choice.get("delta") or {}).get("content")
+                    if text:
+                        if first_token_ms is None:
+                            first_token_ms = int((time.time() - start_time) * 1000)
+                        parts.append(text)
+                        yield text
 
-            # Logging
-            response_time = int((time.time() - start_time) * 1000)
-            tokens_used = result.get("usage", {}).get("total_tokens", 0)
-            log_groq_api_request(prompt_type, tokens_used, response_time)
+        except Exception as e:
+            log_error(f"Groq API streaming request failed: {str(e)}")
+            raise
 
-            if expect_json:
-                try:
-                    return json.loads(content)
-                except json.JSONDecodeError as e:
-                    log_error(f"Failed to parse JSON response: {str(e)}")
-                    log_error(f"Raw content: {content[:500]}...")
-                    raise
+        response_time = int((time.time() - start_time) * 1000)
+        log_groq_api_request(prompt_type, tokens_used, response_time)
+        if tokens_used and rate_limiter is not None:
+            rate_limiter.reconcile(estimated_tokens, tokens_used)
+        self._usage.tokens = getattr(self._usage, "tokens", 0) + tokens_used
+        self.router.observe(task, model, response_time, tokens_used)
+        if self.cassette is not None:
+            self.cassette.record(model, prompt, temperature, max_tokens, "".join(parts),
+                                 tokens_used, response_time, first_token_ms)
 
-            return content
+        if cache_key is not None and parts:
+            self._cache_response(cache_key, "".join(parts), validate)
 
-        except Exception as e:
-            log_error(f"Groq API request failed: {str(e)}")
-            raise
\ No newline at end of file
+    def generate_structured_response(self, prompt: str, expect_json: bool = True,
+                                     temperature: float = 0.7, max_tokens: int = 2048,
+                                     use_cache: bool = True, refresh_cache: bool = False, task: str = None):
+        """Generate a structured (JSON) response from Groq API.
+        Since Groq does not support `response_format`, we enforce JSON via prompt.
+        """
+        # Prompt trick: force JSON output if requested
+        if expect_json:
+            prompt = f"{prompt}\n\nReturn ONLY valid JSON as response."
+
+        content = self._chat_completion(prompt, temperature, max_tokens, use_cache, refresh_cache, task)
+
+        if expect_json:
+            try:
+                return json.loads(content)
+            except json.JSONDecodeError as e:
+                log_error(f"Failed to parse JSON response: {str(e)}")
+                log_error(f"Raw content: {content[:500]}...")
+                raise
+
+        return content
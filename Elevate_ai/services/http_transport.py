@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+HTTP transport for the Groq API client
+
+This module provides a pooled, keep-alive HTTP transport for LLM provider
+calls. Each worker process owns one connection pool, requests use separate
+connect and read timeouts, and HTTP/2 multiplexing is available when the
+optional ``httpx[http2]`` package is installed.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from utils.logger import log_info, log_warning
+
+try:
+    import httpx
+except ImportError:  # HTTP/2 support is optional
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (needed by httpx for HTTP/2)
+except ImportError:
+    h2 = None
+
+
+class TransportError(Exception):
+    """Raised when a request could not be completed by the transport."""
+
+
+class TransportTimeout(TransportError):
+    """Raised when connecting to or reading from the provider timed out."""
+
+
+class HTTPStatusError(TransportError):
+    """Raised when the provider answers with a non-2xx status code."""
+
+    def __init__(self, status_code, headers=None, body=""):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.body = body
+        super().__init__(f"HTTP {status_code}: {body[:200]}")
+
+
+class TransportStats:
+    """
+    Thread-safe counters describing connection reuse.
+
+    A request that did not need a new connection counts as a pool hit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Reset all counters to zero."""
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.new_connections = 0
+            self.handshake_ms_total = 0.0
+
+    def record_request(self, failed=False):
+        with self._lock:
+            self.requests += 1
+            if failed:
+                self.errors += 1
+
+    def record_handshake(self, seconds):
+        with self._lock:
+            self.new_connections += 1
+            self.handshake_ms_total += seconds * 1000
+
+    def snapshot(self):
+        """
+        Get a copy of the counters.
+
+        Returns:
+            dict: Request, connection and handshake statistics
+        """
+        with self._lock:
+            reused = max(self.requests - self.new_connections, 0)
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "new_connections": self.new_connections,
+                "pool_hit_rate": round(reused / self.requests, 4) if self.requests else 0.0,
+                "handshake_ms_total": round(self.handshake_ms_total, 2),
+                "handshake_ms_avg": round(self.handshake_ms_total / self.new_connections, 2)
+                if self.new_connections else 0.0,
+            }
+
+
+class TransportResponse:
+    """Backend-independent HTTP response."""
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        """Raise HTTPStatusError for non-2xx responses."""
+        if not 200 <= self.status_code < 300:
+            raise HTTPStatusError(self.status_code, self.headers, self.text)
+
+
+def _timed_pool(pool_cls, stats):
+    """Build a connection pool class whose connections time their handshake."""
+
+    class TimedConnection(pool_cls.ConnectionCls):
+        def connect(self):
+            start = time.perf_counter()
+            super().connect()
+            stats.record_handshake(time.perf_counter() - start)
+
+    return type(f"Timed{pool_cls.__name__}", (pool_cls,), {"ConnectionCls": TimedConnection})
+
+
+class _InstrumentedAdapter(HTTPAdapter):
+    """HTTPAdapter that reports new connections and their setup time."""
+
+    def __init__(self, stats, **kwargs):
+        self._stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _timed_pool(HTTPConnectionPool, self._stats),
+            "https": _timed_pool(HTTPSConnectionPool, self._stats),
+        }
+
+
+class HTTPTransport:
+    """
+    Pooled keep-alive transport owned by the Groq client.
+
+    The underlying session is created lazily and re-created after a fork, so
+    every gunicorn worker gets its own pool instead of sharing sockets with
+    the master process.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, connect_timeout=5.0,
+                 read_timeout=60.0, http2=False):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.http2 = http2
+        if http2 and (httpx is None or h2 is None):
+            # httpx.Client(http2=True) raises ImportError on first use without h2
+            log_warning("HTTP/2 requested but httpx[http2] is not installed; falling back to HTTP/1.1")
+            self.http2 = False
+
+        self.stats = TransportStats()
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+
+    def _get_session(self):
+        pid = os.getpid()
+        if self._session is not None and self._pid == pid:
+            return self._session
+
+        with self._lock:
+            if self._session is None or self._pid != pid:
+                # Never reuse a pool inherited from the parent process.
+                self._session = self._create_session()
+                self._pid = pid
+                log_info(f"Created HTTP {'2' if self.http2 else '1.1'} connection pool "
+                         f"(pid {pid}, maxsize {self.pool_maxsize})")
+        return self._session
+
+    def _create_session(self):
+        if self.http2:
+            return httpx.Client(
+                http2=True,
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_maxsize,
+                                    max_keepalive_connections=self.pool_maxsize),
+            )
+
+        session = requests.Session()
+        adapter = _InstrumentedAdapter(
+            self.stats,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _httpx_trace(self):
+        """Build an httpx trace hook that measures connection setup."""
+        started = {}
+
+        def trace(event_name, info):
+            # TCP connect through TLS setup ends when the first request headers go out.
+            if event_name == "connection.connect_tcp.started":
+                started["t"] = time.perf_counter()
+            elif event_name.endswith("send_request_headers.started") and "t" in started:
+                self.stats.record_handshake(time.perf_counter() - started.pop("t"))
+
+        return trace
+
+    @contextmanager
+    def _translate_errors(self):
+        """Map backend exceptions onto TransportError and count failures."""
+        try:
+            yield
+        except requests.exceptions.Timeout as e:
+            self.stats.record_request(failed=True)
+            raise TransportTimeout(str(e)) from e
+        except requests.exceptions.RequestException as e:
+            self.stats.record_request(failed=True)
+            raise TransportError(str(e)) from e
+        except Exception as e:
+            if httpx is not None and isinstance(e, httpx.TimeoutException):
+                self.stats.record_request(failed=True)
+                raise TransportTimeout(str(e)) from e
+            if httpx is not None and isinstance(e, httpx.HTTPError):
+                self.stats.record_request(failed=True)
+                raise TransportError(str(e)) from e
+            raise
+
+    def post(self, url, headers=None, payload=None, timeout=None):
+        """
+        Send a JSON POST request.
+
+        Args:
+            url: Request URL
+            headers: Request headers
+            payload: JSON-serialisable request body
+            timeout: Optional (connect, read) tuple overriding the defaults
+
+        Returns:
+            TransportResponse: Response with status, headers and raw body
+        """
+        connect_timeout, read_timeout = timeout or (self.connect_timeout, self.read_timeout)
+        session = self._get_session()
+        with self._translate_errors():
+            if self.http2:
+                response = session.post(
+                    url, headers=headers, json=payload,
+                    timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                    extensions={"trace": self._httpx_trace()},
+                )
+            else:
+                response = session.post(url, headers=headers, json=payload,
+                                        timeout=(connect_timeout, read_timeout))
+
+        self.stats.record_request()
+        return TransportResponse(response.status_code, dict(response.headers), response.content)
+
+    def stream_lines(self, url, headers=None, payload=None, timeout=None):
+        """
+        Send a JSON POST request and yield the response body line by line.
+
+        The read timeout applies between chunks rather than to the whole body,
+        so long generations are not cut off while tokens keep arriving.
+
+        Args:
+            url: Request URL
+            headers: Request headers
+            payload: JSON-serialisable request body
+            timeout: Optional (connect, read) tuple overriding the defaults
+
+        Yields:
+            str: Decoded response lines
+        """
+        connect_timeout, read_timeout = timeout or (self.connect_timeout, self.read_timeout)
+        session = self._get_session()
+        with self._translate_errors():
+            if self.http2:
+                with session.stream(
+                    "POST", url, headers=headers, json=payload,
+                    timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                    extensions={"trace": self._httpx_trace()},
+                ) as response:
+                    if response.status_code >= 400:
+                        response.read()
+                    self._check_stream_status(response.status_code, response.headers, response.text
+                                              if response.status_code >= 400 else "")
+                    for line in response.iter_lines():
+                        yield line
+                return
+
+            response = session.post(url, headers=headers, json=payload, stream=True,
+                                    timeout=(connect_timeout, read_timeout))
+            try:
+                self._check_stream_status(response.status_code, response.headers,
+                                          response.text if response.status_code >= 400 else "")
+                for line in response.iter_lines(decode_unicode=True):
+                    yield line
+            finally:
+                response.close()
+
+    def _check_stream_status(self, status_code, headers, body):
+        self.stats.record_request(failed=status_code >= 400)
+        if status_code >= 400:
+            raise HTTPStatusError(status_code, dict(headers), body)
+
+    def get_stats(self):
+        """Get connection pool statistics for this process."""
+        stats = self.stats.snapshot()
+        stats.update({
+            "http2": self.http2,
+            "pool_maxsize": self.pool_maxsize,
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout,
+        })
+        return stats
+
+    def close(self):
+        """Close all pooled connections."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._pid = None
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport(config):
+    """
+    Get the process-wide transport shared by every GroqClient.
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        HTTPTransport: Shared transport instance
+    """
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = HTTPTransport(
+                    pool_connections=config.GROQ_HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=config.GROQ_HTTP_POOL_MAXSIZE,
+                    connect_timeout=config.GROQ_CONNECT_TIMEOUT,
+                    read_timeout=config.GROQ_READ_TIMEOUT,
+                    http2=config.GROQ_HTTP2,
+                )
+    return _default_transport
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Pre-generated mock interview question sets
+
+This module keeps a pool of question sets per normalised (role, level)
+pair so that starting an interview is a database read instead of a Groq
+call. Job titles are normalised (case, punctuation, synonyms, seniority
+words) so that "Sr. Back-end Developer" and "senior backend engineer" share
+a pool. Sets are rotated least-served first and never repeated for a
+user, retired after a number of serves, and request counts per pair are
+kept so that the most popular pools can be warmed at deploy.
+"""
+
+import json
+import re
+import threading
+
+LEVELS = ("entry", "mid", "senior")
+
+# Seniority words found in titles or the level field, and the level they imply
+SENIORITY_WORDS = {
+    "intern": "entry", "trainee": "entry", "graduate": "entry", "grad": "entry",
+    "entry": "entry", "junior": "entry", "jr": "entry", "associate": "entry",
+    "mid": "mid", "intermediate": "mid",
+    "senior": "senior", "sr": "senior", "lead": "senior", "staff": "senior",
+    "principal": "senior", "level": None,
+}
+
+# Grade suffixes such as "Engineer II" carry no role information
+GRADE_WORDS = {"i", "ii", "iii", "iv", "v", "1", "2", "3", "4", "5"}
+
+# Role synonyms, matched on whole words after punctuation is removed
+ROLE_SYNONYMS = {
+    "swe": "software engineer",
+    "sde": "software engineer",
+    "software developer": "software engineer",
+    "software dev": "software engineer",
+    "programmer": "software engineer",
+    "developer": "engineer",
+    "dev": "engineer",
+    "eng": "engineer",
+    "front end": "frontend",
+    "back end": "backend",
+    "full stack": "fullstack",
+    "ml": "machine learning",
+    "sre": "site reliability engineer",
+    "qa": "quality assurance",
+    "pm": "product manager",
+    "mgr": "manager",
+    "js": "javascript",
+}
+_SYNONYM_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(k) for k in sorted(ROLE_SYNONYMS, key=len, reverse=True)) + r")\b"
+)
+
+# Tables live in the application database next to the interviews they feed
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS interview_sets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        role_key TEXT NOT NULL,
+        level TEXT NOT NULL,
+        questions TEXT NOT NULL,
+        served INTEGER NOT NULL DEFAULT 0,
+        last_served_at TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_interview_sets_pair
+    ON interview_sets (role_key, level, served)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS interview_sets_seen (
+        user_id TEXT NOT NULL,
+        set_id INTEGER NOT NULL,
+        seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, set_id),
+        FOREIGN KEY (set_id) REFERENCES interview_sets (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS interview_pool_stats (
+        role_key TEXT NOT NULL,
+        level TEXT NOT NULL,
+        requests INTEGER NOT NULL DEFAULT 0,
+        last_requested_at TIMESTAMP,
+        PRIMARY KEY (role_key, level)
+    )
+    """,
+]
+
+
+def normalize_role(job_title):
+    """
+    Normalise a job title into a role key and the seniority it names.
+
+    Args:
+        job_title: Job title as typed by the user
+
+    Returns:
+        tuple: (role_key, level or None)
+    """
+    words = re.sub(r"[^a-z0-9+#]+", " ", str(job_title).lower()).split()
+    level = None
+    kept = []
+    for word in words:
+        if word in SENIORITY_WORDS:
+            level = SENIORITY_WORDS[word] or level
+        elif word not in GRADE_WORDS:
+            kept.append(word)
+    words = _SYNONYM_PATTERN.sub(lambda m: ROLE_SYNONYMS[m.group(1)], " ".join(kept)).split()
+    # "software programmer" -> "software software engineer" -> "software engineer"
+    role_key = " ".join(word for i, word in enumerate(words) if i == 0 or word != words[i - 1])
+    return role_key, level
+
+
+def normalize_level(experience_level, title_level=None):
+    """
+    Pick the interview level, preferring a seniority word from the title.
+
+    Args:
+        experience_level: Level field from the form
+        title_level: Level found by normalize_role, if any
+
+    Returns:
+        str: One of LEVELS
+    """
+    if title_level:
+        return title_level
+    words = str(experience_level or "").lower().split()
+    return next((SENIORITY_WORDS[w] for w in words if SENIORITY_WORDS.get(w)), "mid")
+
+
+class InterviewPool:
+    """
+    Store, rotate and refill interview question sets.
+
+    Methods take an open sqlite3 connection to the application database
+    and leave committing to the caller.
+    """
+
+    def __init__(self, sets_per_pair=5, min_sets=2, max_serves=50):
+        self.sets_per_pair = sets_per_pair
+        self.min_sets = min_sets
+        self.max_serves = max_serves
+
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "added": 0, "retired": 0, "refills": 0}
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def record_request(self, conn, role_key, level):
+        """Count a request for a pair, for warming the popular pools."""
+        conn.execute(
+            "INSERT INTO interview_pool_stats (role_key, level, requests, last_requested_at) "
+            "VALUES (?, ?, 1, CURRENT_TIMESTAMP) "
+            "ON CONFLICT (role_key, level) DO UPDATE SET requests = requests + 1, "
+            "last_requested_at = CURRENT_TIMESTAMP",
+            (role_key, level)
+        )
+
+    def take(self, conn, user_id, role_key, level):
+        """
+        Serve the least-served live set the user has not seen.
+
+        Args:
+            conn: Database connection
+            user_id: User starting the interview
+            role_key: Normalised role
+            level: Interview level
+
+        Returns:
+            tuple or None: (set_id, questions JSON string), or None on a miss
+        """
+        row = conn.execute(
+            "SELECT s.id, s.questions FROM interview_sets s "
+            "WHERE s.role_key = ? AND s.level = ? AND s.served < ? AND NOT EXISTS ("
+            "  SELECT 1 FROM interview_sets_seen v WHERE v.user_id = ? AND v.set_id = s.id) "
+            "ORDER BY s.served, s.id LIMIT 1",
+            (role_key, level, self.max_serves, user_id)
+        ).fetchone()
+        if row is None:
+            self.count("misses")
+            return None
+        self.mark_served(conn, user_id, row[0])
+        self.count("hits")
+        return row[0], row[1]
+
+    def mark_served(self, conn, user_id, set_id):
+        """Record that a set was served to a user."""
+        conn.execute(
+            "UPDATE interview_sets SET served = served + 1, last_served_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (set_id,)
+        )
+        conn.execute("INSERT OR IGNORE INTO interview_sets_seen (user_id, set_id) VALUES (?, ?)",
+                     (user_id, set_id))
+
+    def live_sets(self, conn, role_key, level):
+        """Number of sets for a pair that have not been retired."""
+        return conn.execute(
+            "SELECT COUNT(*) FROM interview_sets WHERE role_key = ? AND level = ? AND served < ?",
+            (role_key, level, self.max_serves)
+        ).fetchone()[0]
+
+    def add_sets(self, conn, role_key, level, question_sets):
+        """
+        Add generated sets to a pair's pool, dropping its retired sets.
+
+        Args:
+            conn: Database connection
+            role_key: Normalised role
+            level: Interview level
+            question_sets: Questions JSON strings
+
+        Returns:
+            list: IDs of the new sets
+        """
+        retired = [row[0] for row in conn.execute(
+            "SELECT id FROM interview_sets WHERE role_key = ? AND level = ? AND served >= ?",
+            (role_key, level, self.max_serves)
+        )]
+        if retired:
+            conn.executemany("DELETE FROM interview_sets_seen WHERE set_id = ?", [(i,) for i in retired])
+            conn.executemany("DELETE FROM interview_sets WHERE id = ?", [(i,) for i in retired])
+            self.count("retired", len(retired))
+
+        ids = [conn.execute(
+            "INSERT INTO interview_sets (role_key, level, questions) VALUES (?, ?, ?)",
+            (role_key, level, questions)
+        ).lastrowid for questions in question_sets]
+        self.count("added", len(ids))
+        return ids
+
+    def question_texts(self, conn, role_key, level, limit=20):
+        """Questions of a pair's newest live sets, to tell the generator what exists."""
+        texts = []
+        for row in conn.execute(
+            "SELECT questions FROM interview_sets WHERE role_key = ? AND level = ? AND served < ? "
+            "ORDER BY id DESC LIMIT ?",
+            (role_key, level, self.max_serves, limit)
+        ):
+            try:
+                texts.extend(q.get("question", "") for q in json.loads(row[0]).get("questions", []))
+            except (json.JSONDecodeError, AttributeError):
+                continue
+        return texts[:limit]
+
+    def popular(self, conn, top):
+        """
+        Most requested pairs.
+
+        Args:
+            conn: Database connection
+            top: Number of pairs
+
+        Returns:
+            list: (role_key, level) tuples, most requested first
+        """
+        return [(row[0], row[1]) for row in conn.execute(
+            "SELECT role_key, level FROM interview_pool_stats "
+            "ORDER BY requests DESC, last_requested_at DESC LIMIT ?",
+            (top,)
+        )]
+
+    def get_stats(self):
+        """
+        Get serving and refill counters.
+
+        Returns:
+            dict: Pool statistics
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_default_interview_pool = None
+_default_interview_pool_lock = threading.Lock()
+
+
+def get_default_interview_pool(config):
+    """
+    Get the process-wide interview pool.
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        InterviewPool: Shared pool instance
+    """
+    global _default_interview_pool
+    if _default_interview_pool is None:
+        with _default_interview_pool_lock:
+            if _default_interview_pool is None:
+                _default_interview_pool = InterviewPool(
+                    sets_per_pair=config.INTERVIEW_POOL_SETS,
+                    min_sets=config.INTERVIEW_POOL_MIN_SETS,
+                    max_serves=config.INTERVIEW_POOL_MAX_SERVES,
+                )
+    return _default_interview_pool
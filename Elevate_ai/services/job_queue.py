@@ -0,0 +1,468 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Durable background jobs for long LLM generations
+
+This module keeps jobs in a SQLite file so that a request can enqueue a
+generation, return a job ID at once and let worker threads (in the web
+process or in job_worker.py) make the Groq call. Workers claim jobs with a
+lease and keep extending it while the handler runs; a job whose worker dies
+is picked up again once the lease runs out.
+Upstream failures are retried with backoff, identical submissions share one
+job, and finished jobs expire after a TTL.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from services.http_transport import TransportError
+from utils.logger import log_error, log_info, log_warning
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue with an in-process worker pool.
+
+    Handlers are plain callables registered per job kind; they receive the
+    JSON payload given to enqueue and return a JSON-serialisable result.
+    Exceptions in retry_exceptions are retried up to max_attempts; any
+    other exception fails the job.
+    """
+
+    def __init__(self, db_path, workers=2, max_attempts=3, lease_seconds=300.0, result_ttl=86400.0,
+                 poll_interval=0.5, retry_backoff=2.0, retry_exceptions=(TransportError,)):
+        self.db_path = os.path.abspath(db_path)
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.retry_backoff = retry_backoff
+        self.retry_exceptions = retry_exceptions
+
+        self._handlers = {}
+        self._local = threading.local()
+        self._changed = threading.Condition()
+        self._threads = []
+        self._pid = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._last_purge = 0.0
+        self._stats = {"enqueued": 0, "deduplicated": 0, "succeeded": 0, "failed": 0,
+                       "retried": 0, "recovered": 0, "expired": 0, "cancelled": 0}
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = self._get_db()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                user_id TEXT,
+                dedupe_key TEXT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                result TEXT,
+                error TEXT,
+                owner TEXT,
+                lease_expires REAL,
+                run_after REAL NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        if "user_id" not in {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}:
+            # Job files from before jobs recorded who submitted them
+            try:
+                conn.execute("ALTER TABLE jobs ADD COLUMN user_id TEXT")
+            except sqlite3.OperationalError:
+                pass  # another worker added it first
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_run_after ON jobs (status, run_after)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_dedupe_key ON jobs (dedupe_key)")
+
+    def _get_db(self):
+        """Get this thread's connection to the job file."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            # Autocommit mode so claims are made with explicit BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._changed:
+            self._stats[name] += amount
+
+    def _notify(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    def register(self, kind, handler):
+        """
+        Register the handler that runs jobs of a kind.
+
+        Args:
+            kind: Job kind, e.g. "plan"
+            handler: Callable taking the payload and returning the result
+        """
+        self._handlers[kind] = handler
+
+    def enqueue(self, kind, payload, dedupe_key=None, max_attempts=None, user_id=None):
+        """
+        Add a job, or return the live job already submitted with the same key.
+
+        Args:
+            kind: Registered job kind
+            payload: JSON-serialisable handler argument
+            dedupe_key: Key identifying duplicate submissions; defaults to a
+                hash of kind, payload and user
+            max_attempts: Override for the queue's max_attempts
+            user_id: User the job belongs to, for jobs exposed through the
+                /jobs routes; None for internal jobs
+
+        Returns:
+            dict: The job, as returned by get, plus "deduplicated"
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+        payload_json = json.dumps(payload, sort_keys=True)
+        user_id = str(user_id) if user_id is not None else None
+        if dedupe_key is None:
+            owner = "" if user_id is None else f"{user_id}\n"
+            dedupe_key = hashlib.sha256(f"{kind}\n{owner}{payload_json}".encode("utf-8")).hexdigest()
+
+        now = time.time()
+        conn = self._get_db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Queued, running and unexpired finished jobs absorb duplicates;
+            # a failed job does not, so resubmitting tries again
+            existing = conn.execute(
+                "SELECT id FROM jobs WHERE dedupe_key = ? AND status != 'failed' AND expires_at > ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (dedupe_key, now)
+            ).fetchone()
+            if existing is None:
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, user_id, dedupe_key, payload, status, max_attempts, run_after, "
+                    "created_at, updated_at, expires_at) VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?, ?, ?)",
+                    (job_id, kind, user_id, dedupe_key, payload_json, max_attempts or self.max_attempts,
+                     now, now, now, now + self.result_ttl)
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        if existing is not None:
+            self._count("deduplicated")
+            job = self.get(existing["id"])
+            job["deduplicated"] = True
+            return job
+
+        self._count("enqueued")
+        log_info(f"Enqueued {kind} job {job_id}")
+        self.start()
+        self._notify()
+        job = self.get(job_id)
+        job["deduplicated"] = False
+        return job
+
+    def get(self, job_id):
+        """
+        Get a job's status and, once finished, its result or error.
+
+        Args:
+            job_id: ID returned by enqueue
+
+        Returns:
+            dict or None: Job state, or None if unknown or expired
+        """
+        row = self._get_db().execute(
+            "SELECT id, kind, user_id, status, attempts, max_attempts, result, error, created_at, updated_at "
+            "FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "user_id": row["user_id"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "max_attempts": row["max_attempts"],
+            "result": json.loads(row["result"]) if row["result"] is not None else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def find(self, dedupe_key):
+        """
+        Get the live job a submission with this dedupe key would join.
+
+        Args:
+            dedupe_key: Key passed to enqueue
+
+        Returns:
+            dict or None: Job state as from get, or None
+        """
+        row = self._get_db().execute(
+            "SELECT id FROM jobs WHERE dedupe_key = ? AND status != 'failed' AND expires_at > ? "
+            "ORDER BY created_at DESC LIMIT 1",
+            (dedupe_key, time.time())
+        ).fetchone()
+        return self.get(row["id"]) if row is not None else None
+
+    def cancel(self, job_id):
+        """
+        Delete a job that no worker has started.
+
+        Returns:
+            bool: True if the job was still queued and is now gone
+        """
+        cancelled = self._get_db().execute(
+            "DELETE FROM jobs WHERE id = ? AND status = 'queued'", (job_id,)
+        ).rowcount == 1
+        if cancelled:
+            self._count("cancelled")
+        return cancelled
+
+    def consume(self, job_id):
+        """
+        Take a succeeded job's result and delete the job, so only one caller gets it.
+
+        Returns:
+            The job's result, or None if it is not (or no longer) available
+        """
+        conn = self._get_db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT result FROM jobs WHERE id = ? AND status = 'succeeded'", (job_id,)
+            ).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return json.loads(row["result"]) if row is not None and row["result"] is not None else None
+
+    def wait(self, timeout):
+        """Block until a job in this process changes state or timeout seconds pass."""
+        with self._changed:
+            self._changed.wait(timeout)
+
+    def _claim(self, owner):
+        """Take the oldest runnable job (or one whose worker's lease ran out)."""
+        now = time.time()
+        conn = self._get_db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, kind, payload, status, attempts, max_attempts FROM jobs "
+                "WHERE (status = 'queued' AND run_after <= ?) OR (status = 'running' AND lease_expires < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (owner, now + self.lease_seconds, now, row["id"])
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if row is not None and row["status"] == "running":
+            self._count("recovered")
+            log_warning(f"Recovered {row['kind']} job {row['id']} after its worker's lease expired")
+        return row
+
+    def _finish(self, job_id, owner, status, result=None, error=None, run_after=None):
+        """Record the outcome of an attempt, unless another worker has taken the job over."""
+        now = time.time()
+        self._get_db().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, owner = NULL, lease_expires = NULL, "
+            "run_after = COALESCE(?, run_after), updated_at = ?, expires_at = ? WHERE id = ? AND owner = ?",
+            (status, result, error, run_after, now, now + self.result_ttl, job_id, owner)
+        )
+        self._notify()
+
+    def _heartbeat(self, job_id, owner, done):
+        """Keep extending a running job's lease until done is set."""
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                self._get_db().execute(
+                    "UPDATE jobs SET lease_expires = ? WHERE id = ? AND owner = ?",
+                    (time.time() + self.lease_seconds, job_id, owner)
+                )
+            except sqlite3.Error as e:
+                log_warning(f"Could not extend the lease of job {job_id}: {e}")
+
+    def run_once(self, owner=None):
+        """
+        Claim and run one job.
+
+        Args:
+            owner: Lease owner ID; a fresh one is generated if omitted
+
+        Returns:
+            bool: True if a job was run, False if none was ready
+        """
+        owner = owner or uuid.uuid4().hex
+        job = self._claim(owner)
+        if job is None:
+            return False
+
+        job_id, kind, attempts = job["id"], job["kind"], job["attempts"] + 1
+        self._notify()
+        handler = self._handlers.get(kind)
+        if handler is None:
+            self._finish(job_id, owner, "failed", error=f"No handler registered for job kind: {kind}")
+            self._count("failed")
+            return True
+        if attempts > job["max_attempts"]:
+            self._finish(job_id, owner, "failed", error="Job was interrupted too many times")
+            self._count("failed")
+            return True
+
+        # A handler may outlast the lease (a retried Groq call can take
+        # minutes), so renew it rather than let another worker run the job too
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, owner, done),
+                                     name=f"job-heartbeat-{job_id[:8]}", daemon=True)
+        heartbeat.start()
+        try:
+            result = handler(json.loads(job["payload"]))
+        except Exception as e:
+            if isinstance(e, self.retry_exceptions) and attempts < job["max_attempts"]:
+                delay = self.retry_backoff * 2 ** (attempts - 1)
+                log_warning(f"{kind} job {job_id} failed ({e}); retrying in {delay:.1f}s "
+                            f"(attempt {attempts}/{job['max_attempts']})")
+                self._finish(job_id, owner, "queued", error=str(e), run_after=time.time() + delay)
+                self._count("retried")
+            else:
+                log_error(f"{kind} job {job_id} failed: {e}")
+                self._finish(job_id, owner, "failed", error=str(e))
+                self._count("failed")
+            return True
+        finally:
+            done.set()
+
+        self._finish(job_id, owner, "succeeded", result=json.dumps(result))
+        self._count("succeeded")
+        log_info(f"{kind} job {job_id} succeeded after {attempts} attempt(s)")
+        return True
+
+    def purge_expired(self):
+        """
+        Delete jobs past their expiry that no worker holds.
+
+        Returns:
+            int: Number of jobs deleted
+        """
+        deleted = self._get_db().execute(
+            "DELETE FROM jobs WHERE expires_at < ? AND status != 'running'", (time.time(),)
+        ).rowcount
+        if deleted:
+            self._count("expired", deleted)
+        return deleted
+
+    def _work(self):
+        owner = f"{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex[:8]}"
+        while not self._stopping.is_set():
+            try:
+                if self.run_once(owner):
+                    continue
+                if time.monotonic() - self._last_purge > 60:
+                    self._last_purge = time.monotonic()
+                    self.purge_expired()
+            except Exception as e:
+                log_error(f"Job worker error: {e}")
+            self.wait(self.poll_interval)
+
+    def start(self):
+        """Start this process's worker threads (again after a fork) if workers > 0."""
+        if self.workers <= 0 or self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+
+    def stop(self, timeout=5.0):
+        """Stop the worker threads after their current jobs."""
+        self._stopping.set()
+        self._notify()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._pid = None
+
+    def get_stats(self):
+        """
+        Get job counts by status and worker statistics.
+
+        Returns:
+            dict: Queue statistics
+        """
+        rows = self._get_db().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        with self._changed:
+            stats = dict(self._stats)
+        stats["jobs"] = {row["status"]: row["n"] for row in rows}
+        stats["workers"] = len(self._threads) if self._pid == os.getpid() else 0
+        return stats
+
+
+_default_job_queue = None
+_default_job_queue_lock = threading.Lock()
+
+
+def get_default_job_queue(config):
+    """
+    Get the process-wide job queue.
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        JobQueue: Shared queue instance
+    """
+    global _default_job_queue
+    if _default_job_queue is None:
+        with _default_job_queue_lock:
+            if _default_job_queue is None:
+                _default_job_queue = JobQueue(
+                    config.JOB_QUEUE_PATH,
+                    workers=config.JOB_WORKERS,
+                    max_attempts=config.JOB_MAX_ATTEMPTS,
+                    lease_seconds=config.JOB_LEASE_SECONDS,
+                    result_ttl=config.JOB_RESULT_TTL,
+                )
+    return _default_job_queue
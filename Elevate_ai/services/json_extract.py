@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+JSON extraction for LLM responses
+
+This module finds the JSON object inside a raw completion (which may be
+wrapped in markdown fences or surrounded by prose) with the C JSON decoder,
+falls back to a linear string-aware bracket scan, and applies a cheap repair pass for the
+mistakes LLMs commonly make: trailing commas, smart quotes and output that
+was cut off before the final element was closed. Every repair avoids a paid
+regeneration, so the module counts them.
+"""
+
+import json
+import re
+import threading
+
+from utils.logger import log_info
+
+# Closing character for each opener
+_CLOSERS = {"{": "}", "[": "]"}
+
+# Curly quotes LLMs sometimes emit instead of ASCII quotes
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+# A whole string literal (closing quote captured if present) or a structural character
+_TOKENS = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*(")?|[{}\[\],]', re.DOTALL)
+
+# A string literal (kept) or a comma before a closing bracket (dropped)
+_TRAILING_COMMA = re.compile(r'("[^"\\]*(?:\\.[^"\\]*)*")|,(\s*[}\]])', re.DOTALL)
+
+_decoder = json.JSONDecoder()
+
+# How many candidate objects to try before giving up
+MAX_CANDIDATES = 5
+
+# How far back to cut when closing a truncated response
+MAX_TRUNCATION_CUTS = 3
+
+_stats_lock = threading.Lock()
+_stats = {
+    "calls": 0,
+    "clean": 0,
+    "repaired": 0,
+    "failed": 0,
+    "trailing_commas": 0,
+    "smart_quotes": 0,
+    "unterminated": 0,
+}
+
+
+class ExtractionResult:
+    """The parsed JSON object plus the repairs needed to parse it."""
+
+    def __init__(self, json_string, data, repairs):
+        self.json_string = json_string
+        self.data = data
+        self.repairs = repairs
+
+    @property
+    def repaired(self):
+        return bool(self.repairs)
+
+
+def _scan_object(text, start):
+    """
+    Scan from the '{' at start to its matching '}'.
+
+    Strings are consumed whole by the tokenizer, so brackets inside them are
+    never seen and the scan runs at regex speed.
+
+    Returns:
+        int or None: Index after the closing brace, or None if the text ran
+        out first
+    """
+    depth = 0
+    for match in _TOKENS.finditer(text, start):
+        token = match.group(0)
+        if token in "{[":
+            depth += 1
+        elif token in "}]":
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    return None
+
+
+def _strip_trailing_commas(text):
+    """Remove commas directly followed by a closing bracket, outside strings."""
+    return _TRAILING_COMMA.sub(lambda m: m.group(1) or m.group(2), text)
+
+
+def _close_truncated(text):
+    """
+    Close a response that stops before its outermost object is complete.
+
+    The text is cut back to the last complete element where needed, then any
+    open string and brackets are closed.
+
+    Returns:
+        list: Candidate repaired strings, most complete first
+    """
+    stack = []
+    in_string = False
+    cuts = []
+    for match in _TOKENS.finditer(text):
+        token = match.group(0)
+        if token in "{[":
+            stack.append(token)
+        elif token in "}]":
+            if stack:
+                stack.pop()
+        elif token == ",":
+            cuts.append((match.start(), "".join(stack)))
+        else:
+            in_string = match.group(1) is None
+
+    candidates = []
+    tail = text + ('"' if in_string else "")
+    candidates.append(tail.rstrip().rstrip(",") + "".join(_CLOSERS[c] for c in reversed(stack)))
+    for index, open_stack in reversed(cuts[-MAX_TRUNCATION_CUTS:]):
+        candidates.append(text[:index] + "".join(_CLOSERS[c] for c in reversed(open_stack)))
+    return candidates
+
+
+def _try_parse(text):
+    try:
+        return True, json.loads(text)
+    except (json.JSONDecodeError, ValueError):
+        return False, None
+
+
+def _repair(candidate, truncated):
+    """
+    Apply repairs one at a time, cheapest first, until the candidate parses.
+
+    Returns:
+        tuple: (json_string, data, repairs) or None
+    """
+    repairs = []
+    text = candidate
+
+    if any(q in text for q in "“”‘’"):
+        text = text.translate(_SMART_QUOTES)
+        repairs.append("smart_quotes")
+        if not truncated:
+            ok, data = _try_parse(text)
+            if ok:
+                return text, data, repairs
+
+    if not truncated:
+        fixed = _strip_trailing_commas(text)
+        if fixed != text:
+            ok, data = _try_parse(fixed)
+            if ok:
+                return fixed, data, repairs + ["trailing_commas"]
+        return None
+
+    for closed in _close_truncated(text):
+        fixed = _strip_trailing_commas(closed)
+        ok, data = _try_parse(fixed)
+        if ok:
+            extra = ["unterminated"]
+            if fixed != closed:
+                extra.append("trailing_commas")
+            return fixed, data, repairs + extra
+    return None
+
+
+def _count(*names):
+    with _stats_lock:
+        for name in names:
+            _stats[name] += 1
+
+
+def extract_json(raw_response, record=True):
+    """
+    Extract the first JSON object from a raw LLM response.
+
+    Args:
+        raw_response: Completion text
+        record: Whether the attempt counts towards the extraction statistics
+
+    Returns:
+        ExtractionResult or None: The parsed object, or None if no object
+        could be found or repaired
+    """
+    count = _count if record else (lambda *names: None)
+    count("calls")
+
+    text = raw_response or ""
+    start = text.find("{")
+    attempts = 0
+    while start != -1 and attempts < MAX_CANDIDATES:
+        attempts += 1
+        # Fast path: the C decoder parses the object and ignores what follows
+        try:
+            data, end = _decoder.raw_decode(text, start)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            count("clean")
+            return ExtractionResult(text[start:end], data, [])
+
+        end = _scan_object(text, start)
+        candidate = text[start:end] if end is not None else text[start:]
+
+        repaired = _repair(candidate, truncated=end is None)
+        if repaired is not None and isinstance(repaired[1], dict):
+            json_string, data, repairs = repaired
+            count("repaired", *repairs)
+            return ExtractionResult(json_string, data, repairs)
+
+        if end is None:
+            break
+        # Skip braces in leading prose and try the next object
+        start = text.find("{", start + 1)
+
+    count("failed")
+    return None
+
+
+def has_json_object(raw_response):
+    """
+    Check that a JSON object can be extracted from a response, without
+    counting it in the statistics.
+
+    Passed as `validate` to the Groq clients so a completion the routes
+    cannot parse is not cached and a retry generates a new one.
+    """
+    return extract_json(raw_response, record=False) is not None
+
+
+def extract_json_from_response(raw_response, logger_func):
+    """
+    Extract and repair the JSON object in an AI response.
+
+    Args:
+        raw_response: Completion text
+        logger_func: Function used to log failures
+
+    Returns:
+        ExtractionResult or None: Extraction result, or None on failure
+    """
+    result = extract_json(raw_response)
+    if result is None:
+        logger_func(f"No JSON object found in Groq response: {(raw_response or '')[:200]}")
+    elif result.repaired:
+        log_info(f"Repaired JSON in Groq response: {', '.join(result.repairs)}")
+    return result
+
+
+def get_extraction_stats():
+    """
+    Get extraction counters for this process.
+
+    Every repaired response is a regeneration that did not have to be paid for.
+
+    Returns:
+        dict: Extraction statistics
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["regenerations_avoided"] = stats["repaired"]
+    return stats
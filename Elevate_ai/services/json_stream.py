@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Incremental JSON parsing for streamed LLM output
+
+This module provides a parser that is fed completion text chunk by chunk and
+returns each element of a top-level JSON array (``questions``, ``plan``,
+``detailed_feedback``) as soon as the element is complete. Markdown fences
+and leading prose are skipped because the parser only starts reading once it
+has seen the array key followed by ``[``.
+"""
+
+import json
+
+# Parser states
+_SEEK_KEY = 0
+_SEEK_ARRAY = 1
+_BETWEEN_ELEMENTS = 2
+_IN_ELEMENT = 3
+_DONE = 4
+
+
+class JSONArrayStreamParser:
+    """
+    Emit complete elements of ``{"<array_key>": [...]}`` from streamed text.
+
+    Every character is scanned once; consumed text is discarded so memory
+    stays proportional to the largest element rather than the whole response.
+    """
+
+    def __init__(self, array_key):
+        self.array_key = array_key
+        self._pattern = f'"{array_key}"'
+        self._buffer = ""
+        self._pos = 0
+        self._state = _SEEK_KEY
+
+        # Element scanning state
+        self._element_start = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+        self.count = 0
+        self.errors = 0
+
+    @property
+    def done(self):
+        """True once the closing bracket of the array has been seen."""
+        return self._state == _DONE
+
+    def feed(self, chunk):
+        """
+        Feed the next chunk of text.
+
+        Args:
+            chunk: Newly received completion text
+
+        Returns:
+            list: Array elements completed by this chunk, already parsed;
+                elements that are not valid JSON are skipped
+        """
+        return [element for _, element, error in self.feed_slots(chunk) if error is None]
+
+    def feed_slots(self, chunk):
+        """
+        Feed the next chunk of text, keeping elements that fail to parse.
+
+        Args:
+            chunk: Newly received completion text
+
+        Returns:
+            list: (position in the array, element, error) for every element
+                completed by this chunk; element is None and error the parse
+                error for an element that is not valid JSON
+        """
+        if self._state == _DONE or not chunk:
+            return []
+
+        self._buffer += chunk
+        elements = []
+
+        while self._pos < len(self._buffer) and self._state != _DONE:
+            if self._state == _SEEK_KEY:
+                index = self._buffer.find(self._pattern, self._pos)
+                if index == -1:
+                    # Keep a tail in case the key is split across chunks
+                    self._pos = max(len(self._buffer) - len(self._pattern) + 1, self._pos)
+                    break
+                self._pos = index + len(self._pattern)
+                self._state = _SEEK_ARRAY
+
+            elif self._state == _SEEK_ARRAY:
+                char = self._buffer[self._pos]
+                if char == "[":
+                    self._state = _BETWEEN_ELEMENTS
+                elif not (char.isspace() or char == ":"):
+                    # The key appeared somewhere other than as the array's key
+                    self._state = _SEEK_KEY
+                    continue
+                self._pos += 1
+
+            elif self._state == _BETWEEN_ELEMENTS:
+                char = self._buffer[self._pos]
+                if char == "]":
+                    self._state = _DONE
+                elif not (char.isspace() or char == ","):
+                    self._element_start = self._pos
+                    self._depth = 0
+                    self._in_string = False
+                    self._escaped = False
+                    self._state = _IN_ELEMENT
+                    continue
+                self._pos += 1
+
+            else:
+                element = self._scan_element()
+                if element is not None:
+                    elements.append(element)
+
+        self._compact()
+        return elements
+
+    def _scan_element(self):
+        """Advance through the current element; return its slot once complete."""
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            char = buffer[self._pos]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 0:
+                        # A bare string element ends with its closing quote
+                        self._pos += 1
+                        return self._finish_element(self._pos)
+                self._pos += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # Closing bracket of the array ends a scalar element
+                    return self._finish_element(self._pos)
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pos += 1
+                    return self._finish_element(self._pos)
+            elif char == "," and self._depth == 0:
+                return self._finish_element(self._pos)
+            self._pos += 1
+        return None
+
+    def _finish_element(self, end):
+        """Parse buffer[element_start:end] and reset for the next element."""
+        self._state = _BETWEEN_ELEMENTS
+        text = self._buffer[self._element_start:end].strip()
+        position = self.count + self.errors
+        try:
+            element = json.loads(text)
+        except json.JSONDecodeError as e:
+            self.errors += 1
+            return position, None, f"Invalid JSON element: {e.msg}"
+        self.count += 1
+        return position, element, None
+
+    def _compact(self):
+        """Drop text that can no longer be part of an element."""
+        if self._state == _IN_ELEMENT:
+            keep_from = self._element_start
+        else:
+            keep_from = self._pos
+        if keep_from > 0:
+            self._buffer = self._buffer[keep_from:]
+            self._pos -= keep_from
+            self._element_start -= keep_from
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Task-tiered model routing for Groq completions
+
+This module maps each task type (syllabus, quiz, plan, resume, interview,
+feedback) to a model tier, records per-task latency and token histograms,
+and decides when a latency-sensitive call should send a hedged second
+request: after the task's p95 latency, within a budget of extra requests.
+"""
+
+import math
+import threading
+from collections import deque
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, math.inf)
+TOKEN_BUCKETS = (128, 256, 512, 1024, 2048, 4096, 8192, math.inf)
+
+
+def parse_mapping(value):
+    """
+    Parse "key=value,key=value" configuration into a dict.
+
+    Args:
+        value: Mapping string; empty entries are ignored
+
+    Returns:
+        dict: Parsed mapping with surrounding whitespace stripped
+    """
+    mapping = {}
+    for item in (value or "").split(","):
+        key, sep, val = item.partition("=")
+        if sep and key.strip() and val.strip():
+            mapping[key.strip()] = val.strip()
+    return mapping
+
+
+class Histogram:
+    """
+    Cumulative bucket counts plus a window of recent samples.
+
+    Buckets are for export and tuning; percentiles come from the recent
+    window so they follow changes in provider latency.
+    """
+
+    def __init__(self, buckets, window=512):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += value
+        self.recent.append(value)
+
+    def percentile(self, pct):
+        """Nearest-rank percentile of the recent window, or None if empty."""
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[max(int(math.ceil(pct / 100 * len(ordered))) - 1, 0)]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 1) if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": {("+Inf" if math.isinf(bound) else str(bound)): n
+                        for bound, n in zip(self.buckets, self.counts)},
+        }
+
+
+class _TaskStats:
+    def __init__(self):
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.tokens = Histogram(TOKEN_BUCKETS)
+        self.models = {}
+        self.hedged = 0
+        self.hedge_wins = 0
+
+
+class ModelRouter:
+    """
+    Route tasks to model tiers and decide when to hedge.
+
+    A task without a tier, or a tier without a model, uses the client's
+    default model. Hedging is off for tasks not listed in hedge_tasks and
+    until min_samples latencies have been seen for the task.
+    """
+
+    def __init__(self, model_tiers=None, task_tiers=None, hedge_tasks=(), hedge_percentile=95,
+                 hedge_min_delay=0.5, hedge_min_samples=20, hedge_max_ratio=0.1):
+        self.model_tiers = dict(model_tiers or {})
+        self.task_tiers = dict(task_tiers or {})
+        self.hedge_tasks = set(hedge_tasks)
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_max_ratio = hedge_max_ratio
+
+        self._lock = threading.Lock()
+        self._tasks = {}
+
+    def _task(self, task):
+        stats = self._tasks.get(task)
+        if stats is None:
+            stats = self._tasks[task] = _TaskStats()
+        return stats
+
+    def model_for(self, task, default):
+        """
+        Get the model for a task.
+
+        Args:
+            task: Task type, or None
+            default: Model to use when the task has no tiered model
+
+        Returns:
+            str: Model name
+        """
+        tier = self.task_tiers.get(task)
+        return self.model_tiers.get(tier) or default
+
+    def hedge_delay(self, task):
+        """
+        Get how long to wait before hedging a call for task.
+
+        Returns:
+            float or None: Seconds, or None if this call should not be hedged
+        """
+        if task not in self.hedge_tasks:
+            return None
+        with self._lock:
+            stats = self._task(task)
+            samples = len(stats.latency_ms.recent)
+            budget = self.hedge_max_ratio * stats.latency_ms.count
+            if samples < self.hedge_min_samples or stats.hedged + 1 > budget:
+                return None
+            p = stats.latency_ms.percentile(self.hedge_percentile)
+        return max(p / 1000, self.hedge_min_delay)
+
+    def observe(self, task, model, latency_ms, tokens):
+        """Record one completed upstream call."""
+        with self._lock:
+            stats = self._task(task or "default")
+            stats.latency_ms.observe(latency_ms)
+            stats.tokens.observe(tokens)
+            stats.models[model] = stats.models.get(model, 0) + 1
+
+    def record_hedge(self, task, won):
+        """Record that a hedge was sent for task and whether it beat the original."""
+        with self._lock:
+            stats = self._task(task)
+            stats.hedged += 1
+            stats.hedge_wins += int(won)
+
+    def get_stats(self):
+        """
+        Get per-task latency and token histograms, model counts and hedging.
+
+        Returns:
+            dict: Task name -> statistics
+        """
+        with self._lock:
+            return {
+                task: {
+                    "tier": self.task_tiers.get(task),
+                    "models": dict(stats.models),
+                    "latency_ms": stats.latency_ms.snapshot(),
+                    "tokens": stats.tokens.snapshot(),
+                    "hedged": stats.hedged,
+                    "hedge_wins": stats.hedge_wins,
+                }
+                for task, stats in sorted(self._tasks.items())
+            }
+
+
+_default_router = None
+_default_router_lock = threading.Lock()
+
+
+def get_default_router(config):
+    """
+    Get the process-wide model router.
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        ModelRouter: Shared router instance
+    """
+    global _default_router
+    if _default_router is None:
+        with _default_router_lock:
+            if _default_router is None:
+                _default_router = ModelRouter(
+                    model_tiers=parse_mapping(config.GROQ_MODEL_TIERS),
+                    task_tiers=parse_mapping(config.GROQ_TASK_TIERS),
+                    hedge_tasks=[t.strip() for t in config.GROQ_HEDGE_TASKS.split(",") if t.strip()],
+                    hedge_percentile=config.GROQ_HEDGE_PERCENTILE,
+                    hedge_min_delay=config.GROQ_HEDGE_MIN_DELAY,
+                    hedge_min_samples=config.GROQ_HEDGE_MIN_SAMPLES,
+                    hedge_max_ratio=config.GROQ_HEDGE_MAX_RATIO,
+                )
+    return _default_router
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Speculative prefetch of likely next generations
+
+After a syllabus upload the user nearly always asks for a quiz and a study
+plan with default parameters next. This module generates those completions
+ahead of time as background jobs, keyed by the exact prompt, so the later
+request can take the stored completion instead of waiting for Groq. A
+prefetch only happens while the rate limiter has headroom, and every
+prefetched completion is used at most once.
+"""
+
+import hashlib
+import threading
+import time
+
+from utils.logger import log_info
+
+JOB_KIND = "prefetch"
+
+
+def prefetch_key(task, prompt):
+    """Dedupe key of the prefetch job for a prompt."""
+    return "prefetch:" + hashlib.sha256(f"{task}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+class Prefetcher:
+    """
+    Schedule prefetch jobs and hand their completions to matching requests.
+
+    Stats count scheduled, skipped (no budget), used and cancelled
+    prefetches, plus lookups that found nothing; hit_rate is the share of
+    lookups served from a prefetch and use_rate the share of prefetches
+    that were used.
+    """
+
+    def __init__(self, job_queue, client, min_headroom=0.5, wait_seconds=30.0):
+        self.job_queue = job_queue
+        self.client = client
+        self.min_headroom = min_headroom
+        self.wait_seconds = wait_seconds
+
+        self._lock = threading.Lock()
+        self._stats = {"scheduled": 0, "skipped": 0, "hits": 0, "joined": 0,
+                       "cancelled": 0, "misses": 0}
+        job_queue.register(JOB_KIND, self._run)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _has_budget(self):
+        return self.client.headroom() >= self.min_headroom
+
+    def schedule(self, task, prompt):
+        """
+        Queue a prefetch of prompt, unless the rate limiter is short of budget.
+
+        Args:
+            task: Routing task of the prompt
+            prompt: Exact prompt the later request will send
+
+        Returns:
+            dict or None: The prefetch job, or None when skipped
+        """
+        if not self._has_budget():
+            self._count("skipped")
+            log_info(f"Skipped {task} prefetch: rate limit headroom below {self.min_headroom}")
+            return None
+        job = self.job_queue.enqueue(JOB_KIND, {"task": task, "prompt": prompt},
+                                     dedupe_key=prefetch_key(task, prompt))
+        if not job["deduplicated"]:
+            self._count("scheduled")
+        return job
+
+    def _run(self, payload):
+        # Budget is checked again here: the job may run long after scheduling
+        if not self._has_budget():
+            self._count("skipped")
+            return {"skipped": True}
+        return {"response": self.client.generate_response(payload["prompt"], task=payload["task"])}
+
+    def take(self, task, prompt, wait_seconds=None):
+        """
+        Take the prefetched completion of prompt, if there is one.
+
+        A queued prefetch is cancelled, since the caller is about to generate
+        anyway; a running one is waited for up to wait_seconds.
+
+        Args:
+            task: Routing task of the prompt
+            prompt: Prompt the request would send
+            wait_seconds: Override for the longest wait on a running prefetch
+
+        Returns:
+            str or None: Completion text, or None on a miss
+        """
+        job = self.job_queue.find(prefetch_key(task, prompt))
+        if job is not None and job["status"] == "queued" and self.job_queue.cancel(job["job_id"]):
+            self._count("cancelled")
+            job = None
+
+        joined = job is not None and job["status"] != "succeeded"
+        deadline = time.monotonic() + (self.wait_seconds if wait_seconds is None else wait_seconds)
+        while job is not None and job["status"] not in ("succeeded", "failed") and time.monotonic() < deadline:
+            self.job_queue.wait(min(0.25, max(deadline - time.monotonic(), 0)))
+            job = self.job_queue.get(job["job_id"])
+
+        result = self.job_queue.consume(job["job_id"]) if job is not None else None
+        if not result or "response" not in result:
+            self._count("misses")
+            return None
+
+        self._count("hits")
+        if joined:
+            self._count("joined")
+        stats = self.get_stats()
+        log_info(f"Served {task} from prefetch - hit rate {stats['hit_rate']}, use rate {stats['use_rate']}")
+        return result["response"]
+
+    def get_stats(self):
+        """
+        Get prefetch counters and hit rates.
+
+        Returns:
+            dict: Prefetch statistics
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["use_rate"] = round(stats["hits"] / stats["scheduled"], 3) if stats["scheduled"] else 0.0
+        return stats
@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Precomputed quiz question bank
+
+This module stores generated quiz questions per (syllabus, topic,
+difficulty) so that quizzes can be assembled from the bank instead of
+waiting for a fresh generation. Questions a user has already been served
+are excluded, near-duplicates are rejected by a 64-bit simhash of the
+question text, and buckets running low on unseen questions are reported so
+the caller can top them up in the background.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from itertools import zip_longest
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 4
+STOPWORDS = frozenset(
+    "a an and are as at be by did do does during for from how in is it its of on or "
+    "that the this to was what which who with".split()
+)
+NUMBERING = re.compile(r"^\s*(?:question|q)?\s*\d+\s*[:.)-]\s*")
+
+# Tables live in the application database next to the quizzes they feed
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS question_bank (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        syllabus_id INTEGER NOT NULL,
+        topic TEXT NOT NULL,
+        topic_key TEXT NOT NULL,
+        difficulty TEXT NOT NULL,
+        question TEXT NOT NULL,
+        simhash INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (syllabus_id) REFERENCES syllabi (id)
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_question_bank_bucket
+    ON question_bank (syllabus_id, topic_key, difficulty)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS question_bank_seen (
+        user_id TEXT NOT NULL,
+        question_id INTEGER NOT NULL,
+        seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, question_id),
+        FOREIGN KEY (question_id) REFERENCES question_bank (id)
+    )
+    """,
+]
+
+
+def topic_key(topic):
+    """Normalise a topic name for bucket lookups."""
+    return " ".join(str(topic).lower().split())
+
+
+def simhash(text):
+    """
+    64-bit simhash of character 4-grams, ignoring case and stopwords.
+
+    Character shingles keep short questions that differ in one word or a
+    suffix close together, where word features would scatter them. A
+    leading "Question 3:" style number is dropped first.
+
+    Args:
+        text: Text to fingerprint
+
+    Returns:
+        int: Fingerprint as a signed 64-bit integer (SQLite's INTEGER range)
+    """
+    text = NUMBERING.sub("", text.lower())
+    normalized = " ".join(t for t in re.findall(r"\w+", text) if t not in STOPWORDS)
+    features = [normalized[i:i + SHINGLE_SIZE]
+                for i in range(max(len(normalized) - SHINGLE_SIZE + 1, 1))]
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    value = sum(1 << bit for bit in range(SIMHASH_BITS) if weights[bit] > 0)
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
+
+
+def hamming_distance(a, b):
+    """Number of differing bits between two simhashes."""
+    return bin((a ^ b) & ((1 << SIMHASH_BITS) - 1)).count("1")
+
+
+class QuestionBank:
+    """
+    Add, deduplicate and serve banked questions.
+
+    Methods take an open sqlite3 connection to the application database
+    and leave committing to the caller, so bank updates share the
+    caller's transaction.
+    """
+
+    def __init__(self, max_distance=10, min_unseen=3, max_per_bucket=100):
+        self.max_distance = max_distance
+        self.min_unseen = min_unseen
+        self.max_per_bucket = max_per_bucket
+
+        self._lock = threading.Lock()
+        self._stats = {"quizzes_served": 0, "questions_served": 0, "misses": 0,
+                       "added": 0, "duplicates": 0, "top_ups": 0, "skipped_fills": 0}
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def add_questions(self, conn, syllabus_id, difficulty, questions):
+        """
+        Bank generated questions, skipping near-duplicates of banked ones.
+
+        Questions are compared within their topic, at any difficulty.
+
+        Args:
+            conn: Database connection
+            syllabus_id: Syllabus the questions belong to
+            difficulty: Difficulty they were generated at
+            questions: Question dicts as produced by the quiz prompt
+
+        Returns:
+            list: Bank ID per question - the new row, or the banked
+                question it duplicates
+        """
+        known = {}
+        for row in conn.execute("SELECT id, topic_key, simhash FROM question_bank WHERE syllabus_id = ?",
+                                (syllabus_id,)):
+            known.setdefault(row[1], []).append((row[0], row[2]))
+        ids = []
+        added = 0
+        for question in questions:
+            topic = question.get("topic") or "general"
+            bucket = known.setdefault(topic_key(topic), [])
+            fingerprint = simhash(question.get("question", ""))
+            duplicate = next((bank_id for bank_id, other in bucket
+                              if hamming_distance(fingerprint, other) <= self.max_distance), None)
+            if duplicate is not None:
+                ids.append(duplicate)
+                continue
+            bank_id = conn.execute(
+                "INSERT INTO question_bank (syllabus_id, topic, topic_key, difficulty, question, simhash) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (syllabus_id, topic, topic_key(topic), difficulty.lower(), json.dumps(question), fingerprint)
+            ).lastrowid
+            bucket.append((bank_id, fingerprint))
+            ids.append(bank_id)
+            added += 1
+        self.count("added", added)
+        self.count("duplicates", len(questions) - added)
+        return ids
+
+    def _unseen_counts(self, conn, syllabus_id, user_id, keys, difficulty):
+        placeholders = ",".join("?" * len(keys))
+        rows = conn.execute(
+            f"SELECT b.topic_key, COUNT(*), SUM(s.question_id IS NULL) FROM question_bank b "
+            f"LEFT JOIN question_bank_seen s ON s.question_id = b.id AND s.user_id = ? "
+            f"WHERE b.syllabus_id = ? AND b.difficulty = ? AND b.topic_key IN ({placeholders}) "
+            f"GROUP BY b.topic_key",
+            (user_id, syllabus_id, difficulty, *keys)
+        ).fetchall()
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def assemble(self, conn, syllabus_id, user_id, topics, difficulty, count):
+        """
+        Pick up to count unseen questions, interleaving the topics.
+
+        Args:
+            conn: Database connection
+            syllabus_id: Syllabus to draw from
+            user_id: User the quiz is for
+            topics: Topic names to cover
+            difficulty: Requested difficulty
+            count: Number of questions wanted
+
+        Returns:
+            tuple: (list of (bank_id, question) pairs, dict of topics to
+                top up mapped to their bucket size)
+        """
+        difficulty = difficulty.lower()
+        buckets = {}
+        for topic in topics:
+            if str(topic).strip():
+                buckets.setdefault(topic_key(topic), str(topic).strip())
+        keys = list(buckets)
+        if not keys:
+            return [], {}
+
+        per_topic = []
+        for key in keys:
+            rows = conn.execute(
+                "SELECT b.id, b.question FROM question_bank b "
+                "WHERE b.syllabus_id = ? AND b.topic_key = ? AND b.difficulty = ? AND NOT EXISTS ("
+                "  SELECT 1 FROM question_bank_seen s WHERE s.user_id = ? AND s.question_id = b.id) "
+                "ORDER BY RANDOM() LIMIT ?",
+                (syllabus_id, key, difficulty, user_id, count)
+            ).fetchall()
+            per_topic.append([(row[0], json.loads(row[1])) for row in rows])
+        picked = [pair for group in zip_longest(*per_topic) for pair in group if pair is not None][:count]
+
+        counts = self._unseen_counts(conn, syllabus_id, user_id, keys, difficulty)
+        used = {}
+        for _, question in picked:
+            k = topic_key(question.get("topic") or "general")
+            used[k] = used.get(k, 0) + 1
+        thin = {}
+        for key, topic in buckets.items():
+            banked, unseen = counts.get(key, (0, 0))
+            if unseen - used.get(key, 0) < self.min_unseen and banked < self.max_per_bucket:
+                thin[topic] = banked
+
+        if len(picked) < count:
+            self.count("misses")
+        return picked, thin
+
+    def question_texts(self, conn, syllabus_id, topics, difficulty, limit=30):
+        """
+        Most recent banked question texts for some topics.
+
+        Used to tell the generator which questions already exist.
+
+        Args:
+            conn: Database connection
+            syllabus_id: Syllabus to look in
+            topics: Topic names
+            difficulty: Difficulty bucket
+            limit: Maximum number of texts
+
+        Returns:
+            list: Question texts, newest first
+        """
+        keys = list(dict.fromkeys(topic_key(t) for t in topics))
+        if not keys:
+            return []
+        placeholders = ",".join("?" * len(keys))
+        rows = conn.execute(
+            f"SELECT question FROM question_bank WHERE syllabus_id = ? AND difficulty = ? "
+            f"AND topic_key IN ({placeholders}) ORDER BY id DESC LIMIT ?",
+            (syllabus_id, difficulty.lower(), *keys, limit)
+        ).fetchall()
+        return [json.loads(row[0]).get("question", "") for row in rows]
+
+    def mark_seen(self, conn, user_id, question_ids):
+        """Record that a user has been served these bank questions."""
+        conn.executemany(
+            "INSERT OR IGNORE INTO question_bank_seen (user_id, question_id) VALUES (?, ?)",
+            [(user_id, question_id) for question_id in question_ids]
+        )
+
+    def get_stats(self):
+        """
+        Get serving and deduplication counters.
+
+        Returns:
+            dict: Bank statistics
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        served = stats["quizzes_served"] + stats["misses"]
+        stats["hit_rate"] = round(stats["quizzes_served"] / served, 3) if served else 0.0
+        return stats
+
+
+_default_question_bank = None
+_default_question_bank_lock = threading.Lock()
+
+
+def get_default_question_bank(config):
+    """
+    Get the process-wide question bank.
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        QuestionBank: Shared bank instance
+    """
+    global _default_question_bank
+    if _default_question_bank is None:
+        with _default_question_bank_lock:
+            if _default_question_bank is None:
+                _default_question_bank = QuestionBank(
+                    max_distance=config.QUESTION_BANK_SIMHASH_DISTANCE,
+                    min_unseen=config.QUESTION_BANK_MIN_UNSEEN,
+                    max_per_bucket=config.QUESTION_BANK_MAX_PER_BUCKET,
+                )
+    return _default_question_bank
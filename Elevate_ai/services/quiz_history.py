@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Normalized quiz questions and responses
+
+Every quiz question is stored as a row of quiz_questions, and every answer
+to a submitted quiz as a row of quiz_responses, keyed by (quiz_id,
+question_no). Responses carry the user, syllabus and topic, so weak topics,
+per-topic accuracy and quiz history are indexed SQL aggregates instead of
+JSON parsed in Python. The quizzes.questions and quizzes.answers blobs are
+kept only as an archival copy, and backfill() converts quizzes stored
+before these tables existed, in small batches.
+"""
+
+import json
+import time
+
+from services.topic_mastery import DEFAULT_ALPHA, record_quiz
+from utils.logger import log_error, log_info
+
+# Stored next to the quizzes they normalize
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS quiz_questions (
+        quiz_id INTEGER NOT NULL,
+        question_no INTEGER NOT NULL,
+        question_id TEXT NOT NULL,
+        topic TEXT NOT NULL DEFAULT '',
+        question TEXT NOT NULL,
+        options TEXT NOT NULL,
+        correct_answer TEXT,
+        explanation TEXT,
+        PRIMARY KEY (quiz_id, question_no),
+        FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS quiz_responses (
+        quiz_id INTEGER NOT NULL,
+        question_no INTEGER NOT NULL,
+        user_id TEXT NOT NULL,
+        syllabus_id INTEGER NOT NULL,
+        topic TEXT NOT NULL DEFAULT '',
+        answer TEXT,
+        correct INTEGER NOT NULL,
+        answered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (quiz_id, question_no),
+        FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
+    )
+    """,
+    # Covers the per-user aggregates: recent quizzes, then topic and outcome
+    "CREATE INDEX IF NOT EXISTS idx_quiz_responses_user_syllabus_quiz "
+    "ON quiz_responses (user_id, syllabus_id, quiz_id, topic, correct)",
+]
+
+
+def parse_questions(questions_json):
+    """
+    Questions of a quiz from its archived JSON.
+
+    Accepts {"questions": [...]} as generated and a bare list as in older
+    sample data; items that are not objects are dropped.
+
+    Raises:
+        ValueError: If the JSON cannot be parsed
+    """
+    data = json.loads(questions_json)
+    questions = data.get("questions", []) if isinstance(data, dict) else data
+    if not isinstance(questions, list):
+        raise ValueError("Quiz has no question list")
+    return [q for q in questions if isinstance(q, dict)]
+
+
+def save_questions(conn, quiz_id, questions):
+    """Store the questions of a quiz; rows already stored are kept."""
+    conn.executemany(
+        "INSERT OR IGNORE INTO quiz_questions (quiz_id, question_no, question_id, topic, question, options, "
+        "correct_answer, explanation) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [(quiz_id, no, str(q.get("id", no)), str(q.get("topic") or ""), str(q.get("question", "")),
+          json.dumps(q.get("options", [])), q.get("correct_answer"), q.get("explanation"))
+         for no, q in enumerate(questions, 1)]
+    )
+
+
+def load_questions(conn, quiz_id):
+    """
+    Questions of a quiz in their generated shape, in order.
+
+    Returns:
+        list: Question dicts; empty if the quiz has not been normalized
+    """
+    return [{
+        "id": int(row[0]) if row[0].isdigit() else row[0],
+        "question": row[1],
+        "options": json.loads(row[2]),
+        "correct_answer": row[3],
+        "topic": row[4],
+        "explanation": row[5],
+    } for row in conn.execute(
+        "SELECT question_id, question, options, correct_answer, topic, explanation FROM quiz_questions "
+        "WHERE quiz_id = ? ORDER BY question_no", (quiz_id,)
+    )]
+
+
+def mark_answers(questions, answers):
+    """
+    Mark each question against the submitted answers.
+
+    Args:
+        questions: Question dicts in quiz order
+        answers: Dict of question ID (as a string) to the chosen answer
+
+    Returns:
+        list: (question_no, question, answer, correct) tuples
+    """
+    marked = []
+    for no, q in enumerate(questions, 1):
+        q_id = str(q.get("id", no))
+        marked.append((no, q, answers.get(q_id, ""), q_id in answers and answers[q_id] == q.get("correct_answer")))
+    return marked
+
+
+def save_responses(conn, quiz_id, user_id, syllabus_id, marked, answered_at=None):
+    """
+    Store the scored answers of a quiz.
+
+    Args:
+        conn: Database connection
+        quiz_id: Quiz ID
+        user_id: User who submitted the quiz
+        syllabus_id: Syllabus of the quiz
+        marked: Tuples as returned by mark_answers()
+        answered_at: Submission time, now by default
+    """
+    conn.executemany(
+        "INSERT OR REPLACE INTO quiz_responses "
+        "(quiz_id, question_no, user_id, syllabus_id, topic, answer, correct, answered_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))",
+        [(quiz_id, no, str(user_id), syllabus_id, str(q.get("topic") or ""), answer, int(correct), answered_at)
+         for no, q, answer, correct in marked]
+    )
+
+
+def weak_topics(conn, user_id, syllabus_id, recent=5, threshold=0.7):
+    """
+    Topics answered below a threshold in the user's recent submitted quizzes.
+
+    Args:
+        conn: Database connection
+        user_id: User ID
+        syllabus_id: Syllabus ID
+        recent: Number of most recent submitted quizzes to consider
+        threshold: Accuracy below which a topic is weak
+
+    Returns:
+        list: Topic names, weakest first
+    """
+    return [row[0] for row in conn.execute(
+        "SELECT topic FROM quiz_responses WHERE user_id = ? AND syllabus_id = ? AND quiz_id IN ("
+        "    SELECT DISTINCT quiz_id FROM quiz_responses WHERE user_id = ? AND syllabus_id = ? "
+        "    ORDER BY quiz_id DESC LIMIT ?) "
+        "GROUP BY topic HAVING AVG(correct) < ? ORDER BY AVG(correct), topic",
+        (str(user_id), syllabus_id, str(user_id), syllabus_id, recent, threshold)
+    )]
+
+
+def topic_accuracy(conn, user_id, syllabus_id):
+    """
+    Answered and correct counts per topic over all submitted quizzes.
+
+    Returns:
+        dict: Topic name to {"answered", "correct", "accuracy"}
+    """
+    return {row[0]: {"answered": row[1], "correct": row[2], "accuracy": row[2] / row[1]}
+            for row in conn.execute(
+                "SELECT topic, COUNT(*), SUM(correct) FROM quiz_responses WHERE user_id = ? AND syllabus_id = ? "
+                "GROUP BY topic ORDER BY topic", (str(user_id), syllabus_id)
+            )}
+
+
+def quiz_history(conn, user_id, syllabus_id, limit=-1):
+    """
+    Submitted quizzes of a user, newest first.
+
+    Args:
+        conn: Database connection
+        user_id: User ID
+        syllabus_id: Syllabus ID
+        limit: Maximum number of quizzes, all by default
+
+    Returns:
+        list: Dicts with quiz_id, answered, correct, topics and answered_at
+    """
+    return [{"quiz_id": row[0], "answered": row[1], "correct": row[2], "topics": json.loads(row[3]),
+             "answered_at": row[4]}
+            for row in conn.execute(
+                "SELECT quiz_id, COUNT(*), SUM(correct), json_group_array(DISTINCT topic), MAX(answered_at) "
+                "FROM quiz_responses "
+                "WHERE user_id = ? AND syllabus_id = ? GROUP BY quiz_id ORDER BY quiz_id DESC LIMIT ?",
+                (str(user_id), syllabus_id, limit)
+            )]
+
+
+def backfill_batch(conn, after_id=0, limit=200, alpha=DEFAULT_ALPHA):
+    """
+    Normalize one batch of quizzes stored only as JSON.
+
+    The quizzes are read before any write, so the write lock is held only
+    while their rows are inserted; the caller commits.
+
+    Args:
+        conn: Database connection
+        after_id: Only quizzes with a higher ID are considered
+        limit: Maximum number of quizzes in the batch
+        alpha: Mastery decay passed to topic_mastery.record_quiz()
+
+    Returns:
+        tuple: (quizzes examined, highest ID examined or None when done)
+    """
+    rows = conn.execute(
+        "SELECT id, user_id, syllabus_id, questions, answers, created_at FROM quizzes q WHERE id > ? "
+        "AND NOT EXISTS (SELECT 1 FROM quiz_questions WHERE quiz_id = q.id) ORDER BY id LIMIT ?",
+        (after_id, limit)
+    ).fetchall()
+    converted = []
+    for quiz_id, user_id, syllabus_id, questions_json, answers_json, created_at in rows:
+        try:
+            questions = parse_questions(questions_json)
+            answers = json.loads(answers_json or "{}")
+        except (ValueError, TypeError) as e:
+            log_error(f"Quiz {quiz_id} could not be normalized: {e}")
+            continue
+        # Only submitted quizzes have answers keyed by question ID
+        marked = mark_answers(questions, answers) if isinstance(answers, dict) and answers else []
+        converted.append((quiz_id, user_id, syllabus_id, questions, marked, created_at))
+
+    for quiz_id, user_id, syllabus_id, questions, marked, created_at in converted:
+        save_questions(conn, quiz_id, questions)
+        # The write lock is held from here on, so a submission that landed
+        # after the read above is seen and keeps its responses and mastery
+        if conn.execute("SELECT 1 FROM quiz_responses WHERE quiz_id = ? LIMIT 1", (quiz_id,)).fetchone():
+            continue
+        save_responses(conn, quiz_id, user_id, syllabus_id, marked, answered_at=created_at)
+        record_quiz(conn, user_id, syllabus_id, quiz_id, marked, alpha, seen_at=created_at)
+    return len(rows), rows[-1][0] if rows else None
+
+
+def pending_backfill(conn):
+    """Whether any quiz is stored only as JSON."""
+    return conn.execute(
+        "SELECT 1 FROM quizzes q WHERE NOT EXISTS (SELECT 1 FROM quiz_questions WHERE quiz_id = q.id) LIMIT 1"
+    ).fetchone() is not None
+
+
+def backfill(connect, batch_size=200, pause=0.05, alpha=DEFAULT_ALPHA):
+    """
+    Normalize every quiz stored only as JSON, one short transaction per batch.
+
+    Safe to run while the app serves requests and to run again: quizzes
+    already normalized are skipped.
+
+    Args:
+        connect: Callable returning a database connection
+        batch_size: Quizzes per transaction
+        pause: Seconds to sleep between batches, leaving the write lock to
+            request handlers
+        alpha: Mastery decay passed to topic_mastery.record_quiz()
+
+    Returns:
+        int: Number of quizzes examined
+    """
+    examined, after_id = 0, 0
+    while True:
+        conn = connect()
+        try:
+            count, after_id = backfill_batch(conn, after_id, batch_size, alpha)
+            conn.commit()
+        finally:
+            conn.close()
+        if after_id is None:
+            break
+        examined += count
+        time.sleep(pause)
+    if examined:
+        log_info(f"Quiz backfill: {examined} quizzes normalized")
+    return examined
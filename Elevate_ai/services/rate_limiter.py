@@ -0,0 +1,424 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Client-side rate limiting for the Groq API
+
+This module budgets Groq calls against both requests per minute and tokens
+per minute with a pair of token buckets. Callers in a process are served in
+arrival order; when a SQLite file is configured the bucket levels live there
+so every gunicorn worker on the host draws from the same budget. A 429 with
+Retry-After pauses all callers until the provider is ready again.
+"""
+
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+from services.http_transport import TransportError
+
+# Rough characters-per-token ratio used to estimate prompt size
+CHARS_PER_TOKEN = 4
+
+
+class RateLimitExceeded(TransportError):
+    """Raised when the budget cannot be acquired before the call's deadline."""
+
+    def __init__(self, message, retry_after=None):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+def estimate_tokens(prompt, max_tokens):
+    """
+    Estimate the tokens a request will count against the TPM budget.
+
+    The estimate is reconciled with usage.total_tokens once the response
+    arrives.
+
+    Args:
+        prompt: Prompt text
+        max_tokens: Completion token limit
+
+    Returns:
+        int: Estimated prompt plus completion tokens
+    """
+    return len(prompt) // CHARS_PER_TOKEN + int(max_tokens)
+
+
+def parse_retry_after(headers):
+    """
+    Read the Retry-After header as a number of seconds.
+
+    Args:
+        headers: Response headers
+
+    Returns:
+        float or None: Seconds to wait, or None if the header is missing
+    """
+    value = next((v for k, v in (headers or {}).items() if k.lower() == "retry-after"), None)
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=0.5, cap=20.0):
+    """
+    Get a full-jitter exponential backoff delay.
+
+    Args:
+        attempt: Zero-based retry number
+        base: Delay scale for the first retry in seconds
+        cap: Maximum delay in seconds
+
+    Returns:
+        float: Seconds to wait before retrying
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute token buckets.
+
+    Both buckets start full and refill continuously. A request waits until
+    one request and its estimated tokens are available; requests larger
+    than the whole TPM budget only wait for a full bucket.
+    """
+
+    def __init__(self, requests_per_minute=30, tokens_per_minute=60000, db_path=None, name="groq"):
+        self.requests_per_minute = float(requests_per_minute)
+        self.tokens_per_minute = float(tokens_per_minute)
+        self.db_path = db_path
+        self.name = name
+
+        # Local bucket state: (requests, tokens, updated_at, blocked_until)
+        self._state = (self.requests_per_minute, self.tokens_per_minute, time.time(), 0.0)
+        self._state_lock = threading.Lock()
+        self._local = threading.local()
+
+        # FIFO of waiting callers; only the head draws from the buckets
+        self._queue = deque()
+        self._cond = threading.Condition()
+
+        # Coroutine callers queue on an asyncio.Lock of the loop they run on
+        self._async_lock = None
+        self._async_lock_loop = None
+        self._async_waiting = 0
+        self._stats = {
+            "acquired": 0,
+            "waited": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "max_queue_depth": 0,
+            "deadline_exceeded": 0,
+            "throttled": 0,
+        }
+
+        if self.db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = self._get_db()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limit (
+                    name TEXT PRIMARY KEY,
+                    requests REAL NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    blocked_until REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "INSERT OR IGNORE INTO rate_limit (name, requests, tokens, updated_at, blocked_until) "
+                "VALUES (?, ?, ?, ?, 0)",
+                (self.name, self.requests_per_minute, self.tokens_per_minute, time.time())
+            )
+
+    def _get_db(self):
+        """Get this thread's connection to the shared limiter file."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _update(self, func):
+        """
+        Apply func to the bucket state atomically.
+
+        func receives (requests, tokens, blocked_until) already refilled to
+        now and returns (new_state_tuple, result).
+        """
+        now = time.time()
+        if not self.db_path:
+            with self._state_lock:
+                state, result = func(*self._refill(*self._state, now=now), now)
+                self._state = (*state[:2], now, state[2])
+            return result
+
+        conn = self._get_db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT requests, tokens, updated_at, blocked_until FROM rate_limit WHERE name = ?",
+                (self.name,)
+            ).fetchone()
+            state, result = func(*self._refill(*row, now=now), now)
+            conn.execute(
+                "UPDATE rate_limit SET requests = ?, tokens = ?, updated_at = ?, blocked_until = ? "
+                "WHERE name = ?",
+                (state[0], state[1], now, state[2], self.name)
+            )
+        finally:
+            conn.execute("COMMIT")
+        return result
+
+    def _refill(self, requests, tokens, updated_at, blocked_until, now):
+        elapsed = max(now - updated_at, 0.0)
+        requests = min(self.requests_per_minute, requests + elapsed * self.requests_per_minute / 60)
+        tokens = min(self.tokens_per_minute, tokens + elapsed * self.tokens_per_minute / 60)
+        return requests, tokens, blocked_until
+
+    def _take(self, cost):
+        """Take one request and cost tokens, or return the seconds to wait."""
+        cost = min(cost, self.tokens_per_minute)
+
+        def take(requests, tokens, blocked_until, now):
+            if blocked_until > now:
+                return (requests, tokens, blocked_until), blocked_until - now
+            if requests >= 1 and tokens >= cost:
+                return (requests - 1, tokens - cost, blocked_until), 0.0
+            wait = max((1 - requests) * 60 / self.requests_per_minute,
+                       (cost - tokens) * 60 / self.tokens_per_minute)
+            return (requests, tokens, blocked_until), wait
+
+        return self._update(take)
+
+    def acquire(self, tokens, deadline=None):
+        """
+        Wait for budget for one request of the given size.
+
+        Args:
+            tokens: Estimated tokens for the request
+            deadline: Optional time.monotonic() value to give up at
+
+        Returns:
+            float: Seconds spent waiting
+
+        Raises:
+            RateLimitExceeded: If the budget will not be available by the deadline
+        """
+        start = time.monotonic()
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"],
+                                                 len(self._queue) + self._async_waiting)
+
+        try:
+            with self._cond:
+                while self._queue[0] is not ticket:
+                    timeout = None if deadline is None else deadline - time.monotonic()
+                    if timeout is not None and timeout <= 0:
+                        self._exceeded()
+                    self._cond.wait(timeout)
+
+            # Head of the queue: hold our place while the buckets refill
+            while True:
+                wait = self._take(tokens)
+                if wait <= 0:
+                    break
+                if deadline is not None and time.monotonic() + wait > deadline:
+                    self._exceeded(wait)
+                time.sleep(min(wait, 1.0))
+        finally:
+            with self._cond:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+        return self._record_wait(time.monotonic() - start)
+
+    async def acquire_async(self, tokens, deadline=None):
+        """
+        Coroutine version of acquire for callers on an event loop.
+
+        Args:
+            tokens: Estimated tokens for the request
+            deadline: Optional time.monotonic() value to give up at
+
+        Returns:
+            float: Seconds spent waiting
+
+        Raises:
+            RateLimitExceeded: If the budget will not be available by the deadline
+        """
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        if self._async_lock_loop is not loop:
+            self._async_lock = asyncio.Lock()
+            self._async_lock_loop = loop
+        lock = self._async_lock
+
+        with self._cond:
+            self._async_waiting += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"],
+                                                 len(self._queue) + self._async_waiting)
+        try:
+            # asyncio.Lock wakes waiters in arrival order
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                await asyncio.wait_for(lock.acquire(), timeout)
+            except asyncio.TimeoutError:
+                self._exceeded()
+            try:
+                while True:
+                    wait = await self._off_loop(self._take, tokens)
+                    if wait <= 0:
+                        break
+                    if deadline is not None and time.monotonic() + wait > deadline:
+                        self._exceeded(wait)
+                    await asyncio.sleep(min(wait, 1.0))
+            finally:
+                lock.release()
+        finally:
+            with self._cond:
+                self._async_waiting -= 1
+
+        return self._record_wait(time.monotonic() - start)
+
+    async def _off_loop(self, fn, *args):
+        """Await fn(*args), in a worker thread when it takes the shared file's write lock."""
+        if self.db_path:
+            # BEGIN IMMEDIATE can wait up to the busy timeout for another worker
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def _record_wait(self, waited):
+        with self._cond:
+            self._stats["acquired"] += 1
+            if waited > 0.001:
+                self._stats["waited"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+        return waited
+
+    def _exceeded(self, retry_after=None):
+        with self._cond:  # re-entrant, may already be held
+            self._stats["deadline_exceeded"] += 1
+        raise RateLimitExceeded("Groq rate limit budget not available before the call deadline",
+                                retry_after)
+
+    def reconcile(self, estimated, actual):
+        """
+        Correct the token bucket once the real usage is known.
+
+        Args:
+            estimated: Tokens taken by acquire
+            actual: usage.total_tokens from the response
+        """
+        def adjust(requests, tokens, blocked_until, now):
+            # May go negative: a request that ran over its estimate is owed
+            tokens = min(self.tokens_per_minute, tokens + estimated - actual)
+            return (requests, tokens, blocked_until), None
+
+        self._update(adjust)
+
+    async def reconcile_async(self, estimated, actual):
+        """Coroutine version of reconcile that keeps the shared file off the event loop."""
+        await self._off_loop(self.reconcile, estimated, actual)
+
+    def block_for(self, seconds):
+        """
+        Pause every caller sharing this limiter, e.g. after a 429.
+
+        Args:
+            seconds: Seconds from now before the next request may start
+        """
+        def block(requests, tokens, blocked_until, now):
+            return (requests, tokens, max(blocked_until, now + seconds)), None
+
+        with self._cond:
+            self._stats["throttled"] += 1
+        self._update(block)
+
+    def headroom(self):
+        """
+        Fraction of the request and token budgets available right now.
+
+        Returns 0.0 while a Retry-After block is in force or callers are
+        queued, so optional work (prefetching) can stand aside.
+
+        Returns:
+            float: Between 0.0 (saturated) and 1.0 (full buckets)
+        """
+        with self._cond:
+            if self._queue or self._async_waiting:
+                return 0.0
+
+        def peek(requests, tokens, blocked_until, now):
+            if blocked_until > now:
+                return (requests, tokens, blocked_until), 0.0
+            return (requests, tokens, blocked_until), min(requests / self.requests_per_minute,
+                                                          tokens / self.tokens_per_minute)
+
+        return self._update(peek)
+
+    def get_stats(self):
+        """
+        Get queueing and wait-time metrics for this process.
+
+        Returns:
+            dict: Rate limiter statistics
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["queue_depth"] = len(self._queue) + self._async_waiting
+        stats["wait_ms_avg"] = round(stats["wait_seconds_total"] * 1000 / stats["acquired"], 2) \
+            if stats["acquired"] else 0.0
+        stats["wait_seconds_total"] = round(stats["wait_seconds_total"], 3)
+        stats["wait_seconds_max"] = round(stats["wait_seconds_max"], 3)
+        stats["requests_per_minute"] = self.requests_per_minute
+        stats["tokens_per_minute"] = self.tokens_per_minute
+        return stats
+
+
+_default_rate_limiter = None
+_default_rate_limiter_lock = threading.Lock()
+
+
+def get_default_rate_limiter(config):
+    """
+    Get the process-wide rate limiter, or None when rate limiting is disabled.
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        RateLimiter or None: Shared rate limiter instance
+    """
+    global _default_rate_limiter
+    if not config.GROQ_RATE_LIMIT_ENABLED:
+        return None
+    if _default_rate_limiter is None:
+        with _default_rate_limiter_lock:
+            if _default_rate_limiter is None:
+                _default_rate_limiter = RateLimiter(
+                    requests_per_minute=config.GROQ_REQUESTS_PER_MINUTE,
+                    tokens_per_minute=config.GROQ_TOKENS_PER_MINUTE,
+                    db_path=config.GROQ_RATE_LIMIT_PATH or None,
+                )
+    return _default_rate_limiter
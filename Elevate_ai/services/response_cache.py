@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+LLM response cache for Elevate.AI application
+
+This module provides a two-tier cache for Groq completions: an in-memory LRU
+tier local to each worker process and an optional SQLite tier shared by all
+gunicorn workers on the host. Entries expire after a TTL and both tiers are
+bounded in size.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt):
+    """
+    Normalize a prompt so that indentation and line wrapping do not change its key.
+
+    Args:
+        prompt: Prompt text
+
+    Returns:
+        str: Prompt with runs of whitespace collapsed to single spaces
+    """
+    return _WHITESPACE_RE.sub(" ", prompt).strip()
+
+
+def make_cache_key(model, prompt, temperature, max_tokens):
+    """
+    Build the cache key for a completion request.
+
+    Args:
+        model: Model name
+        prompt: Prompt text
+        temperature: Sampling temperature
+        max_tokens: Completion token limit
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    raw = json.dumps([model, normalize_prompt(prompt), float(temperature), int(max_tokens)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier TTL cache for completion text.
+
+    Lookups check the in-memory LRU first and fall back to the SQLite file,
+    promoting disk hits into memory.
+    """
+
+    def __init__(self, ttl_seconds=3600, memory_max_entries=256, db_path=None, db_max_entries=5000):
+        self.ttl_seconds = ttl_seconds
+        self.memory_max_entries = memory_max_entries
+        self.db_path = db_path
+        self.db_max_entries = db_max_entries
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+            "expired": 0,
+        }
+
+        if self.db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = self._get_db()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+            conn.commit()
+
+    def _get_db(self):
+        """Get this thread's connection to the shared cache file."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def get(self, key):
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key from make_cache_key
+
+        Returns:
+            str or None: Cached value, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+                self._stats["expired"] += 1
+
+        if self.db_path:
+            conn = self._get_db()
+            row = conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                value, expires_at = row
+                if expires_at > now:
+                    conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                    conn.commit()
+                    self._remember(key, value, expires_at)
+                    self._count("disk_hits")
+                    return value
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                conn.commit()
+                self._count("expired")
+
+        self._count("misses")
+        return None
+
+    def _remember(self, key, value, expires_at):
+        with self._lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_max_entries:
+                self._memory.popitem(last=False)
+                self._stats["memory_evictions"] += 1
+
+    def set(self, key, value, ttl_seconds=None):
+        """
+        Store a value in both tiers.
+
+        Args:
+            key: Cache key from make_cache_key
+            value: Completion text
+            ttl_seconds: Optional TTL overriding the default
+        """
+        now = time.time()
+        expires_at = now + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        self._remember(key, value, expires_at)
+        self._count("writes")
+
+        if self.db_path:
+            conn = self._get_db()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now)
+            )
+            # Drop expired rows first, then the least recently used overflow
+            conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+            overflow = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.db_max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self._count("disk_evictions", overflow)
+            conn.commit()
+
+    def invalidate(self, key):
+        """Remove one entry from both tiers."""
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.db_path:
+            conn = self._get_db()
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            conn.commit()
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            conn = self._get_db()
+            conn.execute("DELETE FROM llm_cache")
+            conn.commit()
+
+    def get_stats(self):
+        """
+        Get hit, miss and eviction counters for this process.
+
+        Returns:
+            dict: Cache statistics
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache(config):
+    """
+    Get the process-wide response cache, or None when caching is disabled.
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        ResponseCache or None: Shared cache instance
+    """
+    global _default_cache
+    if not config.GROQ_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ResponseCache(
+                    ttl_seconds=config.GROQ_CACHE_TTL,
+                    memory_max_entries=config.GROQ_CACHE_MEMORY_ENTRIES,
+                    db_path=config.GROQ_CACHE_PATH or None,
+                    db_max_entries=config.GROQ_CACHE_MAX_ENTRIES,
+                )
+    return _default_cache
@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Request coalescing for Groq completions
+
+This module lets concurrent callers asking for the same completion share one
+upstream call. Threads in a process wait on an in-memory flight; when a
+SQLite lease file is configured, one thread per worker then competes for a
+lease so that only one gunicorn worker on the host calls Groq and the others
+read its result from the file.
+
+Results are only shared with callers that were already waiting while the call
+was in flight; a call made after a flight has finished goes upstream again, so
+coalescing never acts as a response cache (that is GROQ_CACHE_ENABLED's job).
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from utils.logger import log_warning
+
+
+class _Flight:
+    """One in-progress call within this process."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce identical in-flight calls by key.
+
+    Waiters give up after wait_timeout seconds and make the call themselves.
+    If the leader fails, the next waiter is promoted to leader. The leader
+    renews its lease while its call runs, so a worker only loses the lease
+    lease_seconds after it dies. A published result is kept for result_ttl
+    seconds, only for other workers' waiters to read.
+    """
+
+    def __init__(self, db_path=None, wait_timeout=120.0, lease_seconds=120.0,
+                 result_ttl=30.0, poll_interval=0.05):
+        self.db_path = db_path
+        self.wait_timeout = wait_timeout
+        self.lease_seconds = lease_seconds
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {
+            "leaders": 0,
+            "coalesced": 0,
+            "coalesced_remote": 0,
+            "leader_failures": 0,
+            "waiter_timeouts": 0,
+            "lease_takeovers": 0,
+        }
+
+        if self.db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = self._get_db()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS single_flight (
+                    key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    lease_expires REAL NOT NULL,
+                    result TEXT,
+                    result_expires REAL
+                )
+            """)
+
+    def _get_db(self):
+        """Get this thread's connection to the shared lease file."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            # Autocommit mode so leases are taken with explicit BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def do(self, key, fn):
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Request key, e.g. from make_cache_key
+            fn: Zero-argument callable making the upstream call; must return
+                a string when a lease file is configured
+
+        Returns:
+            The result of fn, from this caller or from the leader
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+                    self._stats["leaders"] += 1
+
+            if leader:
+                try:
+                    flight.result = self._lead(key, fn, deadline)
+                    return flight.result
+                except BaseException as e:
+                    flight.error = e
+                    raise
+                finally:
+                    with self._lock:
+                        del self._flights[key]
+                    flight.event.set()
+
+            if not flight.event.wait(max(deadline - time.monotonic(), 0)):
+                return self._give_up(key, fn)
+            if flight.error is None:
+                self._count("coalesced")
+                return flight.result
+
+            # The leader failed; loop so that one waiter retries as the new leader
+            self._count("leader_failures")
+            if time.monotonic() >= deadline:
+                return self._give_up(key, fn)
+
+    def _give_up(self, key, fn):
+        """Stop waiting and make the call without coalescing."""
+        self._count("waiter_timeouts")
+        log_warning(f"Single-flight wait timed out for {key[:12]}; calling upstream directly")
+        return fn()
+
+    def _lead(self, key, fn, deadline):
+        """Make the call for this process, coordinating with other workers."""
+        if not self.db_path:
+            return fn()
+
+        owner = uuid.uuid4().hex
+        waited_on = None
+        delay = self.poll_interval
+        while True:
+            state, value = self._acquire(key, owner, waited_on)
+            if state == "result":
+                self._count("coalesced_remote")
+                return value
+            if state == "leader":
+                break
+            waited_on = value
+            if time.monotonic() >= deadline:
+                return self._give_up(key, fn)
+            time.sleep(delay)
+            delay = min(delay * 1.5, 0.5)
+
+        done = self._keep_lease(key, owner)
+        try:
+            result = fn()
+        except BaseException:
+            self._release(key, owner)
+            raise
+        finally:
+            done.set()
+        self._publish(key, owner, result)
+        return result
+
+    async def lead_async(self, key, fn):
+        """
+        Coroutine counterpart of the cross-worker half of do().
+
+        For callers on an event loop that coalesce within the process
+        themselves: takes the lease for key, or waits for the worker holding
+        it. The lease file is only touched from worker threads, so a
+        contended write lock never stalls the loop.
+
+        Args:
+            key: Request key, e.g. from make_cache_key
+            fn: Coroutine function making the upstream call; must return a
+                string when a lease file is configured
+
+        Returns:
+            The result of fn, from this caller or from another worker
+        """
+        if not self.db_path:
+            return await fn()
+
+        deadline = time.monotonic() + self.wait_timeout
+        owner = uuid.uuid4().hex
+        waited_on = None
+        delay = self.poll_interval
+        while True:
+            state, value = await asyncio.to_thread(self._acquire, key, owner, waited_on)
+            if state == "result":
+                self._count("coalesced_remote")
+                return value
+            if state == "leader":
+                break
+            waited_on = value
+            if time.monotonic() >= deadline:
+                self._count("waiter_timeouts")
+                log_warning(f"Single-flight wait timed out for {key[:12]}; calling upstream directly")
+                return await fn()
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.5, 0.5)
+
+        done = self._keep_lease(key, owner)
+        try:
+            result = await fn()
+        except BaseException:
+            await asyncio.to_thread(self._release, key, owner)
+            raise
+        finally:
+            done.set()
+        await asyncio.to_thread(self._publish, key, owner, result)
+        return result
+
+    def _keep_lease(self, key, owner):
+        """
+        Renew the lease on key from a background thread until the returned
+        event is set.
+
+        A call with retries can outlast lease_seconds; without renewal another
+        worker would take the lease over and make the same call again.
+        """
+        done = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(key, owner, done),
+                         name=f"single-flight-heartbeat-{owner[:8]}", daemon=True).start()
+        return done
+
+    def _heartbeat(self, key, owner, done):
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                self._get_db().execute(
+                    "UPDATE single_flight SET lease_expires = ? WHERE key = ? AND owner = ? AND result IS NULL",
+                    (time.time() + self.lease_seconds, key, owner)
+                )
+            except sqlite3.Error as e:
+                log_warning(f"Could not extend the single-flight lease for {key[:12]}: {e}")
+
+    def _acquire(self, key, owner, waited_on=None):
+        """
+        Take the lease for key, or report that another worker holds it.
+
+        Args:
+            key: Request key
+            owner: This caller's lease owner ID
+            waited_on: Owner of the lease this caller has been waiting on, if any;
+                only that lease's result is returned
+
+        Returns:
+            tuple: ("leader", None), ("result", value) or ("wait", lease owner)
+        """
+        conn = self._get_db()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT owner, lease_expires, result, result_expires FROM single_flight WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                lease_owner, lease_expires, result, result_expires = row
+                if result is not None:
+                    # A finished flight only answers the callers that waited on it
+                    if lease_owner == waited_on and result_expires > now:
+                        return "result", result
+                elif lease_expires > now:
+                    return "wait", lease_owner
+                else:
+                    # The previous leader died without releasing its lease
+                    self._count("lease_takeovers")
+
+            conn.execute(
+                "INSERT OR REPLACE INTO single_flight (key, owner, lease_expires, result, result_expires) "
+                "VALUES (?, ?, ?, NULL, NULL)",
+                (key, owner, now + self.lease_seconds)
+            )
+            return "leader", None
+        finally:
+            conn.execute("COMMIT")
+
+    def _publish(self, key, owner, result):
+        """Share the result with workers waiting on this lease and drop stale rows."""
+        conn = self._get_db()
+        now = time.time()
+        conn.execute(
+            "UPDATE single_flight SET result = ?, result_expires = ? WHERE key = ? AND owner = ?",
+            (result, now + self.result_ttl, key, owner)
+        )
+        conn.execute(
+            "DELETE FROM single_flight WHERE result_expires <= ? OR (result IS NULL AND lease_expires <= ?)",
+            (now, now)
+        )
+
+    def _release(self, key, owner):
+        """Give up the lease so a waiting worker can take over."""
+        self._get_db().execute("DELETE FROM single_flight WHERE key = ? AND owner = ?", (key, owner))
+
+    def get_stats(self):
+        """
+        Get coalescing counters for this process.
+
+        Returns:
+            dict: Single-flight statistics
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._flights)
+        return stats
+
+
+_default_single_flight = None
+_default_single_flight_lock = threading.Lock()
+
+
+def get_default_single_flight(config):
+    """
+    Get the process-wide single-flight group, or None when coalescing is disabled.
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        SingleFlight or None: Shared single-flight instance
+    """
+    global _default_single_flight
+    if not config.GROQ_SINGLE_FLIGHT_ENABLED:
+        return None
+    if _default_single_flight is None:
+        with _default_single_flight_lock:
+            if _default_single_flight is None:
+                _default_single_flight = SingleFlight(
+                    db_path=config.GROQ_SINGLE_FLIGHT_PATH or None,
+                    wait_timeout=config.GROQ_SINGLE_FLIGHT_TIMEOUT,
+                    lease_seconds=config.GROQ_SINGLE_FLIGHT_LEASE,
+                )
+    return _default_single_flight
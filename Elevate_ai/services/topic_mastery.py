@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Per-topic mastery maintained on quiz submission
+
+topic_mastery keeps one row per (user, syllabus, topic) with running
+answered and correct counts, an exponentially decayed accuracy and when the
+topic was last seen; mastery_totals keeps the per-syllabus counts. Both are
+updated in the transaction that stores a quiz's responses, so the progress
+page reads a few rows per topic instead of recomputing from the whole quiz
+history.
+
+progress_daily and progress_weekly roll the same counts up per day and per
+week (starting Monday), with the topic's mastery at the end of the period,
+so a chart of any window reads at most one row per topic and period.
+"""
+
+import time
+from datetime import date, timedelta
+from itertools import groupby
+
+from utils.db_utils import bulk_upsert
+
+DEFAULT_ALPHA = 0.3
+
+# Stored next to the quiz responses they summarize
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS topic_mastery (
+        user_id TEXT NOT NULL,
+        syllabus_id INTEGER NOT NULL,
+        topic TEXT NOT NULL,
+        answered INTEGER NOT NULL,
+        correct INTEGER NOT NULL,
+        quizzes INTEGER NOT NULL,
+        mastery REAL NOT NULL,
+        last_quiz_id INTEGER,
+        last_seen TIMESTAMP NOT NULL,
+        PRIMARY KEY (user_id, syllabus_id, topic)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS mastery_totals (
+        user_id TEXT NOT NULL,
+        syllabus_id INTEGER NOT NULL,
+        quizzes INTEGER NOT NULL,
+        answered INTEGER NOT NULL,
+        correct INTEGER NOT NULL,
+        last_quiz_id INTEGER,
+        last_seen TIMESTAMP NOT NULL,
+        PRIMARY KEY (user_id, syllabus_id)
+    )
+    """,
+] + [
+    f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+        user_id TEXT NOT NULL,
+        syllabus_id INTEGER NOT NULL,
+        period DATE NOT NULL,
+        topic TEXT NOT NULL,
+        answered INTEGER NOT NULL,
+        correct INTEGER NOT NULL,
+        quizzes INTEGER NOT NULL,
+        mastery REAL NOT NULL,
+        PRIMARY KEY (user_id, syllabus_id, period, topic)
+    )
+    """
+    for table in ("progress_daily", "progress_weekly")
+]
+
+# Resolution -> (rollup table, first day of the period containing a date)
+ROLLUPS = {
+    "daily": ("progress_daily", lambda day: day),
+    "weekly": ("progress_weekly", lambda day: day - timedelta(days=day.weekday())),
+}
+
+# The topic's mastery is copied from topic_mastery after the quiz is folded in
+_ROLLUP_SQL = """
+    INSERT INTO {table} (user_id, syllabus_id, period, topic, answered, correct, quizzes, mastery)
+    SELECT user_id, syllabus_id, ?, topic, ?, ?, 1, mastery FROM topic_mastery
+    WHERE user_id = ? AND syllabus_id = ? AND topic = ?
+    ON CONFLICT (user_id, syllabus_id, period, topic) DO UPDATE SET
+        answered = answered + excluded.answered,
+        correct = correct + excluded.correct,
+        quizzes = quizzes + 1,
+        mastery = excluded.mastery
+"""
+
+
+def _now():
+    # Same format and clock as CURRENT_TIMESTAMP
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+
+
+def _upsert_topics(conn, rows, alpha):
+    # rows: (user_id, syllabus_id, topic, answered, correct, 1, accuracy, quiz_id, seen_at), oldest quiz first
+    bulk_upsert(
+        conn, "topic_mastery",
+        ("user_id", "syllabus_id", "topic", "answered", "correct", "quizzes", "mastery", "last_quiz_id", "last_seen"),
+        rows,
+        key=("user_id", "syllabus_id", "topic"),
+        update={
+            "answered": "answered + excluded.answered",
+            "correct": "correct + excluded.correct",
+            "quizzes": "quizzes + 1",
+            # Exponentially decayed accuracy: each quiz moves it alpha of the way
+            "mastery": f"mastery + {float(alpha)!r} * (excluded.mastery - mastery)",
+            "last_quiz_id": "excluded.last_quiz_id",
+            "last_seen": "excluded.last_seen",
+        },
+    )
+
+
+def _fold_quiz(conn, user_id, syllabus_id, quiz_id, topics, alpha, seen_at):
+    # topics: {topic: (answered, correct)}
+    _upsert_topics(conn, [(user_id, syllabus_id, topic, answered, correct, 1, correct / answered, quiz_id, seen_at)
+                          for topic, (answered, correct) in topics.items()], alpha)
+    day = date.fromisoformat(seen_at[:10])
+    for table, period_of in ROLLUPS.values():
+        period = period_of(day).isoformat()
+        conn.executemany(_ROLLUP_SQL.format(table=table),
+                         [(period, answered, correct, user_id, syllabus_id, topic)
+                          for topic, (answered, correct) in topics.items()])
+
+
+def record_quiz(conn, user_id, syllabus_id, quiz_id, marked, alpha=DEFAULT_ALPHA, seen_at=None):
+    """
+    Fold one submitted quiz into the user's mastery; the caller commits.
+
+    Every submission counts, so retaking a quiz is another attempt.
+
+    Args:
+        conn: Database connection
+        user_id: User who submitted the quiz
+        syllabus_id: Syllabus of the quiz
+        quiz_id: Quiz ID
+        marked: (question_no, question, answer, correct) tuples as from
+            quiz_history.mark_answers()
+        alpha: Weight of this quiz's accuracy in the decayed mastery
+        seen_at: Submission time, now by default
+    """
+    if not marked:
+        return
+    topics = {}
+    for _, q, _, correct in marked:
+        counts = topics.setdefault(str(q.get("topic") or ""), [0, 0])
+        counts[0] += 1
+        counts[1] += bool(correct)
+
+    seen_at = seen_at or _now()
+    user_id = str(user_id)
+    _fold_quiz(conn, user_id, syllabus_id, quiz_id, topics, alpha, seen_at)
+    bulk_upsert(
+        conn, "mastery_totals",
+        ("user_id", "syllabus_id", "quizzes", "answered", "correct", "last_quiz_id", "last_seen"),
+        [(user_id, syllabus_id, 1, len(marked), sum(correct for _, correct in topics.values()), quiz_id, seen_at)],
+        key=("user_id", "syllabus_id"),
+        update={
+            "quizzes": "quizzes + 1",
+            "answered": "answered + excluded.answered",
+            "correct": "correct + excluded.correct",
+            "last_quiz_id": "excluded.last_quiz_id",
+            "last_seen": "excluded.last_seen",
+        },
+    )
+
+
+def load_mastery(conn, user_id, syllabus_id):
+    """
+    Mastery rows of a user's syllabus.
+
+    Returns:
+        tuple: (totals dict or None, list of per-topic dicts in topic order)
+    """
+    totals_columns = ("quizzes", "answered", "correct", "last_quiz_id", "last_seen")
+    totals = conn.execute(
+        f"SELECT {', '.join(totals_columns)} FROM mastery_totals WHERE user_id = ? AND syllabus_id = ?",
+        (str(user_id), syllabus_id)
+    ).fetchone()
+    topic_columns = ("topic", "answered", "correct", "quizzes", "mastery", "last_quiz_id", "last_seen")
+    topics = conn.execute(
+        f"SELECT {', '.join(topic_columns)} FROM topic_mastery WHERE user_id = ? AND syllabus_id = ? ORDER BY topic",
+        (str(user_id), syllabus_id)
+    ).fetchall()
+    return (dict(zip(totals_columns, totals)) if totals else None), [dict(zip(topic_columns, row)) for row in topics]
+
+
+def rebuild(conn, alpha=DEFAULT_ALPHA):
+    """
+    Recompute all mastery rows from quiz_responses; the caller commits.
+
+    Only the latest submission of each quiz is kept in quiz_responses, so a
+    rebuild counts retakes once.
+    """
+    for table in ("topic_mastery", "mastery_totals") + tuple(table for table, _ in ROLLUPS.values()):
+        conn.execute(f"DELETE FROM {table}")
+    # Replayed one quiz at a time, oldest first, so the rollups get the
+    # mastery each period ended with
+    rows = conn.execute(
+        "SELECT user_id, syllabus_id, quiz_id, topic, COUNT(*), SUM(correct), "
+        "COALESCE(MAX(answered_at), CURRENT_TIMESTAMP) "
+        "FROM quiz_responses GROUP BY user_id, syllabus_id, quiz_id, topic ORDER BY quiz_id"
+    ).fetchall()
+    for quiz_id, quiz_rows in groupby(rows, key=lambda row: row[2]):
+        quiz_rows = list(quiz_rows)
+        user_id, syllabus_id = quiz_rows[0][:2]
+        _fold_quiz(conn, user_id, syllabus_id, quiz_id, {row[3]: (row[4], row[5]) for row in quiz_rows},
+                   alpha, max(row[6] for row in quiz_rows))
+    conn.execute(
+        "INSERT INTO mastery_totals (user_id, syllabus_id, quizzes, answered, correct, last_quiz_id, last_seen) "
+        "SELECT user_id, syllabus_id, COUNT(DISTINCT quiz_id), COUNT(*), SUM(correct), MAX(quiz_id), "
+        "COALESCE(MAX(answered_at), CURRENT_TIMESTAMP) "
+        "FROM quiz_responses GROUP BY user_id, syllabus_id"
+    )
+
+
+def progress_series(conn, user_id, syllabus_id, days=None, points=30, daily_max_days=90, today=None):
+    """
+    Per-topic score and mastery over a window, downsampled to at most
+    `points` buckets per topic.
+
+    Windows up to `daily_max_days` long read the daily rollups, longer ones
+    and the whole history the weekly ones. Bucketing and summing happen in
+    SQL, so the result size depends on `points` and the number of topics,
+    not on how many quizzes were taken.
+
+    Args:
+        conn: Database connection
+        user_id: User ID
+        syllabus_id: Syllabus ID
+        days: Window length ending today, or None for everything
+        points: Buckets per topic
+        daily_max_days: Longest window drawn from the daily rollups
+        today: Last day of the window, today (UTC) by default
+
+    Returns:
+        tuple: (resolution, list of dicts with topic, date of the bucket's
+            last period, mastery at its end, answered, correct and score),
+            ordered by topic and date
+    """
+    resolution = "daily" if days and days <= daily_max_days else "weekly"
+    table, period_of = ROLLUPS[resolution]
+    user_id = str(user_id)
+    end = today or date.fromisoformat(_now()[:10])
+    if days:
+        start = period_of(end - timedelta(days=days - 1)).isoformat()
+    else:
+        start = conn.execute(f"SELECT MIN(period) FROM {table} WHERE user_id = ? AND syllabus_id = ?",
+                             (user_id, syllabus_id)).fetchone()[0]
+        if start is None:
+            return resolution, []
+    span = (end - date.fromisoformat(start)).days + 1
+
+    # With MAX(period), SQLite takes the bare mastery column from the bucket's
+    # latest row, i.e. the mastery the bucket ended with
+    rows = conn.execute(
+        f"SELECT topic, CAST((julianday(period) - julianday(?)) * ? / ? AS INTEGER) AS bucket, "
+        f"MAX(period), mastery, SUM(answered), SUM(correct) FROM {table} "
+        f"WHERE user_id = ? AND syllabus_id = ? AND period BETWEEN ? AND ? "
+        f"GROUP BY topic, bucket ORDER BY topic, bucket",
+        (start, int(points), span, user_id, syllabus_id, start, end.isoformat())
+    ).fetchall()
+    return resolution, [{"topic": topic, "date": last, "mastery": mastery, "answered": answered,
+                         "correct": correct, "score": correct / answered}
+                        for topic, _, last, mastery, answered, correct in rows]
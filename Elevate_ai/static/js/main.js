@@ -364,6 +364,139 @@ function submitFormWithFiles(form, url, successCallback, errorCallback) {
     });
 }
 
+/**
+ * Posts form data to a Server-Sent Events endpoint and dispatches its events
+ * @param {string} url - The streaming endpoint URL
+ * @param {FormData} formData - The request body
+ * @param {Object} handlers - Callbacks: onToken(text, fullText), onItem(item, index), onDone(data), onError(data)
+ * @returns {Promise} Resolves when the stream has ended
+ */
+function streamSSE(url, formData, handlers = {}) {
+    const { onToken, onItem, onDone, onError } = handlers;
+    let fullText = '';
+    
+    return fetch(url, {
+        method: 'POST',
+        body: formData,
+        headers: { 'Accept': 'text/event-stream' }
+    })
+    .then(response => {
+        const contentType = response.headers.get('Content-Type') || '';
+        
+        // Validation errors come back as plain JSON before the stream starts
+        if (!contentType.includes('text/event-stream')) {
+            return response.json().then(data => {
+                if (typeof onError === 'function') onError(data);
+            });
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        function dispatch(frame) {
+            let event = 'message';
+            const dataLines = [];
+            
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+            });
+            if (!dataLines.length) return;
+            
+            const data = JSON.parse(dataLines.join('\n'));
+            if (event === 'token') {
+                fullText += data.text;
+                if (typeof onToken === 'function') onToken(data.text, fullText);
+            } else if (event === 'item') {
+                if (data.valid && typeof onItem === 'function') onItem(data.item, data.index);
+            } else if (event === 'done' && typeof onDone === 'function') {
+                onDone(data);
+            } else if (event === 'error' && typeof onError === 'function') {
+                onError(data);
+            }
+        }
+        
+        function read() {
+            return reader.read().then(({ done, value }) => {
+                if (done) {
+                    if (buffer.trim()) dispatch(buffer);
+                    return;
+                }
+                
+                buffer += decoder.decode(value, { stream: true });
+                const frames = buffer.split('\n\n');
+                buffer = frames.pop();
+                frames.forEach(dispatch);
+                return read();
+            });
+        }
+        
+        return read();
+    });
+}
+
+/**
+ * Submits form data as a background job and follows its status events
+ * @param {string} url - The generation endpoint URL
+ * @param {FormData} formData - The request body
+ * @param {Object} handlers - Callbacks: onStatus(job), onDone(result), onError(data)
+ * @returns {Promise} Resolves when the job has finished
+ */
+function runJob(url, formData, handlers = {}) {
+    const { onStatus, onDone, onError } = handlers;
+    
+    return fetch(url, {
+        method: 'POST',
+        body: formData,
+        headers: { 'Prefer': 'respond-async' }
+    })
+    .then(response => response.json().then(data => ({ accepted: response.status === 202, data })))
+    .then(({ accepted, data }) => {
+        // Validation errors come back as plain JSON instead of a job
+        if (!accepted) {
+            if (data.error && typeof onError === 'function') onError(data);
+            else if (!data.error && typeof onDone === 'function') onDone(data);
+            return;
+        }
+        
+        return new Promise((resolve, reject) => {
+            const events = new EventSource(data.events_url);
+            
+            events.addEventListener('status', e => {
+                if (typeof onStatus === 'function') onStatus(JSON.parse(e.data));
+            });
+            events.addEventListener('done', e => {
+                events.close();
+                if (typeof onDone === 'function') onDone(JSON.parse(e.data).result);
+                resolve();
+            });
+            events.addEventListener('error', e => {
+                // Without data this is a dropped connection, which EventSource retries
+                if (!e.data) {
+                    if (events.readyState === EventSource.CLOSED) reject(new Error('Job events unavailable'));
+                    return;
+                }
+                events.close();
+                if (typeof onError === 'function') onError(JSON.parse(e.data));
+                resolve();
+            });
+        });
+    });
+}
+
+/**
+ * Describes a background job's status for a loading message
+ * @param {Object} job - Job state from a status event
+ * @param {string} runningText - Message while the job runs
+ * @returns {string} Loading message
+ */
+function jobStatusText(job, runningText) {
+    if (job.status === 'queued' && job.attempts === 0) return 'Waiting for a free worker...';
+    if (job.attempts > 1) return `${runningText} (attempt ${job.attempts} of ${job.max_attempts})`;
+    return runningText;
+}
+
 /**
  * Formats a date string to a readable format
  * @param {string} dateStr - The date string to format
@@ -3,4 +3,21 @@
 
 """
 Tests package for Elevate.AI application
-"""
\ No newline at end of file
+"""
+
+import os
+import tempfile
+
+# Tests never reach the real Groq API, so they must import without a key
+# and without leaving shared limiter/lease/job files behind; question bank
+# and interview pool fills and answer evaluations are background Groq
+# calls, so tests that want them turn them on; jobs run in the test
+# process instead of a separate job_worker.py
+os.environ.setdefault('GROQ_API_KEY', 'test-key')
+os.environ.setdefault('GROQ_SINGLE_FLIGHT_PATH', '')
+os.environ.setdefault('GROQ_RATE_LIMIT_PATH', '')
+os.environ.setdefault('JOB_QUEUE_PATH', os.path.join(tempfile.mkdtemp(), 'jobs.db'))
+os.environ.setdefault('JOB_WORKERS', '2')
+os.environ.setdefault('QUESTION_BANK_ENABLED', 'False')
+os.environ.setdefault('INTERVIEW_POOL_ENABLED', 'False')
+os.environ.setdefault('INTERVIEW_EVAL_ENABLED', 'False')
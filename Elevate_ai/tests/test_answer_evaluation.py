@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for incremental interview answer evaluation
+
+This module checks evaluation parsing, storage keyed by answer and the
+aggregation of stored evaluations into final feedback, in an in-memory
+SQLite database.
+"""
+
+import os
+import sqlite3
+import sys
+import unittest
+
+# Add parent directory to path to import services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.answer_evaluation import (SCHEMA, aggregate_feedback, evaluation_key, load_evaluations,
+                                        parse_evaluation, save_evaluation, summary_prompt)
+
+
+class TestAnswerEvaluation(unittest.TestCase):
+    """Test case for storing and aggregating per-answer evaluations"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        for statement in SCHEMA:
+            self.conn.execute(statement)
+        self.pairs = [{"question_id": "1", "question": "Design a queue", "type": "technical"},
+                      {"question_id": "2", "question": "Describe a conflict", "type": "behavioral"}]
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_parse(self):
+        """Test that scores are clamped and incomplete evaluations rejected"""
+        self.assertEqual(parse_evaluation({"score": "12", "feedback": "Great"}), (10.0, "Great"))
+        self.assertEqual(parse_evaluation({"score": -1, "feedback": "Off topic"}), (0.0, "Off topic"))
+        for data in [{"score": 5}, {"feedback": "No score"}, {"score": "high", "feedback": "x"}, []]:
+            with self.assertRaises(ValueError):
+                parse_evaluation(data)
+
+    def test_edited_answer_is_stale(self):
+        """Test that only evaluations of the current answer text are loaded"""
+        save_evaluation(self.conn, 7, "1", "first answer", 6, "Fine")
+        save_evaluation(self.conn, 7, "2", "other answer", 8, "Good")
+        self.assertEqual(set(load_evaluations(self.conn, 7, {"1": "first answer", "2": "other answer"})), {"1", "2"})
+        self.assertEqual(set(load_evaluations(self.conn, 7, {"1": "edited answer", "2": "other answer"})), {"2"})
+
+        save_evaluation(self.conn, 7, "1", "edited answer", 9, "Better")
+        self.assertEqual(load_evaluations(self.conn, 7, {"1": "edited answer"})["1"], {"score": 9, "feedback": "Better"})
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM interview_evaluations").fetchone()[0], 2)
+        self.assertNotEqual(evaluation_key(7, "1", "first answer"), evaluation_key(7, "1", "edited answer"))
+
+    def test_aggregate(self):
+        """Test that the summary prompt omits answers and feedback keeps the one-call shape"""
+        evaluations = {"1": {"score": 6.0, "feedback": "Name the trade-offs"},
+                       "2": {"score": 9.0, "feedback": "Clear STAR structure"}}
+        prompt = summary_prompt("Backend Engineer", self.pairs, evaluations)
+        self.assertIn("Clear STAR structure", prompt)
+        self.assertNotIn('"answer"', prompt)
+
+        feedback = aggregate_feedback(self.pairs, evaluations, {
+            "overall_impression": "Good", "strengths": ["Structure"], "improvements": ["Depth"],
+            "overall_score": 10,
+        })
+        self.assertEqual(feedback["overall_score"], 75)
+        self.assertEqual(feedback["strengths"], ["Structure"])
+        self.assertEqual(feedback["detailed_feedback"][0],
+                         {"question_id": 1, "feedback": "Name the trade-offs", "score": 6.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
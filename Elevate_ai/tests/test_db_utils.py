@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the pooled SQLite connection layer
+
+This module checks connection reuse, tuning pragmas, transaction reset on
+release, fork safety and concurrent readers and writers on a temporary
+database file.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+
+# Add parent directory to path to import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.db_utils import ConnectionPool, bulk_upsert
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test case for checking connections out of and back into the pool"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(os.path.join(self.tmpdir.name, "app.db"), size=2, busy_timeout=2.0)
+        conn = self.pool.acquire()
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.pool.close_all()
+        self.tmpdir.cleanup()
+
+    def test_reuse_and_pragmas(self):
+        """Test that a closed connection is reused and opened with the tuning pragmas"""
+        conn = self.pool.acquire()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+        self.assertEqual(conn.execute("PRAGMA busy_timeout").fetchone()[0], 2000)
+        conn.close()
+        conn.close()  # a second close must not pool it twice
+        self.assertIs(self.pool.acquire(), conn)
+        self.assertEqual(self.pool.get_stats(), {"opened": 1, "reused": 2, "discarded": 0, "idle": 0})
+
+    def test_release_resets_connection(self):
+        """Test that uncommitted work is rolled back and the row factory restored"""
+        conn = self.pool.acquire()
+        conn.row_factory = None
+        conn.execute("INSERT INTO items (name) VALUES ('uncommitted')")
+        conn.close()
+
+        conn = self.pool.acquire()
+        self.assertEqual(conn.execute("SELECT COUNT(*) AS n FROM items").fetchone()["n"], 0)
+        conn.close()
+
+    def test_pool_size(self):
+        """Test that idle connections beyond the pool size are closed"""
+        conns = [self.pool.acquire() for _ in range(3)]
+        for conn in conns:
+            conn.close()
+        stats = self.pool.get_stats()
+        self.assertEqual((stats["idle"], stats["discarded"]), (2, 1))
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conns[2].execute("SELECT 1")
+
+    def test_fork_safety(self):
+        """Test that connections inherited from a parent process are never handed out"""
+        inherited = self.pool.acquire()
+        inherited.close()
+        self.pool._pid = -1  # as seen from a forked child
+        self.assertIsNot(self.pool.acquire(), inherited)
+        self.assertEqual(self.pool.get_stats()["idle"], 0)
+
+    def test_concurrent_writers(self):
+        """Test that readers and writers on separate threads do not hit lock errors"""
+        errors = []
+
+        def write(worker):
+            try:
+                for i in range(50):
+                    conn = self.pool.acquire()
+                    conn.execute("INSERT INTO items (name) VALUES (?)", (f"{worker}-{i}",))
+                    conn.commit()
+                    conn.close()
+            except sqlite3.Error as e:
+                errors.append(e)
+
+        def read():
+            try:
+                for _ in range(100):
+                    conn = self.pool.acquire()
+                    conn.execute("SELECT COUNT(*) FROM items").fetchone()
+                    conn.close()
+            except sqlite3.Error as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+        threads += [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        conn = self.pool.acquire()
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM items").fetchone()[0], 200)
+        conn.close()
+
+
+class TestBulkUpsert(unittest.TestCase):
+    """Test case for inserting and updating rows in one executemany"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.execute("CREATE TABLE counts (name TEXT PRIMARY KEY, value INTEGER, hits INTEGER)")
+        self.conn.execute("INSERT INTO counts VALUES ('a', 1, 1)")
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_default_update(self):
+        """Test that new keys are inserted and existing ones take the new values"""
+        rows = [("a", 5, 1), ("b", 2, 1)]
+        self.assertEqual(bulk_upsert(self.conn, "counts", ("name", "value", "hits"), rows, key=("name",)), 2)
+        self.assertEqual(self.conn.execute("SELECT * FROM counts ORDER BY name").fetchall(), [("a", 5, 1), ("b", 2, 1)])
+
+    def test_update_expressions(self):
+        """Test that custom expressions can refer to the existing row"""
+        bulk_upsert(self.conn, "counts", ("name", "value", "hits"), [("a", 7, 1), ("c", 3, 1)], key=("name",),
+                    update={"hits": "hits + excluded.hits"})
+        self.assertEqual(self.conn.execute("SELECT * FROM counts ORDER BY name").fetchall(), [("a", 1, 2), ("c", 3, 1)])
+
+    def test_do_nothing(self):
+        """Test that an empty update keeps existing rows"""
+        bulk_upsert(self.conn, "counts", ("name",), [("a",), ("d",)], key=("name",))
+        self.assertEqual(self.conn.execute("SELECT name, value FROM counts ORDER BY name").fetchall(),
+                         [("a", 1), ("d", None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,963 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the Groq API client
+
+This module runs the Groq client against a local OpenAI-compatible stub
+server, so no API key or network access is needed.
+"""
+
+import asyncio
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path to import services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.async_groq_client import AsyncGroqClient
+from services.cassette import Cassette, CassetteMiss, read_entries, register_request_recorder
+from services.endpoint_pool import Endpoint, EndpointPool, EndpointUnavailable
+from services.groq_client import GroqClient
+from services.http_transport import HTTPStatusError, HTTPTransport, TransportTimeout
+from services.model_router import ModelRouter, parse_mapping
+from services.rate_limiter import RateLimiter, RateLimitExceeded, parse_retry_after
+from services.response_cache import ResponseCache, make_cache_key
+from services.single_flight import SingleFlight
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Minimal chat/completions endpoint with keep-alive enabled"""
+
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+    # Per-request delays, used in arrival order before falling back to delay
+    delays = []
+    # (status, headers) responses to send before succeeding
+    failures = []
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length))
+        time.sleep(self.delays.pop(0) if self.delays else self.delay)
+        if self.failures:
+            status, headers = self.failures.pop(0)
+            body = b'{"error": "injected"}'
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        prompt = request["messages"][0]["content"]
+        content = json.dumps({"echo": prompt})
+        if request.get("stream"):
+            # Send the completion as SSE chunks of a few characters each
+            chunks = [content[i:i + 4] for i in range(0, len(content), 4)]
+            body = "".join(
+                f"data: {json.dumps({'choices': [{'delta': {'content': chunk}}]})}\n\n"
+                for chunk in chunks
+            ) + "data: [DONE]\n\n"
+            body = body.encode()
+            content_type = "text/event-stream"
+        else:
+            body = json.dumps({
+                "choices": [{"message": {"content": content}}],
+                "usage": {"total_tokens": 10},
+            }).encode()
+            content_type = "application/json"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """Stub server that ignores clients hanging up mid-response (e.g. cancelled hedges)"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class TestGroqClient(unittest.TestCase):
+    """Test case for the Groq client transport"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}/v1"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubHandler.delay = 0.0
+        StubHandler.failures = []
+        self.transport = HTTPTransport(connect_timeout=1, read_timeout=1)
+        self.client = GroqClient(api_key="test", base_url=self.base_url, transport=self.transport,
+                                 single_flight=SingleFlight(), rate_limiter=RateLimiter())
+        self.client.backoff_base = 0.01
+
+    def tearDown(self):
+        self.transport.close()
+
+    def test_connections_are_reused(self):
+        """Test that sequential calls share one keep-alive connection"""
+        for i in range(5):
+            self.client.generate_response(f"prompt {i}")
+
+        stats = self.client.get_stats()["transport"]
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["new_connections"], 1)
+        self.assertEqual(stats["pool_hit_rate"], 0.8)
+
+    def test_structured_response(self):
+        """Test that JSON responses are parsed"""
+        result = self.client.generate_structured_response("hello")
+        self.assertTrue(result["echo"].startswith("hello"))
+
+    def test_stream_response(self):
+        """Test that streamed chunks reassemble into the full completion"""
+        chunks = list(self.client.stream_response("streamed"))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(json.loads("".join(chunks)), {"echo": "streamed"})
+
+    def test_read_timeout(self):
+        """Test that a stalled provider raises instead of hanging"""
+        StubHandler.delay = 1.5
+        with self.assertRaises(TransportTimeout):
+            self.client.generate_response("slow")
+
+    def test_http2_without_h2_falls_back(self):
+        """Test that HTTP/2 without the h2 package falls back to HTTP/1.1 instead of failing"""
+        with mock.patch("services.http_transport.h2", None):
+            transport = HTTPTransport(http2=True)
+        try:
+            self.assertFalse(transport.http2)
+            client = GroqClient(api_key="test", base_url=self.base_url, transport=transport,
+                                single_flight=SingleFlight(), rate_limiter=RateLimiter())
+            self.assertEqual(json.loads(client.generate_response("h2"))["echo"], "h2")
+        finally:
+            transport.close()
+
+    def test_cached_response_skips_request(self):
+        """Test that an identical prompt is served from the cache"""
+        self.client.cache = ResponseCache()
+        first = self.client.generate_response("same   prompt")
+        second = self.client.generate_response("same prompt")
+        self.assertEqual(first, second)
+        self.assertEqual(self.transport.get_stats()["requests"], 1)
+
+        self.client.generate_response("same prompt", refresh_cache=True)
+        self.client.generate_response("same prompt", use_cache=False)
+        self.assertEqual(self.transport.get_stats()["requests"], 3)
+        self.assertEqual(self.client.get_stats()["cache"]["memory_hits"], 1)
+
+    def test_rejected_response_is_not_cached(self):
+        """Test that a response the caller cannot use is regenerated on the next call"""
+        self.client.cache = ResponseCache()
+        rejected = lambda content: False
+        self.client.generate_response("unusable", validate=rejected)
+        list(self.client.stream_response("unusable stream", validate=rejected))
+        self.client.generate_response("unusable", validate=rejected)
+        list(self.client.stream_response("unusable stream", validate=rejected))
+        self.assertEqual(self.transport.get_stats()["requests"], 4)
+
+        self.client.generate_response("usable", validate=lambda content: True)
+        self.client.generate_response("usable")
+        self.assertEqual(self.transport.get_stats()["requests"], 5)
+
+    def test_concurrent_identical_calls_coalesce(self):
+        """Test that a burst of identical prompts makes one upstream call"""
+        StubHandler.delay = 0.3
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.client.generate_response("burst")))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(self.transport.get_stats()["requests"], 1)
+        self.assertEqual(self.client.get_stats()["single_flight"]["coalesced"], 4)
+
+    def test_retry_after_429_and_5xx(self):
+        """Test that throttled and failed calls are retried"""
+        StubHandler.failures = [(429, {"Retry-After": "0.2"}), (503, {})]
+        start = time.monotonic()
+        self.assertIn("retried", self.client.generate_response("retried"))
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertEqual(self.transport.get_stats()["requests"], 3)
+        self.assertEqual(self.client.get_stats()["rate_limiter"]["throttled"], 1)
+
+    def test_stream_retries_before_first_chunk(self):
+        """Test that a streamed call is retried when the provider rejects it"""
+        StubHandler.failures = [(502, {})]
+        chunks = list(self.client.stream_response("streamed"))
+        self.assertEqual(json.loads("".join(chunks)), {"echo": "streamed"})
+
+    def test_gives_up_after_max_retries(self):
+        """Test that persistent failures and client errors are raised"""
+        self.client.max_retries = 2
+        StubHandler.failures = [(500, {})] * 5
+        with self.assertRaises(HTTPStatusError):
+            self.client.generate_response("failing")
+        self.assertEqual(self.transport.get_stats()["requests"], 3)
+
+        StubHandler.failures = [(400, {})]
+        with self.assertRaises(HTTPStatusError):
+            self.client.generate_response("bad request")
+        self.assertEqual(self.transport.get_stats()["requests"], 4)
+
+    def test_retry_after_past_deadline_is_raised(self):
+        """Test that a Retry-After beyond the call deadline is not waited out"""
+        self.client.call_deadline = 1
+        StubHandler.failures = [(429, {"Retry-After": "30"})]
+        with self.assertRaises(HTTPStatusError):
+            self.client.generate_response("throttled")
+
+    def test_generate_many_in_order(self):
+        """Test that a batch runs concurrently and keeps prompt order"""
+        StubHandler.delay = 0.2
+        start = time.monotonic()
+        batch = self.client.generate_many([f"item {i}" for i in range(6)], max_concurrency=3)
+
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual([json.loads(r)["echo"] for r in batch.responses], [f"item {i}" for i in range(6)])
+        self.assertEqual(batch.total_tokens, 60)
+        self.assertEqual(batch.succeeded, 6)
+
+    def test_generate_many_item_errors(self):
+        """Test that a failing item is retried or reported without failing the batch"""
+        StubHandler.failures = [(400, {})]
+        batch = self.client.generate_many(["a", "b", "c"], retries=0)
+        self.assertEqual(batch.failed, 1)
+        self.assertIsInstance([item for item in batch if not item.ok][0].error, HTTPStatusError)
+
+        StubHandler.failures = [(400, {})]
+        items = list(self.client.generate_many_as_completed(["d", "e", "f"], retries=1))
+        self.assertEqual(len(items), 3)
+        self.assertTrue(all(item.ok for item in items))
+        self.assertEqual(sorted(item.attempts for item in items), [1, 1, 2])
+
+
+class TestAsyncGroqClient(unittest.TestCase):
+    """Test case for the asyncio client"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}/v1"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubHandler.delay = 0.0
+        StubHandler.failures = []
+        self.client = AsyncGroqClient(api_key="test", base_url=self.base_url,
+                                      single_flight=SingleFlight(), rate_limiter=RateLimiter())
+        self.client.backoff_base = 0.01
+
+    def tearDown(self):
+        asyncio.run(self.client.aclose())
+
+    def test_concurrent_calls_share_one_loop(self):
+        """Test that many awaiting callers keep their calls in flight together"""
+        StubHandler.delay = 0.3
+
+        async def burst():
+            return await asyncio.gather(*(self.client.generate_response(f"call {i}") for i in range(20)))
+
+        start = time.monotonic()
+        results = asyncio.run(burst())
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertEqual(json.loads(results[7])["echo"], "call 7")
+        self.assertEqual(self.client.get_stats()["async_transport"]["max_in_flight"], 20)
+
+    def test_callers_on_separate_loops(self):
+        """Test that callers on threads with their own loops are coalesced"""
+        StubHandler.delay = 0.3
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            asyncio.run(self.client.generate_response("same")))) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(self.client.get_stats()["async_transport"]["requests"], 1)
+        self.assertEqual(self.client.get_stats()["async_transport"]["coalesced"], 2)
+
+    def test_coalesced_across_workers(self):
+        """Test that clients in different workers share one call through the lease file"""
+        StubHandler.delay = 0.3
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "single_flight.db")
+            workers = [AsyncGroqClient(api_key="test", base_url=self.base_url, rate_limiter=RateLimiter(),
+                                       single_flight=SingleFlight(db_path=db_path, poll_interval=0.01))
+                       for _ in range(2)]
+            results = []
+            threads = [threading.Thread(target=lambda client=client: results.append(
+                asyncio.run(client.generate_response("shared")))) for client in workers]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            for client in workers:
+                asyncio.run(client.aclose())
+
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(sum(client.get_stats()["async_transport"]["requests"] for client in workers), 1)
+        self.assertEqual(sum(client.single_flight.get_stats()["coalesced_remote"] for client in workers), 1)
+
+    def test_stream_and_structured(self):
+        """Test streamed and JSON responses"""
+        async def run():
+            chunks = [chunk async for chunk in self.client.stream_response("streamed")]
+            structured = await self.client.generate_structured_response("hello")
+            return chunks, structured
+
+        chunks, structured = asyncio.run(run())
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(json.loads("".join(chunks)), {"echo": "streamed"})
+        self.assertTrue(structured["echo"].startswith("hello"))
+
+    def test_retries_and_batch(self):
+        """Test that retries and batch item errors match the sync client"""
+        StubHandler.failures = [(429, {"Retry-After": "0"}), (400, {})]
+        batch = asyncio.run(self.client.generate_many(["a", "b", "c"], max_concurrency=1, retries=0))
+        self.assertEqual(batch.failed, 1)
+        self.assertEqual(batch.total_tokens, 20)
+        self.assertEqual(self.client.get_stats()["rate_limiter"]["throttled"], 1)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test case for the RPM/TPM rate limiter"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "rate_limit.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_requests_per_minute(self):
+        """Test that the RPM budget is enforced against the deadline"""
+        limiter = RateLimiter(requests_per_minute=2)
+        limiter.acquire(1)
+        limiter.acquire(1)
+        with self.assertRaises(RateLimitExceeded) as cm:
+            limiter.acquire(1, deadline=time.monotonic() + 0.1)
+        self.assertGreater(cm.exception.retry_after, 25)
+        self.assertEqual(limiter.get_stats()["deadline_exceeded"], 1)
+
+    def test_tokens_reconciled_with_usage(self):
+        """Test that over-estimated tokens are refunded"""
+        limiter = RateLimiter(tokens_per_minute=100)
+        limiter.acquire(80)
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire(50, deadline=time.monotonic() + 0.1)
+        limiter.reconcile(80, 10)
+        self.assertLess(limiter.acquire(50, deadline=time.monotonic() + 0.1), 0.1)
+
+    def test_budget_shared_across_workers(self):
+        """Test that limiters sharing a file draw from one budget"""
+        worker_a = RateLimiter(requests_per_minute=2, db_path=self.db_path)
+        worker_b = RateLimiter(requests_per_minute=2, db_path=self.db_path)
+        worker_a.acquire(1)
+        worker_b.acquire(1)
+        with self.assertRaises(RateLimitExceeded):
+            worker_a.acquire(1, deadline=time.monotonic() + 0.1)
+
+        worker_b.block_for(30)
+        with self.assertRaises(RateLimitExceeded):
+            RateLimiter(requests_per_minute=600, db_path=self.db_path).acquire(
+                1, deadline=time.monotonic() + 0.1)
+
+    def test_async_acquire_leaves_loop_free(self):
+        """Test that waiting on another worker's write lock does not block the event loop"""
+        limiter = RateLimiter(db_path=self.db_path)
+        other_worker = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        other_worker.execute("BEGIN IMMEDIATE")
+        threading.Timer(0.3, other_worker.execute, args=("COMMIT",)).start()
+
+        async def run():
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.02)
+                    ticks += 1
+
+            ticker = asyncio.ensure_future(tick())
+            await limiter.acquire_async(1)
+            ticker.cancel()
+            return ticks
+
+        self.assertGreater(asyncio.run(run()), 5)
+        other_worker.close()
+
+    def test_callers_served_in_order(self):
+        """Test that queued callers acquire in arrival order"""
+        limiter = RateLimiter(requests_per_minute=600)
+        for _ in range(600):
+            limiter.acquire(1)
+
+        order = []
+        threads = [threading.Thread(target=lambda i=i: (limiter.acquire(1), order.append(i)))
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.01)
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(order, [0, 1, 2, 3])
+        self.assertGreaterEqual(limiter.get_stats()["max_queue_depth"], 2)
+        self.assertEqual(limiter.get_stats()["queue_depth"], 0)
+
+    def test_headroom(self):
+        """Test that headroom tracks the scarcer budget and drops to zero while blocked"""
+        limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=1000)
+        self.assertAlmostEqual(limiter.headroom(), 1.0, places=2)
+        limiter.acquire(600)
+        self.assertAlmostEqual(limiter.headroom(), 0.4, places=2)
+        limiter.block_for(5)
+        self.assertEqual(limiter.headroom(), 0.0)
+
+    def test_parse_retry_after(self):
+        """Test both Retry-After formats"""
+        self.assertEqual(parse_retry_after({"retry-after": "1.5"}), 1.5)
+        self.assertIsNone(parse_retry_after({}))
+        date = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 60))
+        self.assertAlmostEqual(parse_retry_after({"Retry-After": date}), 60, delta=2)
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test case for request coalescing"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "single_flight.db")
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def slow_call(self, result="done", delay=0.2, fail_first=False):
+        def fn():
+            with self.lock:
+                self.calls += 1
+                call = self.calls
+            time.sleep(delay)
+            if fail_first and call == 1:
+                raise RuntimeError("upstream failed")
+            return result
+        return fn
+
+    def run_concurrently(self, targets):
+        results, errors = [], []
+
+        def run(target):
+            try:
+                results.append(target())
+            except RuntimeError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(target,)) for target in targets]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_waiter_retries_after_leader_failure(self):
+        """Test that a waiter is promoted when the leader raises"""
+        group = SingleFlight()
+        fn = self.slow_call(fail_first=True)
+        results, errors = self.run_concurrently([lambda: group.do("k", fn)] * 3)
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(results, ["done", "done"])
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(group.get_stats()["in_flight"], 0)
+
+    def test_result_shared_across_workers(self):
+        """Test that a second worker reads the leader's result from the lease file"""
+        worker_a = SingleFlight(db_path=self.db_path, poll_interval=0.01)
+        worker_b = SingleFlight(db_path=self.db_path, poll_interval=0.01)
+        fn = self.slow_call()
+        results, _ = self.run_concurrently([lambda: worker_a.do("k", fn), lambda: worker_b.do("k", fn)])
+
+        self.assertEqual(results, ["done", "done"])
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(worker_b.get_stats()["coalesced_remote"], 1)
+
+    def test_finished_flight_is_not_reused(self):
+        """Test that a call made after a flight has finished reaches upstream again"""
+        worker_a = SingleFlight(db_path=self.db_path, poll_interval=0.01)
+        worker_b = SingleFlight(db_path=self.db_path, poll_interval=0.01)
+        fn = self.slow_call(delay=0)
+
+        self.assertEqual(worker_a.do("k", fn), "done")
+        self.assertEqual(worker_b.do("k", fn), "done")
+        self.assertEqual(worker_a.do("k", fn), "done")
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(worker_b.get_stats()["coalesced_remote"], 0)
+
+    def test_expired_lease_is_taken_over(self):
+        """Test that a lease left by a dead worker does not block others"""
+        dead_worker = SingleFlight(db_path=self.db_path, lease_seconds=0.05)
+        self.assertEqual(dead_worker._acquire("k", "dead"), ("leader", None))
+
+        worker = SingleFlight(db_path=self.db_path, poll_interval=0.01)
+        self.assertEqual(worker.do("k", self.slow_call(delay=0)), "done")
+        self.assertEqual(worker.get_stats()["lease_takeovers"], 1)
+
+    def test_long_call_keeps_its_lease(self):
+        """Test that a leader running past lease_seconds is not taken over by another worker"""
+        worker_a = SingleFlight(db_path=self.db_path, lease_seconds=0.15, poll_interval=0.01)
+        worker_b = SingleFlight(db_path=self.db_path, lease_seconds=0.15, poll_interval=0.01)
+        fn = self.slow_call(delay=0.5)
+        results, _ = self.run_concurrently([lambda: worker_a.do("k", fn), lambda: worker_b.do("k", fn)])
+
+        self.assertEqual(results, ["done", "done"])
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(worker_b.get_stats()["lease_takeovers"], 0)
+        self.assertEqual(worker_b.get_stats()["coalesced_remote"], 1)
+
+    def test_waiter_timeout_calls_upstream(self):
+        """Test that a waiter stops waiting for a stalled leader"""
+        group = SingleFlight(wait_timeout=0.1)
+        fn = self.slow_call(delay=0.4)
+        results, _ = self.run_concurrently([lambda: group.do("k", fn)] * 2)
+
+        self.assertEqual(results, ["done", "done"])
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(group.get_stats()["waiter_timeouts"], 1)
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test case for the two-tier response cache"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "cache.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_key_ignores_whitespace(self):
+        """Test that prompt indentation does not change the key"""
+        self.assertEqual(make_cache_key("m", "a\n    b", 0.7, 10), make_cache_key("m", "a b", 0.7, 10))
+        self.assertNotEqual(make_cache_key("m", "a b", 0.7, 10), make_cache_key("m", "a b", 0.2, 10))
+
+    def test_memory_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = ResponseCache(memory_max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.get_stats()["memory_evictions"], 1)
+
+    def test_ttl_expiry(self):
+        """Test that expired entries are not served"""
+        cache = ResponseCache(db_path=self.db_path)
+        cache.set("a", "1", ttl_seconds=-1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get_stats()["expired"], 1)
+
+    def test_disk_tier_is_shared(self):
+        """Test that a second cache instance sees entries on disk"""
+        writer = ResponseCache(db_path=self.db_path, db_max_entries=2)
+        for key in ("a", "b", "c"):
+            writer.set(key, key.upper())
+
+        reader = ResponseCache(db_path=self.db_path)
+        self.assertEqual(reader.get("c"), "C")
+        self.assertIsNone(reader.get("a"))
+        self.assertEqual(reader.get_stats()["disk_hits"], 1)
+        self.assertEqual(writer.get_stats()["disk_evictions"], 1)
+
+
+class TestCassette(unittest.TestCase):
+    """Test case for record/replay cassettes"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}/v1"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubHandler.delay = 0.0
+        StubHandler.failures = []
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cassette.jsonl.gz")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_client(self, cassette, client_class=GroqClient, base_url=None):
+        return client_class(api_key="test", base_url=base_url or self.base_url, single_flight=SingleFlight(),
+                            rate_limiter=RateLimiter(), cassette=cassette)
+
+    def record(self, *prompts, stream=()):
+        client = self.make_client(Cassette(self.path, mode="record"))
+        responses = [client.generate_response(p, use_cache=False) for p in prompts]
+        responses += ["".join(client.stream_response(p)) for p in stream]
+        return responses
+
+    def test_record_then_replay(self):
+        """Test that replay serves recorded responses without the network"""
+        StubHandler.delay = 0.1
+        recorded = self.record("plan for 2026-01-05\n  day one", stream=["streamed prompt"])
+
+        entries = read_entries(self.path)
+        self.assertEqual([e["type"] for e in entries], ["call", "call"])
+        self.assertGreaterEqual(entries[0]["latency_ms"], 100)
+        self.assertIsNotNone(entries[1]["first_token_ms"])
+
+        cassette = Cassette(self.path, mode="replay", latency_scale=0)
+        # Nothing listens on the discard port: any network call would fail
+        client = self.make_client(cassette, base_url="http://127.0.0.1:9/v1")
+        self.assertEqual(client.generate_response("plan   for 2026-01-05 day one", use_cache=False),
+                         recorded[0])
+        self.assertEqual(client.generate_response("plan for 2026-03-01\nday one", use_cache=False),
+                         recorded[0])
+        self.assertEqual("".join(client.stream_response("streamed prompt")), recorded[1])
+        with self.assertRaises(CassetteMiss):
+            client.generate_response("never recorded", use_cache=False)
+
+        stats = client.get_stats()["cassette"]
+        self.assertEqual((stats["hits"], stats["loose_hits"], stats["misses"]), (2, 1, 1))
+
+    def test_replay_latency(self):
+        """Test that replay can reproduce the recorded latency"""
+        StubHandler.delay = 0.2
+        self.record("slow prompt")
+
+        client = self.make_client(Cassette(self.path, mode="replay", latency_scale=1.0))
+        start = time.monotonic()
+        client.generate_response("slow prompt", use_cache=False)
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+        client = self.make_client(Cassette(self.path, mode="replay", latency_scale=0))
+        start = time.monotonic()
+        client.generate_response("slow prompt", use_cache=False)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_async_replay(self):
+        """Test that the async client records and replays the same way"""
+        recorder = self.make_client(Cassette(self.path, mode="record"), AsyncGroqClient)
+        recorded = asyncio.run(recorder.generate_response("async prompt", use_cache=False))
+
+        client = self.make_client(Cassette(self.path, mode="replay", latency_scale=0), AsyncGroqClient,
+                                  base_url="http://127.0.0.1:9/v1")
+
+        async def replay():
+            streamed = "".join([chunk async for chunk in client.stream_response("async prompt")])
+            return await client.generate_response("async prompt", use_cache=False), streamed
+
+        self.assertEqual(asyncio.run(replay()), (recorded, recorded))
+
+    def test_request_recorder(self):
+        """Test that incoming requests are recorded with their form fields and files"""
+        from flask import Flask, request
+
+        app = Flask(__name__)
+        register_request_recorder(app, Cassette(self.path, mode="record"))
+
+        @app.route('/upload', methods=['POST'])
+        def upload():
+            return {"size": len(request.files['resume'].read())}
+
+        response = app.test_client().post('/upload?x=1', data={
+            "job_description": "Engineer", "resume": (io.BytesIO(b"pdf bytes"), "cv.pdf")
+        })
+        self.assertEqual(response.get_json(), {"size": 9})
+
+        entry, = read_entries(self.path)
+        self.assertEqual((entry["method"], entry["path"], entry["query"]), ("POST", "/upload", "x=1"))
+        self.assertEqual(entry["form"], {"job_description": "Engineer"})
+        self.assertEqual(entry["files"]["resume"][0], "cv.pdf")
+
+
+class TestModelRouter(unittest.TestCase):
+    """Test case for task routing, histograms and hedged requests"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StubServer(("127.0.0.1", 0), StubHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}/v1"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubHandler.delay = 0.0
+        StubHandler.delays = []
+        StubHandler.failures = []
+        self.router = ModelRouter(model_tiers={"fast": "small-model"},
+                                  task_tiers={"quiz": "fast", "plan": "large"},
+                                  hedge_tasks={"quiz"}, hedge_min_delay=0.05,
+                                  hedge_min_samples=1, hedge_max_ratio=1.0)
+
+    def make_client(self, client_class=GroqClient):
+        return client_class(api_key="test", model="default-model", base_url=self.base_url,
+                            single_flight=SingleFlight(), rate_limiter=RateLimiter(), router=self.router)
+
+    def test_routing_and_histograms(self):
+        """Test that tasks use their tier's model and are recorded per task"""
+        client = self.make_client()
+        client.generate_response("routed quiz", task="quiz")
+        client.generate_response("routed plan", task="plan")
+        "".join(client.stream_response("streamed plan", task="plan"))
+
+        stats = client.get_stats()["routing"]
+        self.assertEqual(stats["quiz"]["models"], {"small-model": 1})
+        self.assertEqual(stats["plan"]["models"], {"default-model": 2})
+        self.assertEqual(stats["plan"]["tokens"]["count"], 2)
+        self.assertEqual(stats["plan"]["latency_ms"]["buckets"]["250"], 2)
+        self.assertEqual(parse_mapping(" fast = a , broken, large=b"), {"fast": "a", "large": "b"})
+
+    def test_hedge_delay(self):
+        """Test that hedging waits for samples, follows p95 and respects its budget"""
+        router = ModelRouter(hedge_tasks={"quiz"}, hedge_min_delay=0.1, hedge_min_samples=20,
+                             hedge_max_ratio=0.1)
+        for ms in range(100, 2000, 100):
+            router.observe("quiz", "m", ms, 10)
+        self.assertIsNone(router.hedge_delay("quiz"))
+        router.observe("quiz", "m", 2000, 10)
+        self.assertEqual(router.hedge_delay("quiz"), 1.9)
+        self.assertIsNone(router.hedge_delay("plan"))
+
+        router.record_hedge("quiz", won=True)
+        router.record_hedge("quiz", won=False)
+        self.assertIsNone(router.hedge_delay("quiz"))
+
+    def test_hedged_request_wins(self):
+        """Test that a slow call is raced by a hedge and the faster result returned"""
+        client = self.make_client()
+        self.router.observe("quiz", "small-model", 50, 10)
+        StubHandler.delays = [0.8, 0.0]
+
+        start = time.monotonic()
+        result = client.generate_response("hedged quiz", task="quiz", use_cache=False)
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertEqual(json.loads(result), {"echo": "hedged quiz"})
+        stats = self.router.get_stats()["quiz"]
+        self.assertEqual((stats["hedged"], stats["hedge_wins"]), (1, 1))
+
+    def test_async_hedged_request_wins(self):
+        """Test that the async client hedges and cancels the slower call"""
+        client = self.make_client(AsyncGroqClient)
+        self.router.observe("quiz", "small-model", 50, 10)
+        StubHandler.delays = [0.8, 0.0]
+
+        start = time.monotonic()
+        result = asyncio.run(client.generate_response("async hedged quiz", task="quiz", use_cache=False))
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertEqual(json.loads(result), {"echo": "async hedged quiz"})
+        self.assertEqual(self.router.get_stats()["quiz"]["hedge_wins"], 1)
+
+
+
+class DownHandler(StubHandler):
+    """Endpoint that always fails with 503"""
+
+    requests = 0
+
+    def do_POST(self):
+        type(self).requests += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(503)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class ThrottledHandler(StubHandler):
+    """Endpoint with its own queue of injected failures"""
+
+    failures = []
+
+
+class TestEndpointPool(unittest.TestCase):
+    """Test case for multi-endpoint load balancing and circuit breaking"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.servers = {}
+        for name, handler in (("up", StubHandler), ("down", DownHandler), ("throttled", ThrottledHandler)):
+            server = StubServer(("127.0.0.1", 0), handler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            cls.servers[name] = server
+
+    @classmethod
+    def tearDownClass(cls):
+        for server in cls.servers.values():
+            server.shutdown()
+            server.server_close()
+
+    def setUp(self):
+        StubHandler.delay = 0.0
+        StubHandler.delays = []
+        StubHandler.failures = []
+        ThrottledHandler.failures = []
+        DownHandler.requests = 0
+
+    def endpoint(self, server, name=None, weight=1.0, requests_per_minute=10000, **kwargs):
+        url = f"http://127.0.0.1:{self.servers[server].server_port}/v1"
+        return Endpoint(name or server, url, f"key-{name or server}", weight=weight,
+                        rate_limiter=RateLimiter(requests_per_minute, 10 ** 9), **kwargs)
+
+    def make_client(self, *endpoints, strategy="least_outstanding"):
+        client = GroqClient(pool=EndpointPool(endpoints, strategy=strategy),
+                            single_flight=SingleFlight(), rate_limiter=RateLimiter())
+        client.backoff_base = 0.01
+        return client
+
+    def test_selection(self):
+        """Test weighted ties, least-outstanding spreading and EWMA preference"""
+        a, b = Endpoint("a", "http://a/v1", "k", weight=3), Endpoint("b", "http://b/v1", "k")
+        pool = EndpointPool([a, b])
+        for _ in range(400):
+            pool.release(pool.acquire(), ok=True)
+        self.assertTrue(250 < a.stats["requests"] < 350)
+
+        c, d = Endpoint("c", "http://c/v1", "k"), Endpoint("d", "http://d/v1", "k")
+        pool = EndpointPool([c, d])
+        first, second = pool.acquire(), pool.acquire()
+        self.assertIsNot(first, second)
+        self.assertIs(pool.acquire(exclude=(c,)), d)
+
+        e, f = Endpoint("e", "http://e/v1", "k"), Endpoint("f", "http://f/v1", "k")
+        pool = EndpointPool([e, f], strategy="ewma", ewma_alpha=0.5)
+        for endpoint, samples in ((e, (100, 300)), (f, (10,))):
+            for ms in samples:
+                pool.release(pool.acquire(exclude=[x for x in (e, f) if x is not endpoint]), ok=True, latency_ms=ms)
+        self.assertEqual(pool.get_stats()["endpoints"]["e"]["ewma_ms"], 200)
+        self.assertIs(pool.acquire(), f)
+
+    def test_circuit_breaker(self):
+        """Test ejection after failures, a single half-open probe and recovery"""
+        a = Endpoint("a", "http://a/v1", "k", failure_threshold=2, reset_timeout=0.1)
+        pool = EndpointPool([a])
+        for _ in range(2):
+            pool.release(pool.acquire(), ok=False)
+        self.assertEqual(a.state, "open")
+        with self.assertRaises(EndpointUnavailable):
+            pool.acquire()
+
+        time.sleep(0.1)
+        probe = pool.acquire()
+        self.assertEqual(a.state, "half_open")
+        with self.assertRaises(EndpointUnavailable):
+            pool.acquire()
+        pool.release(probe, ok=False)
+        self.assertEqual(a.state, "open")
+
+        time.sleep(0.1)
+        pool.release(pool.acquire(), ok=True)
+        self.assertEqual(a.state, "closed")
+        self.assertEqual(a.stats, {"requests": 4, "errors": 3, "ejections": 1, "probes": 2})
+
+    def test_failover_ejects_unhealthy_endpoint(self):
+        """Test that calls fail over to a healthy endpoint until the bad one is ejected"""
+        down = self.endpoint("down", weight=100, failure_threshold=2)
+        client = self.make_client(down, self.endpoint("up"))
+        for i in range(5):
+            result = client.generate_response(f"failover {i}", use_cache=False)
+            self.assertEqual(json.loads(result), {"echo": f"failover {i}"})
+
+        stats = client.get_stats()["endpoints"]["endpoints"]
+        self.assertEqual(DownHandler.requests, 2)
+        self.assertEqual((stats["down"]["state"], stats["down"]["ejections"]), ("open", 1))
+        self.assertEqual(stats["up"]["requests"], 5)
+
+    def test_rate_limited_endpoint_fails_over(self):
+        """Test that a 429 moves the call to another key without waiting out Retry-After"""
+        throttled = self.endpoint("throttled", weight=100)
+        client = self.make_client(throttled, self.endpoint("up"))
+        ThrottledHandler.failures = [(429, {"Retry-After": "5"})]
+
+        start = time.monotonic()
+        result = asyncio.run(AsyncGroqClient(pool=client.pool, single_flight=SingleFlight(),
+                                             rate_limiter=RateLimiter()).generate_response("throttled"))
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(json.loads(result), {"echo": "throttled"})
+        self.assertEqual(throttled.state, "closed")
+        self.assertEqual(throttled.rate_limiter.get_stats()["throttled"], 1)
+
+    def test_throughput_scales_with_keys(self):
+        """Test that per-key budgets add up across the pool"""
+        StubHandler.delay = 0.1
+
+        def burst(client):
+            def call(i):
+                try:
+                    client.generate_response(f"burst {i}", use_cache=False)
+                    results.append(True)
+                except RateLimitExceeded:
+                    results.append(False)
+            results = []
+            threads = [threading.Thread(target=call, args=(i,)) for i in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return results.count(True)
+
+        single = self.make_client(self.endpoint("up", requests_per_minute=2))
+        single.call_deadline = 1
+        self.assertEqual(burst(single), 2)
+
+        pooled = self.make_client(*(self.endpoint("up", f"key-{i}", requests_per_minute=2) for i in range(3)))
+        pooled.call_deadline = 1
+        self.assertEqual(burst(pooled), 6)
+        stats = pooled.get_stats()["endpoints"]["endpoints"]
+        self.assertEqual([e["requests"] for e in stats.values()], [2, 2, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
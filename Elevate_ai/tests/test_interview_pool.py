@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the pre-generated interview question pool
+
+This module checks job title normalisation and set rotation, retirement
+and popularity ranking in an in-memory SQLite database.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import unittest
+
+# Add parent directory to path to import services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.interview_pool import SCHEMA, InterviewPool, normalize_level, normalize_role
+
+
+def question_set(*texts):
+    return json.dumps({"questions": [{"id": i, "question": text, "type": "technical"}
+                                     for i, text in enumerate(texts, start=1)]})
+
+
+class TestNormalization(unittest.TestCase):
+    """Test case for role and level normalisation"""
+
+    def test_synonyms_and_seniority(self):
+        """Test that spellings of one role share a key and seniority moves into the level"""
+        for title in ["Sr. Back-end Developer", "senior backend engineer", "Backend Dev II", "BACK END ENG"]:
+            self.assertEqual(normalize_role(title)[0], "backend engineer", title)
+        self.assertEqual(normalize_role("SWE"), ("software engineer", None))
+        self.assertEqual(normalize_role("Software Programmer")[0], "software engineer")
+        self.assertEqual(normalize_role("Lead ML Engineer"), ("machine learning engineer", "senior"))
+        self.assertEqual(normalize_role("Entry Level Data Analyst"), ("data analyst", "entry"))
+        self.assertEqual(normalize_role("C# Developer")[0], "c# engineer")
+
+    def test_level(self):
+        """Test that a title's seniority wins over the form field"""
+        self.assertEqual(normalize_level("mid", "senior"), "senior")
+        self.assertEqual(normalize_level("Entry"), "entry")
+        self.assertEqual(normalize_level("Senior Level (6+ years)"), "senior")
+        self.assertEqual(normalize_level("unknown"), "mid")
+        self.assertEqual(normalize_level(None), "mid")
+
+
+class TestInterviewPool(unittest.TestCase):
+    """Test case for serving, rotating and retiring question sets"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        for statement in SCHEMA:
+            self.conn.execute(statement)
+        self.pool = InterviewPool(sets_per_pair=3, min_sets=2, max_serves=2)
+        self.ids = self.pool.add_sets(self.conn, "backend engineer", "senior",
+                                      [question_set(f"Set {n} question") for n in range(3)])
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_rotation_without_repeats(self):
+        """Test that sets rotate least-served first and a user never gets one twice"""
+        served = [self.pool.take(self.conn, "alice", "backend engineer", "senior")[0] for _ in range(3)]
+        self.assertEqual(served, self.ids)
+        self.assertIsNone(self.pool.take(self.conn, "alice", "backend engineer", "senior"))
+
+        # Bob starts with the least-served set, then moves on
+        self.pool.take(self.conn, "carol", "backend engineer", "senior")
+        self.assertEqual(self.pool.take(self.conn, "bob", "backend engineer", "senior")[0], self.ids[1])
+        self.assertIsNone(self.pool.take(self.conn, "bob", "backend engineer", "mid"))
+
+        stats = self.pool.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"]), (5, 2, 0.714))
+
+    def test_retirement(self):
+        """Test that sets retire after max_serves and are dropped on the next refill"""
+        self.pool.max_serves = 1
+        self.pool.take(self.conn, "alice", "backend engineer", "senior")
+        self.assertEqual(self.pool.live_sets(self.conn, "backend engineer", "senior"), 2)
+
+        self.pool.add_sets(self.conn, "backend engineer", "senior", [question_set("Fresh question")])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM interview_sets").fetchone()[0], 3)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM interview_sets_seen").fetchone()[0], 0)
+        self.assertEqual(self.pool.get_stats()["retired"], 1)
+        self.assertIn("Fresh question", self.pool.question_texts(self.conn, "backend engineer", "senior"))
+
+    def test_popular_pairs(self):
+        """Test that request counts rank pairs for warm-up"""
+        for role_key, level, requests in [("data analyst", "entry", 1), ("backend engineer", "senior", 3),
+                                          ("product manager", "mid", 2)]:
+            for _ in range(requests):
+                self.pool.record_request(self.conn, role_key, level)
+        self.assertEqual(self.pool.popular(self.conn, 2),
+                         [("backend engineer", "senior"), ("product manager", "mid")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the background job queue
+
+This module runs jobs through a JobQueue on a temporary SQLite file,
+driving workers by hand with run_once unless a test needs threads.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+# Add parent directory to path to import services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.http_transport import TransportError
+from services.job_queue import JobQueue
+
+
+class TestJobQueue(unittest.TestCase):
+    """Test case for job persistence, retries, deduplication and expiry"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "jobs.db")
+        self.queue = self.make_queue()
+        self.calls = []
+
+    def tearDown(self):
+        self.queue.stop()
+        self.tmpdir.cleanup()
+
+    def make_queue(self, **kwargs):
+        options = dict(workers=0, retry_backoff=0.0)
+        options.update(kwargs)
+        queue = JobQueue(self.path, **options)
+        queue.register("echo", self.echo)
+        return queue
+
+    def echo(self, payload):
+        self.calls.append(payload)
+        if payload.get("fail_times", 0) >= len(self.calls):
+            raise TransportError("upstream down")
+        if payload.get("bad"):
+            raise ValueError("bad payload")
+        return {"echo": payload["text"]}
+
+    def test_run_job(self):
+        """Test that an enqueued job runs and stores its result"""
+        job = self.queue.enqueue("echo", {"text": "hi"})
+        self.assertEqual(job["status"], "queued")
+        self.assertTrue(self.queue.run_once())
+        self.assertFalse(self.queue.run_once())
+
+        job = self.queue.get(job["job_id"])
+        self.assertEqual((job["status"], job["attempts"]), ("succeeded", 1))
+        self.assertEqual(job["result"], {"echo": "hi"})
+        self.assertIsNone(self.queue.get("missing"))
+        with self.assertRaises(ValueError):
+            self.queue.enqueue("unknown", {})
+
+    def test_deduplication(self):
+        """Test that identical live submissions share a job but failed ones do not"""
+        first = self.queue.enqueue("echo", {"text": "same"})
+        second = self.queue.enqueue("echo", {"text": "same"})
+        self.assertEqual(first["job_id"], second["job_id"])
+        self.assertTrue(second["deduplicated"])
+        self.queue.run_once()
+        self.assertEqual(self.queue.enqueue("echo", {"text": "same"})["job_id"], first["job_id"])
+        self.assertNotEqual(self.queue.enqueue("echo", {"text": "other"})["job_id"], first["job_id"])
+
+        failed = self.queue.enqueue("echo", {"text": "x", "bad": True})
+        while self.queue.run_once():
+            pass
+        self.assertNotEqual(self.queue.enqueue("echo", {"text": "x", "bad": True})["job_id"],
+                            failed["job_id"])
+
+    def test_retries(self):
+        """Test that upstream errors are retried and other errors fail at once"""
+        job = self.queue.enqueue("echo", {"text": "flaky", "fail_times": 2})
+        while self.queue.run_once():
+            pass
+        job = self.queue.get(job["job_id"])
+        self.assertEqual((job["status"], job["attempts"]), ("succeeded", 3))
+
+        self.calls = []
+        job = self.queue.enqueue("echo", {"text": "down", "fail_times": 5})
+        while self.queue.run_once():
+            pass
+        job = self.queue.get(job["job_id"])
+        self.assertEqual((job["status"], job["attempts"], job["error"]), ("failed", 3, "upstream down"))
+
+        job = self.queue.enqueue("echo", {"text": "bad", "bad": True})
+        self.queue.run_once()
+        self.assertEqual((self.queue.get(job["job_id"])["status"], self.queue.get_stats()["retried"]),
+                         ("failed", 4))
+
+    def test_interrupted_job_is_recovered(self):
+        """Test that a job held by a dead worker runs again after its lease expires"""
+        crashed = self.make_queue(lease_seconds=0.05)
+        job = crashed.enqueue("echo", {"text": "survives"})
+        crashed._claim("dead-worker")  # claimed, then the process "dies"
+        self.assertFalse(self.queue.run_once())
+
+        time.sleep(0.1)
+        self.assertTrue(self.queue.run_once())
+        job = self.queue.get(job["job_id"])
+        self.assertEqual((job["status"], job["attempts"]), ("succeeded", 2))
+        self.assertEqual(self.queue.get_stats()["recovered"], 1)
+
+    def test_long_job_keeps_its_lease(self):
+        """Test that a job running past its lease is not taken over by another worker"""
+        slow = self.make_queue(lease_seconds=0.15)
+        slow.register("echo", lambda payload: time.sleep(0.5) or self.echo(payload))
+        job = slow.enqueue("echo", {"text": "slow"})
+        runner = threading.Thread(target=slow.run_once)
+        runner.start()
+
+        time.sleep(0.3)
+        self.assertFalse(self.make_queue(lease_seconds=0.15).run_once())
+        runner.join()
+        job = slow.get(job["job_id"])
+        self.assertEqual((job["status"], job["attempts"], len(self.calls)), ("succeeded", 1, 1))
+
+    def test_owner(self):
+        """Test that a job records its user, and users do not join each other's jobs"""
+        mine = self.queue.enqueue("echo", {"text": "same"}, user_id=7)
+        self.assertEqual(self.queue.get(mine["job_id"])["user_id"], "7")
+        self.assertNotEqual(self.queue.enqueue("echo", {"text": "same"}, user_id=8)["job_id"], mine["job_id"])
+        self.assertIsNone(self.queue.enqueue("echo", {"text": "internal"})["user_id"])
+
+    def test_expiry(self):
+        """Test that finished jobs are purged after the result TTL"""
+        queue = self.make_queue(result_ttl=0.05)
+        job = queue.enqueue("echo", {"text": "old"})
+        queue.run_once()
+        self.assertEqual(queue.purge_expired(), 0)
+        time.sleep(0.1)
+        self.assertEqual(queue.purge_expired(), 1)
+        self.assertIsNone(queue.get(job["job_id"]))
+
+    def test_worker_threads(self):
+        """Test that worker threads pick up jobs and waiters are woken"""
+        queue = self.make_queue(workers=2, poll_interval=5)
+        done = threading.Event()
+        queue.register("echo", lambda payload: done.set() or payload)
+        try:
+            job = queue.enqueue("echo", {"text": "threaded"})
+            self.assertTrue(done.wait(2))
+            deadline = time.monotonic() + 2
+            while queue.get(job["job_id"])["status"] != "succeeded" and time.monotonic() < deadline:
+                queue.wait(0.5)
+            self.assertEqual(queue.get(job["job_id"])["result"], {"text": "threaded"})
+            self.assertEqual(queue.get_stats()["workers"], 2)
+        finally:
+            queue.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for parsing JSON out of LLM responses
+
+This module contains tests for the shared extractor used by every route and
+the incremental array parser used by the streaming endpoints.
+"""
+
+import json
+import os
+import sys
+import unittest
+
+# Add parent directory to path to import services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.json_extract import extract_json, get_extraction_stats, has_json_object
+from services.json_stream import JSONArrayStreamParser
+from flask import Flask
+from utils.sse import sse_response
+
+
+RESPONSE = (
+    'Sure! Here is your quiz:\n```json\n'
+    '{"title": "Quiz", "questions": ['
+    '{"id": 1, "question": "Which brace closes { this?", "options": ["A. }", "B. ]"]}, '
+    '{"id": 2, "question": "Escaped \\"quotes\\", commas", "options": []}'
+    ']}\n```\nGood luck!'
+)
+
+
+class TestExtractJSON(unittest.TestCase):
+    """Test case for the shared JSON extractor"""
+
+    def test_fenced_response_with_prose(self):
+        """Test that fences, prose and braces inside strings are skipped"""
+        result = extract_json(RESPONSE)
+        self.assertFalse(result.repaired)
+        self.assertEqual(len(result.data['questions']), 2)
+        self.assertEqual(result.data['questions'][0]['question'], 'Which brace closes { this?')
+
+    def test_braces_after_object(self):
+        """Test that a later brace in prose does not extend the match"""
+        result = extract_json('{"a": 1}\nNote: use {curly} braces')
+        self.assertEqual(result.data, {'a': 1})
+
+    def test_leading_brace_in_prose(self):
+        """Test that a non-JSON brace before the object is skipped"""
+        result = extract_json('Format {like this}: {"a": 1}')
+        self.assertEqual(result.data, {'a': 1})
+
+    def test_trailing_commas(self):
+        """Test that trailing commas are removed outside strings"""
+        result = extract_json('{"a": [1, 2,], "b": "x,]",}')
+        self.assertEqual(result.data, {'a': [1, 2], 'b': 'x,]'})
+        self.assertEqual(result.repairs, ['trailing_commas'])
+
+    def test_smart_quotes(self):
+        """Test that curly quotes are replaced"""
+        result = extract_json('{“a”: “b”}')
+        self.assertEqual(result.data, {'a': 'b'})
+        self.assertEqual(result.repairs, ['smart_quotes'])
+
+    def test_truncated_response(self):
+        """Test that a cut-off response keeps its complete elements"""
+        cut = RESPONSE.index('"options": []')
+        result = extract_json(RESPONSE[:cut])
+        self.assertIn('unterminated', result.repairs)
+        self.assertEqual(result.data['questions'][0]['id'], 1)
+
+    def test_unrecoverable_response(self):
+        """Test that text without an object returns None and is counted"""
+        failed = get_extraction_stats()['failed']
+        self.assertIsNone(extract_json('I cannot help with that.'))
+        self.assertIsNone(extract_json('["not", "an", "object"]'))
+        self.assertEqual(get_extraction_stats()['failed'], failed + 2)
+
+    def test_regenerations_avoided(self):
+        """Test that every repaired response is counted"""
+        before = get_extraction_stats()['regenerations_avoided']
+        extract_json('{"a": 1,}')
+        extract_json('{"a": 1}')
+        self.assertEqual(get_extraction_stats()['regenerations_avoided'], before + 1)
+
+    def test_cache_check_is_not_counted(self):
+        """Test that checking a response before caching it leaves the counters alone"""
+        before = get_extraction_stats()
+        self.assertTrue(has_json_object(RESPONSE))
+        self.assertFalse(has_json_object('I cannot help with that.'))
+        self.assertEqual(get_extraction_stats(), before)
+
+
+class TestJSONArrayStreamParser(unittest.TestCase):
+    """Test case for the incremental array parser"""
+
+    def feed_in_chunks(self, parser, text, size):
+        elements = []
+        for i in range(0, len(text), size):
+            elements.extend(parser.feed(text[i:i + size]))
+        return elements
+
+    def test_elements_independent_of_chunking(self):
+        """Test that any chunk size yields the same elements"""
+        for size in (1, 2, 5, 17, len(RESPONSE)):
+            parser = JSONArrayStreamParser('questions')
+            elements = self.feed_in_chunks(parser, RESPONSE, size)
+            self.assertEqual([e['id'] for e in elements], [1, 2])
+            self.assertEqual(elements[1]['question'], 'Escaped "quotes", commas')
+            self.assertTrue(parser.done)
+
+    def test_element_emitted_before_response_ends(self):
+        """Test that the first element is available before the array closes"""
+        parser = JSONArrayStreamParser('questions')
+        cut = RESPONSE.index('{"id": 2')
+        self.assertEqual(len(parser.feed(RESPONSE[:cut])), 1)
+        self.assertFalse(parser.done)
+
+    def test_scalar_elements(self):
+        """Test arrays of strings and numbers"""
+        parser = JSONArrayStreamParser('strengths')
+        elements = self.feed_in_chunks(parser, '{"strengths": ["a, b", "c]", 3 ]}', 3)
+        self.assertEqual(elements, ['a, b', 'c]', 3])
+
+
+class TestSSEResponse(unittest.TestCase):
+    """Test case for the streamed item events"""
+
+    def item_events(self, chunks):
+        app = Flask(__name__)
+        with app.test_request_context():
+            response = sse_response(chunks, lambda text: {}, 'questions', ['id'])
+            body = ''.join(response.response)
+        return [json.loads(line[len('data: '):])
+                for frame in body.split('\n\n') if frame.startswith('event: item')
+                for line in frame.splitlines() if line.startswith('data: ')]
+
+    def test_items_in_one_chunk_get_their_own_index(self):
+        """Test that two elements completed by the same chunk keep their order"""
+        items = self.item_events([RESPONSE])
+        self.assertEqual([item['index'] for item in items], [0, 1])
+        self.assertEqual([item['item']['id'] for item in items], [1, 2])
+
+    def test_malformed_item_keeps_its_slot(self):
+        """Test that an element that is not valid JSON is reported at its index"""
+        items = self.item_events(['{"questions": [{"id": 1}, {bad}, {"id": 3}]}'])
+        self.assertEqual([(item['index'], item['valid']) for item in items], [(0, True), (1, False), (2, True)])
+        self.assertEqual(items[2]['item'], {"id": 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the versioned database schema
+
+This module migrates empty databases and databases created by the two old
+schemas, and checks with EXPLAIN QUERY PLAN that the per-user lookups the
+routes run are index searches rather than table scans.
+"""
+
+import os
+import sqlite3
+import sys
+import unittest
+
+# Add parent directory to path to import utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.answer_evaluation import SCHEMA as ANSWER_EVALUATION_SCHEMA
+from services.interview_pool import SCHEMA as INTERVIEW_POOL_SCHEMA
+from services.question_bank import SCHEMA as QUESTION_BANK_SCHEMA
+from services.quiz_history import SCHEMA as QUIZ_HISTORY_SCHEMA
+from services.topic_mastery import SCHEMA as TOPIC_MASTERY_SCHEMA, rebuild
+from utils.config import get_config
+from utils.migrations import (QUIZ_HISTORY_TABLES, SCHEMA_VERSION, TOPIC_MASTERY_TABLES, _unify_schema, migrate,
+                              schema_version)
+
+
+def query_plan(conn, sql):
+    """EXPLAIN QUERY PLAN details of a statement, one string."""
+    params = (None,) * sql.count("?")
+    return " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+class TestMigrations(unittest.TestCase):
+    """Test case for creating and upgrading the schema"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+
+    def tearDown(self):
+        self.conn.close()
+
+    def columns(self, table):
+        return [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+
+    def test_fresh_database(self):
+        """Test that an empty database gets the whole schema once"""
+        self.assertEqual(migrate(self.conn), SCHEMA_VERSION)
+        self.assertEqual(schema_version(self.conn), SCHEMA_VERSION)
+        self.assertIn("plan_content", self.columns("study_plans"))
+        self.assertIn("question_bank", {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master")})
+        self.assertEqual(migrate(self.conn), SCHEMA_VERSION)
+
+    def test_mastery_is_built_from_existing_responses(self):
+        """Test that upgrading to version 3 fills topic mastery from responses stored under version 2"""
+        _unify_schema(self.conn)
+        for statement in QUIZ_HISTORY_TABLES:
+            self.conn.execute(statement)
+        self.conn.execute("PRAGMA user_version = 2")
+        self.conn.executemany(
+            "INSERT INTO quiz_responses (quiz_id, question_no, user_id, syllabus_id, topic, answer, correct) "
+            "VALUES (?, ?, '7', 1, 'Cells', 'A', ?)", [(1, 1, 1), (1, 2, 0), (2, 1, 1)])
+        migrate(self.conn)
+        self.assertEqual(self.conn.execute("SELECT answered, correct, quizzes FROM topic_mastery").fetchone(), (3, 2, 2))
+        self.assertEqual(self.conn.execute("SELECT quizzes, last_quiz_id FROM mastery_totals").fetchone(), (2, 2))
+        self.assertEqual(self.conn.execute("SELECT SUM(answered) FROM progress_weekly").fetchone(), (3,))
+
+    def test_rollups_are_built_from_existing_mastery(self):
+        """Test that upgrading a version 3 database adds the rollups and fills them"""
+        _unify_schema(self.conn)
+        for statement in QUIZ_HISTORY_TABLES + TOPIC_MASTERY_TABLES:
+            self.conn.execute(statement)
+        self.conn.execute("PRAGMA user_version = 3")
+        self.conn.executemany(
+            "INSERT INTO quiz_responses (quiz_id, question_no, user_id, syllabus_id, topic, answer, correct) "
+            "VALUES (?, ?, '7', 1, 'Cells', 'A', ?)", [(1, 1, 1), (1, 2, 0), (2, 1, 1)])
+        self.assertEqual(migrate(self.conn), SCHEMA_VERSION)
+        self.assertEqual(self.conn.execute("SELECT SUM(answered) FROM progress_daily").fetchone(), (3,))
+        self.assertEqual(self.conn.execute("SELECT answered, quizzes FROM topic_mastery").fetchone(), (3, 2))
+
+    def test_rollup_migration_matches_rebuild(self):
+        """Test that migration 4's own rebuild gives the same rows as topic_mastery.rebuild()"""
+        _unify_schema(self.conn)
+        for statement in QUIZ_HISTORY_TABLES + TOPIC_MASTERY_TABLES:
+            self.conn.execute(statement)
+        self.conn.execute("PRAGMA user_version = 3")
+        self.conn.executemany(
+            "INSERT INTO quiz_responses (quiz_id, question_no, user_id, syllabus_id, topic, answer, correct, "
+            "answered_at) VALUES (?, ?, ?, 1, ?, 'A', ?, ?)",
+            [(1, 1, '7', 'Cells', 1, '2026-01-05 10:00:00'), (1, 2, '7', 'Genetics', 0, '2026-01-05 10:00:00'),
+             (2, 1, '7', 'Cells', 0, '2026-01-07 09:00:00'), (2, 2, '7', 'Cells', 1, '2026-01-07 09:00:00'),
+             (3, 1, '8', 'Cells', 1, '2026-01-14 12:00:00')])
+        migrate(self.conn)
+        tables = ("topic_mastery", "mastery_totals", "progress_daily", "progress_weekly")
+        migrated = {table: self.conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2, 3, 4").fetchall()
+                    for table in tables}
+        rebuild(self.conn, get_config().TOPIC_MASTERY_ALPHA)
+        self.assertEqual({table: self.conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2, 3, 4").fetchall()
+                          for table in tables}, migrated)
+
+    def test_service_schemas_match(self):
+        """Test that the tables the services create are the ones the migrations leave behind"""
+        migrate(self.conn)
+        fresh = sqlite3.connect(":memory:")
+        try:
+            for statement in (QUIZ_HISTORY_SCHEMA + TOPIC_MASTERY_SCHEMA + QUESTION_BANK_SCHEMA
+                              + INTERVIEW_POOL_SCHEMA + ANSWER_EVALUATION_SCHEMA):
+                fresh.execute(statement)
+            for (table,) in fresh.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+                self.assertEqual(self.conn.execute(f"PRAGMA table_info({table})").fetchall(),
+                                 fresh.execute(f"PRAGMA table_info({table})").fetchall(), table)
+        finally:
+            fresh.close()
+
+    def test_app_schema_is_upgraded(self):
+        """Test that tables from the old app.py schema keep their rows under the unified columns"""
+        self.conn.executescript("""
+            CREATE TABLE interviews (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, job_title TEXT,
+                questions TEXT, answers TEXT, feedback TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+            CREATE TABLE progress (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, syllabus_id INTEGER,
+                topic TEXT, status TEXT, notes TEXT, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+            INSERT INTO interviews (user_id, job_title, questions) VALUES (7, 'Data Analyst', '{"questions": []}');
+            INSERT INTO progress (user_id, syllabus_id, topic, status) VALUES (7, 1, 'Cells', 'needs_review');
+            INSERT INTO progress (user_id, syllabus_id, topic, status) VALUES (7, 1, 'Cells', 'mastered');
+            INSERT INTO progress (user_id, syllabus_id, topic, status) VALUES (7, 1, 'Genetics', 'mastered');
+        """)
+        migrate(self.conn)
+
+        self.assertEqual(self.conn.execute("SELECT id, job_role FROM interviews").fetchall(), [(1, "Data Analyst")])
+        # Duplicate progress rows collapse to the latest one
+        self.assertEqual(self.conn.execute("SELECT topic, status FROM progress ORDER BY topic").fetchall(),
+                         [("Cells", "mastered"), ("Genetics", "mastered")])
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.conn.execute("INSERT INTO progress (user_id, syllabus_id, topic) VALUES ('7', 1, 'Cells')")
+
+        # New rows continue after the copied IDs
+        self.conn.execute("INSERT INTO interviews (user_id, job_role, questions) VALUES ('7', 'PM', '{}')")
+        self.assertEqual(self.conn.execute("SELECT MAX(id) FROM interviews").fetchone()[0], 2)
+
+    def test_init_db_schema_is_upgraded(self):
+        """Test that the old init_db.py tables lose their stricter columns"""
+        self.conn.executescript("""
+            CREATE TABLE study_plans (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL,
+                syllabus_id INTEGER NOT NULL, duration_days INTEGER NOT NULL, hours_per_day REAL NOT NULL,
+                plan_data TEXT NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+            CREATE TABLE quizzes (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL,
+                syllabus_id INTEGER NOT NULL, topics TEXT NOT NULL, questions TEXT NOT NULL, answers TEXT,
+                score REAL, feedback TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+            INSERT INTO study_plans (user_id, syllabus_id, duration_days, hours_per_day, plan_data)
+                VALUES ('u', 1, 7, 1.5, '{"plan": []}');
+        """)
+        migrate(self.conn)
+
+        self.assertEqual(self.conn.execute("SELECT plan_content, duration_days FROM study_plans").fetchone(),
+                         ('{"plan": []}', 7))
+        self.conn.execute("INSERT INTO quizzes (user_id, syllabus_id, questions) VALUES ('u', 1, '{}')")
+        self.conn.execute("INSERT INTO study_plans (user_id, syllabus_id, plan_content) VALUES ('u', 1, '{}')")
+
+    def test_failed_migration_rolls_back(self):
+        """Test that a failing migration leaves the version and tables untouched"""
+        self.conn.executescript("""
+            CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT, password TEXT);
+            INSERT INTO users (email) VALUES ('a@example.com'), ('a@example.com');
+        """)
+        self.conn.commit()
+        with self.assertRaises(sqlite3.IntegrityError):  # emails become unique
+            migrate(self.conn)
+        self.assertEqual(schema_version(self.conn), 0)
+        self.assertEqual(self.columns("users"), ["id", "email", "password"])
+        self.assertEqual([row[0] for row in self.conn.execute("SELECT name FROM sqlite_master")], ["users"])
+
+
+class TestQueryPlans(unittest.TestCase):
+    """Test case asserting that the routes' hot lookups use indexes"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = sqlite3.connect(":memory:")
+        migrate(cls.conn)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def assertUsesIndex(self, sql, index, grouped=False):
+        plan = query_plan(self.conn, sql)
+        self.assertRegex(plan, rf"SEARCH \w+ USING (COVERING )?INDEX {index} ", plan)
+        self.assertNotIn("SCAN", plan)
+        if not grouped:  # aggregates group the user's own rows in memory
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_quiz_history(self):
+        """Test that recent and ordered quiz history come straight from the index"""
+        self.assertUsesIndex("SELECT questions, answers, score FROM quizzes WHERE user_id = ? AND syllabus_id = ? "
+                             "ORDER BY created_at DESC LIMIT 5", "idx_quizzes_user_syllabus_created")
+        self.assertUsesIndex("SELECT id, score, created_at FROM quizzes WHERE user_id = ? AND syllabus_id = ? "
+                             "ORDER BY created_at ASC", "idx_quizzes_user_syllabus_created")
+
+    def test_progress(self):
+        """Test that progress lookups per syllabus and per topic use the unique key"""
+        self.assertUsesIndex("SELECT topic, status FROM progress WHERE user_id = ? AND syllabus_id = ?",
+                             "idx_progress_user_syllabus_topic")
+        self.assertUsesIndex("SELECT id FROM progress WHERE user_id = ? AND syllabus_id = ? AND topic = ?",
+                             "idx_progress_user_syllabus_topic")
+
+    def test_per_user_lists(self):
+        """Test that per-user lists of plans, syllabi and interviews are index searches"""
+        self.assertUsesIndex("SELECT id FROM study_plans WHERE user_id = ? AND syllabus_id = ? "
+                             "ORDER BY created_at DESC", "idx_study_plans_user_syllabus_created")
+        self.assertUsesIndex("SELECT id, subject FROM syllabi WHERE user_id = ? ORDER BY created_at DESC",
+                             "idx_syllabi_user_created")
+        self.assertUsesIndex("SELECT id FROM interviews WHERE user_id = ? ORDER BY created_at DESC",
+                             "idx_interviews_user_created")
+        self.assertUsesIndex("SELECT question_id, answer FROM interview_answers WHERE interview_id = ?",
+                             "sqlite_autoindex_interview_answers_1")
+
+    def test_quiz_responses(self):
+        """Test that quiz questions and the per-user response aggregates are index searches"""
+        self.assertUsesIndex("SELECT question_id, topic FROM quiz_questions WHERE quiz_id = ? ORDER BY question_no",
+                             "sqlite_autoindex_quiz_questions_1")
+        self.assertUsesIndex("SELECT topic FROM quiz_responses WHERE user_id = ? AND syllabus_id = ? AND quiz_id IN ("
+                             "SELECT DISTINCT quiz_id FROM quiz_responses WHERE user_id = ? AND syllabus_id = ? "
+                             "ORDER BY quiz_id DESC LIMIT ?) GROUP BY topic HAVING AVG(correct) < ?",
+                             "idx_quiz_responses_user_syllabus_quiz", grouped=True)
+        self.assertUsesIndex("SELECT quiz_id, COUNT(*), SUM(correct) FROM quiz_responses "
+                             "WHERE user_id = ? AND syllabus_id = ? GROUP BY quiz_id ORDER BY quiz_id DESC",
+                             "idx_quiz_responses_user_syllabus_quiz")
+
+    def test_progress_reads(self):
+        """Test that the progress page's reads search by user and syllabus, the chart by date range too"""
+        self.assertUsesIndex("SELECT topic, mastery, last_seen FROM topic_mastery WHERE user_id = ? AND syllabus_id = ? "
+                             "ORDER BY topic", "sqlite_autoindex_topic_mastery_1")
+        self.assertUsesIndex("SELECT quizzes FROM mastery_totals WHERE user_id = ? AND syllabus_id = ?",
+                             "sqlite_autoindex_mastery_totals_1")
+        self.assertUsesIndex("SELECT quiz_id, COUNT(*), SUM(correct) FROM quiz_responses "
+                             "WHERE user_id = ? AND syllabus_id = ? GROUP BY quiz_id ORDER BY quiz_id DESC LIMIT 10",
+                             "idx_quiz_responses_user_syllabus_quiz")
+        for table in ("progress_daily", "progress_weekly"):
+            self.assertUsesIndex(f"SELECT topic, CAST((julianday(period) - julianday(?)) * ? / ? AS INTEGER) AS bucket, "
+                                 f"MAX(period), mastery, SUM(answered), SUM(correct) FROM {table} "
+                                 f"WHERE user_id = ? AND syllabus_id = ? AND period BETWEEN ? AND ? "
+                                 f"GROUP BY topic, bucket ORDER BY topic, bucket",
+                                 f"sqlite_autoindex_{table}_1", grouped=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,568 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the mock Groq API server
+
+This module checks that every agent gets schema-valid JSON from the mock,
+that fault injection drives the client's retry paths, and that a real
+route works end to end against it.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+# Add parent directory to path to import services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mock_groq_server import MockGroqServer, detect_agent, parse_latency
+from services.async_groq_client import AsyncGroqClient
+from services.groq_client import GroqClient
+from services.http_transport import HTTPStatusError
+from services.json_extract import extract_json
+from services.rate_limiter import RateLimiter
+from services.single_flight import SingleFlight
+
+# Prompt openings as sent by the blueprints
+PROMPTS = {
+    "syllabus": "You are a Syllabus Agent. Parse the following syllabus content for Biology.\n"
+                "Syllabus Content:\nCells, genetics, evolution",
+    "quiz": "You are a Quiz Generator Agent. Generate a quiz for Biology with the following parameters:\n"
+            "Difficulty: medium\nNumber of Questions: 7\nTopics to Focus on: Cells, Genetics",
+    "plan": "You are a Planner Agent. Generate a personalized study plan for Biology with the following "
+            "parameters:\nDuration: 10 days\nHours per day: 1.5 hours\nStart date: 2026-01-05",
+    "resume": "You are a Resume Analyzer Agent. Analyze the following resume for quality.",
+    "interview": "You are a Mock Interviewer Agent for a Backend Engineer position at senior level.",
+    "evaluation": "You are an Answer Evaluator Agent for a Backend Engineer interview.\n"
+                  "Question: Describe a system you designed.\nAnswer: A queue-backed pipeline.",
+    "feedback": 'You are a Feedback Agent for a Backend Engineer interview.\n'
+                '[{"question": "Q1", "answer": "A1"}, {"question": "Q2", "answer": "A2"}]',
+}
+
+
+def make_client(url, client_class=GroqClient, rate_limiter=None):
+    """Client with its own coalescing group and a limiter that never throttles."""
+    client = client_class(api_key="test-key", base_url=url, single_flight=SingleFlight(),
+                          rate_limiter=rate_limiter or RateLimiter(10000, 10 ** 9))
+    client.backoff_base = 0.01
+    return client
+
+
+class TestMockGroqServer(unittest.TestCase):
+    """Test case for the mock server against the real Groq clients"""
+
+    def setUp(self):
+        self.server = MockGroqServer(seed=7).start()
+        self.client = make_client(self.server.url)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def generate(self, agent):
+        return extract_json(self.client.generate_response(PROMPTS[agent], use_cache=False)).data
+
+    def test_agent_schemas(self):
+        """Each agent prompt gets JSON in the shape the route parses"""
+        self.assertEqual({detect_agent(p) for p in PROMPTS.values()}, set(PROMPTS))
+
+        topics = self.generate("syllabus")["topics"]
+        self.assertTrue(all({"name", "subtopics", "learning_objectives"} <= set(t) for t in topics))
+
+        questions = self.generate("quiz")["questions"]
+        self.assertEqual(len(questions), 7)
+        self.assertEqual({q["topic"] for q in questions}, {"Cells", "Genetics"})
+        self.assertTrue(all(len(q["options"]) == 4 and q["correct_answer"] in "ABCD" for q in questions))
+
+        plan = self.generate("plan")["plan"]
+        self.assertEqual(len(plan), 10)
+        self.assertEqual((plan[0]["date"], plan[-1]["date"]), ("2026-01-05", "2026-01-14"))
+        self.assertEqual(plan[0]["duration_hours"], 1.5)
+
+        resume = self.generate("resume")
+        self.assertTrue(0 <= resume["match_percentage"] <= 100)
+        self.assertIn("suggestions", resume)
+
+        interview = self.generate("interview")["questions"]
+        self.assertEqual(len(interview), 5)
+        self.assertIn("Backend Engineer", interview[0]["question"])
+
+        evaluation = self.generate("evaluation")
+        self.assertTrue(0 <= evaluation["score"] <= 10)
+        self.assertIn("feedback", evaluation)
+
+        feedback = self.generate("feedback")
+        self.assertEqual(len(feedback["detailed_feedback"]), 2)
+        self.assertEqual(self.server.get_stats()["by_agent"]["feedback"], 1)
+
+    def test_deterministic(self):
+        """The same prompt and seed give the same completion"""
+        first = self.client.generate_response(PROMPTS["quiz"], use_cache=False)
+        self.assertEqual(self.client.generate_response(PROMPTS["quiz"], use_cache=False), first)
+
+        other = MockGroqServer(seed=8).start()
+        try:
+            client = make_client(other.url)
+            self.assertNotEqual(client.generate_response(PROMPTS["quiz"], use_cache=False), first)
+        finally:
+            other.stop()
+
+    def test_prose_wrapped_json(self):
+        """Chatty, fenced output still extracts"""
+        self.server.configure(prose=True)
+        raw = self.client.generate_response(PROMPTS["resume"], use_cache=False)
+        self.assertTrue(raw.startswith("Sure!"))
+        self.assertIn("match_percentage", extract_json(raw).data)
+
+    def test_stream(self):
+        """Streaming yields the same content and reports usage on the last chunk"""
+        self.server.configure(tokens_per_second=2000)
+        streamed = "".join(self.client.stream_response(PROMPTS["syllabus"]))
+        self.assertEqual(streamed, self.client.generate_response(PROMPTS["syllabus"], use_cache=False))
+        # The server counts a completion after its last write, which can trail the client
+        deadline = time.monotonic() + 2
+        while self.server.get_stats()["in_flight"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stats = self.server.get_stats()
+        self.assertEqual(stats["streamed"], 1)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_injected_failures_are_retried(self):
+        """fail_next drives the 429 and 5xx retry paths"""
+        self.server.fail_next(429, headers={"Retry-After": "0"})
+        self.server.fail_next(503)
+        self.assertIn("topics", self.generate("syllabus"))
+        stats = self.server.get_stats()
+        self.assertEqual((stats["rate_limited"], stats["errors"], stats["completions"]), (1, 1, 1))
+
+        self.client.max_retries = 1
+        self.server.fail_next(500, count=2)
+        with self.assertRaises(HTTPStatusError):
+            self.generate("syllabus")
+
+    def test_requests_per_minute(self):
+        """The enforced RPM limit answers 429 with a Retry-After the limiter honours"""
+        self.server.configure(requests_per_minute=2)
+        self.client.max_retries = 0
+        self.generate("resume")
+        self.generate("plan")
+        with self.assertRaises(HTTPStatusError) as ctx:
+            self.generate("quiz")
+        self.assertEqual(ctx.exception.status_code, 429)
+
+        limiter = RateLimiter(10000, 10 ** 9)
+        client = make_client(self.server.url, rate_limiter=limiter)
+        client.call_deadline = 5
+        with self.assertRaises(HTTPStatusError):
+            client.generate_response(PROMPTS["quiz"], use_cache=False)
+        # Retry-After is most of a minute: the limiter is blocked and the call gives up
+        self.assertEqual(limiter.get_stats()["throttled"], 1)
+
+    def test_async_concurrency(self):
+        """A latency-bound burst overlaps on the async client"""
+        self.server.configure(latency="0.2")
+        client = make_client(self.server.url, AsyncGroqClient)
+
+        async def burst():
+            return await asyncio.gather(*(
+                client.generate_response(f"{PROMPTS['resume']} #{i}", use_cache=False) for i in range(10)
+            ))
+
+        results = asyncio.run(burst())
+        self.assertEqual(len(results), 10)
+        self.assertGreaterEqual(self.server.get_stats()["max_in_flight"], 5)
+
+    def test_parse_latency(self):
+        """Latency specs parse into seeded distributions"""
+        rng = random.Random(1)
+        self.assertEqual(parse_latency("0.25")(rng), 0.25)
+        self.assertTrue(0.1 <= parse_latency("uniform:0.1,0.2")(rng) <= 0.2)
+        self.assertGreater(parse_latency("lognormal:0.4,0.5")(rng), 0)
+        self.assertGreaterEqual(parse_latency("normal:0.1,5")(rng), 0)
+        with self.assertRaises(ValueError):
+            parse_latency("pareto:1")
+
+
+class TestRoutesAgainstMock(unittest.TestCase):
+    """Run a blueprint route end to end against the mock server"""
+
+    def setUp(self):
+        from app import app
+        from blueprints.study import routes
+        from utils import db_utils
+        from utils.migrations import migrate
+
+        self.server = MockGroqServer(seed=3).start()
+        self.routes = routes
+        self.base_url = routes.groq_client.base_url
+        routes.groq_client.base_url = self.server.url
+
+        # Every route connects through db_utils; point it at a fresh database
+        self.cwd = os.getcwd()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmpdir.name)
+        os.makedirs("database")
+        with sqlite3.connect("database/database.db") as conn:
+            migrate(conn)
+        self.db_utils = db_utils
+        self.database_path, db_utils.DATABASE_PATH = db_utils.DATABASE_PATH, os.path.abspath("database/database.db")
+        self.app = app.test_client()
+
+    def tearDown(self):
+        self.routes.groq_client.base_url = self.base_url
+        self.db_utils.get_pool().close_all()
+        self.db_utils.DATABASE_PATH = self.database_path
+        os.chdir(self.cwd)
+        self.tmpdir.cleanup()
+        self.server.stop()
+
+    def test_upload_syllabus(self):
+        """The async syllabus route parses and stores the mock's topics"""
+        response = self.app.post('/study/syllabus/upload', data={
+            "subject": "Chemistry", "syllabus_content": "Atoms, bonds, reactions"
+        })
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertTrue(body["parsed_syllabus"]["topics"])
+        with sqlite3.connect("database/database.db") as conn:
+            self.assertEqual(conn.execute("SELECT subject FROM syllabi").fetchone()[0], "Chemistry")
+
+    def test_resume_job(self):
+        """A resume analysis requested with Prefer: respond-async runs as a job and can be polled"""
+        from blueprints.career import routes as career_routes
+
+        base_url, career_routes.groq_client.base_url = career_routes.groq_client.base_url, self.server.url
+        try:
+            form = {"resume_text": "Python developer, 5 years", "job_description": "Backend engineer"}
+            headers = {"Prefer": "respond-async"}
+            response = self.app.post('/career/resume/analyze', data=form, headers=headers)
+            self.assertEqual(response.status_code, 202)
+            body = response.get_json()
+            self.assertEqual(response.headers["Location"], body["status_url"])
+            duplicate = self.app.post('/career/resume/analyze', data=form, headers=headers)
+            self.assertEqual(duplicate.get_json()["job_id"], body["job_id"])
+
+            events = self.app.get(body["events_url"]).get_data(as_text=True)
+            self.assertIn("event: done", events)
+            job = self.app.get(body["status_url"]).get_json()
+            self.assertEqual(job["status"], "succeeded")
+            self.assertIn("match_percentage", job["result"])
+            with sqlite3.connect("database/database.db") as conn:
+                self.assertEqual(conn.execute("SELECT COUNT(*) FROM resumes").fetchone()[0], 1)
+            self.assertEqual(self.app.get('/jobs/unknown').status_code, 404)
+
+            # Someone else's job is reported as missing
+            with self.app.session_transaction() as sess:
+                sess['user_id'] = 99
+            self.assertEqual(self.app.get(body["status_url"]).status_code, 404)
+            self.assertEqual(self.app.get(body["events_url"]).status_code, 404)
+        finally:
+            career_routes.groq_client.base_url = base_url
+
+    def wait_for_jobs(self, timeout=10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            jobs = self.routes.job_queue.get_stats()["jobs"]
+            # The mock counts a completion just after sending it, so also wait for that
+            if not jobs.get("queued") and not jobs.get("running") and not self.server.get_stats()["in_flight"]:
+                return
+            self.routes.job_queue.wait(0.1)
+        self.fail("background jobs did not finish")
+
+    def test_quiz_from_question_bank(self):
+        """Uploading fills the question bank, and quizzes, streamed or not, are then served from it without the LLM"""
+        routes = self.routes
+        base_url, routes.groq_client.base_url = routes.groq_client.base_url, self.server.url
+        try:
+            with mock.patch.object(routes.config, "QUESTION_BANK_ENABLED", True), \
+                    mock.patch.object(routes.config, "QUESTION_BANK_DIFFICULTIES", ["medium"]), \
+                    mock.patch.object(routes.config, "PREFETCH_MIN_HEADROOM", 0.0):
+                response = self.app.post('/study/syllabus/upload', data={
+                    "subject": "Biology", "syllabus_content": "Cells, genetics, evolution, ecology"
+                })
+                syllabus_id = response.get_json()["syllabus_id"]
+                self.wait_for_jobs()
+                with sqlite3.connect("database/database.db") as conn:
+                    self.assertEqual(conn.execute("SELECT COUNT(*) FROM question_bank").fetchone()[0], 20)
+
+                completions = self.server.get_stats()["completions"]
+                top_ups = routes.question_bank.get_stats()["top_ups"]
+                form = {"syllabus_id": syllabus_id, "difficulty": "medium", "num_questions": 5}
+                first = self.app.post('/study/quiz/generate', data=form).get_json()["quiz"]["questions"]
+                # The quiz page's stream route replays a bank hit as item and done events
+                events = self.app.post('/study/quiz/generate/stream', data=form).get_data(as_text=True)
+                self.assertNotIn("event: token", events)
+                self.assertEqual(events.count("event: item"), 5)
+                second = json.loads(events.split("event: done\ndata: ")[1])["quiz"]["questions"]
+                self.assertEqual([q["id"] for q in first], [1, 2, 3, 4, 5])
+                self.assertFalse({q["question"] for q in first} & {q["question"] for q in second})
+
+                # Ten of twenty questions seen: the thinner buckets are topped up in the background,
+                # which is the only Groq call
+                self.assertEqual(routes.question_bank.get_stats()["top_ups"], top_ups + 1)
+                self.wait_for_jobs()
+                self.assertEqual(self.server.get_stats()["completions"], completions + 1)
+                with sqlite3.connect("database/database.db") as conn:
+                    self.assertGreater(conn.execute("SELECT COUNT(*) FROM question_bank").fetchone()[0], 20)
+
+                # A topic missing from the bank falls back to the LLM, and its questions are banked
+                form["topics"] = "Photosynthesis"
+                completions = self.server.get_stats()["completions"]
+                quiz = self.app.post('/study/quiz/generate', data=form).get_json()["quiz"]
+                self.assertEqual({q["topic"] for q in quiz["questions"]}, {"Photosynthesis"})
+                self.assertEqual(self.server.get_stats()["completions"], completions + 1)
+                self.wait_for_jobs()
+                with sqlite3.connect("database/database.db") as conn:
+                    self.assertEqual(conn.execute(
+                        "SELECT COUNT(*) FROM question_bank_seen s JOIN question_bank b ON b.id = s.question_id "
+                        "WHERE b.topic = 'Photosynthesis'").fetchone()[0], 5)
+        finally:
+            routes.groq_client.base_url = base_url
+
+    def test_question_bank_fill_needs_headroom(self):
+        """No fill is queued while the rate limiter is short of budget"""
+        routes = self.routes
+        with mock.patch.object(routes.groq_client, "headroom", return_value=0.1):
+            skipped = routes.question_bank.get_stats()["skipped_fills"]
+            queued = routes.job_queue.get_stats()["jobs"]
+            self.assertFalse(routes._queue_question_bank_fill({"syllabus_id": 1, "difficulty": "easy"}))
+            self.assertEqual(routes._fill_question_bank({"syllabus_id": 1, "difficulty": "easy"}), {"skipped": True})
+            self.assertEqual(routes.question_bank.get_stats()["skipped_fills"], skipped + 2)
+            self.assertEqual(routes.job_queue.get_stats()["jobs"], queued)
+
+    def test_submit_quiz(self):
+        """Submitting a quiz scores it, stores its responses and upserts one progress row per topic"""
+        questions = [{"id": i, "question": f"Q{i}", "options": ["A", "B"], "correct_answer": "A",
+                      "explanation": "", "topic": "Cells" if i <= 3 else "Genetics"} for i in range(1, 6)]
+        with sqlite3.connect("database/database.db") as conn:
+            conn.execute("INSERT INTO quizzes (user_id, syllabus_id, questions) VALUES ('anonymous', 1, ?)",
+                         (json.dumps({"questions": questions}),))
+
+        answers = {"1": "A", "2": "A", "3": "A", "4": "A", "5": "B"}
+        body = self.app.post('/study/quiz/submit', json={"quiz_id": 1, "answers": answers}).get_json()
+        self.assertEqual((body["correct_count"], body["total_questions"]), (4, 5))
+        self.assertEqual([q["is_correct"] for q in body["questions_with_explanations"]],
+                         [True, True, True, True, False])
+
+        answers["3"] = "B"
+        self.app.post('/study/quiz/submit', json={"quiz_id": 1, "answers": answers})
+        with sqlite3.connect("database/database.db") as conn:
+            rows = conn.execute("SELECT topic, status, quiz_count, last_quiz_id FROM progress ORDER BY topic").fetchall()
+            self.assertEqual(rows, [("Cells", "needs_review", 2, 1), ("Genetics", "needs_review", 2, 1)])
+            self.assertEqual(conn.execute("SELECT score, total_questions FROM quizzes").fetchone(), (0.6, 5))
+            # The JSON-only quiz was normalized on first submission; resubmitting replaced its responses
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM quiz_questions").fetchone()[0], 5)
+            self.assertEqual(conn.execute("SELECT topic, SUM(correct) FROM quiz_responses GROUP BY topic").fetchall(),
+                             [("Cells", 2), ("Genetics", 1)])
+            conn.execute("UPDATE quizzes SET questions = '{}'")  # reads no longer need the archived JSON
+        self.assertEqual(self.app.get('/study/quiz/get?quiz_id=1').get_json()["quiz"]["questions"], questions)
+        self.assertEqual(self.app.post('/study/quiz/submit', json={"quiz_id": 2, "answers": {}}).status_code, 404)
+
+    def test_progress(self):
+        """The progress page reads the mastery maintained by quiz submissions"""
+        questions = [{"id": i, "question": f"Q{i}", "options": ["A", "B"], "correct_answer": "A",
+                      "explanation": "", "topic": "Cells" if i <= 2 else "Genetics"} for i in range(1, 5)]
+        with sqlite3.connect("database/database.db") as conn:
+            conn.execute("INSERT INTO syllabi (user_id, subject, content, parsed_topics) VALUES ('7', 'Biology', '', '{}')")
+            for _ in range(2):
+                conn.execute("INSERT INTO quizzes (user_id, syllabus_id, questions) VALUES ('7', 1, ?)",
+                             (json.dumps({"questions": questions}),))
+        self.assertEqual(self.app.get('/study/progress/get?syllabus_id=1').status_code, 401)
+
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 7
+        with mock.patch.object(self.routes.config, "TOPIC_MASTERY_ALPHA", 0.3):
+            self.app.post('/study/quiz/submit', json={"quiz_id": 1, "answers": {"1": "A", "2": "A", "3": "B", "4": "B"}})
+            self.app.post('/study/quiz/submit', json={"quiz_id": 2, "answers": {"1": "A", "2": "A", "3": "A", "4": "B"}})
+
+        # Genetics: 0% then 50%, so mastery moves 0.3 of the way to 50%
+        body = self.app.get('/study/progress/get?syllabus_id=1').get_json()
+        self.assertEqual(body["topic_mastery"], {"Cells": 100.0, "Genetics": 15.0})
+        self.assertEqual((body["quizzes_completed"], body["topics_mastered"], body["weak_topics"]),
+                         (2, "1/2", ["Genetics"]))
+        self.assertEqual([(quiz["id"], quiz["percentage"]) for quiz in body["quiz_history"]], [(2, 75.0), (1, 50.0)])
+
+        # Both quizzes fall on today, so each topic's series is one point
+        self.assertEqual(body["chart_resolution"], "daily")
+        genetics = [point for point in body["chart_data"] if point["topic"] == "Genetics"]
+        self.assertEqual([(point["mastery"], point["score"], point["answered"]) for point in genetics], [(15.0, 25.0, 4)])
+        body = self.app.get('/study/progress/get?syllabus_id=1&days=all').get_json()
+        self.assertEqual((body["chart_resolution"], len(body["chart_data"])), ("weekly", 2))
+
+        # A manual update keeps the quiz counters of the topic's one progress row
+        for notes in ("Revise meiosis", "Revised"):
+            response = self.app.post('/study/progress/update', json={
+                "syllabus_id": 1, "topic": "Genetics", "status": "in_progress", "notes": notes
+            })
+            self.assertEqual(response.get_json(), {"success": True})
+        with sqlite3.connect("database/database.db") as conn:
+            self.assertEqual(conn.execute("SELECT status, notes, quiz_count FROM progress WHERE topic = 'Genetics'")
+                             .fetchall(), [("in_progress", "Revised", 2)])
+
+    def test_prefetch_after_upload(self):
+        """The default quiz and plan are prefetched after upload and served without another Groq call"""
+        routes = self.routes
+        base_url, routes.groq_client.base_url = routes.groq_client.base_url, self.server.url
+        try:
+            # Earlier tests spend the shared limiter's budget; prefetch regardless
+            with mock.patch.object(routes.config, "PREFETCH_ENABLED", True), \
+                    mock.patch.object(routes.prefetcher, "min_headroom", 0.0):
+                response = self.app.post('/study/syllabus/upload', data={
+                    "subject": "Biology", "syllabus_content": "Cells, genetics"
+                })
+                syllabus_id = response.get_json()["syllabus_id"]
+                self.wait_for_jobs()
+                completions = self.server.get_stats()["completions"]
+                hits = routes.prefetcher.get_stats()["hits"]
+
+                quiz = self.app.post('/study/quiz/generate', data={"syllabus_id": syllabus_id}).get_json()
+                self.assertEqual(len(quiz["quiz"]["questions"]), 5)
+                self.assertEqual(self.server.get_stats()["completions"], completions)
+                self.assertEqual(routes.prefetcher.get_stats()["hits"], hits + 1)
+
+                # The prefetch is used once; the next default quiz is generated
+                self.app.post('/study/quiz/generate', data={"syllabus_id": syllabus_id})
+                self.assertEqual(self.server.get_stats()["completions"], completions + 1)
+
+                # The plan page's background job uses the prefetched plan
+                accepted = self.app.post('/study/plan/generate', data={"syllabus_id": syllabus_id},
+                                         headers={"Prefer": "respond-async"})
+                self.assertEqual(accepted.status_code, 202)
+                self.wait_for_jobs()
+                job = self.app.get(accepted.get_json()["status_url"]).get_json()
+                self.assertEqual(job["status"], "succeeded")
+                self.assertTrue(job["result"]["plan"])
+                self.assertEqual(self.server.get_stats()["completions"], completions + 1)
+                self.assertEqual(routes.prefetcher.get_stats()["hits"], hits + 2)
+        finally:
+            routes.groq_client.base_url = base_url
+
+    def test_interview_pool(self):
+        """Interviews are banked per normalised role and later started without the LLM"""
+        from blueprints.career import routes as career_routes
+
+        base_url, career_routes.groq_client.base_url = career_routes.groq_client.base_url, self.server.url
+        try:
+            with mock.patch.object(career_routes.config, "INTERVIEW_POOL_ENABLED", True):
+                # A miss generates inline, pools the set and refills the thin pool in the background
+                first = self.app.post('/career/interview/start', data={
+                    "job_title": "Sr. Back-end Developer", "experience_level": "mid"
+                }).get_json()
+                self.assertEqual(len(first["questions"]), 5)
+                self.wait_for_jobs()
+                with sqlite3.connect("database/database.db") as conn:
+                    self.assertEqual(conn.execute(
+                        "SELECT COUNT(*) FROM interview_sets WHERE role_key = 'backend engineer' "
+                        "AND level = 'senior'").fetchone()[0], 5)
+
+                completions = self.server.get_stats()["completions"]
+                second = self.app.post('/career/interview/start', data={
+                    "job_title": "senior backend engineer", "experience_level": "senior"
+                }).get_json()
+                self.assertEqual(self.server.get_stats()["completions"], completions)
+                self.assertIn("backend engineer", second["questions"][0]["question"])
+                self.assertNotEqual(second["interview_id"], first["interview_id"])
+
+                self.assertEqual(career_routes.warm_interview_pool(10), 0)  # already full
+                self.assertFalse(career_routes.schedule_interview_pool_warm())  # off by default
+                with mock.patch.object(career_routes.config, "INTERVIEW_POOL_WARM_TOP", 10):
+                    self.assertTrue(career_routes.schedule_interview_pool_warm())
+                    self.wait_for_jobs()
+                    self.assertFalse(career_routes.schedule_interview_pool_warm())  # once for all workers
+                with sqlite3.connect("database/database.db") as conn:
+                    self.assertEqual(conn.execute("SELECT requests FROM interview_pool_stats").fetchone()[0], 2)
+        finally:
+            career_routes.groq_client.base_url = base_url
+
+    def test_interview_answers(self):
+        """Answers are upserted one row each, singly, in batches and concurrently"""
+        from blueprints.career import routes as career_routes
+
+        base_url, career_routes.groq_client.base_url = career_routes.groq_client.base_url, self.server.url
+        try:
+            interview = self.app.post('/career/interview/start', data={
+                "job_title": "Backend Engineer", "experience_level": "mid"
+            }).get_json()
+            interview_id = interview["interview_id"]
+            ids = [question["id"] for question in interview["questions"]]
+
+            response = self.app.post('/career/interview/answers', json={"interview_id": interview_id, "answers": [
+                {"question_id": ids[0], "answer": "First draft"}, {"question_id": ids[1], "answer": "Second"}
+            ]})
+            self.assertEqual(response.get_json(), {"success": True, "saved": 2})
+            self.app.post('/career/interview/answer', json={
+                "interview_id": interview_id, "question_id": ids[0], "answer": "Revised"
+            })
+
+            # Concurrent single submissions must not overwrite each other
+            threads = [threading.Thread(target=lambda question_id=question_id: self.app.application.test_client().post(
+                '/career/interview/answer',
+                json={"interview_id": interview_id, "question_id": question_id, "answer": f"Answer {question_id}"}
+            )) for question_id in ids[2:]]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(career_routes._load_answers(interview_id)[str(ids[0])], "Revised")
+            self.assertEqual(len(career_routes._load_answers(interview_id)), len(ids))
+
+            self.assertEqual(self.app.post('/career/interview/answers', json={
+                "interview_id": 999, "answers": [{"question_id": 1, "answer": "x"}]}).status_code, 404)
+            self.assertEqual(self.app.post('/career/interview/answers', json={
+                "interview_id": interview_id, "answers": [{"question_id": 1}]}).status_code, 400)
+
+            feedback = self.app.post('/career/interview/feedback',
+                                     data={"interview_id": interview_id}).get_json()["feedback"]
+            self.assertEqual(len(feedback["detailed_feedback"]), len(ids))
+        finally:
+            career_routes.groq_client.base_url = base_url
+
+    def test_incremental_interview_feedback(self):
+        """Answers are evaluated as they arrive and final feedback is one short summary call"""
+        from blueprints.career import routes as career_routes
+
+        base_url, career_routes.groq_client.base_url = career_routes.groq_client.base_url, self.server.url
+        try:
+            with mock.patch.object(career_routes.config, "INTERVIEW_EVAL_ENABLED", True):
+                interview = self.app.post('/career/interview/start', data={
+                    "job_title": "Backend Engineer", "experience_level": "mid"
+                }).get_json()
+                interview_id = interview["interview_id"]
+                for question in interview["questions"][:3]:
+                    response = self.app.post('/career/interview/answer', json={
+                        "interview_id": interview_id, "question_id": question["id"],
+                        "answer": f"My answer to question {question['id']}"
+                    })
+                    self.assertEqual(response.status_code, 200)
+                self.wait_for_jobs()
+                self.assertEqual(self.server.get_stats()["by_agent"]["evaluation"], 3)
+
+                completions = self.server.get_stats()["completions"]
+                client = career_routes.groq_client
+                with mock.patch.object(client, "generate_response", wraps=client.generate_response) as generate:
+                    feedback = self.app.post('/career/interview/feedback',
+                                             data={"interview_id": interview_id}).get_json()["feedback"]
+                self.assertEqual(self.server.get_stats()["completions"], completions + 1)
+                self.assertEqual(generate.call_args.kwargs["task"], "summary")
+                self.assertEqual(generate.call_args.kwargs["max_tokens"],
+                                 career_routes.config.INTERVIEW_SUMMARY_MAX_TOKENS)
+                with sqlite3.connect("database/database.db") as conn:
+                    scores = [row[0] for row in conn.execute(
+                        "SELECT score FROM interview_evaluations ORDER BY question_id")]
+                self.assertEqual([item["score"] for item in feedback["detailed_feedback"]], scores)
+                self.assertEqual(feedback["overall_score"], round(sum(scores) * 10 / 3))
+                self.assertTrue(feedback["overall_impression"])
+        finally:
+            career_routes.groq_client.base_url = base_url
+
+if __name__ == '__main__':
+    unittest.main()
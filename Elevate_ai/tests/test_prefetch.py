@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for speculative prefetch
+
+This module runs a Prefetcher on a JobQueue in a temporary SQLite file
+with a recording client, driving the queue by hand with run_once.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+# Add parent directory to path to import services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.job_queue import JobQueue
+from services.prefetch import Prefetcher
+
+
+class RecordingClient:
+    """Client double with a settable rate-limit headroom."""
+
+    def __init__(self):
+        self.prompts = []
+        self.budget = 1.0
+
+    def headroom(self):
+        return self.budget
+
+    def generate_response(self, prompt, task=None):
+        self.prompts.append((task, prompt))
+        return f"completion of {prompt}"
+
+
+class TestPrefetcher(unittest.TestCase):
+    """Test case for scheduling, budget checks and one-shot hand-off"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.queue = JobQueue(os.path.join(self.tmpdir.name, "jobs.db"), workers=0, retry_backoff=0.0)
+        self.client = RecordingClient()
+        self.prefetcher = Prefetcher(self.queue, self.client, min_headroom=0.5, wait_seconds=2)
+
+    def tearDown(self):
+        self.queue.stop()
+        self.tmpdir.cleanup()
+
+    def test_prefetched_completion_is_used_once(self):
+        """Test that a matching request takes the completion and the next one misses"""
+        self.prefetcher.schedule("quiz", "default quiz")
+        self.prefetcher.schedule("quiz", "default quiz")
+        self.assertTrue(self.queue.run_once())
+        self.assertFalse(self.queue.run_once())
+
+        self.assertIsNone(self.prefetcher.take("quiz", "other quiz"))
+        self.assertEqual(self.prefetcher.take("quiz", "default quiz"), "completion of default quiz")
+        self.assertIsNone(self.prefetcher.take("quiz", "default quiz"))
+        self.assertEqual(self.client.prompts, [("quiz", "default quiz")])
+
+        stats = self.prefetcher.get_stats()
+        self.assertEqual((stats["scheduled"], stats["hits"], stats["misses"]), (1, 1, 2))
+        self.assertEqual((stats["hit_rate"], stats["use_rate"]), (0.333, 1.0))
+
+    def test_budget(self):
+        """Test that prefetches are skipped when the rate limiter is short of budget"""
+        self.client.budget = 0.2
+        self.assertIsNone(self.prefetcher.schedule("plan", "default plan"))
+
+        self.client.budget = 1.0
+        job = self.prefetcher.schedule("plan", "default plan")
+        self.client.budget = 0.2  # saturated by the time a worker gets to it
+        self.queue.run_once()
+        self.assertEqual(self.queue.get(job["job_id"])["result"], {"skipped": True})
+        self.assertIsNone(self.prefetcher.take("plan", "default plan"))
+        self.assertEqual(self.client.prompts, [])
+        self.assertEqual(self.prefetcher.get_stats()["skipped"], 2)
+
+    def test_queued_prefetch_is_cancelled(self):
+        """Test that a request arriving before the prefetch starts cancels it"""
+        job = self.prefetcher.schedule("quiz", "default quiz")
+        self.assertIsNone(self.prefetcher.take("quiz", "default quiz"))
+        self.assertIsNone(self.queue.get(job["job_id"]))
+        self.assertFalse(self.queue.run_once())
+        self.assertEqual(self.prefetcher.get_stats()["cancelled"], 1)
+
+    def test_running_prefetch_is_joined(self):
+        """Test that a request arriving mid-prefetch waits for it instead of generating"""
+        started, release = threading.Event(), threading.Event()
+        generate = self.client.generate_response
+
+        def slow_generate(prompt, task=None):
+            started.set()
+            release.wait(2)
+            return generate(prompt, task)
+
+        self.client.generate_response = slow_generate
+        self.prefetcher.schedule("plan", "default plan")
+        worker = threading.Thread(target=self.queue.run_once)
+        worker.start()
+        self.assertTrue(started.wait(2))
+        threading.Timer(0.1, release.set).start()
+
+        self.assertEqual(self.prefetcher.take("plan", "default plan"), "completion of default plan")
+        worker.join()
+        self.assertEqual(self.prefetcher.get_stats()["joined"], 1)
+
+    def test_short_wait_leaves_running_prefetch(self):
+        """Test that a caller with a short wait gives up on a running prefetch, and a later one gets it"""
+        started, release = threading.Event(), threading.Event()
+        generate = self.client.generate_response
+
+        def slow_generate(prompt, task=None):
+            started.set()
+            release.wait(2)
+            return generate(prompt, task)
+
+        self.client.generate_response = slow_generate
+        self.prefetcher.schedule("plan", "default plan")
+        worker = threading.Thread(target=self.queue.run_once)
+        worker.start()
+        self.assertTrue(started.wait(2))
+
+        self.assertIsNone(self.prefetcher.take("plan", "default plan", wait_seconds=0.1))
+        release.set()
+        worker.join()
+        self.assertEqual(self.prefetcher.take("plan", "default plan"), "completion of default plan")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the quiz question bank
+
+This module fills a QuestionBank in an in-memory SQLite database and checks
+near-duplicate detection, unseen-question selection and top-up reporting.
+"""
+
+import os
+import sqlite3
+import sys
+import unittest
+
+# Add parent directory to path to import services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.question_bank import SCHEMA, QuestionBank, hamming_distance, simhash, topic_key
+
+
+def make_questions(topic, texts):
+    return [{"question": text, "options": ["A. a", "B. b", "C. c", "D. d"], "correct_answer": "A",
+             "topic": topic, "explanation": "because"} for text in texts]
+
+
+CELL_QUESTIONS = [
+    "Which organelle produces most of the cell's ATP?",
+    "What does the cell membrane regulate?",
+    "Where in the cell does protein synthesis take place?",
+    "How do plant cells differ from animal cells?",
+    "What is the role of the nucleus during mitosis?",
+]
+GENETICS_QUESTIONS = [
+    "What is the expected ratio of a monohybrid cross?",
+    "Which base pairs with adenine in DNA?",
+    "What is a recessive allele?",
+]
+
+
+class TestSimhash(unittest.TestCase):
+    """Test case for the near-duplicate fingerprint"""
+
+    def test_near_duplicates(self):
+        """Test that rewordings and renumbering land close and distinct questions far apart"""
+        base = simhash("What is the time complexity of binary search?")
+        self.assertEqual(hamming_distance(base, simhash("Question 3: What is the time complexity of binary search")), 0)
+        self.assertLessEqual(hamming_distance(base, simhash("What's the time complexity of a binary search?")), 10)
+        self.assertGreater(hamming_distance(base, simhash("Which sorting algorithm is stable?")), 10)
+        for a, b in zip(CELL_QUESTIONS, CELL_QUESTIONS[1:]):
+            self.assertGreater(hamming_distance(simhash(a), simhash(b)), 10)
+
+    def test_signed_range(self):
+        """Test that fingerprints fit SQLite's signed 64-bit INTEGER"""
+        for text in CELL_QUESTIONS + GENETICS_QUESTIONS + [""]:
+            self.assertTrue(-2 ** 63 <= simhash(text) < 2 ** 63)
+        self.assertEqual(topic_key("  Cell   Biology "), "cell biology")
+
+
+class TestQuestionBank(unittest.TestCase):
+    """Test case for banking, assembling and seen tracking"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        for statement in SCHEMA:
+            self.conn.execute(statement)
+        self.bank = QuestionBank(max_distance=10, min_unseen=2, max_per_bucket=100)
+        self.bank.add_questions(self.conn, 1, "Medium", make_questions("Cells", CELL_QUESTIONS))
+        self.bank.add_questions(self.conn, 1, "medium", make_questions("Genetics", GENETICS_QUESTIONS))
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_add_deduplicates(self):
+        """Test that near-duplicates map to the banked question instead of being stored"""
+        ids = self.bank.add_questions(self.conn, 1, "hard", make_questions("Cells", [
+            "Question 9: Which organelle produces most of the cell's ATP?",
+            "What does the Golgi apparatus do?",
+        ]))
+        first = self.conn.execute("SELECT id FROM question_bank ORDER BY id").fetchone()[0]
+        self.assertEqual(ids[0], first)
+        self.assertNotEqual(ids[1], first)
+
+        # Same text under another topic or syllabus is a different question
+        other = self.bank.add_questions(self.conn, 1, "medium", make_questions("Genetics", CELL_QUESTIONS[:1]))
+        self.assertNotEqual(other[0], first)
+        self.bank.add_questions(self.conn, 2, "medium", make_questions("Cells", CELL_QUESTIONS[:1]))
+
+        stats = self.bank.get_stats()
+        self.assertEqual((stats["added"], stats["duplicates"]), (11, 1))
+
+    def test_assemble_interleaves_and_excludes_seen(self):
+        """Test that quizzes mix topics and never repeat a question for a user"""
+        picked, thin = self.bank.assemble(self.conn, 1, "alice", ["Cells", " genetics "], "MEDIUM", 4)
+        self.assertEqual([q["topic"] for _, q in picked], ["Cells", "Genetics", "Cells", "Genetics"])
+        self.assertEqual(thin, {"genetics": 3})  # one unseen question left after this quiz
+        self.bank.mark_seen(self.conn, "alice", [bank_id for bank_id, _ in picked])
+        self.bank.mark_seen(self.conn, "alice", [picked[0][0]])
+
+        again, thin = self.bank.assemble(self.conn, 1, "alice", ["Cells", "Genetics"], "medium", 4)
+        self.assertFalse({bank_id for bank_id, _ in again} & {bank_id for bank_id, _ in picked})
+        self.assertEqual(len(again), 4)
+        # Genetics had one unseen question left, so the draw leans on Cells
+        self.assertEqual(sorted(q["topic"] for _, q in again), ["Cells", "Cells", "Cells", "Genetics"])
+        self.assertEqual(thin, {"Cells": 5, "Genetics": 3})
+
+        # Another user still sees the whole bank
+        fresh, _ = self.bank.assemble(self.conn, 1, "bob", ["Cells", "Genetics"], "medium", 8)
+        self.assertEqual(len(fresh), 8)
+
+    def test_short_bucket_is_a_miss(self):
+        """Test that an unfillable quiz reports a miss and the empty topic as thin"""
+        picked, thin = self.bank.assemble(self.conn, 1, "alice", ["Cells", "Evolution"], "medium", 8)
+        self.assertEqual(len(picked), 5)
+        self.assertEqual(thin, {"Cells": 5, "Evolution": 0})
+        self.assertEqual(self.bank.assemble(self.conn, 1, "alice", ["Cells"], "hard", 2), ([], {"Cells": 0}))
+        self.assertEqual(self.bank.get_stats()["misses"], 2)
+
+        capped = QuestionBank(min_unseen=10, max_per_bucket=5)
+        self.assertEqual(capped.assemble(self.conn, 1, "alice", ["Cells"], "medium", 1)[1], {})
+
+    def test_question_texts(self):
+        """Test that existing questions are listed newest first for the generator prompt"""
+        texts = self.bank.question_texts(self.conn, 1, ["Cells"], "medium", limit=2)
+        self.assertEqual(texts, CELL_QUESTIONS[:-3:-1])
+        self.assertEqual(self.bank.question_texts(self.conn, 1, [], "medium"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for normalized quiz questions and responses
+
+This module checks storing and scoring quiz questions, the SQL aggregates
+for weak topics, accuracy and history, and the batched backfill of quizzes
+stored only as JSON, on a temporary database file.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path to import services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.quiz_history import (backfill, backfill_batch, load_questions, mark_answers, pending_backfill,
+                                   quiz_history, save_questions, save_responses, topic_accuracy, weak_topics)
+from utils.migrations import migrate
+
+
+def make_questions(topics):
+    return [{"id": i, "question": f"Q{i}", "options": ["A. yes", "B. no"], "correct_answer": "A",
+             "topic": topic, "explanation": f"Because {i}"} for i, topic in enumerate(topics, 1)]
+
+
+class TestQuizHistory(unittest.TestCase):
+    """Test case for quiz questions, responses and their aggregates"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "app.db")
+        self.conn = sqlite3.connect(self.path)
+        migrate(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def add_quiz(self, questions, answers=None, user_id="u1"):
+        quiz_id = self.conn.execute(
+            "INSERT INTO quizzes (user_id, syllabus_id, questions, answers) VALUES (?, 1, ?, ?)",
+            (user_id, json.dumps({"questions": questions}), json.dumps(answers or {}))
+        ).lastrowid
+        return quiz_id
+
+    def submit(self, quiz_id, questions, answers, user_id="u1"):
+        save_questions(self.conn, quiz_id, questions)
+        save_responses(self.conn, quiz_id, user_id, 1, mark_answers(questions, answers))
+
+    def test_round_trip_and_marking(self):
+        """Test that stored questions load in their generated shape and answers are marked by ID"""
+        questions = make_questions(["Cells", "Genetics"])
+        quiz_id = self.add_quiz(questions)
+        save_questions(self.conn, quiz_id, questions)
+        self.assertEqual(load_questions(self.conn, quiz_id), questions)
+
+        marked = mark_answers(questions, {"1": "A", "2": "B"})
+        self.assertEqual([(no, answer, correct) for no, _, answer, correct in marked], [(1, "A", True), (2, "B", False)])
+        self.assertFalse(mark_answers(questions, {})[0][3])
+
+    def test_aggregates(self):
+        """Test weak topics over the recent quizzes, per-topic accuracy and history"""
+        questions = make_questions(["Cells", "Cells", "Genetics", "Ecology"])
+        for answers in [{"1": "A", "2": "A", "3": "B", "4": "A"}] * 5 + [{"1": "B", "2": "B", "3": "A", "4": "A"}]:
+            self.submit(self.add_quiz(questions), questions, answers)
+        # Someone else's responses never count
+        self.submit(self.add_quiz(questions, user_id="u2"), questions, {}, user_id="u2")
+
+        # Genetics is wrong in four of the last five quizzes, Cells only in the last one
+        self.assertEqual(weak_topics(self.conn, "u1", 1), ["Genetics"])
+        self.assertEqual(weak_topics(self.conn, "u1", 1, recent=1), ["Cells"])
+        accuracy = topic_accuracy(self.conn, "u1", 1)
+        self.assertEqual(accuracy["Genetics"], {"answered": 6, "correct": 1, "accuracy": 1 / 6})
+
+        history = quiz_history(self.conn, "u1", 1)
+        self.assertEqual([quiz["quiz_id"] for quiz in history], [6, 5, 4, 3, 2, 1])
+        self.assertEqual((history[0]["answered"], history[0]["correct"]), (4, 2))
+        self.assertEqual(sorted(history[0]["topics"]), ["Cells", "Ecology", "Genetics"])
+
+    def test_backfill(self):
+        """Test that JSON-only quizzes are normalized in batches, once, without replacing newer responses"""
+        questions = make_questions(["Cells", "Genetics"])
+        submitted = self.add_quiz(questions, {"1": "A", "2": "B"})
+        unsubmitted = self.add_quiz(questions)
+        self.conn.execute("INSERT INTO quizzes (user_id, syllabus_id, questions) VALUES ('u1', 1, 'not json')")
+        legacy = self.conn.execute(
+            "INSERT INTO quizzes (user_id, syllabus_id, questions, answers) VALUES ('u1', 1, ?, '[1]')",
+            (json.dumps([{"question": "Sample", "options": ["x", "y"], "correct": 1}]),)
+        ).lastrowid
+        self.conn.commit()
+        self.assertTrue(pending_backfill(self.conn))
+
+        # A submission landing between the backfill's read and write keeps its responses
+        save_responses(self.conn, submitted, "u1", 1, mark_answers(questions, {"1": "A", "2": "A"}))
+        self.assertEqual(backfill_batch(self.conn, 0, 2), (2, unsubmitted))
+        self.conn.commit()
+
+        self.assertEqual(backfill(lambda: sqlite3.connect(self.path), batch_size=2, pause=0), 2)
+        self.assertEqual(backfill(lambda: sqlite3.connect(self.path), batch_size=2, pause=0), 1)  # the broken one
+        self.assertEqual(load_questions(self.conn, unsubmitted), questions)
+        self.assertEqual(load_questions(self.conn, legacy)[0]["question"], "Sample")
+        self.assertEqual(quiz_history(self.conn, "u1", 1)[0]["correct"], 2)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM quiz_responses").fetchone()[0], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
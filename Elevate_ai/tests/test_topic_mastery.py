@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for per-topic mastery maintained on quiz submission
+
+This module checks the running counts and decayed accuracy folded in per
+quiz, the per-syllabus totals, and that a rebuild from quiz_responses gives
+the same rows, in an in-memory SQLite database.
+"""
+
+import os
+import sqlite3
+import sys
+import unittest
+from datetime import date, timedelta
+
+# Add parent directory to path to import services
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.quiz_history import mark_answers, save_responses
+from services.topic_mastery import load_mastery, progress_series, rebuild, record_quiz
+from utils.migrations import migrate
+
+QUESTIONS = [{"id": 1, "topic": "Cells", "correct_answer": "A"},
+             {"id": 2, "topic": "Cells", "correct_answer": "A"},
+             {"id": 3, "topic": "Genetics", "correct_answer": "A"}]
+
+
+class TestTopicMastery(unittest.TestCase):
+    """Test case for folding quizzes into topic mastery"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        migrate(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def submit(self, quiz_id, answers, user_id="u1", seen_at=None):
+        marked = mark_answers(QUESTIONS, answers)
+        save_responses(self.conn, quiz_id, user_id, 1, marked, answered_at=seen_at)
+        record_quiz(self.conn, user_id, 1, quiz_id, marked, alpha=0.5, seen_at=seen_at)
+
+    def test_running_counts_and_decay(self):
+        """Test that counts accumulate and mastery moves alpha of the way per quiz"""
+        self.submit(1, {"1": "A", "2": "B", "3": "A"})
+        self.submit(2, {"1": "A", "2": "A", "3": "B"})
+        self.submit(3, {"1": "B", "2": "B", "3": "B"}, user_id="u2")
+
+        totals, topics = load_mastery(self.conn, "u1", 1)
+        self.assertEqual((totals["quizzes"], totals["answered"], totals["correct"], totals["last_quiz_id"]),
+                         (2, 6, 4, 2))
+        cells, genetics = topics
+        self.assertEqual((cells["topic"], cells["answered"], cells["correct"], cells["quizzes"]), ("Cells", 4, 3, 2))
+        self.assertAlmostEqual(cells["mastery"], 0.5 + 0.5 * (1.0 - 0.5))
+        self.assertAlmostEqual(genetics["mastery"], 1.0 + 0.5 * (0.0 - 1.0))
+        self.assertEqual(load_mastery(self.conn, "u3", 1), (None, []))
+
+    def test_rebuild_matches_incremental(self):
+        """Test that rebuilding from the stored responses reproduces the maintained rows"""
+        for quiz_id, answers in enumerate([{"1": "A"}, {"2": "A", "3": "A"}, {}], 1):
+            self.submit(quiz_id, answers)
+        incremental = load_mastery(self.conn, "u1", 1)
+
+        daily = self.conn.execute("SELECT * FROM progress_daily ORDER BY topic").fetchall()
+
+        rebuild(self.conn, alpha=0.5)
+        rebuilt = load_mastery(self.conn, "u1", 1)
+        strip = lambda rows: [{k: v for k, v in row.items() if k != "last_seen"} for row in rows]
+        self.assertEqual(strip(rebuilt[1]), strip(incremental[1]))
+        self.assertEqual(rebuilt[0]["quizzes"], incremental[0]["quizzes"])
+        self.assertEqual(self.conn.execute("SELECT * FROM progress_daily ORDER BY topic").fetchall(), daily)
+
+    def test_rollups(self):
+        """Test that a day's quizzes roll up into one row per topic ending with that day's mastery"""
+        self.submit(1, {"1": "A", "2": "A", "3": "A"}, seen_at="2026-03-04 09:00:00")  # a Wednesday
+        self.submit(2, {"1": "B", "2": "B", "3": "A"}, seen_at="2026-03-04 18:00:00")
+        self.submit(3, {"1": "A", "2": "A", "3": "A"}, seen_at="2026-03-08 10:00:00")  # the Sunday after
+
+        rows = self.conn.execute("SELECT period, answered, correct, quizzes, mastery FROM progress_daily "
+                                 "WHERE topic = 'Cells' ORDER BY period").fetchall()
+        self.assertEqual(rows, [("2026-03-04", 4, 2, 2, 0.5), ("2026-03-08", 2, 2, 1, 0.75)])
+        self.assertEqual(self.conn.execute("SELECT period, answered, quizzes, mastery FROM progress_weekly "
+                                           "WHERE topic = 'Cells'").fetchall(), [("2026-03-02", 6, 3, 0.75)])
+
+    def test_series_is_downsampled(self):
+        """Test that any window gives at most the requested points per topic, summed per bucket"""
+        today = date(2026, 3, 31)
+        for quiz_id in range(1, 61):
+            day = today - timedelta(days=(quiz_id - 1) % 30)
+            self.submit(quiz_id, {"1": "A", "2": "B", "3": "A"}, seen_at=f"{day} 12:00:00")
+
+        resolution, series = progress_series(self.conn, "u1", 1, days=30, points=10, today=today)
+        self.assertEqual(resolution, "daily")
+        cells = [point for point in series if point["topic"] == "Cells"]
+        self.assertEqual(len(cells), 10)
+        # Three days per bucket, two quizzes per day, two Cells questions per quiz
+        self.assertEqual((cells[0]["answered"], cells[0]["correct"], cells[0]["score"]), (12, 6, 0.5))
+        self.assertEqual(cells[-1]["date"], "2026-03-31")
+        self.assertEqual(sum(point["answered"] for point in series), 60 * 3)
+
+        # A week of the window, and the whole history from the weekly rollups
+        self.assertEqual(len(progress_series(self.conn, "u1", 1, days=7, points=10, today=today)[1]), 2 * 7)
+        resolution, series = progress_series(self.conn, "u1", 1, days=None, points=3, today=today)
+        self.assertEqual(resolution, "weekly")
+        self.assertEqual(len(series), 2 * 3)
+        self.assertEqual(sum(point["answered"] for point in series), 60 * 3)
+        self.assertEqual(progress_series(self.conn, "u2", 1), ("weekly", []))
+
+
+if __name__ == '__main__':
+    unittest.main()
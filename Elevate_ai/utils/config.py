@@ -25,12 +25,147 @@ class Config:
     
     # Database configuration
     DATABASE_PATH = os.getenv('DATABASE_PATH', 'database/database.db')
+
+    # Pooled SQLite connections (WAL, synchronous=NORMAL); idle connections
+    # kept per process, busy timeout in seconds, mmap size in bytes
+    DB_POOL_ENABLED = os.getenv('DB_POOL_ENABLED', 'True').lower() == 'true'
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 8))
+    DB_BUSY_TIMEOUT = float(os.getenv('DB_BUSY_TIMEOUT', 5))
+    DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', 64 * 1024 * 1024))
+    DB_STATEMENT_CACHE = int(os.getenv('DB_STATEMENT_CACHE', 256))
     
     # Groq API configuration
     GROQ_API_KEY = os.getenv('GROQ_API_KEY')
     GROQ_API_BASE_URL = os.getenv('GROQ_API_BASE_URL', 'https://api.groq.com/openai/v1/chat/completions')
     GROQ_API_MODEL = os.getenv('GROQ_API_MODEL', 'llama2-70b-4096')
-    
+
+    # Groq HTTP transport configuration
+    GROQ_HTTP_POOL_CONNECTIONS = int(os.getenv('GROQ_HTTP_POOL_CONNECTIONS', 10))
+    GROQ_HTTP_POOL_MAXSIZE = int(os.getenv('GROQ_HTTP_POOL_MAXSIZE', 20))
+    GROQ_CONNECT_TIMEOUT = float(os.getenv('GROQ_CONNECT_TIMEOUT', 5))
+    GROQ_READ_TIMEOUT = float(os.getenv('GROQ_READ_TIMEOUT', 90))
+    GROQ_HTTP2 = os.getenv('GROQ_HTTP2', 'False').lower() == 'true'
+
+    # Groq response cache configuration (opt-in)
+    GROQ_CACHE_ENABLED = os.getenv('GROQ_CACHE_ENABLED', 'False').lower() == 'true'
+    GROQ_CACHE_TTL = int(os.getenv('GROQ_CACHE_TTL', 3600))
+    GROQ_CACHE_MEMORY_ENTRIES = int(os.getenv('GROQ_CACHE_MEMORY_ENTRIES', 256))
+    GROQ_CACHE_MAX_ENTRIES = int(os.getenv('GROQ_CACHE_MAX_ENTRIES', 5000))
+    GROQ_CACHE_PATH = os.getenv('GROQ_CACHE_PATH', 'database/llm_cache.db')
+
+    # Groq request coalescing (single-flight) configuration
+    GROQ_SINGLE_FLIGHT_ENABLED = os.getenv('GROQ_SINGLE_FLIGHT_ENABLED', 'True').lower() == 'true'
+    GROQ_SINGLE_FLIGHT_PATH = os.getenv('GROQ_SINGLE_FLIGHT_PATH', 'database/single_flight.db')
+    GROQ_SINGLE_FLIGHT_TIMEOUT = float(os.getenv('GROQ_SINGLE_FLIGHT_TIMEOUT', 120))
+    GROQ_SINGLE_FLIGHT_LEASE = float(os.getenv('GROQ_SINGLE_FLIGHT_LEASE', 120))
+
+    # Task-tiered model routing: "tier=model" pairs and "task=tier" pairs;
+    # tiers without a model use GROQ_API_MODEL
+    GROQ_MODEL_TIERS = os.getenv('GROQ_MODEL_TIERS', '')
+    GROQ_TASK_TIERS = os.getenv(
+        'GROQ_TASK_TIERS',
+        'syllabus=fast,quiz=fast,interview=fast,evaluation=fast,summary=fast,resume=large,feedback=large,plan=large'
+    )
+
+    # Hedged requests for latency-sensitive tasks (comma-separated; empty = off)
+    GROQ_HEDGE_TASKS = os.getenv('GROQ_HEDGE_TASKS', '')
+    GROQ_HEDGE_PERCENTILE = float(os.getenv('GROQ_HEDGE_PERCENTILE', 95))
+    GROQ_HEDGE_MIN_DELAY = float(os.getenv('GROQ_HEDGE_MIN_DELAY', 0.5))
+    GROQ_HEDGE_MIN_SAMPLES = int(os.getenv('GROQ_HEDGE_MIN_SAMPLES', 20))
+    GROQ_HEDGE_MAX_RATIO = float(os.getenv('GROQ_HEDGE_MAX_RATIO', 0.1))
+
+    # Groq rate limiting and retry configuration
+    GROQ_RATE_LIMIT_ENABLED = os.getenv('GROQ_RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    GROQ_REQUESTS_PER_MINUTE = float(os.getenv('GROQ_REQUESTS_PER_MINUTE', 30))
+    GROQ_TOKENS_PER_MINUTE = float(os.getenv('GROQ_TOKENS_PER_MINUTE', 60000))
+    GROQ_RATE_LIMIT_PATH = os.getenv('GROQ_RATE_LIMIT_PATH', 'database/rate_limit.db')
+    GROQ_MAX_RETRIES = int(os.getenv('GROQ_MAX_RETRIES', 4))
+    GROQ_BACKOFF_BASE = float(os.getenv('GROQ_BACKOFF_BASE', 0.5))
+    GROQ_BACKOFF_MAX = float(os.getenv('GROQ_BACKOFF_MAX', 20))
+    GROQ_CALL_DEADLINE = float(os.getenv('GROQ_CALL_DEADLINE', 120))
+
+    # Groq endpoint pool: GROQ_ENDPOINTS is a JSON list of
+    # {name, base_url, api_key, weight, requests_per_minute, tokens_per_minute};
+    # GROQ_API_KEYS is a comma-separated list of keys for GROQ_API_BASE_URL.
+    # Either one replaces GROQ_API_KEY; empty = single endpoint
+    GROQ_ENDPOINTS = os.getenv('GROQ_ENDPOINTS', '')
+    GROQ_API_KEYS = os.getenv('GROQ_API_KEYS', '')
+    GROQ_ENDPOINT_STRATEGY = os.getenv('GROQ_ENDPOINT_STRATEGY', 'least_outstanding')
+    GROQ_BREAKER_FAILURES = int(os.getenv('GROQ_BREAKER_FAILURES', 5))
+    GROQ_BREAKER_RESET = float(os.getenv('GROQ_BREAKER_RESET', 30))
+
+    # Async Groq client configuration (upstream connections per worker)
+    GROQ_ASYNC_MAX_CONNECTIONS = int(os.getenv('GROQ_ASYNC_MAX_CONNECTIONS', 200))
+
+    # Groq record/replay cassette ('' = off, 'record' or 'replay')
+    GROQ_CASSETTE_MODE = os.getenv('GROQ_CASSETTE_MODE', '').lower()
+    GROQ_CASSETTE_PATH = os.getenv('GROQ_CASSETTE_PATH', 'database/groq_cassette.jsonl.gz')
+    GROQ_CASSETTE_LATENCY_SCALE = float(os.getenv('GROQ_CASSETTE_LATENCY_SCALE', 1.0))
+
+    # Background job queue for long generations (JOB_WORKERS threads per
+    # process; 0 = only job_worker.py runs jobs)
+    JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', 'database/jobs.db')
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 0))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+    JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', 300))
+    JOB_RESULT_TTL = float(os.getenv('JOB_RESULT_TTL', 86400))
+
+    # Precomputed quiz question bank, filled in the background after a
+    # syllabus upload and topped up when a bucket runs low (background Groq
+    # calls, so off by default; fills are skipped below PREFETCH_MIN_HEADROOM)
+    QUESTION_BANK_ENABLED = os.getenv('QUESTION_BANK_ENABLED', 'False').lower() == 'true'
+    QUESTION_BANK_DIFFICULTIES = [d.strip().lower() for d in
+                                  os.getenv('QUESTION_BANK_DIFFICULTIES', 'easy,medium,hard').split(',') if d.strip()]
+    QUESTION_BANK_PER_TOPIC = int(os.getenv('QUESTION_BANK_PER_TOPIC', 5))
+    QUESTION_BANK_TOPICS_PER_CALL = int(os.getenv('QUESTION_BANK_TOPICS_PER_CALL', 3))
+    QUESTION_BANK_MIN_UNSEEN = int(os.getenv('QUESTION_BANK_MIN_UNSEEN', 3))
+    QUESTION_BANK_MAX_PER_BUCKET = int(os.getenv('QUESTION_BANK_MAX_PER_BUCKET', 100))
+    QUESTION_BANK_SIMHASH_DISTANCE = int(os.getenv('QUESTION_BANK_SIMHASH_DISTANCE', 10))
+
+    # Speculative prefetch of the default quiz and study plan after a
+    # syllabus upload (skipped below this fraction of rate-limit budget)
+    PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'False').lower() == 'true'
+    PREFETCH_MIN_HEADROOM = float(os.getenv('PREFETCH_MIN_HEADROOM', 0.5))
+    PREFETCH_WAIT_SECONDS = float(os.getenv('PREFETCH_WAIT_SECONDS', 30))
+    # Streaming routes show no output while they wait, so they wait less
+    PREFETCH_STREAM_WAIT_SECONDS = float(os.getenv('PREFETCH_STREAM_WAIT_SECONDS', 3))
+
+    # Pre-generated interview question sets per normalised (role, level);
+    # refilled below INTERVIEW_POOL_MIN_SETS live sets; a positive
+    # INTERVIEW_POOL_WARM_TOP queues one warm-up job of that many of the most
+    # requested pairs at startup, shared by all workers
+    INTERVIEW_POOL_ENABLED = os.getenv('INTERVIEW_POOL_ENABLED', 'True').lower() == 'true'
+    INTERVIEW_POOL_SETS = int(os.getenv('INTERVIEW_POOL_SETS', 5))
+    INTERVIEW_POOL_MIN_SETS = int(os.getenv('INTERVIEW_POOL_MIN_SETS', 2))
+    INTERVIEW_POOL_MAX_SERVES = int(os.getenv('INTERVIEW_POOL_MAX_SERVES', 50))
+    INTERVIEW_POOL_WARM_TOP = int(os.getenv('INTERVIEW_POOL_WARM_TOP', 0))
+
+    # Per-answer interview evaluation in background jobs (one call per saved
+    # answer, so off by default); final feedback waits up to
+    # INTERVIEW_EVAL_WAIT_SECONDS for pending evaluations, then summarises
+    # them in one call capped at INTERVIEW_SUMMARY_MAX_TOKENS
+    INTERVIEW_EVAL_ENABLED = os.getenv('INTERVIEW_EVAL_ENABLED', 'False').lower() == 'true'
+    INTERVIEW_EVAL_WAIT_SECONDS = float(os.getenv('INTERVIEW_EVAL_WAIT_SECONDS', 20))
+    INTERVIEW_EVAL_MAX_TOKENS = int(os.getenv('INTERVIEW_EVAL_MAX_TOKENS', 400))
+    INTERVIEW_SUMMARY_MAX_TOKENS = int(os.getenv('INTERVIEW_SUMMARY_MAX_TOKENS', 600))
+
+    # Quizzes stored before quiz_questions existed are normalized by a
+    # background job, QUIZ_BACKFILL_BATCH_SIZE quizzes per transaction with
+    # QUIZ_BACKFILL_PAUSE seconds between transactions
+    QUIZ_BACKFILL_BATCH_SIZE = int(os.getenv('QUIZ_BACKFILL_BATCH_SIZE', 200))
+    QUIZ_BACKFILL_PAUSE = float(os.getenv('QUIZ_BACKFILL_PAUSE', 0.05))
+
+    # Per-topic mastery is an exponentially decayed accuracy: each submitted
+    # quiz moves it TOPIC_MASTERY_ALPHA of the way to that quiz's accuracy.
+    # The progress page lists the PROGRESS_HISTORY_LIMIT most recent quizzes
+    TOPIC_MASTERY_ALPHA = float(os.getenv('TOPIC_MASTERY_ALPHA', 0.3))
+    PROGRESS_HISTORY_LIMIT = int(os.getenv('PROGRESS_HISTORY_LIMIT', 10))
+    # The progress chart has at most PROGRESS_CHART_POINTS points per topic
+    # for any window; windows up to PROGRESS_DAILY_MAX_DAYS long are drawn
+    # from the daily rollups, longer ones from the weekly rollups
+    PROGRESS_CHART_POINTS = int(os.getenv('PROGRESS_CHART_POINTS', 30))
+    PROGRESS_DAILY_MAX_DAYS = int(os.getenv('PROGRESS_DAILY_MAX_DAYS', 90))
+
     # File upload configuration
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
@@ -76,7 +211,7 @@ def validate_config():
     config = get_config()
     
     # Check required configuration
-    if not config.GROQ_API_KEY:
+    if not (config.GROQ_API_KEY or config.GROQ_ENDPOINTS or config.GROQ_API_KEYS):
         return False, "GROQ_API_KEY is not set. Please set it in the .env file."
     
     # Check database directory
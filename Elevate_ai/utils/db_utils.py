@@ -5,20 +5,201 @@
 Database utilities for Elevate.AI application
 
 This module provides utilities for database operations in the Elevate.AI application.
+All routes get their connections here, from a per-process pool of SQLite
+connections tuned on open: WAL journal so readers do not block the writer,
+synchronous=NORMAL, a busy timeout instead of immediate "database is locked"
+errors, memory-mapped reads and a larger prepared-statement cache.
 """
 
 import os
 import sqlite3
 import json
+import threading
 from contextlib import contextmanager
 
+from utils.config import get_config
+
+config = get_config()
+
 # Define database path
-DATABASE_PATH = os.path.join(os.getcwd(), 'database', 'database.db')
+DATABASE_PATH = os.path.join(os.getcwd(), config.DATABASE_PATH)
 
 # Ensure database directory exists
 os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
 
 
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection whose close() hands it back to its pool."""
+
+    _pool = None
+    _checked_out = False
+
+    def close(self):
+        if self._pool is None:
+            super().close()
+        elif self._checked_out:
+            self._pool.release(self)
+
+    def discard(self):
+        """Close the connection for good instead of pooling it."""
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Idle connections to one database file, reused across requests.
+
+    Connections are opened on demand, so the pool never blocks; at most
+    `size` idle connections are kept. A connection is rolled back and reset
+    when it comes back, so an uncommitted transaction is discarded exactly
+    as closing a plain connection would. Connections inherited from the
+    parent process after a fork (gunicorn --preload) are never handed out.
+    """
+
+    def __init__(self, path, size=8, busy_timeout=5.0, mmap_size=64 * 1024 * 1024, statement_cache=256):
+        self.path = path
+        self.size = size
+        self.busy_timeout = busy_timeout
+        self.mmap_size = mmap_size
+        self.statement_cache = statement_cache
+
+        self._lock = threading.Lock()
+        self._idle = []
+        self._pid = os.getpid()
+        self._inherited = []
+        self._stats = {"opened": 0, "reused": 0, "discarded": 0}
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False,
+                               cached_statements=self.statement_cache, factory=PooledConnection)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn._pool = self
+        return conn
+
+    def _check_fork(self):
+        # Called with the lock held
+        pid = os.getpid()
+        if pid != self._pid:
+            # Keep the parent's connections referenced but unused: closing
+            # them here could disturb the parent's locks on the file
+            self._inherited.extend(self._idle)
+            self._idle = []
+            self._pid = pid
+
+    def acquire(self):
+        """
+        Check out a connection.
+
+        Returns:
+            PooledConnection: Connection with sqlite3.Row rows; close() returns it
+        """
+        with self._lock:
+            self._check_fork()
+            conn = self._idle.pop() if self._idle else None
+            self._stats["reused" if conn is not None else "opened"] += 1
+        if conn is None:
+            conn = self._open()
+        conn.row_factory = sqlite3.Row
+        conn._checked_out = True
+        return conn
+
+    def release(self, conn):
+        """Return a checked-out connection to the pool."""
+        conn._checked_out = False
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.discard()
+            return
+        with self._lock:
+            self._check_fork()
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+            self._stats["discarded"] += 1
+        conn.discard()
+
+    def close_all(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.discard()
+
+    def get_stats(self):
+        """
+        Get pool counters.
+
+        Returns:
+            dict: Opened, reused and discarded counts and the idle pool size
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=None):
+    """
+    Get the process-wide pool for a database file.
+
+    Args:
+        path: Database file, DATABASE_PATH by default
+
+    Returns:
+        ConnectionPool: Shared pool instance
+    """
+    path = path or DATABASE_PATH
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(path)
+            if pool is None:
+                pool = _pools[path] = ConnectionPool(
+                    path,
+                    size=config.DB_POOL_SIZE,
+                    busy_timeout=config.DB_BUSY_TIMEOUT,
+                    mmap_size=config.DB_MMAP_SIZE,
+                    statement_cache=config.DB_STATEMENT_CACHE,
+                )
+    return pool
+
+
+def close_pools():
+    """Close the idle connections of every pool."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
+
+
+def connect():
+    """
+    Open a connection to the application database.
+
+    The caller closes it when done; with DB_POOL_ENABLED that returns it to
+    the pool instead.
+
+    Returns:
+        sqlite3.Connection: Connection with sqlite3.Row rows
+    """
+    if not config.DB_POOL_ENABLED:
+        conn = sqlite3.connect(DATABASE_PATH)
+        conn.row_factory = sqlite3.Row
+        return conn
+    return get_pool().acquire()
+
+
 @contextmanager
 def get_db_connection():
     """
@@ -27,8 +208,7 @@ def get_db_connection():
     Yields:
         sqlite3.Connection: Database connection object
     """
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row  # This enables column access by name
+    conn = connect()
     try:
         yield conn
     finally:
@@ -92,6 +272,39 @@ def insert_db(table, data):
         return cur.lastrowid
 
 
+def bulk_upsert(conn, table, columns, rows, key, update=None):
+    """
+    Insert or update many rows with one prepared statement.
+
+    Runs INSERT ... ON CONFLICT (key) DO UPDATE through executemany on the
+    caller's connection, so the rows join the caller's transaction; the
+    caller commits. The conflict target must be a primary key or unique
+    index.
+
+    Args:
+        conn: Database connection
+        table: Table name
+        columns: Column names, in the order of each row's values
+        rows: Iterable of value tuples
+        key: Columns of the conflict target
+        update: Dictionary of column names and SQL expressions to set on
+            conflict; by default every non-key column takes the new value
+            (excluded.column)
+
+    Returns:
+        int: Number of rows inserted or updated
+    """
+    if update is None:
+        update = {column: f"excluded.{column}" for column in columns if column not in key}
+    query = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+        f"ON CONFLICT ({', '.join(key)}) "
+        + (f"DO UPDATE SET {', '.join(f'{column} = {expr}' for column, expr in update.items())}"
+           if update else "DO NOTHING")
+    )
+    return conn.executemany(query, rows).rowcount
+
+
 def update_db(table, data, condition):
     """
     Update data in a database table.
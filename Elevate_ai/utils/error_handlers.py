@@ -82,4 +82,24 @@ def api_error(message, status_code=400):
     return jsonify({
         'error': True,
         'message': message
-    }), status_code
\ No newline at end of file
+    }), status_code
+
+class AIResponseError(Exception):
+    """
+    Raised when an AI response cannot be turned into the expected JSON.
+    """
+
+    def __init__(self, message, raw_response=None, status_code=500):
+        super().__init__(message)
+        self.message = message
+        self.raw_response = raw_response
+        self.status_code = status_code
+
+    def to_dict(self):
+        """
+        Get the JSON error body for this error.
+
+        Returns:
+            dict: Error message and the raw AI response
+        """
+        return {"error": self.message, "raw_response": self.raw_response}
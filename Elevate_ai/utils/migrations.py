@@ -0,0 +1,474 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Versioned database schema for Elevate.AI application
+
+This module is the single definition of the application schema. The
+database records the version it is at in PRAGMA user_version, and
+migrate() applies every newer migration in one transaction, so all
+workers can call it at startup. Migration 1 replaces the two schemas
+that app.py and init_db.py used to create. It rebuilds tables made by
+either one to the unified columns and adds indexes for the per-user
+lookups.
+
+Each migration's SQL is kept here as it shipped rather than imported from
+the service that owns the tables, so changing a service's schema takes a
+new migration instead of silently changing an old one.
+"""
+
+from datetime import date, timedelta
+from itertools import groupby
+
+from utils.config import get_config
+from utils.logger import log_info
+
+# Column definitions of the core tables
+TABLES = {
+    "users": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT UNIQUE,
+        password TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    """,
+    "resumes": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        content TEXT NOT NULL,
+        job_description TEXT NOT NULL,
+        analysis TEXT,
+        match_score REAL,
+        strengths TEXT,
+        gaps TEXT,
+        suggestions TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    """,
+    "interviews": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        job_role TEXT NOT NULL,
+        questions TEXT NOT NULL,
+        answers TEXT,
+        feedback TEXT,
+        overall_score REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    """,
+    "interview_answers": """
+        interview_id INTEGER NOT NULL,
+        question_id TEXT NOT NULL,
+        answer TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (interview_id, question_id),
+        FOREIGN KEY (interview_id) REFERENCES interviews (id)
+    """,
+    "syllabi": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        content TEXT NOT NULL,
+        parsed_topics TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    """,
+    "quizzes": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        syllabus_id INTEGER NOT NULL,
+        topics TEXT,
+        questions TEXT NOT NULL,
+        answers TEXT,
+        score REAL,
+        total_questions INTEGER,
+        feedback TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (syllabus_id) REFERENCES syllabi (id)
+    """,
+    "study_plans": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        syllabus_id INTEGER NOT NULL,
+        plan_content TEXT NOT NULL,
+        start_date DATE,
+        end_date DATE,
+        duration_days INTEGER,
+        hours_per_day REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (syllabus_id) REFERENCES syllabi (id)
+    """,
+    "progress": """
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        syllabus_id INTEGER NOT NULL,
+        topic TEXT NOT NULL,
+        status TEXT,
+        notes TEXT,
+        mastery_level REAL DEFAULT 0,
+        quiz_count INTEGER DEFAULT 0,
+        study_hours REAL DEFAULT 0,
+        last_quiz_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (syllabus_id) REFERENCES syllabi (id),
+        FOREIGN KEY (last_quiz_id) REFERENCES quizzes (id)
+    """,
+}
+
+# Columns the old app.py schema named differently: (table, column) -> old name
+LEGACY_COLUMNS = {
+    ("interviews", "job_role"): "job_title",
+    ("resumes", "content"): "resume_text",
+    ("resumes", "analysis"): "analysis_result",
+    ("study_plans", "plan_content"): "plan_data",
+}
+
+# Unique keys beyond the primary key; older duplicates are dropped when a
+# table is rebuilt so the unique index can be created
+UNIQUE_KEYS = {
+    "progress": ("user_id", "syllabus_id", "topic"),
+}
+
+INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_progress_user_syllabus_topic ON progress (user_id, syllabus_id, topic)",
+    "CREATE INDEX IF NOT EXISTS idx_quizzes_user_syllabus_created ON quizzes (user_id, syllabus_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_study_plans_user_syllabus_created "
+    "ON study_plans (user_id, syllabus_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_syllabi_user_created ON syllabi (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_interviews_user_created ON interviews (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_resumes_user_created ON resumes (user_id, created_at)",
+]
+
+
+def create_table_sql(name, table=None):
+    """CREATE TABLE statement of a core table, optionally under another name."""
+    return f"CREATE TABLE IF NOT EXISTS {table or name} ({TABLES[name]})"
+
+
+def _columns(conn, table):
+    return [(row[1], row[2], row[3], row[4]) for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _rebuild_table(conn, name):
+    """Recreate a table with the unified columns, copying its rows across."""
+    old = {column for column, _, _, _ in _columns(conn, name)}
+    new_table = f"{name}__migrated"
+    conn.execute(f"DROP TABLE IF EXISTS {new_table}")
+    conn.execute(create_table_sql(name, new_table))
+
+    targets, sources = [], []
+    for column, type_, not_null, default in _columns(conn, new_table):
+        source = column if column in old else LEGACY_COLUMNS.get((name, column))
+        source = source if source in old else None
+        # Rows from the other schema may lack a value for a NOT NULL column
+        fallback = default if default is not None else ("0" if "INT" in type_ or "REAL" in type_ else "''")
+        if source is None and not (not_null and default is None):
+            continue
+        targets.append(column)
+        sources.append(f"COALESCE({source}, {fallback})" if not_null and source else source or fallback)
+
+    where = ""
+    if name in UNIQUE_KEYS and set(UNIQUE_KEYS[name]) <= old:
+        key = ", ".join(UNIQUE_KEYS[name])
+        where = f" WHERE rowid IN (SELECT MAX(rowid) FROM {name} GROUP BY {key})"
+    conn.execute(f"INSERT INTO {new_table} ({', '.join(targets)}) "
+                 f"SELECT {', '.join(sources)} FROM {name}{where} ORDER BY rowid")
+    conn.execute(f"DROP TABLE {name}")
+    conn.execute(f"ALTER TABLE {new_table} RENAME TO {name}")
+
+
+def _unify_schema(conn):
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for name in TABLES:
+        if name in existing:
+            _rebuild_table(conn, name)
+        else:
+            conn.execute(create_table_sql(name))
+    for statement in INDEXES:
+        conn.execute(statement)
+
+
+QUIZ_HISTORY_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS quiz_questions (
+        quiz_id INTEGER NOT NULL,
+        question_no INTEGER NOT NULL,
+        question_id TEXT NOT NULL,
+        topic TEXT NOT NULL DEFAULT '',
+        question TEXT NOT NULL,
+        options TEXT NOT NULL,
+        correct_answer TEXT,
+        explanation TEXT,
+        PRIMARY KEY (quiz_id, question_no),
+        FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS quiz_responses (
+        quiz_id INTEGER NOT NULL,
+        question_no INTEGER NOT NULL,
+        user_id TEXT NOT NULL,
+        syllabus_id INTEGER NOT NULL,
+        topic TEXT NOT NULL DEFAULT '',
+        answer TEXT,
+        correct INTEGER NOT NULL,
+        answered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (quiz_id, question_no),
+        FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_quiz_responses_user_syllabus_quiz "
+    "ON quiz_responses (user_id, syllabus_id, quiz_id, topic, correct)",
+]
+
+TOPIC_MASTERY_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS topic_mastery (
+        user_id TEXT NOT NULL,
+        syllabus_id INTEGER NOT NULL,
+        topic TEXT NOT NULL,
+        answered INTEGER NOT NULL,
+        correct INTEGER NOT NULL,
+        quizzes INTEGER NOT NULL,
+        mastery REAL NOT NULL,
+        last_quiz_id INTEGER,
+        last_seen TIMESTAMP NOT NULL,
+        PRIMARY KEY (user_id, syllabus_id, topic)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS mastery_totals (
+        user_id TEXT NOT NULL,
+        syllabus_id INTEGER NOT NULL,
+        quizzes INTEGER NOT NULL,
+        answered INTEGER NOT NULL,
+        correct INTEGER NOT NULL,
+        last_quiz_id INTEGER,
+        last_seen TIMESTAMP NOT NULL,
+        PRIMARY KEY (user_id, syllabus_id)
+    )
+    """,
+]
+
+PROGRESS_ROLLUP_TABLES = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+        user_id TEXT NOT NULL,
+        syllabus_id INTEGER NOT NULL,
+        period DATE NOT NULL,
+        topic TEXT NOT NULL,
+        answered INTEGER NOT NULL,
+        correct INTEGER NOT NULL,
+        quizzes INTEGER NOT NULL,
+        mastery REAL NOT NULL,
+        PRIMARY KEY (user_id, syllabus_id, period, topic)
+    )
+    """
+    for table in ("progress_daily", "progress_weekly")
+]
+
+
+_UPSERT_TOPIC_MASTERY = """
+    INSERT INTO topic_mastery (user_id, syllabus_id, topic, answered, correct, quizzes, mastery, last_quiz_id, last_seen)
+    VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?)
+    ON CONFLICT (user_id, syllabus_id, topic) DO UPDATE SET
+        answered = answered + excluded.answered,
+        correct = correct + excluded.correct,
+        quizzes = quizzes + 1,
+        mastery = mastery + ? * (excluded.mastery - mastery),
+        last_quiz_id = excluded.last_quiz_id,
+        last_seen = excluded.last_seen
+"""
+
+_UPSERT_ROLLUP = """
+    INSERT INTO {table} (user_id, syllabus_id, period, topic, answered, correct, quizzes, mastery)
+    SELECT user_id, syllabus_id, ?, topic, ?, ?, 1, mastery FROM topic_mastery
+    WHERE user_id = ? AND syllabus_id = ? AND topic = ?
+    ON CONFLICT (user_id, syllabus_id, period, topic) DO UPDATE SET
+        answered = answered + excluded.answered,
+        correct = correct + excluded.correct,
+        quizzes = quizzes + 1,
+        mastery = excluded.mastery
+"""
+
+
+def _progress_rollups(conn):
+    for statement in PROGRESS_ROLLUP_TABLES:
+        conn.execute(statement)
+
+    # Refill topic_mastery, mastery_totals and the rollups from
+    # quiz_responses, replaying one quiz at a time, oldest first, so each
+    # period ends with the mastery it had then
+    alpha = float(get_config().TOPIC_MASTERY_ALPHA)
+    for table in ("topic_mastery", "mastery_totals", "progress_daily", "progress_weekly"):
+        conn.execute(f"DELETE FROM {table}")
+    rows = conn.execute(
+        "SELECT user_id, syllabus_id, quiz_id, topic, COUNT(*), SUM(correct), "
+        "COALESCE(MAX(answered_at), CURRENT_TIMESTAMP) "
+        "FROM quiz_responses GROUP BY user_id, syllabus_id, quiz_id, topic ORDER BY quiz_id"
+    ).fetchall()
+    for quiz_id, quiz_rows in groupby(rows, key=lambda row: row[2]):
+        quiz_rows = list(quiz_rows)
+        user_id, syllabus_id = quiz_rows[0][:2]
+        seen_at = max(row[6] for row in quiz_rows)
+        conn.executemany(_UPSERT_TOPIC_MASTERY, [
+            (user_id, syllabus_id, topic, answered, correct, correct / answered, quiz_id, seen_at, alpha)
+            for _, _, _, topic, answered, correct, _ in quiz_rows
+        ])
+        day = date.fromisoformat(seen_at[:10])
+        for table, period in (("progress_daily", day), ("progress_weekly", day - timedelta(days=day.weekday()))):
+            conn.executemany(_UPSERT_ROLLUP.format(table=table), [
+                (period.isoformat(), answered, correct, user_id, syllabus_id, topic)
+                for _, _, _, topic, answered, correct, _ in quiz_rows
+            ])
+    conn.execute(
+        "INSERT INTO mastery_totals (user_id, syllabus_id, quizzes, answered, correct, last_quiz_id, last_seen) "
+        "SELECT user_id, syllabus_id, COUNT(DISTINCT quiz_id), COUNT(*), SUM(correct), MAX(quiz_id), "
+        "COALESCE(MAX(answered_at), CURRENT_TIMESTAMP) "
+        "FROM quiz_responses GROUP BY user_id, syllabus_id"
+    )
+
+
+QUESTION_BANK_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS question_bank (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        syllabus_id INTEGER NOT NULL,
+        topic TEXT NOT NULL,
+        topic_key TEXT NOT NULL,
+        difficulty TEXT NOT NULL,
+        question TEXT NOT NULL,
+        simhash INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (syllabus_id) REFERENCES syllabi (id)
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_question_bank_bucket
+    ON question_bank (syllabus_id, topic_key, difficulty)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS question_bank_seen (
+        user_id TEXT NOT NULL,
+        question_id INTEGER NOT NULL,
+        seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, question_id),
+        FOREIGN KEY (question_id) REFERENCES question_bank (id)
+    )
+    """,
+]
+
+INTERVIEW_POOL_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS interview_sets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        role_key TEXT NOT NULL,
+        level TEXT NOT NULL,
+        questions TEXT NOT NULL,
+        served INTEGER NOT NULL DEFAULT 0,
+        last_served_at TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_interview_sets_pair
+    ON interview_sets (role_key, level, served)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS interview_sets_seen (
+        user_id TEXT NOT NULL,
+        set_id INTEGER NOT NULL,
+        seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, set_id),
+        FOREIGN KEY (set_id) REFERENCES interview_sets (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS interview_pool_stats (
+        role_key TEXT NOT NULL,
+        level TEXT NOT NULL,
+        requests INTEGER NOT NULL DEFAULT 0,
+        last_requested_at TIMESTAMP,
+        PRIMARY KEY (role_key, level)
+    )
+    """,
+]
+
+ANSWER_EVALUATION_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS interview_evaluations (
+        interview_id INTEGER NOT NULL,
+        question_id TEXT NOT NULL,
+        answer_hash TEXT NOT NULL,
+        score REAL NOT NULL,
+        feedback TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (interview_id, question_id),
+        FOREIGN KEY (interview_id) REFERENCES interviews (id)
+    )
+    """,
+]
+
+
+# (version, description, step); a step is a callable taking the connection
+# or a list of SQL statements. Append new migrations, never edit old ones.
+MIGRATIONS = [
+    (1, "unified schema with per-user lookup indexes", _unify_schema),
+    # Existing quizzes are normalized afterwards by quiz_history.backfill()
+    (2, "normalized quiz questions and responses", QUIZ_HISTORY_TABLES),
+    # Filled from the existing responses by the rebuild in migration 4
+    (3, "per-topic mastery maintained on quiz submission", TOPIC_MASTERY_TABLES),
+    (4, "daily and weekly progress rollups", _progress_rollups),
+    # Databases that ran migration 1 before these moved out of it already
+    # have the tables, so the statements are no-ops there
+    (5, "quiz question bank", QUESTION_BANK_TABLES),
+    (6, "pre-generated interview question sets", INTERVIEW_POOL_TABLES),
+    (7, "per-answer interview evaluations", ANSWER_EVALUATION_TABLES),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    """Schema version recorded in the database."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """
+    Apply pending migrations in one immediate transaction.
+
+    Concurrent callers are serialised by the write lock; the version is
+    re-read under it, so each migration runs once.
+
+    Args:
+        conn: Database connection
+
+    Returns:
+        int: Schema version after migrating
+    """
+    if schema_version(conn) >= SCHEMA_VERSION:
+        return schema_version(conn)
+
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # explicit transaction control, DDL included
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = schema_version(conn)
+            for target, description, step in MIGRATIONS:
+                if target <= version:
+                    continue
+                log_info(f"Migrating database schema to version {target}: {description}")
+                if callable(step):
+                    step(conn)
+                else:
+                    for statement in step:
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {int(target)}")
+                version = target
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.isolation_level = isolation_level
+    return version
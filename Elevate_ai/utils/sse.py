@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Server-Sent Events utilities for Elevate.AI application
+
+This module provides helpers for streaming LLM output to the browser as
+Server-Sent Events.
+"""
+
+import json
+from flask import Response, stream_with_context
+from services.json_stream import JSONArrayStreamParser
+from utils.error_handlers import AIResponseError
+from utils.logger import log_error
+from utils.validators import validate_json_structure
+
+
+def format_sse(data, event=None):
+    """
+    Format one Server-Sent Event.
+
+    Args:
+        data: JSON-serialisable event payload
+        event: Optional event name
+
+    Returns:
+        str: Event frame terminated by a blank line
+    """
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+
+def _item_event(index, item, required_fields, parse_error=None):
+    """Format one array element as an `item` event, checked for required_fields."""
+    if parse_error is not None:
+        is_valid, error_message = False, parse_error
+    else:
+        is_valid, error_message = validate_json_structure(item, required_fields or [])
+    return format_sse({
+        "index": index,
+        "item": item,
+        "valid": is_valid,
+        "error": error_message
+    }, "item")
+
+
+def _event_stream(events):
+    return Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def sse_response(chunks, finalize, array_key=None, required_fields=None):
+    """
+    Stream completion text as `token` events, then a final `done` event.
+
+    When array_key is given, each element of that top-level array is also
+    sent as an `item` event as soon as it is complete, after being checked
+    for required_fields. An element that is not valid JSON is sent as an
+    invalid `item` event at its position.
+
+    Args:
+        chunks: Iterable of text chunks from GroqClient.stream_response
+        finalize: Callable that receives the full text once the stream ends,
+            parses and stores it, and returns the `done` payload
+        array_key: Optional name of the top-level array to emit item by item
+        required_fields: Optional list of fields every item must contain
+
+    Returns:
+        Response: text/event-stream response
+    """
+    def generate():
+        parts = []
+        parser = JSONArrayStreamParser(array_key) if array_key else None
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                yield format_sse({"text": chunk}, "token")
+
+                if parser is not None:
+                    # An element that is not valid JSON still takes its slot
+                    for index, item, error in parser.feed_slots(chunk):
+                        yield _item_event(index, item, required_fields, error)
+
+            yield format_sse(finalize("".join(parts)), "done")
+        except AIResponseError as e:
+            yield format_sse(e.to_dict(), "error")
+        except Exception as e:
+            log_error(f"Streaming response failed: {e}")
+            yield format_sse({"error": str(e)}, "error")
+
+    return _event_stream(generate())
+
+
+def sse_replay(payload, items, required_fields=None):
+    """
+    Send a result that needed no generation as `item` events and a `done` event.
+
+    The page renders it exactly like a streamed result, without the token
+    preview.
+
+    Args:
+        payload: The `done` payload
+        items: Elements of the result's array, in order
+        required_fields: Optional list of fields every item must contain
+
+    Returns:
+        Response: text/event-stream response
+    """
+    def generate():
+        for index, item in enumerate(items):
+            yield _item_event(index, item, required_fields)
+        yield format_sse(payload, "done")
+
+    return _event_stream(generate())